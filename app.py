@@ -5,14 +5,19 @@ import logging
 import streamlit as st
 
 from app_sections import (
+    HOMEPAGE_TTL,
     render_connection_overview,
     render_data_board,
     render_error_log,
     render_operations_panel,
+    render_query_diagnostics,
     render_table_overview,
+    run_homepage_loaders,
 )
 from config.settings import configure_logging
 from db.connection import query_db
+from utils.cache import cached_query
+from utils.ui import render_change_notice
 
 configure_logging()
 logger = logging.getLogger(__name__)
@@ -31,9 +36,13 @@ def _show_collection_feedback() -> None:
         st.toast(f"开奖采集失败：{feedback.get('error', '未知错误')}", icon="⚠️")
 
 
-def create_safe_query(status_messages: list[tuple[str, str]]):
+def create_safe_query(status_messages: list[tuple[str, str]], ttl: int | None = None):
+    """``ttl`` 非空时经 ``cached_query`` 缓存结果；失败只记录错误并返回空列表。"""
+
     def safe_query(sql: str, params: dict[str, object] | None = None):
         try:
+            if ttl is not None:
+                return cached_query(query_db, sql, params or {}, ttl=ttl)
             return query_db(sql, params or {})
         except Exception as exc:  # pragma: no cover - 依赖外部数据库
             logger.exception("数据库查询失败: %s", sql)
@@ -46,6 +55,7 @@ def create_safe_query(status_messages: list[tuple[str, str]]):
 def main() -> None:
     if "collection_feedback" in st.session_state:
         _show_collection_feedback()
+    render_change_notice()
 
     st.title("系统诊断 / 探活")
     st.caption("数据源：Docker MySQL 容器 `mysql:3306` (db: lotto_3d)")
@@ -53,9 +63,12 @@ def main() -> None:
     status_messages: list[tuple[str, str]] = []
     safe_query = create_safe_query(status_messages)
 
-    connection_info = render_connection_overview(safe_query)
-    render_data_board(safe_query)
-    render_table_overview(safe_query, connection_info.get("db_name"))
+    homepage = run_homepage_loaders(create_safe_query(status_messages, ttl=HOMEPAGE_TTL))
+
+    render_connection_overview(safe_query, homepage["server_info"])
+    render_data_board(homepage)
+    render_table_overview(homepage["tables"], homepage["server_info"].get("db_name"))
+    render_query_diagnostics(homepage)
     render_operations_panel(safe_query)
     render_error_log(status_messages)
 
@@ -1,17 +1,23 @@
 """Streamlit dashboard sections extracted from the legacy app.py."""
 
 from .dashboard import (
+                        HOMEPAGE_TTL,
                         render_connection_overview,
                         render_data_board,
                         render_error_log,
                         render_operations_panel,
+                        render_query_diagnostics,
                         render_table_overview,
+                        run_homepage_loaders,
 )
 
 __all__ = [
     "render_connection_overview",
     "render_data_board",
     "render_table_overview",
+    "render_query_diagnostics",
     "render_operations_panel",
     "render_error_log",
+    "run_homepage_loaders",
+    "HOMEPAGE_TTL",
 ]
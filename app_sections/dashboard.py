@@ -4,21 +4,43 @@ from __future__ import annotations
 
 import logging
 import platform
-from typing import Callable, Dict, List, Optional
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Mapping, Optional
 
 import pandas as pd
 import streamlit as st
 from streamlit import column_config
 
 from collector.lottery_results import collect_lottery_results
+from db.connection import query_metrics
+from utils.cache import cache_metrics
 
 logger = logging.getLogger(__name__)
 
 SafeQuery = Callable[[str, Optional[Dict[str, object]]], List[Dict[str, object]]]
 
+# 首页加载器结果的缓存时长（秒）；采集写入会通过变更日志提前失效
+HOMEPAGE_TTL = 300
+LOADER_WORKERS = 4
 
-def render_connection_overview(safe_query: SafeQuery) -> dict[str, str | None]:
-    """Show database connection status and basic metrics."""
+
+def load_server_info(safe_query: SafeQuery) -> dict[str, str | None]:
+    version_rows = safe_query("SELECT VERSION() AS version")
+    database_rows = safe_query("SELECT DATABASE() AS db")
+    return {
+        "version": version_rows[0].get("version") if version_rows else None,
+        "db_name": database_rows[0].get("db") if database_rows else None,
+    }
+
+
+def render_connection_overview(safe_query: SafeQuery, server_info: Mapping[str, Any]) -> None:
+    """Show database connection status and basic metrics.
+
+    ``SELECT 1`` 探活始终实时执行，不走缓存。
+    """
 
     connect_rows = safe_query("SELECT 1 AS ok")
     if connect_rows:
@@ -26,18 +48,10 @@ def render_connection_overview(safe_query: SafeQuery) -> dict[str, str | None]:
     else:
         st.warning("数据库连接不可用或未启动")
 
-    version_rows = safe_query("SELECT VERSION() AS version")
-    database_rows = safe_query("SELECT DATABASE() AS db")
-
-    db_version = version_rows[0].get("version") if version_rows else None
-    db_name = database_rows[0].get("db") if database_rows else None
-
     version_cols = st.columns(3)
     version_cols[0].metric("Python 版本", platform.python_version())
     version_cols[1].metric("Streamlit 版本", st.__version__)
-    version_cols[2].metric("数据库版本", db_version or "未知")
-
-    return {"db_name": db_name}
+    version_cols[2].metric("数据库版本", server_info.get("version") or "未知")
 
 
 def load_issue_summary(safe_query: SafeQuery) -> dict[str, str | int | None]:
@@ -177,11 +191,94 @@ def load_special_hits(safe_query: SafeQuery) -> pd.DataFrame:
     return pd.DataFrame(data)
 
 
-def render_data_board(safe_query: SafeQuery) -> None:
-    issue_summary = load_issue_summary(safe_query)
-    user_total = load_user_summary(safe_query)
-    top_hits_df = load_top_hits(safe_query)
-    special_hits_df = load_special_hits(safe_query)
+def load_table_overview(safe_query: SafeQuery) -> pd.DataFrame:
+    tables = safe_query(
+        """
+        SELECT table_name AS 表名称,
+               table_rows AS 行数量
+        FROM information_schema.tables
+        WHERE table_schema = DATABASE()
+        ORDER BY table_name
+        """
+    )
+    table_df = pd.DataFrame(tables)
+    if "行数量" in table_df.columns:
+        table_df["行数量"] = table_df["行数量"].fillna(0).astype(int)
+    return table_df
+
+
+HOMEPAGE_LOADERS: dict[str, Callable[[SafeQuery], Any]] = {
+    "server_info": load_server_info,
+    "issue_summary": load_issue_summary,
+    "user_total": load_user_summary,
+    "top_hits": load_top_hits,
+    "special_hits": load_special_hits,
+    "tables": load_table_overview,
+}
+
+
+@dataclass
+class LoaderTiming:
+    name: str
+    elapsed_ms: float
+
+
+@dataclass
+class HomepageData:
+    results: dict[str, Any]
+    timings: list[LoaderTiming] = field(default_factory=list)
+    wall_ms: float = 0.0
+
+    def __getitem__(self, name: str) -> Any:
+        return self.results[name]
+
+
+_loader_pool: ThreadPoolExecutor | None = None
+_loader_pool_lock = threading.Lock()
+
+
+def _get_loader_pool() -> ThreadPoolExecutor:
+    global _loader_pool
+    if _loader_pool is None:
+        with _loader_pool_lock:
+            if _loader_pool is None:
+                _loader_pool = ThreadPoolExecutor(
+                    max_workers=LOADER_WORKERS, thread_name_prefix="homepage-loader"
+                )
+    return _loader_pool
+
+
+def run_homepage_loaders(
+    safe_query: SafeQuery,
+    loaders: Mapping[str, Callable[[SafeQuery], Any]] = HOMEPAGE_LOADERS,
+) -> HomepageData:
+    """Run the homepage loaders concurrently on a shared small pool and time each one.
+
+    加载器只查询与整理数据，不调用 ``st.*``；``safe_query`` 需可在多线程中调用。
+    """
+
+    def timed(loader: Callable[[SafeQuery], Any]) -> tuple[Any, float]:
+        started = time.perf_counter()
+        value = loader(safe_query)
+        return value, (time.perf_counter() - started) * 1000
+
+    started = time.perf_counter()
+    pool = _get_loader_pool()
+    futures = {name: pool.submit(timed, loader) for name, loader in loaders.items()}
+    data = HomepageData(results={})
+    for name, future in futures.items():
+        value, elapsed_ms = future.result()
+        data.results[name] = value
+        data.timings.append(LoaderTiming(name, elapsed_ms))
+    data.wall_ms = (time.perf_counter() - started) * 1000
+    return data
+
+
+def render_data_board(data: HomepageData) -> None:
+    issue_summary = data["issue_summary"]
+    user_total = data["user_total"]
+    top_hits_df = data["top_hits"]
+    special_hits_df = data["special_hits"]
 
     overview_tab, hits_tab, special_tab = st.tabs(["开奖概览", "命中榜单", "上期开奖命中"])
 
@@ -255,26 +352,124 @@ def render_data_board(safe_query: SafeQuery) -> None:
             st.info("暂无命中记录。")
 
 
-def render_table_overview(safe_query: SafeQuery, db_name: str | None) -> None:
+def render_table_overview(table_df: pd.DataFrame, db_name: str | None) -> None:
     st.subheader(f"当前数据库：{db_name or '未知'}，表清单")
-    tables = safe_query(
-        """
-        SELECT table_name AS 表名称,
-               table_rows AS 行数量
-        FROM information_schema.tables
-        WHERE table_schema = DATABASE()
-        ORDER BY table_name
-        """
-    )
-    if tables:
-        table_df = pd.DataFrame(tables)
-        if "行数量" in table_df.columns:
-            table_df["行数量"] = table_df["行数量"].fillna(0).astype(int)
+    if not table_df.empty:
         st.dataframe(table_df, use_container_width=True, hide_index=True)
     else:
         st.info("无法获取表清单。")
 
 
+_LOADER_LABELS = {
+    "server_info": "数据库信息",
+    "issue_summary": "开奖概览",
+    "user_total": "专家总数",
+    "top_hits": "命中榜单",
+    "special_hits": "上期开奖命中",
+    "tables": "表清单",
+}
+
+
+def render_query_diagnostics(homepage: HomepageData | None = None) -> None:
+    """In-process query_db / cached_query metrics, grouped by statement and by page."""
+
+    st.subheader("查询诊断")
+    statements = query_metrics.statements()
+    sources = query_metrics.sources()
+    flights = cache_metrics()
+
+    total_calls = sum(item["calls"] for item in statements)
+    total_ms = sum(item["total_ms"] for item in statements)
+    cache_calls = sum(item["cache_calls"] for item in statements)
+    cache_misses = sum(item["cache_misses"] for item in statements)
+    metric_cols = st.columns(4)
+    metric_cols[0].metric("SQL 执行次数", total_calls)
+    metric_cols[1].metric("SQL 总耗时", f"{total_ms / 1000:.1f}s")
+    metric_cols[2].metric(
+        "缓存命中率", f"{1 - cache_misses / cache_calls:.0%}" if cache_calls else "-"
+    )
+    metric_cols[3].metric("合并的并发查询", flights["coalesced"])
+
+    since = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(query_metrics.started_at))
+    slow_log = query_metrics.slow_log
+    log_note = (
+        f"慢查询日志：{slow_log.path}" if slow_log else "未配置慢查询日志（LOTTO_SLOW_QUERY_LOG）"
+    )
+    st.caption(f"统计自 {since}（进程内）；慢查询阈值 {query_metrics.slow_ms:.0f}ms，{log_note}")
+
+    statement_tab, source_tab, loader_tab = st.tabs(["按语句", "按页面", "首页加载器"])
+    with statement_tab:
+        if statements:
+            statement_df = pd.DataFrame(statements)
+            statement_df["sources"] = statement_df["sources"].map(
+                lambda counts: "、".join(f"{name}×{count}" for name, count in counts.items())
+            )
+            st.dataframe(
+                statement_df.rename(
+                    columns={
+                        "fingerprint": "指纹",
+                        "statement": "语句",
+                        "calls": "执行次数",
+                        "errors": "失败",
+                        "total_ms": "总耗时(ms)",
+                        "avg_ms": "平均(ms)",
+                        "max_ms": "最大(ms)",
+                        "pool_wait_ms": "连接池等待(ms)",
+                        "rows": "行数",
+                        "bytes": "估算字节",
+                        "cache_calls": "缓存调用",
+                        "cache_misses": "缓存未命中",
+                        "sources": "来源",
+                    }
+                ),
+                hide_index=True,
+                use_container_width=True,
+            )
+        else:
+            st.info("尚无查询记录。")
+    with source_tab:
+        if sources:
+            st.dataframe(
+                pd.DataFrame(sources).rename(
+                    columns={
+                        "source": "来源",
+                        "calls": "执行次数",
+                        "total_ms": "总耗时(ms)",
+                        "rows": "行数",
+                        "bytes": "估算字节",
+                    }
+                ),
+                hide_index=True,
+                use_container_width=True,
+            )
+        else:
+            st.info("尚无查询记录。")
+
+    with loader_tab:
+        if homepage is not None and homepage.timings:
+            st.caption(
+                f"本次并发加载用时 {homepage.wall_ms:.0f}ms，"
+                f"各加载器合计 {sum(item.elapsed_ms for item in homepage.timings):.0f}ms；"
+                f"结果缓存 {HOMEPAGE_TTL}s。"
+            )
+            st.dataframe(
+                pd.DataFrame(
+                    {
+                        "加载器": [_LOADER_LABELS.get(t.name, t.name) for t in homepage.timings],
+                        "耗时(ms)": [round(t.elapsed_ms, 1) for t in homepage.timings],
+                    }
+                ),
+                hide_index=True,
+                use_container_width=True,
+            )
+        else:
+            st.info("本页未运行首页加载器。")
+
+    if st.button("重置查询统计", icon="🧹"):
+        query_metrics.reset()
+        st.rerun()
+
+
 def render_operations_panel(safe_query: SafeQuery) -> None:
     st.subheader("运维工具")
     if st.button("采集最近 5 期开奖信息", type="primary", icon="🎯", use_container_width=True):
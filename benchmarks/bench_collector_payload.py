@@ -0,0 +1,61 @@
+"""Micro-benchmark for collector payload construction.
+
+Usage::
+
+    python -m benchmarks.bench_collector_payload --number 20000
+"""
+
+from __future__ import annotations
+
+import argparse
+import binascii
+import json
+import timeit
+
+from collector import api
+
+
+def _legacy_build_payload(action_code: str, body: dict[str, object]) -> str:
+    """Previous implementation: full re-serialization and key decode per request."""
+    body_json = json.dumps(body, separators=(",", ":"), ensure_ascii=False)
+    wrapper = json.dumps(
+        {"body": body_json, "header": api._request_header(action_code)},
+        separators=(",", ":"),
+        ensure_ascii=False,
+    )
+    key = binascii.unhexlify(api.AES_KEY_HEX)
+    cipher = api.AES.new(key, api.AES.MODE_CBC, api.AES_IV)
+    encrypted = cipher.encrypt(api.pad(wrapper.encode("utf-8"), api.AES.block_size))
+    return api.base64.b64encode(encrypted).decode("utf-8")
+
+
+def _detail_body(user_id: int) -> dict[str, object]:
+    return {
+        "issueName": "2025101",
+        "lotteryId": "6",
+        "recomTenantCode": "recom",
+        "recomUserId": str(user_id),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="采集请求 payload 构造吞吐基准")
+    parser.add_argument("--number", type=int, default=20000, help="每轮构造次数")
+    parser.add_argument("--repeat", type=int, default=5, help="重复轮数，取最优值")
+    args = parser.parse_args()
+
+    body = _detail_body(18838011)
+    assert _legacy_build_payload("40016", body) == api._build_payload("40016", body)
+
+    for label, func in (("legacy", _legacy_build_payload), ("current", api._build_payload)):
+        best = min(
+            timeit.repeat(lambda f=func: f("40016", body), number=args.number, repeat=args.repeat)
+        )
+        print(
+            f"{label:>8}: {best / args.number * 1e6:8.2f} µs/payload  "
+            f"{args.number / best:10.0f} payload/s"
+        )
+
+
+if __name__ == "__main__":
+    main()
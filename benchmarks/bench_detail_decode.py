@@ -0,0 +1,99 @@
+"""Micro-benchmark for decoding 40016 detail responses into storage rows.
+
+Usage::
+
+    python -m benchmarks.bench_detail_decode --responses 'logs/detail_samples/*.json'
+
+Without ``--responses`` a synthetic response (labelled as such) is generated.
+"""
+
+from __future__ import annotations
+
+import argparse
+import glob
+import json
+import random
+import timeit
+from typing import Any
+
+from collector import api
+from collector.decode import expand_scheme
+
+
+def _synthetic_response(schemes: int, seed: int = 7) -> dict[str, Any]:
+    rng = random.Random(seed)
+    items: list[dict[str, Any]] = []
+    for index in range(schemes):
+        if index % 3 == 0:
+            items.append(
+                {
+                    "playtypeId": 3003,
+                    "playtypeName": "定位3*3*3",
+                    "dwNumberList": [rng.sample(range(10), 3) for _ in range(3)],
+                }
+            )
+        else:
+            items.append(
+                {
+                    "playtypeId": 1000 + index % 7,
+                    "playtypeName": "胆码",
+                    "numberList": rng.sample(range(10), rng.randint(1, 7)),
+                }
+            )
+    return {"code": 0, "data": {"issueName": "2025101", "schemeContentModelList": items}}
+
+
+def _legacy_decode(data: dict[str, Any]) -> list[Any]:
+    detail = api._parse_detail(data, 6, None)
+    rows: list[Any] = []
+    for scheme in detail.schemes:
+        rows.extend(expand_scheme(scheme.playtype_id, scheme.playtype_name, scheme.numbers))
+    return rows
+
+
+def _current_decode(data: dict[str, Any]) -> list[Any]:
+    return api._parse_detail_expanded(data, 6, None).schemes
+
+
+def _load_responses(pattern: str | None, schemes: int) -> tuple[str, list[dict[str, Any]]]:
+    if pattern:
+        paths = sorted(glob.glob(pattern))
+        if paths:
+            responses = []
+            for path in paths:
+                with open(path, encoding="utf-8") as handle:
+                    responses.append(json.load(handle))
+            return f"recorded ({len(paths)} files)", responses
+        print(f"未找到匹配 {pattern!r} 的响应文件，改用合成数据")
+    return f"synthetic ({schemes} schemes)", [_synthetic_response(schemes)]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="方案明细解码吞吐基准")
+    parser.add_argument("--responses", help="已录制的 40016 响应 JSON 文件 glob")
+    parser.add_argument("--schemes", type=int, default=200, help="合成响应中的方案条数")
+    parser.add_argument("--number", type=int, default=500, help="每轮解码次数")
+    parser.add_argument("--repeat", type=int, default=5, help="重复轮数，取最优值")
+    args = parser.parse_args()
+
+    label, responses = _load_responses(args.responses, args.schemes)
+    for data in responses:
+        legacy = [(r.playtype_id, r.numbers) for r in _legacy_decode(data)]
+        current = [(r.playtype_id, r.numbers) for r in _current_decode(data)]
+        assert legacy == current
+
+    print(f"input: {label}")
+    for name, func in (("legacy", _legacy_decode), ("current", _current_decode)):
+        best = min(
+            timeit.repeat(
+                lambda f=func: [f(data) for data in responses],
+                number=args.number,
+                repeat=args.repeat,
+            )
+        )
+        per_response = best / (args.number * len(responses))
+        print(f"{name:>8}: {per_response * 1e6:8.2f} µs/response")
+
+
+if __name__ == "__main__":
+    main()
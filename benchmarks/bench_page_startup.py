@@ -0,0 +1,169 @@
+"""Per-page cold-start profile: import time and first render.
+
+每个页面在独立的新进程里测量，模拟部署后第一次访问：
+
+* ``import``：用 ``python -X importtime`` 执行页面顶层的 import 语句，按直接导入的模块
+  汇总累计耗时（延迟导入的模块不会出现在这里）；
+* ``render``：用 ``streamlit.testing.v1.AppTest`` 完整跑一遍页面脚本，记录总耗时、
+  ``query_db`` 调用次数与耗时以及页面抛出的异常。需要可连通的数据库，``--no-render`` 跳过。
+
+Usage::
+
+    python -m benchmarks.bench_page_startup
+    python -m benchmarks.bench_page_startup --page UserExpertHitStat --top 8 --json
+"""
+
+from __future__ import annotations
+
+import argparse
+import ast
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+PAGE_DIR = PROJECT_ROOT / "pages"
+_MARKER = "--bench-page-startup--"
+
+_RENDER_SNIPPET = """
+import json, sys, time
+started = time.perf_counter()
+import db.connection as connection
+from streamlit.testing.v1 import AppTest
+
+calls = []
+original = connection.query_db
+
+def timed_query(sql, params=None):
+    begin = time.perf_counter()
+    try:
+        return original(sql, params)
+    finally:
+        calls.append(time.perf_counter() - begin)
+
+connection.query_db = timed_query
+setup = time.perf_counter() - started
+app = AppTest.from_file(sys.argv[1], default_timeout=float(sys.argv[2]))
+begin = time.perf_counter()
+app.run()
+print(json.dumps({
+    "setup_ms": setup * 1000,
+    "render_ms": (time.perf_counter() - begin) * 1000,
+    "query_count": len(calls),
+    "query_ms": sum(calls) * 1000,
+    "exceptions": [str(item.message) for item in app.exception],
+}))
+"""
+
+
+def page_imports(path: Path) -> list[str]:
+    """Top-level import statements of a page script, in source order."""
+    tree = ast.parse(path.read_text(encoding="utf-8"))
+    statements = []
+    for node in tree.body:
+        if isinstance(node, ast.Import) or (
+            isinstance(node, ast.ImportFrom) and node.level == 0 and node.module != "__future__"
+        ):
+            statements.append(ast.unparse(node))
+    return statements
+
+
+def parse_importtime(stderr: str) -> dict[str, float]:
+    """Cumulative milliseconds of each directly imported module after the marker line."""
+    lines = stderr.splitlines()
+    if _MARKER in lines:
+        lines = lines[lines.index(_MARKER) + 1 :]
+    result: dict[str, float] = {}
+    for line in lines:
+        if not line.startswith("import time:"):
+            continue
+        parts = line.split("|")
+        if len(parts) != 3 or not parts[1].strip().isdigit():
+            continue
+        name = parts[2]
+        if len(name) - len(name.lstrip()) > 1:
+            continue  # 嵌套导入已计入上层模块的累计耗时
+        result[name.strip()] = int(parts[1]) / 1000
+    return result
+
+
+def _env() -> dict[str, str]:
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(PROJECT_ROOT), env.get("PYTHONPATH")]))
+    return env
+
+
+def profile_imports(path: Path) -> dict[str, float]:
+    code = "\n".join([f"import sys; print({_MARKER!r}, file=sys.stderr)", *page_imports(path)])
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=PROJECT_ROOT,
+        env=_env(),
+        capture_output=True,
+        text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1])
+    return parse_importtime(proc.stderr)
+
+
+def profile_render(path: Path, timeout: float) -> dict[str, object]:
+    proc = subprocess.run(
+        [sys.executable, "-c", _RENDER_SNIPPET, str(path), str(timeout)],
+        cwd=PROJECT_ROOT,
+        env=_env(),
+        capture_output=True,
+        text=True,
+    )
+    if proc.returncode != 0:
+        return {"error": (proc.stderr.strip().splitlines() or ["unknown error"])[-1]}
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="页面冷启动剖析：导入耗时与首次渲染")
+    parser.add_argument("--page", action="append", help="只测指定页面（文件名，不含 .py）")
+    parser.add_argument("--top", type=int, default=5, help="每页列出最慢的导入数")
+    parser.add_argument("--timeout", type=float, default=60.0, help="单页渲染超时（秒）")
+    parser.add_argument("--no-render", action="store_true", help="只测导入，不跑页面")
+    parser.add_argument("--json", action="store_true", help="输出 JSON")
+    args = parser.parse_args()
+
+    pages = sorted(PAGE_DIR.glob("*.py"))
+    if args.page:
+        pages = [page for page in pages if page.stem in set(args.page)]
+
+    report = []
+    for page in pages:
+        imports = profile_imports(page)
+        entry: dict[str, object] = {
+            "page": page.stem,
+            "import_ms": round(sum(imports.values()), 1),
+            "imports": {
+                name: round(ms, 1)
+                for name, ms in sorted(imports.items(), key=lambda item: -item[1])[: args.top]
+            },
+        }
+        if not args.no_render:
+            entry["render"] = profile_render(page, args.timeout)
+        report.append(entry)
+        if not args.json:
+            slowest = ", ".join(f"{name} {ms:.0f}" for name, ms in entry["imports"].items())
+            print(f"{page.stem:<36} import {entry['import_ms']:8.1f} ms  [{slowest}]")
+            render = entry.get("render")
+            if render and "error" in render:
+                print(f"{'':<36} render failed: {render['error']}")
+            elif render:
+                print(
+                    f"{'':<36} render {render['render_ms']:8.1f} ms  "
+                    f"query {render['query_count']} × {render['query_ms']:.1f} ms  "
+                    f"exceptions {len(render['exceptions'])}"
+                )
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -7,7 +7,8 @@ import logging
 import random
 import time
 from dataclasses import dataclass
-from typing import Any, Sequence
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any, Sequence
 
 import requests
 from Crypto.Cipher import AES
@@ -22,6 +23,10 @@ from .constants import (
     TOKEN,
     USER_AGENT,
 )
+from .decode import ExpandedScheme, decode_schemes
+
+if TYPE_CHECKING:  # pragma: no cover - typing only
+    from .telemetry import RunMetrics
 
 logger = logging.getLogger(__name__)
 
@@ -58,9 +63,22 @@ class DetailResult:
     schemes: list[ExpertScheme]
 
 
+@dataclass(slots=True)
+class ExpandedDetailResult:
+    """明细结果的入库形态：``numbers`` 已是最终字符串，定位玩法已拆分。"""
+
+    issue_name: str
+    lottery_id: int
+    schemes: list[ExpandedScheme]
+
+
+_AES_KEY = binascii.unhexlify(AES_KEY_HEX)
+_JSON_SEPARATORS = (",", ":")
+
+
 def _aes_encrypt(plaintext: str) -> str:
-    key = binascii.unhexlify(AES_KEY_HEX)
-    cipher = AES.new(key, AES.MODE_CBC, AES_IV)
+    # CBC 模式的 cipher 对象带链式状态，不能跨请求复用；只缓存解码后的密钥。
+    cipher = AES.new(_AES_KEY, AES.MODE_CBC, AES_IV)
     padded = pad(plaintext.encode("utf-8"), AES.block_size)
     encrypted = cipher.encrypt(padded)
     return base64.b64encode(encrypted).decode("utf-8")
@@ -88,12 +106,19 @@ def _request_header(action_code: str) -> dict[str, Any]:
     }
 
 
-def _build_payload(action_code: str, body: dict[str, Any]) -> str:
-    body_json = json.dumps(body, separators=(",", ":"), ensure_ascii=False)
-    header = _request_header(action_code)
-    wrapper = json.dumps(
-        {"body": body_json, "header": header}, separators=(",", ":"), ensure_ascii=False
+@lru_cache(maxsize=16)
+def _header_suffix(action_code: str) -> str:
+    """Serialized ``,"header":{...}}`` tail of the wrapper for one action code."""
+    header_json = json.dumps(
+        _request_header(action_code), separators=_JSON_SEPARATORS, ensure_ascii=False
     )
+    return f',"header":{header_json}}}'
+
+
+def _build_payload(action_code: str, body: dict[str, Any]) -> str:
+    body_json = json.dumps(body, separators=_JSON_SEPARATORS, ensure_ascii=False)
+    # 与 json.dumps({"body": body_json, "header": header}) 逐字节一致，仅序列化可变部分。
+    wrapper = '{"body":' + json.dumps(body_json, ensure_ascii=False) + _header_suffix(action_code)
     return _aes_encrypt(wrapper)
 
 
@@ -101,11 +126,127 @@ def _headers() -> dict[str, str]:
     return {"User-Agent": USER_AGENT}
 
 
+def _jittered_delay(delay: float) -> float:
+    return delay * (0.8 + random.random() * 0.4)
+
+
+def _observe_response(
+    metrics: RunMetrics | None, domain: str, started: float, response: requests.Response
+) -> None:
+    if metrics is not None:
+        metrics.record_request(
+            domain, time.perf_counter() - started, size=len(response.content or b"")
+        )
+
+
+def _observe_failure(metrics: RunMetrics | None, domain: str, exc: BaseException) -> None:
+    if metrics is not None:
+        metrics.record_error(domain, exc)
+
+
+def _observe_attempt(metrics: RunMetrics | None, domain: str, is_retry: bool) -> None:
+    if metrics is not None and is_retry:
+        metrics.record_retry(domain)
+
+
+def _ensure_ok(response: requests.Response, domain: str) -> requests.Response:
+    if response.status_code != 200:
+        raise CollectorAPIError(f"HTTP {response.status_code} from {domain}")
+    return response
+
+
+def _leaderboard_body(
+    *, lottery_id: int, playtype_id: int, sort_type: int, limit: int, issue_count: int
+) -> dict[str, Any]:
+    return {
+        "issueCount": issue_count,
+        "limit": limit,
+        "lotteryId": str(lottery_id),
+        "playTypeId": int(playtype_id),
+        "sortType": int(sort_type),
+    }
+
+
+def _detail_body(*, lottery_id: int, user_id: int, issue_name: str | None) -> dict[str, Any]:
+    return {
+        "issueName": issue_name or "",
+        "lotteryId": str(lottery_id),
+        "recomTenantCode": "recom",
+        "recomUserId": str(user_id),
+    }
+
+
+def _parse_leaderboard(data: dict[str, Any], lottery_id: int) -> LeaderboardResult:
+    if data.get("code") != 0:
+        raise CollectorAPIError(f"排行榜接口返回异常: {data}")
+    data_section = data.get("data") or {}
+    issue_name = data_section.get("issueName") or ""
+    lottery = int(data_section.get("lotteryId", lottery_id))
+    rank_list: Sequence[dict[str, Any]] = data_section.get("rankList") or []
+    entries = [
+        LeaderboardEntry(
+            user_id=int(item.get("userId")),
+            nick_name=item.get("nickName") or "",
+            payload=item,
+        )
+        for item in rank_list
+        if item.get("userId") is not None
+    ]
+    return LeaderboardResult(issue_name=issue_name, lottery_id=lottery, entries=entries)
+
+
+def _detail_section(
+    data: dict[str, Any], lottery_id: int, issue_name: str | None
+) -> tuple[str, int, Sequence[dict[str, Any]]]:
+    if data.get("code") != 0:
+        raise CollectorAPIError(f"方案接口返回异常: {data}")
+    data_section = data.get("data") or {}
+    issue = data_section.get("issueName") or issue_name or ""
+    lottery = int(data_section.get("lotteryId", lottery_id))
+    raw_list: Sequence[dict[str, Any]] = data_section.get("schemeContentModelList") or []
+    return issue, lottery, raw_list
+
+
+def _parse_detail(data: dict[str, Any], lottery_id: int, issue_name: str | None) -> DetailResult:
+    issue, lottery, raw_list = _detail_section(data, lottery_id, issue_name)
+    schemes: list[ExpertScheme] = []
+    for item in raw_list:
+        playtype_id = int(item.get("playtypeId", 0))
+        playtype_name = item.get("playtypeName") or ""
+        numbers: Any
+        if item.get("dwNumberList"):
+            numbers = [tuple(int(num) for num in sublist) for sublist in item["dwNumberList"]]
+        elif item.get("numberList"):
+            numbers = [int(num) for num in item["numberList"]]
+        else:
+            numbers = item.get("numbers") or ""
+        schemes.append(
+            ExpertScheme(
+                playtype_id=playtype_id,
+                playtype_name=playtype_name,
+                numbers=numbers,
+            )
+        )
+    return DetailResult(issue_name=issue, lottery_id=lottery, schemes=schemes)
+
+
+def _parse_detail_expanded(
+    data: dict[str, Any], lottery_id: int, issue_name: str | None
+) -> ExpandedDetailResult:
+    issue, lottery, raw_list = _detail_section(data, lottery_id, issue_name)
+    return ExpandedDetailResult(
+        issue_name=issue, lottery_id=lottery, schemes=decode_schemes(raw_list)
+    )
+
+
 class _BaseClient:
     domains = (PRIMARY_DOMAIN, SECONDARY_DOMAIN)
 
-    def __init__(self, session: requests.Session | None = None) -> None:
+    def __init__(
+        self, session: requests.Session | None = None, *, metrics: RunMetrics | None = None
+    ) -> None:
         self._session = session or requests.Session()
+        self._metrics = metrics
 
     def _post_with_failover(
         self, payload: str, retries: int = 3, delay: float = 1.5
@@ -113,18 +254,18 @@ class _BaseClient:
         files = {"request": (None, payload)}
         headers = _headers()
         last_error: Exception | None = None
-        for domain in self.domains:
+        for domain_index, domain in enumerate(self.domains):
             url = f"https://{domain}{ENDPOINT_PATH}"
             for attempt in range(retries):
+                _observe_attempt(self._metrics, domain, bool(domain_index or attempt))
+                started = time.perf_counter()
                 try:
                     response = self._session.post(url, headers=headers, files=files, timeout=15)
-                    if response.status_code == 200:
-                        return response
-                    msg = f"HTTP {response.status_code} from {domain}"
-                    raise CollectorAPIError(msg)
+                    _observe_response(self._metrics, domain, started, response)
+                    return _ensure_ok(response, domain)
                 except Exception as exc:  # noqa: BLE001 - keep diagnostics simple
                     last_error = exc
-                    sleep_time = delay * (0.8 + random.random() * 0.4)
+                    _observe_failure(self._metrics, domain, exc)
                     logger.warning(
                         "Collector request failed (domain=%s, attempt=%s/%s): %s",
                         domain,
@@ -132,7 +273,7 @@ class _BaseClient:
                         retries,
                         exc,
                     )
-                    time.sleep(sleep_time)
+                    time.sleep(_jittered_delay(delay))
             # 当前 domain 重试完毕，换备用域名
         if last_error is None:
             last_error = CollectorAPIError("未知错误导致请求失败")
@@ -152,32 +293,15 @@ class LeaderboardClient(_BaseClient):
         limit: int,
         issue_count: int,
     ) -> LeaderboardResult:
-        body = {
-            "issueCount": issue_count,
-            "limit": limit,
-            "lotteryId": str(lottery_id),
-            "playTypeId": int(playtype_id),
-            "sortType": int(sort_type),
-        }
-        payload = _build_payload("40030", body)
-        response = self._post_with_failover(payload)
-        data = response.json()
-        if data.get("code") != 0:
-            raise CollectorAPIError(f"排行榜接口返回异常: {data}")
-        data_section = data.get("data") or {}
-        issue_name = data_section.get("issueName") or ""
-        lottery = int(data_section.get("lotteryId", lottery_id))
-        rank_list: Sequence[dict[str, Any]] = data_section.get("rankList") or []
-        entries = [
-            LeaderboardEntry(
-                user_id=int(item.get("userId")),
-                nick_name=item.get("nickName") or "",
-                payload=item,
-            )
-            for item in rank_list
-            if item.get("userId") is not None
-        ]
-        return LeaderboardResult(issue_name=issue_name, lottery_id=lottery, entries=entries)
+        body = _leaderboard_body(
+            lottery_id=lottery_id,
+            playtype_id=playtype_id,
+            sort_type=sort_type,
+            limit=limit,
+            issue_count=issue_count,
+        )
+        response = self._post_with_failover(_build_payload("40030", body))
+        return _parse_leaderboard(response.json(), lottery_id)
 
 
 class DetailClient(_BaseClient):
@@ -190,37 +314,18 @@ class DetailClient(_BaseClient):
         user_id: int,
         issue_name: str | None = None,
     ) -> DetailResult:
-        body = {
-            "issueName": issue_name or "",
-            "lotteryId": str(lottery_id),
-            "recomTenantCode": "recom",
-            "recomUserId": str(user_id),
-        }
-        payload = _build_payload("40016", body)
-        response = self._post_with_failover(payload)
-        data = response.json()
-        if data.get("code") != 0:
-            raise CollectorAPIError(f"方案接口返回异常: {data}")
-        data_section = data.get("data") or {}
-        issue = data_section.get("issueName") or issue_name or ""
-        lottery = int(data_section.get("lotteryId", lottery_id))
-        raw_list: Sequence[dict[str, Any]] = data_section.get("schemeContentModelList") or []
-        schemes: list[ExpertScheme] = []
-        for item in raw_list:
-            playtype_id = int(item.get("playtypeId", 0))
-            playtype_name = item.get("playtypeName") or ""
-            numbers: Any
-            if item.get("dwNumberList"):
-                numbers = [tuple(int(num) for num in sublist) for sublist in item["dwNumberList"]]
-            elif item.get("numberList"):
-                numbers = [int(num) for num in item["numberList"]]
-            else:
-                numbers = item.get("numbers") or ""
-            schemes.append(
-                ExpertScheme(
-                    playtype_id=playtype_id,
-                    playtype_name=playtype_name,
-                    numbers=numbers,
-                )
-            )
-        return DetailResult(issue_name=issue, lottery_id=lottery, schemes=schemes)
+        body = _detail_body(lottery_id=lottery_id, user_id=user_id, issue_name=issue_name)
+        response = self._post_with_failover(_build_payload("40016", body))
+        return _parse_detail(response.json(), lottery_id, issue_name)
+
+    def fetch_expanded(
+        self,
+        *,
+        lottery_id: int,
+        user_id: int,
+        issue_name: str | None = None,
+    ) -> ExpandedDetailResult:
+        """Like :meth:`fetch` but decode schemes straight into storage rows."""
+        body = _detail_body(lottery_id=lottery_id, user_id=user_id, issue_name=issue_name)
+        response = self._post_with_failover(_build_payload("40016", body))
+        return _parse_detail_expanded(response.json(), lottery_id, issue_name)
@@ -0,0 +1,170 @@
+"""asyncio 版本的采集客户端，接口与结果结构与 :mod:`collector.api` 保持一致。
+
+HTTP 请求仍由 ``requests`` 完成（项目未引入 aiohttp/httpx），通过
+``asyncio.to_thread`` 放入默认线程池执行；重试退避使用 ``asyncio.sleep``，
+并发度由 :class:`asyncio.Semaphore` 控制。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from typing import TYPE_CHECKING, Awaitable, Callable, Iterable, TypeVar
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from .api import (
+    CollectorAPIError,
+    DetailResult,
+    ExpandedDetailResult,
+    LeaderboardResult,
+    _build_payload,
+    _detail_body,
+    _ensure_ok,
+    _headers,
+    _jittered_delay,
+    _leaderboard_body,
+    _observe_attempt,
+    _observe_failure,
+    _observe_response,
+    _parse_detail,
+    _parse_detail_expanded,
+    _parse_leaderboard,
+)
+from .constants import ENDPOINT_PATH, PRIMARY_DOMAIN, SECONDARY_DOMAIN
+
+if TYPE_CHECKING:  # pragma: no cover - typing only
+    from .telemetry import RunMetrics
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CONCURRENCY = 8
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+def make_session(concurrency: int = DEFAULT_CONCURRENCY) -> requests.Session:
+    """Return a session whose connection pool can serve ``concurrency`` workers."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=2, pool_maxsize=max(concurrency, 1))
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+async def gather_limited(
+    items: Iterable[T],
+    worker: Callable[[T], Awaitable[R]],
+    *,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    semaphore: asyncio.Semaphore | None = None,
+) -> list[R | BaseException]:
+    """Run ``worker`` over ``items`` with at most ``concurrency`` in flight.
+
+    Results keep the input order; exceptions are returned in place instead of
+    cancelling the remaining tasks, mirroring the per-item ``try/except`` of the
+    synchronous collector loop.
+    """
+    limiter = semaphore or asyncio.Semaphore(max(concurrency, 1))
+
+    async def _run(item: T) -> R:
+        async with limiter:
+            return await worker(item)
+
+    return await asyncio.gather(*(_run(item) for item in items), return_exceptions=True)
+
+
+class _AsyncBaseClient:
+    domains = (PRIMARY_DOMAIN, SECONDARY_DOMAIN)
+
+    def __init__(
+        self, session: requests.Session | None = None, *, metrics: RunMetrics | None = None
+    ) -> None:
+        self._session = session or make_session()
+        self._metrics = metrics
+
+    async def _post_with_failover(
+        self, payload: str, retries: int = 3, delay: float = 1.5
+    ) -> requests.Response:
+        files = {"request": (None, payload)}
+        headers = _headers()
+        last_error: Exception | None = None
+        for domain_index, domain in enumerate(self.domains):
+            url = f"https://{domain}{ENDPOINT_PATH}"
+            for attempt in range(retries):
+                _observe_attempt(self._metrics, domain, bool(domain_index or attempt))
+                started = time.perf_counter()
+                try:
+                    response = await asyncio.to_thread(
+                        self._session.post, url, headers=headers, files=files, timeout=15
+                    )
+                    _observe_response(self._metrics, domain, started, response)
+                    return _ensure_ok(response, domain)
+                except Exception as exc:  # noqa: BLE001 - keep diagnostics simple
+                    last_error = exc
+                    _observe_failure(self._metrics, domain, exc)
+                    logger.warning(
+                        "Collector request failed (domain=%s, attempt=%s/%s): %s",
+                        domain,
+                        attempt + 1,
+                        retries,
+                        exc,
+                    )
+                    await asyncio.sleep(_jittered_delay(delay))
+            # 当前 domain 重试完毕，换备用域名
+        if last_error is None:
+            last_error = CollectorAPIError("未知错误导致请求失败")
+        logger.error("Collector API失败，所有域名尝试均告终", exc_info=last_error)
+        raise last_error
+
+
+class AsyncLeaderboardClient(_AsyncBaseClient):
+    """异步调用 40030 接口获取排行榜专家列表。"""
+
+    async def fetch(
+        self,
+        *,
+        lottery_id: int,
+        playtype_id: int,
+        sort_type: int,
+        limit: int,
+        issue_count: int,
+    ) -> LeaderboardResult:
+        body = _leaderboard_body(
+            lottery_id=lottery_id,
+            playtype_id=playtype_id,
+            sort_type=sort_type,
+            limit=limit,
+            issue_count=issue_count,
+        )
+        response = await self._post_with_failover(_build_payload("40030", body))
+        return _parse_leaderboard(response.json(), lottery_id)
+
+
+class AsyncDetailClient(_AsyncBaseClient):
+    """异步调用 40016 接口获取专家方案。"""
+
+    async def fetch(
+        self,
+        *,
+        lottery_id: int,
+        user_id: int,
+        issue_name: str | None = None,
+    ) -> DetailResult:
+        body = _detail_body(lottery_id=lottery_id, user_id=user_id, issue_name=issue_name)
+        response = await self._post_with_failover(_build_payload("40016", body))
+        return _parse_detail(response.json(), lottery_id, issue_name)
+
+    async def fetch_expanded(
+        self,
+        *,
+        lottery_id: int,
+        user_id: int,
+        issue_name: str | None = None,
+    ) -> ExpandedDetailResult:
+        body = _detail_body(lottery_id=lottery_id, user_id=user_id, issue_name=issue_name)
+        response = await self._post_with_failover(_build_payload("40016", body))
+        return _parse_detail_expanded(response.json(), lottery_id, issue_name)
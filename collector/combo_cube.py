@@ -0,0 +1,112 @@
+"""维护 combo_frequency 组合热度立方体（建表语句见 ``newsql/combo_frequency.sql``）。
+
+推荐采集写库后调用 :func:`refresh_combo_cube`：按期读取 expert_predictions，
+用 :func:`utils.combo_cube.aggregate_combos` 汇总为 (期号, 玩法, 规范组合) → 专家数，
+随后「按期删除 + 批量插入」并发布 ``combo_frequency`` 变更。``--rebuild`` 扫描全部期号。
+超长组合不入库，被截掉组合的 (期号, 玩法) 同步写入 ``combo_frequency_overflow``。
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+import time
+from typing import Iterable, Sequence
+
+import pandas as pd
+from sqlalchemy import text
+
+from config.settings import configure_logging
+from db.connection import get_engine
+from utils.change_feed import publish_change
+from utils.combo_cube import CUBE_COLUMNS, OVERFLOW_COLUMNS, aggregate_combos, split_overflow
+from utils.sql import make_in_clause
+
+logger = logging.getLogger(__name__)
+
+# 单期约数万条推荐，按少量期号分批读取
+REFRESH_BATCH_SIZE = 20
+
+
+def _refresh_batch(engine, issues: Sequence[str]) -> int:
+    clause, params = make_in_clause("issue_name", issues, "issue")
+    with engine.connect() as conn:
+        predictions = pd.DataFrame(
+            [
+                dict(row._mapping)
+                for row in conn.execute(
+                    text(
+                        f"""
+                        SELECT issue_name, playtype_id, user_id, numbers
+                        FROM expert_predictions
+                        WHERE {clause}
+                        """
+                    ),
+                    params,
+                )
+            ],
+            columns=["issue_name", "playtype_id", "user_id", "numbers"],
+        )
+    cube, overflow = split_overflow(aggregate_combos(predictions))
+    with engine.begin() as conn:
+        for table, columns, frame in (
+            ("combo_frequency", CUBE_COLUMNS, cube),
+            ("combo_frequency_overflow", OVERFLOW_COLUMNS, overflow),
+        ):
+            rows = frame.astype(object).to_dict("records")
+            names = ", ".join(columns)
+            values = ", ".join(f":{column}" for column in columns)
+            conn.execute(text(f"DELETE FROM {table} WHERE {clause}"), params)
+            if rows:
+                conn.execute(text(f"INSERT INTO {table} ({names}) VALUES ({values})"), rows)
+    return len(cube)
+
+
+def refresh_combo_cube(issues: Iterable[str], *, source: str = "combo_cube") -> int:
+    """Recompute cube rows for ``issues`` and publish a ``combo_frequency`` change.
+
+    立方体只是派生数据，失败时记录日志而不影响调用方的采集流程。
+    """
+    targets = sorted({str(issue) for issue in issues if issue})
+    if not targets:
+        return 0
+    started = time.perf_counter()
+    written = 0
+    try:
+        engine = get_engine()
+        for start in range(0, len(targets), REFRESH_BATCH_SIZE):
+            written += _refresh_batch(engine, targets[start : start + REFRESH_BATCH_SIZE])
+    except Exception:
+        logger.exception("组合热度立方体更新失败：%s", ",".join(targets[:5]))
+        return written
+    publish_change("combo_frequency", row_count=written, max_issue=targets[-1], source=source)
+    logger.info(
+        "组合热度立方体已更新：%s 期 %s 行，用时 %.2fs",
+        len(targets),
+        written,
+        time.perf_counter() - started,
+    )
+    return written
+
+
+def predicted_issues() -> list[str]:
+    with get_engine().connect() as conn:
+        rows = conn.execute(text("SELECT DISTINCT issue_name FROM expert_predictions"))
+        return sorted(str(row[0]) for row in rows if row[0])
+
+
+def main(argv: Sequence[str] | None = None) -> None:
+    configure_logging()
+    parser = argparse.ArgumentParser(description="维护 combo_frequency 组合热度立方体")
+    parser.add_argument("--issue", action="append", default=[], help="指定期号，可多次指定")
+    parser.add_argument("--rebuild", action="store_true", help="扫描全部期号重建立方体")
+    args = parser.parse_args(argv)
+
+    issues = predicted_issues() if args.rebuild else args.issue
+    if not issues:
+        parser.error("请指定 --issue 或 --rebuild")
+    refresh_combo_cube(issues)
+
+
+if __name__ == "__main__":
+    main()
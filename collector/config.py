@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
+from datetime import time, timedelta, timezone
 from typing import Sequence
 
 LOTTERY_ID = 6  # 福彩3D
@@ -8,6 +9,20 @@ DEFAULT_LIMIT = 1000
 DEFAULT_ISSUE_COUNT = 5
 DEFAULT_SORT_TYPES = (2, 4, 5)  # 红连、综合、黑连
 
+# 开奖日历：福彩3D 每天 21:15（北京时间）开奖，中国无夏令时，固定 UTC+8 即可
+DRAW_TZ = timezone(timedelta(hours=8), name="Asia/Shanghai")
+DRAW_TIME = time(21, 15)
+RESULT_WINDOW_BEFORE = timedelta(minutes=5)  # 开奖前提前进入轮询窗口
+RESULT_WINDOW_AFTER = timedelta(minutes=90)  # 开奖后最长轮询时长
+RESULT_POLL_MIN_SECONDS = 10.0
+RESULT_POLL_MAX_SECONDS = 120.0
+RESULT_POLL_BACKOFF = 1.5
+PREDICTION_INTERVAL = timedelta(hours=3)
+
+# 命中统计：avg_hit_gap 统计最近多少期开奖内的命中间隔
+HIT_GAP_WINDOW = 30
+HIT_STAT_CHUNK_SIZE = 50  # 全量重建时每个进程任务处理的期数
+
 
 @dataclass(frozen=True)
 class PlaytypeSpec:
@@ -0,0 +1,120 @@
+"""明细接口方案解码：把 ``schemeContentModelList`` 直接转换为入库字符串。
+
+:func:`decode_schemes` 一次遍历完成数字转字符串、定位玩法拆分与数字掩码计算，
+不再构造中间的 tuple 列表；:func:`expand_scheme` 保留给已解析的
+:class:`~collector.api.ExpertScheme` 使用，两条路径产出的 ``numbers`` 完全一致。
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any, Iterable, Sequence
+
+from utils.numbers import digit_mask
+
+
+@dataclass(slots=True)
+class ExpandedScheme:
+    playtype_id: int
+    playtype_name: str
+    numbers: str
+    digit_mask: int = 0
+
+
+_POS_SUFFIXES = ["百位", "十位", "个位"]
+_SPLIT_PLAYTYPES = {3003, 3004, 3005}
+
+
+def _coerce_numbers(numbers: object) -> str:
+    if numbers is None:
+        return ""
+    if isinstance(numbers, str):
+        return numbers
+    if isinstance(numbers, Sequence):
+        if numbers and isinstance(numbers[0], Sequence):
+            parts: list[str] = []
+            for group in numbers:  # type: ignore[arg-type]
+                parts.append(",".join(str(int(num)) for num in group if num is not None))
+            return "|".join(parts)
+        return ",".join(str(int(num)) for num in numbers if num is not None)
+    return str(numbers)
+
+
+def _split_children(
+    playtype_id: int, playtype_name: str, parts: Sequence[str], masks: Sequence[int]
+) -> list[ExpandedScheme]:
+    return [
+        ExpandedScheme(
+            playtype_id=int(f"{playtype_id}{idx}"),
+            playtype_name=f"{playtype_name}-{_POS_SUFFIXES[idx - 1]}",
+            numbers=part,
+            digit_mask=mask,
+        )
+        for idx, (part, mask) in enumerate(zip(parts, masks), start=1)
+    ]
+
+
+def expand_scheme(
+    playtype_id: int, playtype_name: str, numbers: object
+) -> Iterable[ExpandedScheme]:
+    number_string = _coerce_numbers(numbers)
+    if playtype_id in _SPLIT_PLAYTYPES and "|" in number_string:
+        parts = number_string.split("|")
+        if len(parts) == 3:
+            yield from _split_children(
+                playtype_id, playtype_name, parts, [digit_mask(part) for part in parts]
+            )
+            return
+    yield ExpandedScheme(
+        playtype_id=playtype_id,
+        playtype_name=playtype_name,
+        numbers=number_string,
+        digit_mask=digit_mask(number_string),
+    )
+
+
+def _join_ints(values: Iterable[Any]) -> tuple[str, int]:
+    texts: list[str] = []
+    mask = 0
+    for value in values:
+        if value is None:
+            continue
+        number = int(value)
+        texts.append(str(number))
+        if 0 <= number <= 9:
+            mask |= 1 << number
+        else:
+            mask |= digit_mask(str(number))
+    return ",".join(texts), mask
+
+
+def decode_schemes(raw_list: Iterable[dict[str, Any]]) -> list[ExpandedScheme]:
+    """Convert raw ``schemeContentModelList`` items into rows ready for storage."""
+    schemes: list[ExpandedScheme] = []
+    for item in raw_list:
+        playtype_id = int(item.get("playtypeId", 0))
+        playtype_name = item.get("playtypeName") or ""
+        dw_list = item.get("dwNumberList")
+        number_list = item.get("numberList")
+        if dw_list:
+            parts: list[str] = []
+            masks: list[int] = []
+            for sublist in dw_list:
+                text, mask = _join_ints(sublist)
+                parts.append(text)
+                masks.append(mask)
+            if playtype_id in _SPLIT_PLAYTYPES and len(parts) == 3:
+                schemes.extend(_split_children(playtype_id, playtype_name, parts, masks))
+                continue
+            combined_mask = 0
+            for mask in masks:
+                combined_mask |= mask
+            schemes.append(
+                ExpandedScheme(playtype_id, playtype_name, "|".join(parts), combined_mask)
+            )
+        elif number_list:
+            text, mask = _join_ints(number_list)
+            schemes.append(ExpandedScheme(playtype_id, playtype_name, text, mask))
+        else:
+            schemes.extend(expand_scheme(playtype_id, playtype_name, item.get("numbers") or ""))
+    return schemes
@@ -0,0 +1,398 @@
+"""专家命中统计计算：由 expert_predictions + lottery_results 生成 expert_hit_stat。
+
+每行对应 (issue_name, user_id, playtype_id)：
+
+- ``total_count``：该期该玩法的推荐条数；
+- ``hit_count``：按 :func:`utils.numbers.match_prediction_hit` 规则命中的条数；
+- ``hit_number_count``：推荐数字中出现在开奖号码里的数字个数（同 ``count_digit_hits``）；
+- ``avg_hit_gap``：最近 ``window`` 期开奖内相邻两次命中的平均间隔期数，不足两次命中为 NULL。
+
+命中判断按玩法规则在 NumPy 数组上批量计算；单期增量运行从已有 expert_hit_stat
+读取历史命中，全量重建按期号区间分块交给进程池，每块带上前置窗口自行计算历史。
+写入为「按期删除 + 批量插入」。
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable, Mapping, Sequence
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import text
+
+from config.settings import configure_logging
+from db.connection import get_engine
+from utils.change_feed import publish_change
+from utils.numbers import (
+    POPCOUNT_1024,
+    classify_hit_rule,
+    digit_mask,
+    evaluate_hit_rule,
+    open_code_arrays,
+)
+from utils.sql import make_in_clause
+
+from .config import HIT_GAP_WINDOW, HIT_STAT_CHUNK_SIZE
+from .decode import _POS_SUFFIXES
+from .issue_catalog import refresh_catalog
+
+logger = logging.getLogger(__name__)
+
+KEY_COLUMNS = ["issue_name", "user_id", "playtype_id"]
+STAT_COLUMNS = KEY_COLUMNS + ["total_count", "hit_count", "hit_number_count", "avg_hit_gap"]
+INSERT_BATCH_SIZE = 2000
+
+
+def resolve_playtype_name(playtype_id: int, names: Mapping[int, str]) -> str:
+    """Name for ``playtype_id``; split positional children fall back to ``父玩法-百位``."""
+    if playtype_id in names:
+        return names[playtype_id]
+    parent, suffix = divmod(playtype_id, 10)
+    if parent in names and 1 <= suffix <= len(_POS_SUFFIXES):
+        return f"{names[parent]}-{_POS_SUFFIXES[suffix - 1]}"
+    return ""
+
+
+def compute_issue_stats(
+    predictions: pd.DataFrame,
+    open_codes: Mapping[str, str],
+    playtype_names: Mapping[int, str],
+) -> pd.DataFrame:
+    """Aggregate hit counters per (issue, user, playtype); ``avg_hit_gap`` is left empty."""
+    columns = STAT_COLUMNS[:-1]
+    if predictions.empty:
+        return pd.DataFrame(columns=columns)
+
+    frame = predictions[predictions["issue_name"].isin(open_codes.keys())]
+    if frame.empty:
+        return pd.DataFrame(columns=columns)
+    frame = frame.reset_index(drop=True)
+
+    masks = np.fromiter(
+        (digit_mask(value) for value in frame["numbers"]), dtype=np.int16, count=len(frame)
+    )
+    issue_codes, issue_values = pd.factorize(frame["issue_name"])
+    issue_masks, issue_positions = open_code_arrays([open_codes[i] for i in issue_values])
+    open_masks = issue_masks[issue_codes]
+    open_positions = issue_positions[issue_codes]
+
+    hits = np.zeros(len(frame), dtype=bool)
+    playtype_ids = frame["playtype_id"].to_numpy(dtype=np.int64)
+    for playtype_id in np.unique(playtype_ids):
+        selector = playtype_ids == playtype_id
+        rule = classify_hit_rule(resolve_playtype_name(int(playtype_id), playtype_names))
+        hits[selector] = evaluate_hit_rule(
+            rule, masks[selector], open_masks[selector], open_positions[selector]
+        )
+
+    frame = frame[KEY_COLUMNS].assign(
+        total_count=1,
+        hit_count=hits.astype(np.int32),
+        hit_number_count=POPCOUNT_1024[masks & open_masks].astype(np.int32),
+    )
+    return frame.groupby(KEY_COLUMNS, as_index=False, sort=False)[
+        ["total_count", "hit_count", "hit_number_count"]
+    ].sum()
+
+
+def attach_hit_gaps(
+    stats: pd.DataFrame,
+    history: pd.DataFrame,
+    issue_order: Sequence[str],
+    window: int = HIT_GAP_WINDOW,
+) -> pd.DataFrame:
+    """Fill ``avg_hit_gap`` for ``stats`` using hits in ``stats`` + ``history``.
+
+    平均间隔 = (窗口内最后一次命中位置 - 第一次命中位置) / (命中次数 - 1)，
+    位置为期号在 ``issue_order``（按开奖顺序）中的下标。
+    """
+    result = stats.copy()
+    if result.empty:
+        result["avg_hit_gap"] = pd.Series(dtype=float)
+        return result
+
+    position = {issue: idx for idx, issue in enumerate(issue_order)}
+    span = len(issue_order) + 1
+    combined = pd.concat(
+        [history[KEY_COLUMNS + ["hit_count"]], result[KEY_COLUMNS + ["hit_count"]]],
+        ignore_index=True,
+    ).drop_duplicates(KEY_COLUMNS, keep="last")
+
+    pairs = pd.concat([combined[["user_id", "playtype_id"]], result[["user_id", "playtype_id"]]])
+    group_codes, _ = pd.factorize(
+        pd.MultiIndex.from_frame(pairs.astype({"user_id": np.int64, "playtype_id": np.int64}))
+    )
+    combined_groups = group_codes[: len(combined)]
+    target_groups = group_codes[len(combined) :]
+
+    combined_pos = combined["issue_name"].map(position).to_numpy(dtype=float)
+    hit_mask = (combined["hit_count"].to_numpy() > 0) & ~np.isnan(combined_pos)
+    hit_keys = np.sort(
+        combined_groups[hit_mask].astype(np.int64) * span + combined_pos[hit_mask].astype(np.int64)
+    )
+
+    target_pos = result["issue_name"].map(position).to_numpy(dtype=float)
+    known = ~np.isnan(target_pos)
+    target_pos = np.nan_to_num(target_pos, nan=0).astype(np.int64)
+    base = target_groups.astype(np.int64) * span
+    lo = np.searchsorted(hit_keys, base + np.maximum(target_pos - window + 1, 0), side="left")
+    hi = np.searchsorted(hit_keys, base + target_pos, side="right")
+    counts = hi - lo
+
+    gaps = np.full(len(result), np.nan)
+    enough = known & (counts >= 2)
+    if enough.any():
+        first = hit_keys[lo[enough]]
+        last = hit_keys[hi[enough] - 1]
+        gaps[enough] = (last - first) / (counts[enough] - 1)
+    result["avg_hit_gap"] = np.round(gaps, 4)
+    return result
+
+
+# ---------- 数据库读写 ----------
+
+
+def _fetch_frame(conn, sql: str, params: dict[str, object] | None = None) -> pd.DataFrame:
+    result = conn.execute(text(sql), params or {})
+    return pd.DataFrame(result.fetchall(), columns=list(result.keys()))
+
+
+def _load_issue_order(conn) -> list[str]:
+    frame = _fetch_frame(
+        conn,
+        "SELECT issue_name FROM lottery_results WHERE open_code IS NOT NULL AND open_code <> '' "
+        "GROUP BY issue_name ORDER BY issue_name",
+    )
+    return [str(value) for value in frame["issue_name"]] if not frame.empty else []
+
+
+def _load_open_codes(conn, issues: Sequence[str]) -> dict[str, str]:
+    clause, params = make_in_clause("issue_name", issues, "issue")
+    frame = _fetch_frame(
+        conn, f"SELECT issue_name, open_code FROM lottery_results WHERE {clause}", params
+    )
+    return {str(row.issue_name): str(row.open_code) for row in frame.itertuples() if row.open_code}
+
+
+def _load_playtype_names(conn) -> dict[int, str]:
+    frame = _fetch_frame(conn, "SELECT playtype_id, playtype_name FROM playtype_dict")
+    return {int(row.playtype_id): str(row.playtype_name) for row in frame.itertuples()}
+
+
+def _load_predictions(conn, issues: Sequence[str]) -> pd.DataFrame:
+    clause, params = make_in_clause("issue_name", issues, "issue")
+    frame = _fetch_frame(
+        conn,
+        f"""
+        SELECT issue_name, user_id, playtype_id, numbers
+        FROM expert_predictions
+        WHERE {clause} AND playtype_id IS NOT NULL
+        """,
+        params,
+    )
+    if frame.empty:
+        return pd.DataFrame(columns=["issue_name", "user_id", "playtype_id", "numbers"])
+    frame["issue_name"] = frame["issue_name"].astype(str)
+    return frame
+
+
+def _load_history(conn, issues: Sequence[str]) -> pd.DataFrame:
+    if not issues:
+        return pd.DataFrame(columns=KEY_COLUMNS + ["hit_count"])
+    clause, params = make_in_clause("issue_name", issues, "issue")
+    frame = _fetch_frame(
+        conn,
+        f"""
+        SELECT issue_name, user_id, playtype_id, hit_count
+        FROM expert_hit_stat
+        WHERE {clause} AND hit_count > 0
+        """,
+        params,
+    )
+    if frame.empty:
+        return pd.DataFrame(columns=KEY_COLUMNS + ["hit_count"])
+    frame["issue_name"] = frame["issue_name"].astype(str)
+    return frame
+
+
+def _write_stats(conn, issues: Sequence[str], stats: pd.DataFrame) -> int:
+    clause, params = make_in_clause("issue_name", issues, "issue")
+    conn.execute(text(f"DELETE FROM expert_hit_stat WHERE {clause}"), params)
+    if stats.empty:
+        return 0
+    frame = stats[STAT_COLUMNS].astype(object)
+    frame = frame.where(pd.notna(frame), None)
+    records = frame.to_dict("records")
+    insert_sql = text(
+        """
+        INSERT INTO expert_hit_stat (
+            issue_name, user_id, playtype_id, total_count, hit_count,
+            hit_number_count, avg_hit_gap
+        ) VALUES (:issue_name, :user_id, :playtype_id, :total_count, :hit_count,
+                  :hit_number_count, :avg_hit_gap)
+        """
+    )
+    for start in range(0, len(records), INSERT_BATCH_SIZE):
+        conn.execute(insert_sql, records[start : start + INSERT_BATCH_SIZE])
+    return len(records)
+
+
+def _preceding(issue_order: Sequence[str], issues: Iterable[str], window: int) -> list[str]:
+    """Issues in the ``window - 1`` draws before the earliest of ``issues``."""
+    position = {issue: idx for idx, issue in enumerate(issue_order)}
+    indexes = [position[issue] for issue in issues if issue in position]
+    if not indexes:
+        return []
+    first = min(indexes)
+    return list(issue_order[max(first - window + 1, 0) : first])
+
+
+def refresh_issues(issues: Sequence[str], *, window: int = HIT_GAP_WINDOW) -> int:
+    """Incrementally (re)compute the given issues; history comes from expert_hit_stat."""
+    started = time.perf_counter()
+    targets = sorted({str(issue) for issue in issues if issue})
+    if not targets:
+        return 0
+    engine = get_engine()
+    with engine.connect() as conn:
+        issue_order = _load_issue_order(conn)
+        open_codes = _load_open_codes(conn, targets)
+        playtype_names = _load_playtype_names(conn)
+        predictions = _load_predictions(conn, targets)
+        history = _load_history(conn, _preceding(issue_order, targets, window))
+
+    ready = [issue for issue in targets if issue in open_codes]
+    if not ready:
+        logger.warning("期号 %s 尚未开奖，跳过命中统计", ",".join(targets))
+        return 0
+    stats = compute_issue_stats(predictions, open_codes, playtype_names)
+    stats = attach_hit_gaps(stats, history, issue_order, window)
+    with engine.begin() as conn:
+        written = _write_stats(conn, ready, stats)
+    for issue in ready:
+        publish_change(
+            "expert_hit_stat",
+            issue_name=issue,
+            row_count=int((stats["issue_name"] == issue).sum()),
+            source="hit_stats",
+        )
+    refresh_catalog(ready, source="hit_stats")
+    logger.info(
+        "命中统计完成：期号 %s，写入 %s 行，用时 %.2fs",
+        ",".join(ready),
+        written,
+        time.perf_counter() - started,
+    )
+    return written
+
+
+def _init_worker() -> None:
+    # fork 出来的子进程不能复用父进程的连接
+    get_engine().dispose(close=False)
+
+
+def _rebuild_chunk(chunk: Sequence[str], lead_in: Sequence[str], window: int) -> int:
+    engine = get_engine()
+    scope = list(lead_in) + list(chunk)
+    with engine.connect() as conn:
+        issue_order = _load_issue_order(conn)
+        open_codes = _load_open_codes(conn, scope)
+        playtype_names = _load_playtype_names(conn)
+        predictions = _load_predictions(conn, scope)
+    stats = compute_issue_stats(predictions, open_codes, playtype_names)
+    chunk_set = set(chunk)
+    in_chunk = stats["issue_name"].isin(chunk_set)
+    target = attach_hit_gaps(stats[in_chunk], stats[~in_chunk], issue_order, window)
+    with engine.begin() as conn:
+        return _write_stats(conn, list(chunk), target)
+
+
+def rebuild(
+    start: str | None = None,
+    end: str | None = None,
+    *,
+    workers: int | None = None,
+    chunk_size: int = HIT_STAT_CHUNK_SIZE,
+    window: int = HIT_GAP_WINDOW,
+) -> int:
+    """Full rebuild over ``[start, end]``, one process-pool task per issue chunk."""
+    started = time.perf_counter()
+    with get_engine().connect() as conn:
+        issue_order = _load_issue_order(conn)
+    targets = [
+        issue
+        for issue in issue_order
+        if (start is None or issue >= start) and (end is None or issue <= end)
+    ]
+    if not targets:
+        logger.warning("没有可重建的开奖期号")
+        return 0
+
+    chunk_size = max(1, chunk_size)
+    chunks = [targets[i : i + chunk_size] for i in range(0, len(targets), chunk_size)]
+    lead_ins = [_preceding(issue_order, chunk, window) for chunk in chunks]
+    max_workers = max(1, min(workers or os.cpu_count() or 1, len(chunks)))
+    logger.info("命中统计全量重建：%s 期，%s 块，%s 进程", len(targets), len(chunks), max_workers)
+
+    written = 0
+    if max_workers == 1:
+        for chunk, lead_in in zip(chunks, lead_ins):
+            written += _rebuild_chunk(chunk, lead_in, window)
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker) as pool:
+            futures = [
+                pool.submit(_rebuild_chunk, chunk, lead_in, window)
+                for chunk, lead_in in zip(chunks, lead_ins)
+            ]
+            for done, future in enumerate(futures, start=1):
+                written += future.result()
+                logger.info("……已完成 %s/%s 块", done, len(futures))
+
+    publish_change("expert_hit_stat", row_count=written, max_issue=targets[-1], source="hit_stats")
+    refresh_catalog(targets, source="hit_stats")
+    logger.info(
+        "✅ 命中统计重建完成：写入 %s 行，用时 %.1fs", written, time.perf_counter() - started
+    )
+    return written
+
+
+def main(argv: Sequence[str] | None = None) -> None:
+    configure_logging()
+    parser = argparse.ArgumentParser(description="计算专家命中统计并写入 expert_hit_stat")
+    parser.add_argument("--issue", action="append", default=[], help="增量计算指定期号，可多次指定")
+    parser.add_argument("--rebuild", action="store_true", help="全量重建（可配合 --start/--end）")
+    parser.add_argument("--start", default=None, help="重建起始期号（含）")
+    parser.add_argument("--end", default=None, help="重建结束期号（含）")
+    parser.add_argument("--workers", type=int, default=None, help="重建进程数，默认 CPU 核数")
+    parser.add_argument(
+        "--chunk-size", type=int, default=HIT_STAT_CHUNK_SIZE, help="每个重建任务的期数"
+    )
+    parser.add_argument(
+        "--window", type=int, default=HIT_GAP_WINDOW, help="avg_hit_gap 统计窗口（期）"
+    )
+    args = parser.parse_args(argv)
+
+    if args.rebuild:
+        rebuild(
+            args.start,
+            args.end,
+            workers=args.workers,
+            chunk_size=args.chunk_size,
+            window=args.window,
+        )
+        return
+    issues = args.issue
+    if not issues:
+        with get_engine().connect() as conn:
+            order = _load_issue_order(conn)
+        issues = order[-1:]
+    refresh_issues(issues, window=args.window)
+
+
+if __name__ == "__main__":
+    main()
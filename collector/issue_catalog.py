@@ -0,0 +1,227 @@
+"""维护 issue_catalog 期号目录表（建表语句见 ``newsql/issue_catalog.sql``）。
+
+采集脚本写完 expert_predictions / lottery_results / expert_hit_stat 后调用
+:func:`refresh_catalog` 重算受影响期号的目录行：三条按期号过滤的分组查询，
+随后「按期删除 + 批量插入」并发布 ``issue_catalog`` 变更。``--rebuild`` 扫描全部期号。
+
+目录表为空（新部署）时，第一次刷新会先扫描全部期号完整建目录，否则页面只能看到
+这一次采集写入的期号。所有批次在同一事务内写入，失败时不会留下只有部分期号的目录。
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+import time
+from typing import Any, Iterable, Mapping, Sequence
+
+from sqlalchemy import text
+
+from config.settings import configure_logging
+from db.connection import get_engine
+from utils.change_feed import publish_change
+from utils.sql import make_in_clause
+
+logger = logging.getLogger(__name__)
+
+CATALOG_COLUMNS = [
+    "issue_name",
+    "playtype_ids",
+    "expert_count",
+    "row_count",
+    "has_result",
+    "has_hit_stat",
+    "hit_stat_playtype_ids",
+]
+REFRESH_BATCH_SIZE = 200
+
+
+def _join_ids(values: Iterable[int]) -> str:
+    return ",".join(str(value) for value in sorted(set(values)))
+
+
+def build_catalog_rows(
+    issues: Sequence[str],
+    playtype_counts: Iterable[Mapping[str, Any]],
+    expert_counts: Iterable[Mapping[str, Any]],
+    results: Iterable[Mapping[str, Any]],
+    hit_stat_playtypes: Iterable[Mapping[str, Any]],
+) -> list[dict[str, Any]]:
+    """Assemble catalog rows for ``issues``; issues with no data at all are omitted.
+
+    ``playtype_counts`` 为 ``(issue_name, playtype_id, row_count)``，``expert_counts`` 为
+    ``(issue_name, expert_count)``，``results`` 为开奖记录的 ``issue_name``，
+    ``hit_stat_playtypes`` 为 ``(issue_name, playtype_id)``。
+    """
+    rows: dict[str, dict[str, Any]] = {}
+
+    def entry(issue: Any) -> dict[str, Any]:
+        key = str(issue)
+        if key not in rows:
+            rows[key] = {
+                "issue_name": key,
+                "playtype_ids": set(),
+                "expert_count": 0,
+                "row_count": 0,
+                "has_result": 0,
+                "has_hit_stat": 0,
+                "hit_stat_playtype_ids": set(),
+            }
+        return rows[key]
+
+    wanted = {str(issue) for issue in issues}
+    for row in playtype_counts:
+        if row.get("playtype_id") is None:
+            continue
+        item = entry(row["issue_name"])
+        item["playtype_ids"].add(int(row["playtype_id"]))
+        item["row_count"] += int(row.get("row_count") or 0)
+    for row in expert_counts:
+        entry(row["issue_name"])["expert_count"] = int(row.get("expert_count") or 0)
+    for row in results:
+        entry(row["issue_name"])["has_result"] = 1
+    for row in hit_stat_playtypes:
+        if row.get("playtype_id") is None:
+            continue
+        item = entry(row["issue_name"])
+        item["has_hit_stat"] = 1
+        item["hit_stat_playtype_ids"].add(int(row["playtype_id"]))
+
+    catalog: list[dict[str, Any]] = []
+    for issue in sorted(rows):
+        if issue not in wanted:
+            continue
+        item = rows[issue]
+        item["playtype_ids"] = _join_ids(item["playtype_ids"])
+        item["hit_stat_playtype_ids"] = _join_ids(item["hit_stat_playtype_ids"])
+        catalog.append(item)
+    return catalog
+
+
+def _fetch_rows(conn, sql: str, params: dict[str, Any] | None = None) -> list[dict[str, Any]]:
+    return [dict(row._mapping) for row in conn.execute(text(sql), params or {})]
+
+
+def _collect_batch(conn, issues: Sequence[str]) -> list[dict[str, Any]]:
+    clause, params = make_in_clause("issue_name", issues, "issue")
+    playtype_counts = _fetch_rows(
+        conn,
+        f"""
+        SELECT issue_name, playtype_id, COUNT(*) AS row_count
+        FROM expert_predictions
+        WHERE {clause}
+        GROUP BY issue_name, playtype_id
+        """,
+        params,
+    )
+    expert_counts = _fetch_rows(
+        conn,
+        f"""
+        SELECT issue_name, COUNT(DISTINCT user_id) AS expert_count
+        FROM expert_predictions
+        WHERE {clause}
+        GROUP BY issue_name
+        """,
+        params,
+    )
+    results = _fetch_rows(
+        conn,
+        f"""
+        SELECT DISTINCT issue_name
+        FROM lottery_results
+        WHERE {clause}
+        """,
+        params,
+    )
+    hit_stat_playtypes = _fetch_rows(
+        conn,
+        f"SELECT DISTINCT issue_name, playtype_id FROM expert_hit_stat WHERE {clause}",
+        params,
+    )
+    return build_catalog_rows(issues, playtype_counts, expert_counts, results, hit_stat_playtypes)
+
+
+def _write_batch(conn, issues: Sequence[str], rows: Sequence[Mapping[str, Any]]) -> None:
+    clause, params = make_in_clause("issue_name", issues, "issue")
+    columns = ", ".join(CATALOG_COLUMNS)
+    values = ", ".join(f":{column}" for column in CATALOG_COLUMNS)
+    conn.execute(text(f"DELETE FROM issue_catalog WHERE {clause}"), params)
+    if rows:
+        conn.execute(text(f"INSERT INTO issue_catalog ({columns}) VALUES ({values})"), list(rows))
+
+
+def _catalog_is_empty(conn) -> bool:
+    return conn.execute(text("SELECT 1 FROM issue_catalog LIMIT 1")).first() is None
+
+
+def _known_issues(conn) -> list[str]:
+    rows = _fetch_rows(
+        conn,
+        """
+        SELECT issue_name FROM lottery_results
+        UNION
+        SELECT DISTINCT issue_name FROM expert_predictions
+        UNION
+        SELECT DISTINCT issue_name FROM expert_hit_stat
+        """,
+    )
+    return sorted(str(row["issue_name"]) for row in rows if row.get("issue_name"))
+
+
+def refresh_catalog(issues: Iterable[str], *, source: str = "issue_catalog") -> int:
+    """Recompute catalog rows for ``issues`` and publish an ``issue_catalog`` change.
+
+    目录表为空时改为扫描全部期号完整建目录。目录只是加速用的派生数据，
+    失败时记录日志而不影响调用方的采集流程。
+    """
+    targets = sorted({str(issue) for issue in issues if issue})
+    if not targets:
+        return 0
+    started = time.perf_counter()
+    written = 0
+    try:
+        engine = get_engine()
+        with engine.connect() as conn:
+            if _catalog_is_empty(conn):
+                logger.info("期号目录为空，扫描全部期号完整建目录")
+                targets = sorted(set(targets).union(_known_issues(conn)))
+            batches = [
+                (batch, _collect_batch(conn, batch))
+                for batch in (
+                    targets[start : start + REFRESH_BATCH_SIZE]
+                    for start in range(0, len(targets), REFRESH_BATCH_SIZE)
+                )
+            ]
+        with engine.begin() as conn:
+            for batch, rows in batches:
+                _write_batch(conn, batch, rows)
+                written += len(rows)
+    except Exception:
+        logger.exception("期号目录更新失败：%s", ",".join(targets[:5]))
+        return 0
+    publish_change("issue_catalog", row_count=written, max_issue=targets[-1], source=source)
+    logger.info("期号目录已更新：%s 期，用时 %.2fs", len(targets), time.perf_counter() - started)
+    return written
+
+
+def all_known_issues() -> list[str]:
+    """Every issue present in any source table (full scan; only for ``--rebuild``)."""
+    with get_engine().connect() as conn:
+        return _known_issues(conn)
+
+
+def main(argv: Sequence[str] | None = None) -> None:
+    configure_logging()
+    parser = argparse.ArgumentParser(description="维护 issue_catalog 期号目录")
+    parser.add_argument("--issue", action="append", default=[], help="指定期号，可多次指定")
+    parser.add_argument("--rebuild", action="store_true", help="扫描全部期号重建目录")
+    args = parser.parse_args(argv)
+
+    issues = all_known_issues() if args.rebuild else args.issue
+    if not issues:
+        parser.error("请指定 --issue 或 --rebuild")
+    refresh_catalog(issues)
+
+
+if __name__ == "__main__":
+    main()
@@ -11,9 +11,10 @@ from typing import Iterable, Sequence
 import requests
 from sqlalchemy import text
 
+from collector.issue_catalog import refresh_catalog
 from config.settings import configure_logging
 from db.connection import get_engine
-from utils.cache_control import bump_cache_token
+from utils.change_feed import publish_change
 
 BASE_URL = "https://mix.lottery.sina.com.cn/gateway/index/entry"
 DEFAULT_PARAMS: dict[str, str] = {
@@ -252,6 +253,35 @@ def _persist_results(results: Iterable[LotteryResult]) -> dict[str, int]:
     return {"inserted": inserted, "updated": updated, "skipped": skipped}
 
 
+def fetch_latest_issue(lottery_name: str = "福彩3D") -> str | None:
+    """Return the newest stored issue for ``lottery_name`` (``None`` when empty)."""
+    engine = get_engine()
+    with engine.connect() as conn:
+        value = conn.execute(
+            text("SELECT MAX(issue_name) FROM lottery_results WHERE lottery_name = :lottery"),
+            {"lottery": lottery_name},
+        ).scalar()
+    return str(value) if value else None
+
+
+def fetch_latest_draw_time(lottery_name: str = "福彩3D") -> datetime | None:
+    """Return ``open_time`` of the newest stored issue (naive Beijing time, ``None`` if unknown)."""
+    engine = get_engine()
+    with engine.connect() as conn:
+        value = conn.execute(
+            text(
+                """
+                SELECT open_time FROM lottery_results
+                WHERE lottery_name = :lottery
+                ORDER BY issue_name DESC
+                LIMIT 1
+                """
+            ),
+            {"lottery": lottery_name},
+        ).scalar()
+    return value if isinstance(value, datetime) else None
+
+
 def collect_lottery_results(
     *,
     lottery_name: str = "福彩3D",
@@ -280,8 +310,16 @@ def collect_lottery_results(
         logger.warning("未获取到任何开奖数据。")
         return {"inserted": 0, "updated": 0, "skipped": 0}
     stats = _persist_results(results)
-    bump_cache_token()
-    logger.info("已刷新前端缓存标记。")
+    changed = stats["inserted"] + stats["updated"]
+    if changed:
+        publish_change(
+            "lottery_results",
+            row_count=changed,
+            max_issue=max(record.issue_name for record in results),
+            source="lottery_results",
+        )
+        refresh_catalog({record.issue_name for record in results}, source="lottery_results")
+        logger.info("已发布开奖数据变更。")
     logger.info(
         "开奖采集完成：新增 %s 条，更新 %s 条，跳过 %s 条。",
         stats["inserted"],
@@ -1,63 +1,142 @@
 from __future__ import annotations
 
 import argparse
+import asyncio
 import logging
-from collections import Counter
-from typing import Sequence
+from pathlib import Path
+from typing import Iterator, Sequence
 
 from config.settings import configure_logging
-from utils.cache_control import bump_cache_token
+from utils.change_feed import publish_change
 
-from .api import CollectorAPIError, DetailClient, LeaderboardClient
+from .api import CollectorAPIError, DetailClient, ExpandedDetailResult, LeaderboardClient
+from .async_api import (
+    DEFAULT_CONCURRENCY,
+    AsyncDetailClient,
+    AsyncLeaderboardClient,
+    gather_limited,
+    make_session,
+)
+from .combo_cube import refresh_combo_cube
 from .config import DEFAULT_ISSUE_COUNT, DEFAULT_LIMIT, LOTTERY_ID, PLAYTYPE_SPECS
-from .storage import expand_scheme, upsert_expert_info, upsert_prediction
+from .issue_catalog import refresh_catalog
+from .storage import upsert_expert_info, upsert_prediction
+from .telemetry import RunMetrics
 
 logger = logging.getLogger(__name__)
 
 
+def _leaderboard_jobs(sort_types: Sequence[int] | None) -> Iterator[tuple[int, int]]:
+    for spec in PLAYTYPE_SPECS:
+        sort_candidates = tuple(sort_types) if sort_types else spec.sort_types
+        for sort_type in sort_candidates:
+            yield spec.playtype_id, sort_type
+
+
+def _store_detail(
+    detail: ExpandedDetailResult,
+    *,
+    user_id: int,
+    issue_name: str | None,
+    lottery_id: int,
+) -> int | None:
+    """Persist one expert's schemes; return the number of rows or ``None`` when skipped."""
+    resolved_issue = detail.issue_name or issue_name
+    if not resolved_issue:
+        logger.warning("无法获取期号，跳过专家 %s", user_id)
+        return None
+    for scheme in detail.schemes:
+        upsert_prediction(
+            user_id=user_id,
+            issue_name=resolved_issue,
+            lottery_id=lottery_id,
+            scheme=scheme,
+        )
+    return len(detail.schemes)
+
+
+def _finish_run(
+    metrics: RunMetrics,
+    *,
+    issue_name: str | None = None,
+    report_dir: Path | str | None = None,
+    prom_file: Path | str | None = None,
+) -> None:
+    stats = metrics.counters
+    metrics.finish()
+    logger.info(
+        "✅ 采集完成：排行榜请求 %s 次，明细请求 %s 次，写入方案 %s 条",
+        stats["leaderboard_calls"],
+        stats["detail_calls"],
+        stats["predictions"],
+    )
+
+    for table, rows in metrics.rows_written.items():
+        if rows:
+            publish_change(table, issue_name=issue_name, row_count=rows, source=metrics.name)
+    if issue_name and any(metrics.rows_written.values()):
+        refresh_catalog([issue_name], source=metrics.name)
+    if issue_name and metrics.rows_written.get("expert_predictions"):
+        refresh_combo_cube([issue_name], source=metrics.name)
+    logger.info("🔄 已发布数据变更，Streamlit 将在下次请求时获取最新数据。")
+
+    try:
+        report_path = metrics.write_json(report_dir)
+        logger.info("📈 运行指标已写入 %s", report_path)
+        if prom_file:
+            metrics.write_prometheus(prom_file)
+    except OSError:
+        logger.exception("写入采集运行指标失败")
+
+
 def collect_lotto3d(
     *,
     limit: int = DEFAULT_LIMIT,
     issue_count: int = DEFAULT_ISSUE_COUNT,
     sort_types: Sequence[int] | None = None,
-) -> None:
-    leaderboard_client = LeaderboardClient()
-    detail_client = DetailClient()
+    metrics: RunMetrics | None = None,
+    report_dir: Path | str | None = None,
+    prom_file: Path | str | None = None,
+) -> RunMetrics:
+    metrics = metrics or RunMetrics("lotto3d")
+    leaderboard_client = LeaderboardClient(metrics=metrics)
+    detail_client = DetailClient(metrics=metrics)
 
     known_users: dict[int, str] = {}
-    stats = Counter()
+    stats = metrics.counters
     issue_name: str | None = None
     lottery_id = LOTTERY_ID
 
-    for spec in PLAYTYPE_SPECS:
-        sort_candidates = tuple(sort_types) if sort_types else spec.sort_types
-        for sort_type in sort_candidates:
-            try:
+    for playtype_id, sort_type in _leaderboard_jobs(sort_types):
+        try:
+            with metrics.phase("leaderboard"):
                 result = leaderboard_client.fetch(
                     lottery_id=LOTTERY_ID,
-                    playtype_id=spec.playtype_id,
+                    playtype_id=playtype_id,
                     sort_type=sort_type,
                     limit=limit,
                     issue_count=issue_count,
                 )
-            except CollectorAPIError as exc:
-                logger.warning(
-                    "排行榜获取失败 playtype=%s sort=%s: %s",
-                    spec.playtype_id,
-                    sort_type,
-                    exc,
-                )
-                continue
+        except CollectorAPIError as exc:
+            logger.warning(
+                "排行榜获取失败 playtype=%s sort=%s: %s",
+                playtype_id,
+                sort_type,
+                exc,
+            )
+            continue
 
-            if result.issue_name:
-                issue_name = issue_name or result.issue_name
-            lottery_id = result.lottery_id or lottery_id
+        if result.issue_name:
+            issue_name = issue_name or result.issue_name
+        lottery_id = result.lottery_id or lottery_id
 
+        with metrics.phase("storage"):
             for entry in result.entries:
                 known_users.setdefault(entry.user_id, entry.nick_name)
                 upsert_expert_info(entry.user_id, entry.nick_name)
-            stats["leaderboard_calls"] += 1
-            stats["leaderboard_users"] += len(result.entries)
+        metrics.record_rows("expert_info", len(result.entries))
+        stats["leaderboard_calls"] += 1
+        stats["leaderboard_users"] += len(result.entries)
 
     if not known_users:
         raise RuntimeError("未从排行榜获取到任何专家数据")
@@ -69,41 +148,142 @@ def collect_lotto3d(
 
     for idx, (user_id, _nick_name) in enumerate(known_users.items(), start=1):
         try:
-            detail = detail_client.fetch(
-                lottery_id=lottery_id,
-                user_id=user_id,
-                issue_name=issue_name,
-            )
+            with metrics.phase("detail"):
+                detail = detail_client.fetch_expanded(
+                    lottery_id=lottery_id,
+                    user_id=user_id,
+                    issue_name=issue_name,
+                )
         except CollectorAPIError as exc:
             logger.warning("明细获取失败 user=%s: %s", user_id, exc)
             continue
 
-        resolved_issue = detail.issue_name or issue_name
-        if not resolved_issue:
-            logger.warning("无法获取期号，跳过专家 %s", user_id)
+        with metrics.phase("storage"):
+            written = _store_detail(
+                detail, user_id=user_id, issue_name=issue_name, lottery_id=lottery_id
+            )
+        if written is None:
             continue
-        for scheme in detail.schemes:
-            for expanded in expand_scheme(scheme.playtype_id, scheme.playtype_name, scheme.numbers):
-                upsert_prediction(
-                    user_id=user_id,
-                    issue_name=resolved_issue,
-                    lottery_id=lottery_id,
-                    scheme=expanded,
-                )
-                stats["predictions"] += 1
+        metrics.record_rows("expert_predictions", written)
+        stats["predictions"] += written
         stats["detail_calls"] += 1
         if idx % 20 == 0:
             logger.info("……已完成 %s 位专家采集", idx)
 
+    _finish_run(metrics, issue_name=issue_name, report_dir=report_dir, prom_file=prom_file)
+    return metrics
+
+
+async def collect_lotto3d_async(
+    *,
+    limit: int = DEFAULT_LIMIT,
+    issue_count: int = DEFAULT_ISSUE_COUNT,
+    sort_types: Sequence[int] | None = None,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    metrics: RunMetrics | None = None,
+    report_dir: Path | str | None = None,
+    prom_file: Path | str | None = None,
+) -> RunMetrics:
+    """Async variant of :func:`collect_lotto3d` with semaphore-limited fan-out.
+
+    排行榜与明细请求并发发出；数据库写入仍是同步的 SQLAlchemy 调用，
+    通过 ``asyncio.to_thread`` 执行，与请求共享同一个并发上限。
+    指标中 leaderboard/detail 为并发阶段的墙钟时间，storage 为各次写入耗时之和。
+    """
+    metrics = metrics or RunMetrics("lotto3d")
+    session = make_session(concurrency)
+    leaderboard_client = AsyncLeaderboardClient(session, metrics=metrics)
+    detail_client = AsyncDetailClient(session, metrics=metrics)
+    semaphore = asyncio.Semaphore(max(concurrency, 1))
+
+    stats = metrics.counters
+    jobs = list(_leaderboard_jobs(sort_types))
+
+    async def _fetch_leaderboard(job: tuple[int, int]):
+        playtype_id, sort_type = job
+        return await leaderboard_client.fetch(
+            lottery_id=LOTTERY_ID,
+            playtype_id=playtype_id,
+            sort_type=sort_type,
+            limit=limit,
+            issue_count=issue_count,
+        )
+
+    with metrics.phase("leaderboard"):
+        results = await gather_limited(jobs, _fetch_leaderboard, semaphore=semaphore)
+
+    known_users: dict[int, str] = {}
+    issue_name: str | None = None
+    lottery_id = LOTTERY_ID
+    for (playtype_id, sort_type), result in zip(jobs, results):
+        if isinstance(result, BaseException):
+            if not isinstance(result, CollectorAPIError):
+                raise result
+            logger.warning("排行榜获取失败 playtype=%s sort=%s: %s", playtype_id, sort_type, result)
+            continue
+        if result.issue_name:
+            issue_name = issue_name or result.issue_name
+        lottery_id = result.lottery_id or lottery_id
+        for entry in result.entries:
+            known_users.setdefault(entry.user_id, entry.nick_name)
+        stats["leaderboard_calls"] += 1
+        stats["leaderboard_users"] += len(result.entries)
+
+    if not known_users:
+        raise RuntimeError("未从排行榜获取到任何专家数据")
+
+    def _store_experts() -> None:
+        with metrics.phase("storage"):
+            for uid, nick in known_users.items():
+                upsert_expert_info(uid, nick)
+
+    await asyncio.to_thread(_store_experts)
+    metrics.record_rows("expert_info", len(known_users))
+
+    if not issue_name:
+        logger.warning("排行榜未返回期号，将在明细接口中获取 issue_name")
+
     logger.info(
-        "✅ 采集完成：排行榜请求 %s 次，明细请求 %s 次，写入方案 %s 条",
-        stats["leaderboard_calls"],
-        stats["detail_calls"],
-        stats["predictions"],
+        "🏁 本次采集覆盖 %s 位专家，目标期号 %s（并发 %s）",
+        len(known_users),
+        issue_name or "未知",
+        concurrency,
     )
 
-    bump_cache_token()
-    logger.info("🔄 已刷新前端缓存标记，Streamlit 将在下次请求时获取最新数据。")
+    async def _collect_user(user_id: int) -> None:
+        try:
+            detail = await detail_client.fetch_expanded(
+                lottery_id=lottery_id,
+                user_id=user_id,
+                issue_name=issue_name,
+            )
+        except CollectorAPIError as exc:
+            logger.warning("明细获取失败 user=%s: %s", user_id, exc)
+            return
+
+        def _store() -> int | None:
+            with metrics.phase("storage"):
+                return _store_detail(
+                    detail, user_id=user_id, issue_name=issue_name, lottery_id=lottery_id
+                )
+
+        written = await asyncio.to_thread(_store)
+        if written is None:
+            return
+        metrics.record_rows("expert_predictions", written)
+        stats["predictions"] += written
+        stats["detail_calls"] += 1
+        if stats["detail_calls"] % 20 == 0:
+            logger.info("……已完成 %s 位专家采集", stats["detail_calls"])
+
+    with metrics.phase("detail"):
+        outcomes = await gather_limited(list(known_users), _collect_user, semaphore=semaphore)
+    for outcome in outcomes:
+        if isinstance(outcome, BaseException):
+            raise outcome
+
+    _finish_run(metrics, issue_name=issue_name, report_dir=report_dir, prom_file=prom_file)
+    return metrics
 
 
 def main() -> None:
@@ -117,11 +297,47 @@ def main() -> None:
         default="",
         help="可选：指定 sortType 列表，逗号分隔。例如 '4' 或 '2,4'",
     )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=1,
+        help="并发请求数；大于 1 时使用 asyncio 采集流程",
+    )
+    parser.add_argument(
+        "--report-dir",
+        type=str,
+        default="",
+        help="运行指标 JSON 报告目录，默认 logs/collector_runs",
+    )
+    parser.add_argument(
+        "--prom-file",
+        type=str,
+        default="",
+        help="可选：输出 Prometheus 文本格式指标文件（textfile collector）",
+    )
     args = parser.parse_args()
     chosen_sorts = None
     if args.sort_types:
         chosen_sorts = tuple(int(x) for x in args.sort_types.split(",") if x.strip())
-    collect_lotto3d(limit=args.limit, issue_count=args.issue_count, sort_types=chosen_sorts)
+    if args.concurrency > 1:
+        asyncio.run(
+            collect_lotto3d_async(
+                limit=args.limit,
+                issue_count=args.issue_count,
+                sort_types=chosen_sorts,
+                concurrency=args.concurrency,
+                report_dir=args.report_dir or None,
+                prom_file=args.prom_file or None,
+            )
+        )
+        return
+    collect_lotto3d(
+        limit=args.limit,
+        issue_count=args.issue_count,
+        sort_types=chosen_sorts,
+        report_dir=args.report_dir or None,
+        prom_file=args.prom_file or None,
+    )
 
 
 if __name__ == "__main__":
@@ -0,0 +1,183 @@
+"""把 red_val_list_v2 的 ``*_count_map`` JSON 字段展开写入长表 red_val_dist。
+
+每个 (issue_name, playtype_id, type) 取 id 最大的一行，七个分布字段逐一解析为
+``(metric, bucket, expert_count)``；按期删除后批量插入。表结构见
+``newsql/red_val_dist.sql``。默认只同步 red_val_dist 中还没有的期号。
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import time
+from typing import Any, Iterable, Mapping, Sequence
+
+import pandas as pd
+from sqlalchemy import text
+
+from config.settings import configure_logging
+from db.connection import get_engine
+from utils.change_feed import publish_change
+from utils.sql import make_in_clause
+
+logger = logging.getLogger(__name__)
+
+# 列名 -> metric（去掉 _map 后缀）
+DISTRIBUTION_COLUMNS: tuple[str, ...] = (
+    "hit_count_map",
+    "serial_hit_count_map",
+    "series_not_hit_count_map",
+    "max_serial_hit_count_map",
+    "max_series_not_hit_count_map",
+    "his_max_serial_hit_count_map",
+    "his_max_series_not_hit_count_map",
+)
+DIST_COLUMNS = [
+    "issue_name",
+    "playtype_id",
+    "type",
+    "metric",
+    "bucket",
+    "expert_count",
+    "rank_count",
+]
+INSERT_BATCH_SIZE = 5000
+
+
+def parse_count_map(raw: Any) -> dict[int, int]:
+    """Parse one ``*_count_map`` value into ``{bucket: count}``.
+
+    兼容 ``{"3": 12}`` 对象与 ``[{"key": 3, "value": 12}]`` 列表两种格式，
+    非整数键或值会被忽略。
+    """
+    if raw is None or raw == "":
+        return {}
+    data = raw
+    if isinstance(raw, (str, bytes)):
+        try:
+            data = json.loads(raw)
+        except ValueError:
+            return {}
+    pairs: Iterable[tuple[Any, Any]]
+    if isinstance(data, Mapping):
+        pairs = data.items()
+    elif isinstance(data, list):
+        pairs = ((item.get("key"), item.get("value")) for item in data if isinstance(item, Mapping))
+    else:
+        return {}
+    result: dict[int, int] = {}
+    for key, value in pairs:
+        try:
+            bucket = int(str(key).strip())
+            count = int(value)
+        except (TypeError, ValueError):
+            continue
+        result[bucket] = result.get(bucket, 0) + count
+    return result
+
+
+def explode_distribution_rows(rows: Sequence[Mapping[str, Any]]) -> pd.DataFrame:
+    """Explode red_val_list_v2 rows into the long ``red_val_dist`` layout."""
+    latest: dict[tuple[str, int, int], Mapping[str, Any]] = {}
+    for row in rows:
+        if row.get("issue_name") is None or row.get("playtype_id") is None:
+            continue
+        key = (str(row["issue_name"]), int(row["playtype_id"]), int(row.get("type") or 0))
+        current = latest.get(key)
+        if current is None or int(row.get("id") or 0) >= int(current.get("id") or 0):
+            latest[key] = row
+
+    records: list[tuple[str, int, int, str, int, int, int | None]] = []
+    for (issue, playtype_id, type_), row in latest.items():
+        rank_count = row.get("rank_count")
+        rank_value = int(rank_count) if rank_count is not None else None
+        for column in DISTRIBUTION_COLUMNS:
+            metric = column[: -len("_map")]
+            for bucket, count in sorted(parse_count_map(row.get(column)).items()):
+                records.append((issue, playtype_id, type_, metric, bucket, count, rank_value))
+    return pd.DataFrame.from_records(records, columns=DIST_COLUMNS)
+
+
+def _fetch_rows(conn, sql: str, params: dict[str, Any] | None = None) -> list[dict[str, Any]]:
+    return [dict(row._mapping) for row in conn.execute(text(sql), params or {})]
+
+
+def pending_issues(limit: int | None = None) -> list[str]:
+    """Issues present in red_val_list_v2 but not yet exploded."""
+    sql = """
+        SELECT DISTINCT v2.issue_name
+        FROM red_val_list_v2 v2
+        LEFT JOIN (SELECT DISTINCT issue_name FROM red_val_dist) d
+               ON d.issue_name = v2.issue_name
+        WHERE v2.issue_name IS NOT NULL AND d.issue_name IS NULL
+        ORDER BY v2.issue_name
+    """
+    with get_engine().connect() as conn:
+        issues = [str(row["issue_name"]) for row in _fetch_rows(conn, sql)]
+    return issues[-limit:] if limit else issues
+
+
+def sync_issues(issues: Sequence[str]) -> int:
+    """Re-explode ``issues`` from red_val_list_v2 into red_val_dist."""
+    targets = sorted({str(issue) for issue in issues if issue})
+    if not targets:
+        return 0
+    started = time.perf_counter()
+    clause, params = make_in_clause("issue_name", targets, "issue")
+    columns = ", ".join(DISTRIBUTION_COLUMNS)
+    engine = get_engine()
+    with engine.connect() as conn:
+        rows = _fetch_rows(
+            conn,
+            f"""
+            SELECT id, issue_name, playtype_id, type, rank_count, {columns}
+            FROM red_val_list_v2
+            WHERE {clause}
+            """,
+            params,
+        )
+    frame = explode_distribution_rows(rows)
+    records = frame.astype(object).where(pd.notna(frame), None).to_dict("records")
+    insert_sql = text(
+        """
+        INSERT INTO red_val_dist (
+            issue_name, playtype_id, type, metric, bucket, expert_count, rank_count
+        ) VALUES (:issue_name, :playtype_id, :type, :metric, :bucket, :expert_count, :rank_count)
+        """
+    )
+    with engine.begin() as conn:
+        conn.execute(text(f"DELETE FROM red_val_dist WHERE {clause}"), params)
+        for start in range(0, len(records), INSERT_BATCH_SIZE):
+            conn.execute(insert_sql, records[start : start + INSERT_BATCH_SIZE])
+    publish_change(
+        "red_val_dist", row_count=len(records), max_issue=targets[-1], source="red_val_dist"
+    )
+    logger.info(
+        "选号分布展开完成：%s 期，源记录 %s 行，写入 %s 行，用时 %.2fs",
+        len(targets),
+        len(rows),
+        len(records),
+        time.perf_counter() - started,
+    )
+    return len(records)
+
+
+def main(argv: Sequence[str] | None = None) -> None:
+    configure_logging()
+    parser = argparse.ArgumentParser(description="展开 red_val_list_v2 分布 JSON 到 red_val_dist")
+    parser.add_argument("--issue", action="append", default=[], help="指定期号，可多次指定")
+    parser.add_argument("--limit", type=int, default=None, help="仅同步最近 N 个待处理期号")
+    parser.add_argument("--batch", type=int, default=20, help="每批同步的期号数")
+    args = parser.parse_args(argv)
+
+    issues = args.issue or pending_issues(args.limit)
+    if not issues:
+        logger.info("没有待展开的期号。")
+        return
+    for start in range(0, len(issues), max(args.batch, 1)):
+        sync_issues(issues[start : start + args.batch])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,299 @@
+"""常驻采集调度：按福彩3D开奖时间轮询开奖结果，并定时采集专家预测。
+
+开奖窗口（默认 21:10–22:45 北京时间）内以 10s 起步、指数退避到 120s 的间隔轮询
+开奖接口；一旦 ``lottery_results`` 出现新期号立即执行 ``on_new_issue`` 钩子
+（命中统计刷新等；开奖变更已由采集器写入变更日志），当天即不再轮询。启动时若库中
+最新一期已是当天开奖，当天直接视为已开奖。专家预测按 ``prediction_interval`` 触发，
+开奖窗口内尚未拿到当天结果时推迟到拿到结果或窗口结束后，避免耽误开奖轮询；
+其余时间休眠到下一个事件。
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+import shlex
+import subprocess
+import threading
+import time
+from dataclasses import dataclass
+from datetime import date, datetime, time as dt_time, timedelta
+from typing import Callable, Iterator, Sequence
+
+from config.settings import configure_logging
+
+from .config import (
+    DRAW_TIME,
+    DRAW_TZ,
+    PREDICTION_INTERVAL,
+    RESULT_POLL_BACKOFF,
+    RESULT_POLL_MAX_SECONDS,
+    RESULT_POLL_MIN_SECONDS,
+    RESULT_WINDOW_AFTER,
+    RESULT_WINDOW_BEFORE,
+)
+
+logger = logging.getLogger(__name__)
+
+IssueHook = Callable[[str], None]
+
+# 窗口外的最长单次休眠，避免系统时间调整后长时间睡过头
+MAX_IDLE_SECONDS = 600.0
+
+
+@dataclass(frozen=True)
+class SchedulerConfig:
+    draw_time: dt_time = DRAW_TIME
+    window_before: timedelta = RESULT_WINDOW_BEFORE
+    window_after: timedelta = RESULT_WINDOW_AFTER
+    poll_min_seconds: float = RESULT_POLL_MIN_SECONDS
+    poll_max_seconds: float = RESULT_POLL_MAX_SECONDS
+    poll_backoff: float = RESULT_POLL_BACKOFF
+    prediction_interval: timedelta | None = PREDICTION_INTERVAL
+    lottery_name: str = "福彩3D"
+
+
+def draw_window(day: date, config: SchedulerConfig) -> tuple[datetime, datetime]:
+    """Return the ``[start, end)`` result polling window around ``day``'s draw."""
+    draw_at = datetime.combine(day, config.draw_time, tzinfo=DRAW_TZ)
+    return draw_at - config.window_before, draw_at + config.window_after
+
+
+def backoff_delays(initial: float, maximum: float, factor: float) -> Iterator[float]:
+    """Yield ``initial, initial*factor, ...`` capped at ``maximum``."""
+    delay = max(initial, 0.0)
+    while True:
+        yield min(delay, maximum)
+        delay = min(delay * max(factor, 1.0), maximum)
+
+
+def _default_poll_results(lottery_name: str) -> None:
+    from .lottery_results import collect_lottery_results
+
+    collect_lottery_results(lottery_name=lottery_name, max_pages=1, sleep_min=0, sleep_max=0)
+
+
+def _default_latest_issue(lottery_name: str) -> str | None:
+    from .lottery_results import fetch_latest_issue
+
+    return fetch_latest_issue(lottery_name)
+
+
+def _default_latest_draw_time(lottery_name: str) -> datetime | None:
+    from .lottery_results import fetch_latest_draw_time
+
+    return fetch_latest_draw_time(lottery_name)
+
+
+def _default_collect_predictions() -> None:
+    from .lotto3d import collect_lotto3d
+
+    collect_lotto3d()
+
+
+class DrawScheduler:
+    """Single-threaded scheduler; :meth:`tick` runs one step and returns the sleep time."""
+
+    def __init__(
+        self,
+        config: SchedulerConfig | None = None,
+        *,
+        poll_results: Callable[[], None] | None = None,
+        latest_issue: Callable[[], str | None] | None = None,
+        latest_draw_time: Callable[[], datetime | None] | None = None,
+        collect_predictions: Callable[[], None] | None = None,
+        clock: Callable[[], datetime] | None = None,
+    ) -> None:
+        self.config = config or SchedulerConfig()
+        name = self.config.lottery_name
+        self._poll_results = poll_results or (lambda: _default_poll_results(name))
+        self._latest_issue = latest_issue or (lambda: _default_latest_issue(name))
+        # 自定义了 latest_issue 时不默认查库，开奖时间未知即按未开奖处理
+        self._latest_draw_time = latest_draw_time or (
+            (lambda: None) if latest_issue else (lambda: _default_latest_draw_time(name))
+        )
+        self._collect_predictions = collect_predictions or _default_collect_predictions
+        self._clock = clock or (lambda: datetime.now(DRAW_TZ))
+        self._hooks: list[IssueHook] = []
+        self._last_issue: str | None = None
+        self._primed = False
+        self._settled_day: date | None = None
+        self._missed_day: date | None = None
+        self._next_prediction_at: datetime | None = None
+        self._backoff = self._new_backoff()
+
+    @property
+    def last_issue(self) -> str | None:
+        return self._last_issue
+
+    def on_new_issue(self, hook: IssueHook) -> IssueHook:
+        """Register ``hook(issue_name)``; usable as a decorator."""
+        self._hooks.append(hook)
+        return hook
+
+    def _new_backoff(self) -> Iterator[float]:
+        return backoff_delays(
+            self.config.poll_min_seconds, self.config.poll_max_seconds, self.config.poll_backoff
+        )
+
+    def _prime(self, today: date) -> None:
+        try:
+            self._last_issue = self._latest_issue()
+            drawn_at = self._latest_draw_time() if self._last_issue else None
+            self._primed = True
+        except Exception:  # noqa: BLE001
+            logger.exception("读取最新开奖期号失败，稍后重试")
+            return
+        if drawn_at is not None:
+            drawn_on = (drawn_at.astimezone(DRAW_TZ) if drawn_at.tzinfo else drawn_at).date()
+            if drawn_on == today:
+                logger.info("库中已有当天开奖结果 %s，今天不再轮询", self._last_issue)
+                self._settled_day = today
+
+    def _fire_hooks(self, issue_name: str) -> None:
+        for hook in self._hooks:
+            try:
+                hook(issue_name)
+            except Exception:  # noqa: BLE001 - 钩子失败不影响调度
+                logger.exception("新期号钩子执行失败: %r", hook)
+
+    def _poll_once(self, day: date) -> None:
+        try:
+            self._poll_results()
+            issue_name = self._latest_issue()
+        except Exception:  # noqa: BLE001
+            logger.exception("开奖结果轮询失败")
+            return
+        if not issue_name or issue_name == self._last_issue:
+            return
+        logger.info("🎯 检测到新开奖期号 %s（上一期 %s）", issue_name, self._last_issue or "无")
+        self._last_issue = issue_name
+        self._settled_day = day
+        self._backoff = self._new_backoff()
+        self._fire_hooks(issue_name)
+
+    def _run_predictions(self, now: datetime) -> None:
+        interval = self.config.prediction_interval
+        if interval is None:
+            return
+        if self._next_prediction_at is not None and now < self._next_prediction_at:
+            return
+        self._next_prediction_at = now + interval
+        logger.info("⏰ 开始定时采集专家预测")
+        try:
+            self._collect_predictions()
+        except Exception:  # noqa: BLE001
+            logger.exception("专家预测采集失败")
+
+    def tick(self, now: datetime | None = None) -> float:
+        now = now or self._clock()
+        today = now.astimezone(DRAW_TZ).date()
+        if not self._primed:
+            self._prime(today)
+
+        if self._next_prediction_at is None and self.config.prediction_interval is not None:
+            self._next_prediction_at = now
+
+        start, end = draw_window(today, self.config)
+        awaiting_result = start <= now < end and self._settled_day != today
+        if not awaiting_result:
+            self._run_predictions(now)
+
+        if awaiting_result and self._primed:
+            self._poll_once(today)
+            if self._settled_day != today:
+                return next(self._backoff)
+        elif now >= end and self._settled_day != today and self._missed_day != today:
+            self._missed_day = today
+            self._backoff = self._new_backoff()
+            logger.warning("开奖窗口已结束仍未获取到 %s 的开奖结果", today.isoformat())
+
+        if not self._primed:
+            return self.config.poll_max_seconds
+
+        if now >= start:
+            start, _ = draw_window(today + timedelta(days=1), self.config)
+        wake_at = start
+        if self._next_prediction_at is not None:
+            wake_at = min(wake_at, self._next_prediction_at)
+        return max(min((wake_at - now).total_seconds(), MAX_IDLE_SECONDS), 1.0)
+
+    def run(self, stop_event: threading.Event | None = None) -> None:
+        stop_event = stop_event or threading.Event()
+        logger.info(
+            "采集调度已启动：开奖时间 %s，预测采集间隔 %s",
+            self.config.draw_time.strftime("%H:%M"),
+            self.config.prediction_interval or "关闭",
+        )
+        while not stop_event.is_set():
+            delay = self.tick()
+            logger.debug("调度休眠 %.1f 秒", delay)
+            stop_event.wait(delay)
+
+
+def refresh_hit_stats_hook(issue_name: str) -> None:
+    from .hit_stats import refresh_issues
+
+    refresh_issues([issue_name])
+
+
+def command_hook(command: str) -> IssueHook:
+    """Build a hook that runs ``command`` with ``{issue}`` substituted."""
+
+    def _run(issue_name: str) -> None:
+        args = [part.replace("{issue}", issue_name) for part in shlex.split(command)]
+        started = time.perf_counter()
+        subprocess.run(args, check=True)
+        logger.info("钩子命令完成（%.1fs）：%s", time.perf_counter() - started, " ".join(args))
+
+    return _run
+
+
+def main(argv: Sequence[str] | None = None) -> None:
+    configure_logging()
+    parser = argparse.ArgumentParser(description="按开奖时间调度开奖与专家预测采集的常驻进程")
+    parser.add_argument(
+        "--prediction-interval",
+        type=float,
+        default=PREDICTION_INTERVAL.total_seconds() / 3600,
+        help="专家预测采集间隔（小时）；0 表示不采集",
+    )
+    parser.add_argument(
+        "--concurrency", type=int, default=1, help="专家预测采集并发数，大于 1 时使用 asyncio"
+    )
+    parser.add_argument(
+        "--hook-command",
+        action="append",
+        default=[],
+        help="新期号到达后执行的命令，可多次指定；命令中的 {issue} 会替换为期号",
+    )
+    parser.add_argument(
+        "--skip-hit-stats", action="store_true", help="新期号到达后不自动计算命中统计"
+    )
+    args = parser.parse_args(argv)
+
+    collect_predictions: Callable[[], None] | None = None
+    if args.concurrency > 1:
+        from .lotto3d import collect_lotto3d_async
+
+        def collect_predictions() -> None:
+            asyncio.run(collect_lotto3d_async(concurrency=args.concurrency))
+
+    interval = timedelta(hours=args.prediction_interval) if args.prediction_interval > 0 else None
+    scheduler = DrawScheduler(
+        SchedulerConfig(prediction_interval=interval),
+        collect_predictions=collect_predictions,
+    )
+    if not args.skip_hit_stats:
+        scheduler.on_new_issue(refresh_hit_stats_hook)
+    for command in args.hook_command:
+        scheduler.on_new_issue(command_hook(command))
+    try:
+        scheduler.run()
+    except KeyboardInterrupt:
+        logger.info("采集调度已停止")
+
+
+if __name__ == "__main__":
+    main()
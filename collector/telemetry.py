@@ -0,0 +1,184 @@
+"""采集运行指标：分阶段耗时、请求延迟分位数、重试/错误分布与写入吞吐。
+
+一次采集对应一个 :class:`RunMetrics`，运行结束后写成 JSON 报告，
+也可以输出 Prometheus 文本格式文件供 node_exporter textfile collector 读取。
+"""
+
+from __future__ import annotations
+
+import json
+import math
+import threading
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Iterator
+
+_PROJECT_ROOT = Path(__file__).resolve().parents[1]
+DEFAULT_REPORT_DIR = _PROJECT_ROOT / "logs" / "collector_runs"
+
+LATENCY_BUCKETS: tuple[float, ...] = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 15.0)
+PERCENTILES: tuple[int, ...] = (50, 90, 99)
+
+
+def percentile(values: list[float], pct: float) -> float | None:
+    """Nearest-rank percentile; ``None`` for an empty sample."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+class RunMetrics:
+    """Thread-safe accumulator for one collector run."""
+
+    def __init__(self, name: str = "lotto3d") -> None:
+        self.name = name
+        self.started_at = datetime.now()
+        self._start = time.perf_counter()
+        self._finished: float | None = None
+        self._lock = threading.Lock()
+        self.phases: defaultdict[str, float] = defaultdict(float)
+        self.latencies: defaultdict[str, list[float]] = defaultdict(list)
+        self.errors: defaultdict[str, Counter[str]] = defaultdict(Counter)
+        self.retries: Counter[str] = Counter()
+        self.bytes_received = 0
+        self.rows_written: Counter[str] = Counter()
+        self.counters: Counter[str] = Counter()
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Accumulate wall time spent inside the block under ``name``."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                self.phases[name] += elapsed
+
+    def record_request(self, domain: str, seconds: float, *, size: int = 0) -> None:
+        with self._lock:
+            self.latencies[domain].append(seconds)
+            self.bytes_received += size
+
+    def record_error(self, domain: str, exc: BaseException) -> None:
+        label = str(exc) if str(exc).startswith("HTTP ") else type(exc).__name__
+        with self._lock:
+            self.errors[domain][label] += 1
+
+    def record_retry(self, domain: str) -> None:
+        with self._lock:
+            self.retries[domain] += 1
+
+    def record_rows(self, table: str, count: int) -> None:
+        with self._lock:
+            self.rows_written[table] += count
+
+    def incr(self, key: str, value: int = 1) -> None:
+        with self._lock:
+            self.counters[key] += value
+
+    def finish(self) -> None:
+        if self._finished is None:
+            self._finished = time.perf_counter()
+
+    @property
+    def wall_seconds(self) -> float:
+        end = self._finished if self._finished is not None else time.perf_counter()
+        return end - self._start
+
+    def to_report(self) -> dict[str, object]:
+        with self._lock:
+            storage_seconds = self.phases.get("storage", 0.0)
+            total_rows = sum(self.rows_written.values())
+            requests_report = {}
+            for domain, samples in self.latencies.items():
+                requests_report[domain] = {
+                    "count": len(samples),
+                    **{f"p{pct}": percentile(samples, pct) for pct in PERCENTILES},
+                    "max": max(samples) if samples else None,
+                    "errors": dict(self.errors.get(domain, {})),
+                    "retries": self.retries.get(domain, 0),
+                }
+            for domain, errors in self.errors.items():
+                requests_report.setdefault(
+                    domain,
+                    {"count": 0, "errors": dict(errors), "retries": self.retries.get(domain, 0)},
+                )
+            return {
+                "name": self.name,
+                "started_at": self.started_at.isoformat(timespec="seconds"),
+                "wall_seconds": round(self.wall_seconds, 3),
+                "phases": {key: round(value, 3) for key, value in self.phases.items()},
+                "requests": requests_report,
+                "retries_total": sum(self.retries.values()),
+                "bytes_received": self.bytes_received,
+                "rows_written": dict(self.rows_written),
+                "rows_per_second": (
+                    round(total_rows / storage_seconds, 2) if storage_seconds > 0 else None
+                ),
+                "counters": dict(self.counters),
+            }
+
+    def write_json(self, directory: Path | str | None = None) -> Path:
+        target_dir = Path(directory) if directory else DEFAULT_REPORT_DIR
+        target_dir.mkdir(parents=True, exist_ok=True)
+        stamp = self.started_at.strftime("%Y%m%d-%H%M%S")
+        path = target_dir / f"{self.name}-{stamp}.json"
+        path.write_text(
+            json.dumps(self.to_report(), ensure_ascii=False, indent=2), encoding="utf-8"
+        )
+        return path
+
+    def to_prometheus(self) -> str:
+        prefix = f"lotto_collector_{self.name}"
+        lines: list[str] = [
+            f"# TYPE {prefix}_wall_seconds gauge",
+            f"{prefix}_wall_seconds {self.wall_seconds:.6f}",
+            f"# TYPE {prefix}_phase_seconds gauge",
+        ]
+        with self._lock:
+            for phase, seconds in sorted(self.phases.items()):
+                lines.append(f'{prefix}_phase_seconds{{phase="{phase}"}} {seconds:.6f}')
+            lines.append(f"# TYPE {prefix}_request_seconds histogram")
+            for domain, samples in sorted(self.latencies.items()):
+                for bound in LATENCY_BUCKETS:
+                    count = sum(1 for value in samples if value <= bound)
+                    lines.append(
+                        f'{prefix}_request_seconds_bucket{{domain="{domain}",le="{bound}"}} {count}'
+                    )
+                lines.append(
+                    f'{prefix}_request_seconds_bucket{{domain="{domain}",le="+Inf"}} {len(samples)}'
+                )
+                lines.append(
+                    f'{prefix}_request_seconds_sum{{domain="{domain}"}} {sum(samples):.6f}'
+                )
+                lines.append(f'{prefix}_request_seconds_count{{domain="{domain}"}} {len(samples)}')
+            lines.append(f"# TYPE {prefix}_request_errors_total counter")
+            for domain, errors in sorted(self.errors.items()):
+                for label, count in sorted(errors.items()):
+                    lines.append(
+                        f'{prefix}_request_errors_total{{domain="{domain}",error="{label}"}} {count}'
+                    )
+            lines.append(f"# TYPE {prefix}_retries_total counter")
+            for domain, count in sorted(self.retries.items()):
+                lines.append(f'{prefix}_retries_total{{domain="{domain}"}} {count}')
+            lines.append(f"# TYPE {prefix}_bytes_received_total counter")
+            lines.append(f"{prefix}_bytes_received_total {self.bytes_received}")
+            lines.append(f"# TYPE {prefix}_rows_written_total counter")
+            for table, count in sorted(self.rows_written.items()):
+                lines.append(f'{prefix}_rows_written_total{{table="{table}"}} {count}')
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path: Path | str) -> Path:
+        target = Path(path)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        # 先写临时文件再替换，避免 textfile collector 读到半截内容
+        tmp = target.with_suffix(target.suffix + ".tmp")
+        tmp.write_text(self.to_prometheus(), encoding="utf-8")
+        tmp.replace(target)
+        return target
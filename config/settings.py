@@ -55,6 +55,8 @@ class DatabaseSettings:
     max_overflow: int
     pool_recycle: int
     connect_timeout: int
+    slow_query_ms: int = 1000
+    slow_query_log: str = ""
 
 
 @dataclass(frozen=True)
@@ -90,6 +92,8 @@ def get_settings() -> Settings:
         max_overflow=_get_int_env("LOTTO_DB_MAX_OVERFLOW", 10),
         pool_recycle=_get_int_env("LOTTO_DB_POOL_RECYCLE", 1800),
         connect_timeout=_get_int_env("LOTTO_DB_CONNECT_TIMEOUT", 10),
+        slow_query_ms=_get_int_env("LOTTO_SLOW_QUERY_MS", 1000),
+        slow_query_log=_get_env("LOTTO_SLOW_QUERY_LOG", default=""),
     )
 
     collector = CollectorSettings(
@@ -1,43 +1,84 @@
 from __future__ import annotations
 
 import logging
+import threading
+import time
 from typing import Any
 
-from sqlalchemy import create_engine, text
+from sqlalchemy import Engine, create_engine, text
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.pool import QueuePool
 
 from config import settings
+from db.instrumentation import QueryMetrics, SlowQueryLog
 
 logger = logging.getLogger(__name__)
 
-_engine = create_engine(
-    settings.database.url,
-    poolclass=QueuePool,
-    pool_size=settings.database.pool_size,
-    max_overflow=settings.database.max_overflow,
-    pool_pre_ping=True,
-    pool_recycle=settings.database.pool_recycle,
-    future=True,
-    connect_args={"connect_timeout": settings.database.connect_timeout},
+_engine: Engine | None = None
+_engine_lock = threading.Lock()
+
+_slow_log = settings.database.slow_query_log
+query_metrics = QueryMetrics(
+    slow_ms=settings.database.slow_query_ms,
+    slow_log=SlowQueryLog(_slow_log) if _slow_log else None,
 )
 
 
-def get_engine():
-    """Return the shared SQLAlchemy engine for the application."""
+def _create_engine() -> Engine:
+    return create_engine(
+        settings.database.url,
+        poolclass=QueuePool,
+        pool_size=settings.database.pool_size,
+        max_overflow=settings.database.max_overflow,
+        pool_pre_ping=True,
+        pool_recycle=settings.database.pool_recycle,
+        future=True,
+        connect_args={"connect_timeout": settings.database.connect_timeout},
+    )
+
+
+def get_engine() -> Engine:
+    """Return the shared SQLAlchemy engine, creating it on first use.
+
+    引擎（及 PyMySQL 方言）在首次查询时才创建，页面导入本模块不再付出这部分开销。
+    """
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = _create_engine()
     return _engine
 
 
 def query_db(sql: str, params: dict[str, Any] | None = None):
-    """Execute a parameterised SQL statement and return rows or metadata."""
+    """Execute a parameterised SQL statement and return rows or metadata.
+
+    每次调用的耗时、连接池等待与行数计入 :data:`query_metrics`。
+    """
     params = params or {}
     logger.debug("Executing query", extra={"sql": sql, "params": params})
+    started = time.perf_counter()
+    pool_wait_ms = 0.0
+    rows: list[dict[str, Any]] | None = None
+    error = False
     try:
-        with _engine.connect() as conn:
+        with get_engine().connect() as conn:
+            pool_wait_ms = (time.perf_counter() - started) * 1000
             result = conn.execute(text(sql), params)
             if result.returns_rows:
-                return [dict(r._mapping) for r in result]
+                rows = [dict(r._mapping) for r in result]
+                return rows
             return {"rowcount": result.rowcount}
     except SQLAlchemyError:
+        error = True
         logger.exception("Database query failed: %s", sql)
         raise
+    finally:
+        query_metrics.record_query(
+            sql,
+            params,
+            elapsed_ms=(time.perf_counter() - started) * 1000,
+            pool_wait_ms=pool_wait_ms,
+            rows=rows,
+            error=error,
+        )
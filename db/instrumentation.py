@@ -0,0 +1,249 @@
+"""In-process instrumentation for :func:`db.connection.query_db`.
+
+每条语句按指纹（去掉字面量、把 ``make_in_clause`` 展开的 ``:issue_0, :issue_1`` 折叠成
+``:issue_*`` 后的 SQL）聚合调用次数、耗时、连接池等待、行数与估算字节数，并按来源页面
+汇总；``cached_query`` 上报缓存调用与未命中。超过阈值的慢查询写日志，配置了
+``LOTTO_SLOW_QUERY_LOG`` 时另追加到 JSON Lines 文件。
+
+本模块不依赖 Streamlit：来源页面只在 Streamlit 已被导入时从脚本上下文读取。
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Mapping, Sequence
+
+logger = logging.getLogger(__name__)
+
+_IN_LIST = re.compile(r":([A-Za-z_]\w*?)_\d+(?:\s*,\s*:\1_\d+)*")
+_STRING = re.compile(r"'(?:[^'\\]|\\.)*'")
+_NUMBER = re.compile(r"(?<![\w:])\d+(?:\.\d+)?\b")
+_SPACE = re.compile(r"\s+")
+_POOL_THREAD = re.compile(r"_\d+$")
+
+_SAMPLE_ROWS = 64
+
+
+@lru_cache(maxsize=2048)
+def fingerprint(sql: str) -> tuple[str, str]:
+    """Return ``(fingerprint, normalised_sql)`` for a statement."""
+    normalised = _SPACE.sub(" ", sql).strip()
+    normalised = _IN_LIST.sub(r":\1_*", normalised)
+    normalised = _NUMBER.sub("?", _STRING.sub("?", normalised))
+    digest = hashlib.sha1(normalised.encode("utf-8")).hexdigest()[:12]
+    return digest, normalised
+
+
+def estimate_bytes(rows: Sequence[Mapping[str, Any]]) -> int:
+    """Approximate payload size, extrapolated from the first rows."""
+    if not rows:
+        return 0
+    sample = rows[:_SAMPLE_ROWS]
+    size = 0
+    for row in sample:
+        for value in row.values():
+            if value is None:
+                continue
+            if isinstance(value, (bytes, bytearray)):
+                size += len(value)
+            elif isinstance(value, str):
+                size += len(value.encode("utf-8"))
+            else:
+                size += 8
+    return round(size * len(rows) / len(sample))
+
+
+def current_source() -> str:
+    """Page that issued the query: script stem, or the thread name outside a script run.
+
+    线程池线程名（``homepage-loader_0``、``lotto-job_1``）去掉序号后按池汇总。
+    """
+    module = sys.modules.get("streamlit.runtime.scriptrunner_utils.script_run_context")
+    ctx = module.get_script_run_ctx(suppress_warning=True) if module is not None else None
+    if ctx is None:
+        return _POOL_THREAD.sub("", threading.current_thread().name)
+    try:
+        page = ctx.pages_manager.get_pages().get(ctx.page_script_hash) or {}
+        return Path(page.get("script_path") or ctx.main_script_path).stem
+    except Exception:  # pragma: no cover - Streamlit 内部接口变化时退化
+        return Path(ctx.main_script_path).stem
+
+
+@dataclass
+class StatementStats:
+    fingerprint: str
+    statement: str
+    calls: int = 0
+    errors: int = 0
+    total_ms: float = 0.0
+    max_ms: float = 0.0
+    pool_wait_ms: float = 0.0
+    rows: int = 0
+    bytes: int = 0
+    cache_calls: int = 0
+    cache_misses: int = 0
+    sources: Counter = field(default_factory=Counter)
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "fingerprint": self.fingerprint,
+            "statement": self.statement,
+            "calls": self.calls,
+            "errors": self.errors,
+            "total_ms": round(self.total_ms, 1),
+            "avg_ms": round(self.total_ms / self.calls, 1) if self.calls else 0.0,
+            "max_ms": round(self.max_ms, 1),
+            "pool_wait_ms": round(self.pool_wait_ms, 1),
+            "rows": self.rows,
+            "bytes": self.bytes,
+            "cache_calls": self.cache_calls,
+            "cache_misses": self.cache_misses,
+            "sources": dict(self.sources.most_common()),
+        }
+
+
+@dataclass
+class SourceStats:
+    source: str
+    calls: int = 0
+    total_ms: float = 0.0
+    rows: int = 0
+    bytes: int = 0
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "source": self.source,
+            "calls": self.calls,
+            "total_ms": round(self.total_ms, 1),
+            "rows": self.rows,
+            "bytes": self.bytes,
+        }
+
+
+class SlowQueryLog:
+    """Append slow statements to a JSON Lines file."""
+
+    def __init__(self, path: str | Path) -> None:
+        self.path = Path(path)
+        self._lock = threading.Lock()
+
+    def write(self, entry: Mapping[str, Any]) -> None:
+        line = json.dumps(entry, ensure_ascii=False, default=str)
+        try:
+            with self._lock:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                with self.path.open("a", encoding="utf-8") as handle:
+                    handle.write(line + "\n")
+        except OSError:
+            logger.warning("写入慢查询日志失败：%s", self.path, exc_info=True)
+
+
+class QueryMetrics:
+    """Thread-safe aggregation of query timings by statement fingerprint and source."""
+
+    def __init__(self, *, slow_ms: float = 1000.0, slow_log: SlowQueryLog | None = None) -> None:
+        self._lock = threading.Lock()
+        self._statements: dict[str, StatementStats] = {}
+        self._sources: dict[str, SourceStats] = {}
+        self.slow_ms = slow_ms
+        self.slow_log = slow_log
+        self.started_at = time.time()
+
+    def _statement(self, sql: str) -> StatementStats:
+        digest, normalised = fingerprint(sql)
+        stats = self._statements.get(digest)
+        if stats is None:
+            stats = self._statements[digest] = StatementStats(digest, normalised)
+        return stats
+
+    def record_query(
+        self,
+        sql: str,
+        params: Mapping[str, Any] | None,
+        *,
+        elapsed_ms: float,
+        pool_wait_ms: float = 0.0,
+        rows: Sequence[Mapping[str, Any]] | None = None,
+        error: bool = False,
+        source: str | None = None,
+    ) -> None:
+        source = source or current_source()
+        row_count = len(rows) if rows is not None else 0
+        nbytes = estimate_bytes(rows) if rows else 0
+        with self._lock:
+            stats = self._statement(sql)
+            stats.calls += 1
+            stats.errors += int(error)
+            stats.total_ms += elapsed_ms
+            stats.max_ms = max(stats.max_ms, elapsed_ms)
+            stats.pool_wait_ms += pool_wait_ms
+            stats.rows += row_count
+            stats.bytes += nbytes
+            stats.sources[source] += 1
+            per_source = self._sources.get(source)
+            if per_source is None:
+                per_source = self._sources[source] = SourceStats(source)
+            per_source.calls += 1
+            per_source.total_ms += elapsed_ms
+            per_source.rows += row_count
+            per_source.bytes += nbytes
+
+        if elapsed_ms >= self.slow_ms:
+            logger.warning(
+                "慢查询 %.0fms（%s，%s 行，来源 %s）：%s",
+                elapsed_ms,
+                stats.fingerprint,
+                row_count,
+                source,
+                stats.statement[:200],
+            )
+            if self.slow_log is not None:
+                self.slow_log.write(
+                    {
+                        "ts": time.strftime("%Y-%m-%d %H:%M:%S"),
+                        "elapsed_ms": round(elapsed_ms, 1),
+                        "pool_wait_ms": round(pool_wait_ms, 1),
+                        "fingerprint": stats.fingerprint,
+                        "rows": row_count,
+                        "bytes": nbytes,
+                        "error": error,
+                        "source": source,
+                        "sql": _SPACE.sub(" ", sql).strip(),
+                        "params": dict(params or {}),
+                    }
+                )
+
+    def record_cache_call(self, sql: str) -> None:
+        with self._lock:
+            self._statement(sql).cache_calls += 1
+
+    def record_cache_miss(self, sql: str) -> None:
+        with self._lock:
+            self._statement(sql).cache_misses += 1
+
+    def statements(self) -> list[dict[str, Any]]:
+        """Per-statement totals, most expensive first."""
+        with self._lock:
+            items = [stats.to_dict() for stats in self._statements.values()]
+        return sorted(items, key=lambda item: (-item["total_ms"], -item["cache_calls"]))
+
+    def sources(self) -> list[dict[str, Any]]:
+        with self._lock:
+            items = [stats.to_dict() for stats in self._sources.values()]
+        return sorted(items, key=lambda item: -item["total_ms"])
+
+    def reset(self) -> None:
+        with self._lock:
+            self._statements.clear()
+            self._sources.clear()
+            self.started_at = time.time()
@@ -0,0 +1,47 @@
+"""专家筛选核心：纯 Python / NumPy 接口，不依赖 Streamlit。
+
+- 多条件筛选（UserExpertFilterPlus）：:func:`run_filter` 与可保存的 :class:`FilterPipeline`；
+- 回溯未命中筛选（FilterTool_MissV2）：:class:`MissRule` / :func:`miss_filter`；
+- 命中统计选专家（UserExpertHitStat）：:func:`summarize_hit_stat` / :func:`select_experts`；
+- 推荐频次：:func:`digit_frequencies` / :func:`token_frequencies`。
+
+页面与 ``python -m filters`` 命令行共用这些函数；命令行的数据读取见 :mod:`filters.source`。
+"""
+
+from __future__ import annotations
+
+from utils.expert_filter import (
+    FilterOutcome,
+    FilterSession,
+    HitCondition,
+    NumberCondition,
+    PlanStep,
+    run_filter,
+)
+from utils.filter_pipeline import FilterPipeline, PipelineStore, StageCache, run_pipeline
+
+from .frequency import digit_frequencies, token_frequencies
+from .hit_stat import select_experts, split_last_hit, summarize_hit_stat
+from .miss import MISS_MODES, MissRule, miss_filter, miss_stats
+
+__all__ = [
+    "MISS_MODES",
+    "FilterOutcome",
+    "FilterPipeline",
+    "FilterSession",
+    "HitCondition",
+    "MissRule",
+    "NumberCondition",
+    "PipelineStore",
+    "PlanStep",
+    "StageCache",
+    "digit_frequencies",
+    "miss_filter",
+    "miss_stats",
+    "run_filter",
+    "run_pipeline",
+    "select_experts",
+    "split_last_hit",
+    "summarize_hit_stat",
+    "token_frequencies",
+]
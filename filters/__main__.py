@@ -0,0 +1,3 @@
+from filters.cli import main
+
+main()
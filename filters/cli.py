@@ -0,0 +1,282 @@
+"""专家筛选命令行：在 Streamlit 之外跑批量筛选，输出候选专家与数字频次。
+
+示例::
+
+    python -m filters pipeline --issue 2025100 --name 稳胆方案 --playtype 1
+    python -m filters miss --issue 2025100 --playtype 1 --lookback 5 --mode all_hit
+    python -m filters hit-stat --issue 2025098 --issue 2025099 --playtype 1 \\
+        --query-issue 2025100 --last hit --format csv --table frequencies
+
+``--format json``（默认）同时输出专家与频次；``csv`` 只输出 ``--table`` 指定的一张表。
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import sys
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Sequence
+
+import numpy as np
+import pandas as pd
+
+from config.settings import configure_logging
+from utils.expert_filter import run_filter
+from utils.filter_pipeline import FilterPipeline, PipelineStore
+from utils.numbers import digit_mask
+
+from . import source
+from .frequency import digit_frequencies, token_frequencies
+from .hit_stat import select_experts, split_last_hit, summarize_hit_stat
+from .miss import MISS_MODES, MissRule, miss_filter
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class FilterReport:
+    command: str
+    params: dict[str, Any]
+    experts: pd.DataFrame
+    frequencies: pd.DataFrame
+    elapsed_ms: float = 0.0
+    extra: dict[str, Any] = field(default_factory=dict)
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "command": self.command,
+            "params": self.params,
+            "elapsed_ms": self.elapsed_ms,
+            **self.extra,
+            "expert_count": len(self.experts),
+            "experts": self.experts.to_dict("records"),
+            "frequencies": self.frequencies.to_dict("records"),
+        }
+
+
+def _masks(numbers: pd.Series) -> np.ndarray:
+    values = numbers.fillna("").astype(str).to_numpy()
+    uniques, inverse = np.unique(values, return_inverse=True)
+    return np.fromiter((digit_mask(value) for value in uniques), dtype=np.int16)[inverse]
+
+
+def _experts(user_ids: Sequence[int], rows: pd.DataFrame, names: dict[int, str]) -> pd.DataFrame:
+    """One row per expert with nickname and their current-issue predictions."""
+    nick_map = source.nick_names(user_ids)
+    labels = rows.assign(
+        label=rows["playtype_id"].map(lambda pid: names.get(int(pid), str(pid)))
+        + ": "
+        + rows["numbers"].fillna("").astype(str)
+    )
+    joined = labels.groupby("user_id")["label"].agg(lambda values: " / ".join(sorted(set(values))))
+    return pd.DataFrame(
+        {
+            "user_id": [int(uid) for uid in user_ids],
+            "nick_name": [nick_map.get(int(uid), "未知") for uid in user_ids],
+            "predictions": [joined.get(uid, "") for uid in user_ids],
+        }
+    )
+
+
+def _load_pipeline(args: argparse.Namespace) -> FilterPipeline:
+    if args.file:
+        return FilterPipeline.from_json(Path(args.file).read_text(encoding="utf-8"))
+    pipeline = PipelineStore(args.store).load(args.name)
+    if pipeline is None:
+        raise SystemExit(f"未找到筛选方案：{args.name}")
+    return pipeline
+
+
+def run_pipeline_command(args: argparse.Namespace) -> FilterReport:
+    pipeline = _load_pipeline(args)
+    names = source.playtype_names()
+    current = source.predictions([args.issue])
+    history_issues = source.predicted_issues(before=args.issue, limit=args.history_limit)
+
+    def load_history(issues: list[str], playtype_ids: list[int]):
+        return source.predictions(issues, playtype_ids), source.open_codes(issues)
+
+    current = current.dropna(subset=["user_id", "playtype_id"])
+    outcome = run_filter(
+        current["user_id"].to_numpy(dtype=np.int64),
+        current["playtype_id"].to_numpy(dtype=np.int64),
+        _masks(current["numbers"]),
+        pipeline.number_conditions,
+        pipeline.hit_conditions,
+        history_issues=history_issues,
+        load_history=load_history,
+        playtype_names=names,
+    )
+    kept = current[current["user_id"].isin(outcome.user_ids)]
+    if args.playtype:
+        kept = kept[kept["playtype_id"].isin(args.playtype)]
+    user_ids = outcome.user_ids.tolist()
+    return FilterReport(
+        command="pipeline",
+        params={"issue": args.issue, "pipeline": pipeline.to_dict(), "playtype": args.playtype},
+        experts=_experts(user_ids, kept, names),
+        frequencies=digit_frequencies(kept["numbers"]),
+        extra={"plan": [asdict(step) for step in outcome.steps]},
+    )
+
+
+def run_miss_command(args: argparse.Namespace) -> FilterReport:
+    names = source.playtype_names()
+    current = source.predictions([args.issue], args.playtype)
+    if not args.keep_duplicates:
+        current = current.drop_duplicates(["user_id", "playtype_id", "numbers"])
+
+    window: list[str] = []
+    if not args.no_filter:
+        ref_issue = args.ref_issue or next(iter(source.predicted_issues(before=args.issue)), None)
+        if ref_issue:
+            window = source.predicted_issues(before=ref_issue, inclusive=True, limit=args.lookback)
+        history = source.predictions(window, args.ref_playtype or args.playtype)
+        rule = MissRule(args.mode, args.low, args.high)
+        kept_users = miss_filter(
+            history, source.open_codes(window), names, rule, min_rows=args.lookback, issues=window
+        )
+        current = current[current["user_id"].isin(kept_users)]
+
+    user_ids = sorted(int(uid) for uid in current["user_id"].unique())
+    return FilterReport(
+        command="miss",
+        params={
+            "issue": args.issue,
+            "playtype": args.playtype,
+            "ref_playtype": args.ref_playtype or args.playtype,
+            "window": window,
+            "mode": None if args.no_filter else args.mode,
+            "low": args.low,
+            "high": args.high,
+        },
+        experts=_experts(user_ids, current, names),
+        frequencies=token_frequencies(current["numbers"]),
+    )
+
+
+def run_hit_stat_command(args: argparse.Namespace) -> FilterReport:
+    names = source.playtype_names()
+    summary = summarize_hit_stat(source.hit_summary(args.issue, args.playtype))
+
+    allowed = None
+    if args.last != "any":
+        if not args.query_issue:
+            raise SystemExit("--last 需要同时指定 --query-issue")
+        previous = source.previous_expert_issue(args.query_issue)
+        hit_users, miss_users = (
+            split_last_hit(source.hit_stat_rows(previous, args.playtype))
+            if previous
+            else (set(), set())
+        )
+        allowed = hit_users if args.last == "hit" else miss_users
+    selected = select_experts(
+        summary,
+        hit_counts=args.hit_count or None,
+        hit_number_counts=args.hit_number_count or None,
+        allowed_users=allowed,
+    )
+
+    experts = summary[summary["user_id"].isin(selected)].reset_index(drop=True)
+    nick_map = source.nick_names(selected.tolist())
+    experts.insert(1, "nick_name", experts["user_id"].map(nick_map).fillna("未知"))
+    frequencies = digit_frequencies([])
+    if args.query_issue:
+        rows = source.predictions([args.query_issue], [args.playtype])
+        frequencies = digit_frequencies(rows[rows["user_id"].isin(selected)]["numbers"])
+    return FilterReport(
+        command="hit-stat",
+        params={
+            "issue": args.issue,
+            "playtype": args.playtype,
+            "playtype_name": names.get(args.playtype),
+            "query_issue": args.query_issue,
+            "last": args.last,
+        },
+        experts=experts,
+        frequencies=frequencies,
+    )
+
+
+def write_report(report: FilterReport, *, fmt: str, table: str, output: str | None) -> None:
+    if fmt == "json":
+        text = json.dumps(report.to_dict(), ensure_ascii=False, indent=2, default=str)
+    else:
+        frame = report.experts if table == "experts" else report.frequencies
+        text = frame.to_csv(index=False)
+    if output:
+        Path(output).write_text(text if text.endswith("\n") else text + "\n", encoding="utf-8")
+    else:
+        sys.stdout.write(text if text.endswith("\n") else text + "\n")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="专家筛选命令行（JSON / CSV 输出）")
+    parser.add_argument("--format", choices=["json", "csv"], default="json")
+    parser.add_argument(
+        "--table", choices=["experts", "frequencies"], default="experts", help="CSV 输出的表"
+    )
+    parser.add_argument("--output", help="输出文件，默认写到标准输出")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    pipeline = commands.add_parser("pipeline", help="执行已保存的筛选方案（UserExpertFilterPlus）")
+    pipeline.add_argument("--issue", required=True)
+    group = pipeline.add_mutually_exclusive_group(required=True)
+    group.add_argument("--name", help="logs/filter_pipelines.json 中的方案名")
+    group.add_argument("--file", help="单个方案的 JSON 文件")
+    pipeline.add_argument("--store", help="方案存储文件路径")
+    pipeline.add_argument(
+        "--playtype", type=int, action="append", help="统计频次的玩法，可多次指定"
+    )
+    pipeline.add_argument("--history-limit", type=int, default=200, help="命中条件可回溯的期数")
+    pipeline.set_defaults(handler=run_pipeline_command)
+
+    miss = commands.add_parser("miss", help="回溯未命中筛选（FilterTool_MissV2）")
+    miss.add_argument("--issue", required=True)
+    miss.add_argument("--playtype", type=int, action="append", required=True)
+    miss.add_argument("--ref-issue", help="回溯截至期号，默认为上一期")
+    miss.add_argument(
+        "--ref-playtype", type=int, action="append", help="回溯玩法，默认同 --playtype"
+    )
+    miss.add_argument("--lookback", type=int, default=1)
+    miss.add_argument("--mode", choices=MISS_MODES, default="max")
+    miss.add_argument("--low", type=int, default=0)
+    miss.add_argument("--high", type=int, default=0)
+    miss.add_argument("--keep-duplicates", action="store_true", help="不去重同专家同玩法记录")
+    miss.add_argument("--no-filter", action="store_true", help="只统计频次，不做回溯筛选")
+    miss.set_defaults(handler=run_miss_command)
+
+    hit_stat = commands.add_parser("hit-stat", help="按命中统计选专家（UserExpertHitStat）")
+    hit_stat.add_argument("--issue", action="append", required=True, help="统计期号，可多次指定")
+    hit_stat.add_argument("--playtype", type=int, required=True)
+    hit_stat.add_argument("--hit-count", type=int, action="append", help="保留的命中期数")
+    hit_stat.add_argument(
+        "--hit-number-count", type=int, action="append", help="保留的命中数字数量"
+    )
+    hit_stat.add_argument("--query-issue", help="统计推荐数字频次的期号")
+    hit_stat.add_argument("--last", choices=["any", "hit", "miss"], default="any")
+    hit_stat.set_defaults(handler=run_hit_stat_command)
+    return parser
+
+
+def main(argv: Sequence[str] | None = None) -> None:
+    configure_logging()
+    args = build_parser().parse_args(argv)
+    started = time.perf_counter()
+    report = args.handler(args)
+    report.elapsed_ms = round((time.perf_counter() - started) * 1000, 3)
+    logger.info(
+        "%s 筛选完成：%s 位专家，用时 %.1fms",
+        report.command,
+        len(report.experts),
+        report.elapsed_ms,
+    )
+    write_report(report, fmt=args.format, table=args.table, output=args.output)
+
+
+if __name__ == "__main__":
+    main()
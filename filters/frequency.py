@@ -0,0 +1,48 @@
+"""推荐号码频次统计。
+
+同一推荐串只解析一次再按出现次数加权，结果按次数降序、同次数按号码升序。
+"""
+
+from __future__ import annotations
+
+from collections import Counter
+from typing import Iterable
+
+import pandas as pd
+
+from utils.numbers import normalize_code, parse_tokens
+
+FREQUENCY_COLUMNS = ["value", "count"]
+
+
+def _weighted(numbers: Iterable[str | None]) -> pd.Series:
+    return pd.Series(list(numbers), dtype=object).fillna("").astype(str).value_counts(sort=False)
+
+
+def _to_frame(counter: Counter[str]) -> pd.DataFrame:
+    frame = pd.DataFrame(list(counter.items()), columns=FREQUENCY_COLUMNS)
+    if frame.empty:
+        return frame
+    frame["count"] = frame["count"].astype("int64")
+    return frame.sort_values(["count", "value"], ascending=[False, True], ignore_index=True)
+
+
+def digit_frequencies(numbers: Iterable[str | None]) -> pd.DataFrame:
+    """Occurrences of each single digit across all tokens (``value`` / ``count``)."""
+    counter: Counter[str] = Counter()
+    for value, times in _weighted(numbers).items():
+        for token in parse_tokens(value):
+            for char in token:
+                counter[char] += int(times)
+    return _to_frame(counter)
+
+
+def token_frequencies(numbers: Iterable[str | None]) -> pd.DataFrame:
+    """Occurrences of each normalised token (``value`` / ``count``)."""
+    counter: Counter[str] = Counter()
+    for value, times in _weighted(numbers).items():
+        for token in parse_tokens(value):
+            key = normalize_code(token) or token.strip()
+            if key:
+                counter[key] += int(times)
+    return _to_frame(counter)
@@ -0,0 +1,65 @@
+"""命中统计汇总与按命中条件选专家（UserExpertHitStat）。
+
+输入为 ``expert_hit_stat`` 按专家汇总后的行（``user_id, total_count, hit_count,
+hit_number_count``）；命中率沿用页面口径：命中数字数量 / 预测期数。
+"""
+
+from __future__ import annotations
+
+from typing import Iterable, Mapping, Sequence
+
+import numpy as np
+import pandas as pd
+
+HIT_STAT_COLUMNS = ["user_id", "total_count", "hit_count", "hit_number_count", "hit_rate"]
+
+
+def summarize_hit_stat(rows: pd.DataFrame | Sequence[Mapping[str, object]]) -> pd.DataFrame:
+    """Typed summary (:data:`HIT_STAT_COLUMNS`) sorted by ``hit_rate`` descending."""
+    frame = pd.DataFrame(rows)
+    if frame.empty:
+        return pd.DataFrame(columns=HIT_STAT_COLUMNS)
+    frame = frame.dropna(subset=["user_id"])
+    summary = pd.DataFrame({"user_id": frame["user_id"].astype("int64")})
+    for column in ("total_count", "hit_count", "hit_number_count"):
+        summary[column] = pd.to_numeric(frame[column], errors="coerce").fillna(0).astype("int64")
+    total = summary["total_count"].to_numpy()
+    rate = np.divide(
+        summary["hit_number_count"].to_numpy(dtype=float),
+        total,
+        out=np.zeros(len(summary)),
+        where=total != 0,
+    )
+    summary["hit_rate"] = np.round(rate, 4)
+    return summary.sort_values("hit_rate", ascending=False, kind="stable", ignore_index=True)
+
+
+def split_last_hit(rows: Iterable[Mapping[str, object]]) -> tuple[set[int], set[int]]:
+    """``(命中专家, 未命中专家)`` from one issue's ``user_id / hit_count`` rows."""
+    hit_users: set[int] = set()
+    miss_users: set[int] = set()
+    for row in rows:
+        target = hit_users if row.get("hit_count", 0) else miss_users
+        target.add(int(row["user_id"]))
+    return hit_users, miss_users
+
+
+def select_experts(
+    summary: pd.DataFrame,
+    *,
+    hit_counts: Iterable[int] | None = None,
+    hit_number_counts: Iterable[int] | None = None,
+    allowed_users: Iterable[int] | None = None,
+) -> np.ndarray:
+    """User ids of ``summary`` rows matching every given filter, in summary order.
+
+    ``None`` 表示该项不过滤；``allowed_users`` 一般为上期命中 / 未命中专家集合。
+    """
+    keep = np.ones(len(summary), dtype=bool)
+    if hit_counts is not None:
+        keep &= summary["hit_count"].isin(list(hit_counts)).to_numpy()
+    if hit_number_counts is not None:
+        keep &= summary["hit_number_count"].isin(list(hit_number_counts)).to_numpy()
+    if allowed_users is not None:
+        keep &= summary["user_id"].isin(list(allowed_users)).to_numpy()
+    return summary["user_id"].to_numpy(dtype=np.int64)[keep]
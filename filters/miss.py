@@ -0,0 +1,112 @@
+"""回溯未命中筛选（FilterTool_MissV2）。
+
+回溯窗口内每位专家每期取一条推荐（同期同玩法同号码先去重），用
+:func:`utils.numbers.evaluate_hit_rule` 按玩法向量化判定命中；未开奖的期不计入。
+推荐条数少于 ``min_rows`` 的专家不参与筛选（与原页面「记录数 < 回溯期数则跳过」一致）。
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Iterable, Mapping
+
+import numpy as np
+import pandas as pd
+
+from utils.numbers import (
+    classify_hit_rule,
+    digit_mask,
+    evaluate_hit_rule,
+    normalize_code,
+    open_code_arrays,
+)
+
+# max: 未命中 ≤ high；range: low ≤ 未命中 ≤ high；all_hit: 未命中 = 0；all_miss: 命中 = 0
+MISS_MODES = ("max", "range", "all_hit", "all_miss")
+MISS_STAT_COLUMNS = ["user_id", "rows", "evaluated", "hit_count", "miss_count"]
+
+
+@dataclass(frozen=True)
+class MissRule:
+    mode: str = "max"
+    low: int = 0
+    high: int = 0
+
+    def __post_init__(self) -> None:
+        if self.mode not in MISS_MODES:
+            raise ValueError(f"Unsupported miss mode: {self.mode}")
+
+    def accepts(self, stats: pd.DataFrame) -> np.ndarray:
+        misses = stats["miss_count"].to_numpy()
+        if self.mode == "max":
+            return misses <= self.high
+        if self.mode == "range":
+            return (misses >= self.low) & (misses <= self.high)
+        if self.mode == "all_hit":
+            return misses == 0
+        return stats["hit_count"].to_numpy() == 0
+
+
+def miss_stats(
+    history: pd.DataFrame,
+    open_codes: Mapping[str, str | None],
+    playtype_names: Mapping[int, str],
+    *,
+    issues: Iterable[str] | None = None,
+) -> pd.DataFrame:
+    """Per-expert row / hit / miss counts (:data:`MISS_STAT_COLUMNS`) over ``history``.
+
+    ``history`` 需含 ``issue_name, playtype_id, user_id, numbers``；``issues`` 限定回溯期号。
+    """
+    if history.empty:
+        return pd.DataFrame(columns=MISS_STAT_COLUMNS)
+    frame = history.dropna(subset=["user_id", "playtype_id"]).assign(
+        issue_name=lambda df: df["issue_name"].astype(str),
+        playtype_id=lambda df: df["playtype_id"].astype("int64"),
+        numbers=lambda df: df["numbers"].fillna("").astype(str),
+    )
+    if issues is not None:
+        frame = frame[frame["issue_name"].isin({str(issue) for issue in issues})]
+    frame = frame.drop_duplicates(["user_id", "issue_name", "playtype_id", "numbers"])
+    rows = frame.groupby("user_id").size()
+
+    first = frame.drop_duplicates(["user_id", "issue_name"])
+    codes = first["issue_name"].map(lambda issue: normalize_code(open_codes.get(issue)))
+    first = first[codes.to_numpy() != ""]
+    codes = codes[codes != ""]
+    numbers = first["numbers"].to_numpy()
+    uniques, inverse = np.unique(numbers, return_inverse=True) if len(numbers) else ([], [])
+    masks = np.fromiter((digit_mask(value) for value in uniques), dtype=np.int16)[inverse]
+    open_masks, open_positions = open_code_arrays(codes.tolist())
+    playtypes = first["playtype_id"].to_numpy()
+    hits = np.zeros(len(first), dtype=bool)
+    for playtype_id in np.unique(playtypes):
+        selector = playtypes == playtype_id
+        rule = classify_hit_rule(playtype_names.get(int(playtype_id), str(playtype_id)))
+        hits[selector] = evaluate_hit_rule(
+            rule, masks[selector], open_masks[selector], open_positions[selector]
+        )
+
+    evaluated = first.assign(hit=hits).groupby("user_id")["hit"].agg(["size", "sum"])
+    stats = pd.DataFrame({"user_id": rows.index, "rows": rows.to_numpy()})
+    stats["evaluated"] = stats["user_id"].map(evaluated["size"]).fillna(0).astype("int64")
+    stats["hit_count"] = stats["user_id"].map(evaluated["sum"]).fillna(0).astype("int64")
+    stats["miss_count"] = stats["evaluated"] - stats["hit_count"]
+    return stats[MISS_STAT_COLUMNS]
+
+
+def miss_filter(
+    history: pd.DataFrame,
+    open_codes: Mapping[str, str | None],
+    playtype_names: Mapping[int, str],
+    rule: MissRule,
+    *,
+    min_rows: int = 1,
+    issues: Iterable[str] | None = None,
+) -> np.ndarray:
+    """User ids kept by ``rule``, ascending."""
+    stats = miss_stats(history, open_codes, playtype_names, issues=issues)
+    if stats.empty:
+        return np.array([], dtype=np.int64)
+    kept = stats[(stats["rows"].to_numpy() >= int(min_rows)) & rule.accepts(stats)]
+    return np.sort(kept["user_id"].to_numpy(dtype=np.int64))
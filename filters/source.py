@@ -0,0 +1,120 @@
+"""筛选命令行使用的数据读取，直接走 :func:`db.connection.query_db`，不依赖 Streamlit 缓存。"""
+
+from __future__ import annotations
+
+from typing import Iterable, Sequence
+
+import pandas as pd
+
+from db.connection import query_db
+from utils.sql import make_in_clause
+
+PREDICTION_COLUMNS = ["issue_name", "playtype_id", "user_id", "numbers"]
+
+
+def playtype_names() -> dict[int, str]:
+    rows = query_db("SELECT playtype_id, playtype_name FROM playtype_dict")
+    return {int(row["playtype_id"]): str(row["playtype_name"]) for row in rows}
+
+
+def predicted_issues(
+    *, before: str | None = None, inclusive: bool = False, limit: int = 200
+) -> list[str]:
+    """Issues with predictions, newest first; ``before`` 只取该期号之前（``inclusive`` 含本期）的期。"""
+    operator = "<=" if inclusive else "<"
+    condition = f"WHERE issue_name {operator} :before" if before else ""
+    rows = query_db(
+        f"""
+        SELECT DISTINCT issue_name
+        FROM expert_predictions
+        {condition}
+        ORDER BY issue_name DESC
+        LIMIT :limit
+        """,
+        {"before": before, "limit": int(limit)} if before else {"limit": int(limit)},
+    )
+    return [str(row["issue_name"]) for row in rows]
+
+
+def predictions(issues: Sequence[str], playtype_ids: Iterable[int] | None = None) -> pd.DataFrame:
+    wanted = None if playtype_ids is None else [int(pid) for pid in playtype_ids]
+    if not issues or wanted == []:
+        return pd.DataFrame(columns=PREDICTION_COLUMNS)
+    clause, params = make_in_clause("issue_name", issues, "issue")
+    conditions = [clause]
+    if wanted is not None:
+        playtype_clause, playtype_params = make_in_clause("playtype_id", wanted, "pt")
+        conditions.append(playtype_clause)
+        params.update(playtype_params)
+    rows = query_db(
+        f"""
+        SELECT {", ".join(PREDICTION_COLUMNS)}
+        FROM expert_predictions
+        WHERE {" AND ".join(conditions)}
+        """,
+        params,
+    )
+    return pd.DataFrame(rows, columns=PREDICTION_COLUMNS)
+
+
+def open_codes(issues: Sequence[str]) -> dict[str, str | None]:
+    if not issues:
+        return {}
+    clause, params = make_in_clause("issue_name", issues, "issue")
+    rows = query_db(f"SELECT issue_name, open_code FROM lottery_results WHERE {clause}", params)
+    return {str(row["issue_name"]): row.get("open_code") for row in rows}
+
+
+def hit_summary(issues: Sequence[str], playtype_id: int) -> list[dict[str, object]]:
+    if not issues:
+        return []
+    clause, params = make_in_clause("issue_name", issues, "issue")
+    params["playtype"] = int(playtype_id)
+    return query_db(
+        f"""
+        SELECT user_id,
+               SUM(total_count) AS total_count,
+               SUM(hit_count) AS hit_count,
+               SUM(hit_number_count) AS hit_number_count
+        FROM expert_hit_stat
+        WHERE {clause} AND playtype_id = :playtype
+        GROUP BY user_id
+        """,
+        params,
+    )
+
+
+def hit_stat_rows(issue: str, playtype_id: int) -> list[dict[str, object]]:
+    return query_db(
+        """
+        SELECT user_id, hit_count
+        FROM expert_hit_stat
+        WHERE issue_name = :issue AND playtype_id = :playtype
+        """,
+        {"issue": issue, "playtype": int(playtype_id)},
+    )
+
+
+def previous_expert_issue(issue: str) -> str | None:
+    """上一期（命中统计或推荐任一存在），与 UserExpertHitStat 的查询期号列表一致。"""
+    rows = query_db(
+        """
+        SELECT MAX(issue_name) AS issue_name
+        FROM (
+            SELECT issue_name FROM expert_hit_stat WHERE issue_name < :issue
+            UNION
+            SELECT issue_name FROM expert_predictions WHERE issue_name < :issue
+        ) AS merged
+        """,
+        {"issue": issue},
+    )
+    return str(rows[0]["issue_name"]) if rows and rows[0]["issue_name"] else None
+
+
+def nick_names(user_ids: Iterable[int]) -> dict[int, str]:
+    ids = [int(uid) for uid in user_ids]
+    if not ids:
+        return {}
+    clause, params = make_in_clause("user_id", ids, "uid")
+    rows = query_db(f"SELECT user_id, nick_name FROM expert_info WHERE {clause}", params)
+    return {int(row["user_id"]): row.get("nick_name") or "未知" for row in rows}
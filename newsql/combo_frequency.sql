@@ -0,0 +1,25 @@
+-- ----------------------------
+-- Table structure for combo_frequency
+-- 组合热度立方体：每期每玩法去重后的规范组合（号码拆分排序拼接）及推荐该组合的专家数。
+-- 由 collector/combo_cube.py 在推荐采集写库后按期维护，供 NumberAnalysis 跨期热度趋势使用
+-- ----------------------------
+CREATE TABLE IF NOT EXISTS `combo_frequency`  (
+  `issue_name` varchar(50) CHARACTER SET utf8mb4 COLLATE utf8mb4_general_ci NOT NULL COMMENT '期号',
+  `playtype_id` int NOT NULL COMMENT '玩法ID',
+  `combo_key` varchar(64) CHARACTER SET utf8mb4 COLLATE utf8mb4_general_ci NOT NULL COMMENT '规范组合',
+  `expert_count` int NOT NULL DEFAULT 0 COMMENT '推荐专家数',
+  PRIMARY KEY (`issue_name`, `playtype_id`, `combo_key`) USING BTREE,
+  INDEX `idx_playtype_issue`(`playtype_id`, `issue_name`) USING BTREE
+) ENGINE = InnoDB CHARACTER SET = utf8mb4 COLLATE = utf8mb4_general_ci COMMENT = '组合热度立方体' ROW_FORMAT = DYNAMIC;
+
+-- ----------------------------
+-- Table structure for combo_frequency_overflow
+-- 组合长度超过 64 字符（如直选多注）的推荐不入 combo_frequency；这里记录被截掉组合的
+-- (期号, 玩法) 及截掉的组合数，NumberAnalysis 单期统计对这些玩法回退到现算
+-- ----------------------------
+CREATE TABLE IF NOT EXISTS `combo_frequency_overflow`  (
+  `issue_name` varchar(50) CHARACTER SET utf8mb4 COLLATE utf8mb4_general_ci NOT NULL COMMENT '期号',
+  `playtype_id` int NOT NULL COMMENT '玩法ID',
+  `dropped_count` int NOT NULL DEFAULT 0 COMMENT '未入立方体的组合数',
+  PRIMARY KEY (`issue_name`, `playtype_id`) USING BTREE
+) ENGINE = InnoDB CHARACTER SET = utf8mb4 COLLATE = utf8mb4_general_ci COMMENT = '组合热度立方体溢出记录' ROW_FORMAT = DYNAMIC;
@@ -0,0 +1,17 @@
+-- ----------------------------
+-- Table structure for issue_catalog
+-- 每期一行的期号目录：本期有推荐的玩法、专家数、推荐条数、是否已开奖、是否已有命中统计。
+-- 由 collector/issue_catalog.py 在各采集脚本写库后增量维护，供页面期号 / 玩法选择器使用，
+-- 避免对 expert_predictions / expert_hit_stat 做全表 DISTINCT 扫描
+-- ----------------------------
+CREATE TABLE IF NOT EXISTS `issue_catalog`  (
+  `issue_name` varchar(50) CHARACTER SET utf8mb4 COLLATE utf8mb4_general_ci NOT NULL COMMENT '期号',
+  `playtype_ids` text CHARACTER SET utf8mb4 COLLATE utf8mb4_general_ci NULL COMMENT '有推荐的玩法ID，逗号分隔',
+  `expert_count` int NOT NULL DEFAULT 0 COMMENT '推荐专家数',
+  `row_count` int NOT NULL DEFAULT 0 COMMENT '推荐条数',
+  `has_result` tinyint NOT NULL DEFAULT 0 COMMENT '是否已有开奖记录',
+  `has_hit_stat` tinyint NOT NULL DEFAULT 0 COMMENT '是否已有命中统计',
+  `hit_stat_playtype_ids` text CHARACTER SET utf8mb4 COLLATE utf8mb4_general_ci NULL COMMENT '有命中统计的玩法ID，逗号分隔',
+  `updated_at` timestamp NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+  PRIMARY KEY (`issue_name`) USING BTREE
+) ENGINE = InnoDB CHARACTER SET = utf8mb4 COLLATE = utf8mb4_general_ci COMMENT = '期号目录' ROW_FORMAT = DYNAMIC;
@@ -0,0 +1,16 @@
+-- ----------------------------
+-- Table structure for red_val_dist
+-- red_val_list_v2 中 7 个 *_count_map JSON 字段展开后的长表，
+-- 由 collector/red_val_dist.py 维护，供跨期分布统计与走势图使用
+-- ----------------------------
+CREATE TABLE IF NOT EXISTS `red_val_dist`  (
+  `issue_name` varchar(50) CHARACTER SET utf8mb4 COLLATE utf8mb4_general_ci NOT NULL COMMENT '期号',
+  `playtype_id` int NOT NULL COMMENT '玩法ID',
+  `type` tinyint NOT NULL COMMENT '排序类型（同 red_val_list_v2.type）',
+  `metric` varchar(40) CHARACTER SET utf8mb4 COLLATE utf8mb4_general_ci NOT NULL COMMENT '分布字段，如 hit_count / serial_hit_count',
+  `bucket` int NOT NULL COMMENT '分布键（次数）',
+  `expert_count` int NOT NULL DEFAULT 0 COMMENT '该键对应的专家人数',
+  `rank_count` int NULL DEFAULT NULL COMMENT '参与排名的专家总数',
+  PRIMARY KEY (`issue_name`, `playtype_id`, `type`, `metric`, `bucket`) USING BTREE,
+  INDEX `idx_red_val_dist_metric`(`playtype_id` ASC, `type` ASC, `metric` ASC, `issue_name` ASC) USING BTREE
+) ENGINE = InnoDB CHARACTER SET = utf8mb4 COLLATE = utf8mb4_general_ci COMMENT = '选号分布V2-展开统计' ROW_FORMAT = DYNAMIC;
@@ -1,15 +1,17 @@
 from __future__ import annotations
 
-import altair as alt
 import pandas as pd
 import streamlit as st
 
 from db.connection import query_db
 from utils.cache import cached_query
-from utils.data_access import fetch_playtypes_for_issue
+from utils.data_access import fetch_playtypes_for_issue, load_issue_bundle
+from utils.lazy import lazy_import
 from utils.sql import make_in_clause
 from utils.ui import issue_picker, playtype_picker, render_open_info
 
+alt = lazy_import("altair")
+
 st.set_page_config(page_title="Lotto AI", layout="wide")
 
 st.header("Expert Hit Top - 本期命中榜")
@@ -43,27 +45,17 @@ if not selected_playtypes:
     st.warning("请至少选择一个玩法。")
     st.stop()
 
-playtype_clause, playtype_params = make_in_clause("p.playtype_id", selected_playtypes, "pt")
-
-sql_predictions = f"""
-    SELECT p.user_id, p.playtype_id, p.numbers
-    FROM expert_predictions p
-    WHERE p.issue_name = :issue
-      AND {playtype_clause}
-"""
-params = {"issue": selected_issue, **playtype_params}
-
 try:
-    prediction_rows = cached_query(query_db, sql_predictions, params=params, ttl=120)
+    bundle = load_issue_bundle(selected_issue, strict=True)
 except Exception as exc:
     st.warning(f"加载本期推荐失败：{exc}")
-    prediction_rows = []
+    st.stop()
 
-if not prediction_rows:
+prediction_df = bundle.for_playtypes(selected_playtypes).to_frame()
+if prediction_df.empty:
     st.info("当前期暂无推荐数据。")
     st.stop()
 
-prediction_df = pd.DataFrame(prediction_rows)
 prediction_df["playtype_name"] = prediction_df["playtype_id"].map(playtype_map)
 
 numbers_map = (
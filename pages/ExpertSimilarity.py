@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+import pandas as pd
+import streamlit as st
+
+from utils.data_access import fetch_playtypes_for_issue, fetch_recent_issues
+from utils.similarity import (
+    load_expert_vectors,
+    mask_density,
+    nearest_neighbors,
+    pairwise_similarity,
+    top_pairs,
+)
+from utils.ui import issue_picker, playtype_picker
+
+st.set_page_config(page_title="专家相似度", layout="wide")
+st.header("ExpertSimilarity - 专家推荐相似度 / 跟单检测")
+
+selected_issue = issue_picker(
+    "expert_similarity_issue",
+    mode="single",
+    label="截止期号",
+)
+if not selected_issue:
+    st.stop()
+
+playtypes_df = fetch_playtypes_for_issue(selected_issue)
+if playtypes_df.empty:
+    st.info("当前期未找到可用玩法。")
+    st.stop()
+
+playtype_map = {int(row.playtype_id): row.playtype_name for row in playtypes_df.itertuples()}
+raw_playtypes = playtype_picker(
+    "expert_similarity_playtypes",
+    mode="multi",
+    label="玩法",
+    include=[str(pid) for pid in playtype_map.keys()],
+    default=[str(next(iter(playtype_map)))],
+)
+selected_playtypes = [int(pid) for pid in raw_playtypes]
+if not selected_playtypes:
+    st.warning("请至少选择一个玩法。")
+    st.stop()
+
+col_window, col_metric, col_overlap = st.columns(3)
+with col_window:
+    window = st.select_slider("统计期数", options=[10, 30, 50, 100, 200], value=50)
+with col_metric:
+    metric = st.radio(
+        "相似度",
+        options=["jaccard", "cosine"],
+        format_func=lambda name: "Jaccard" if name == "jaccard" else "余弦",
+        horizontal=True,
+    )
+with col_overlap:
+    min_overlap = st.number_input(
+        "最少共同推荐槽位",
+        min_value=0,
+        value=max(window // 5, 1),
+        step=1,
+        help="两位专家在同一期同一玩法都有推荐记为一个共同槽位，低于该值的专家对不参与比较。",
+    )
+
+window_issues = [
+    issue for issue in fetch_recent_issues(limit=window + 50) if issue <= selected_issue
+][:window]
+
+with st.spinner("正在构建专家推荐向量..."):
+    vectors = load_expert_vectors(window_issues, selected_playtypes)
+
+if len(vectors) < 2:
+    st.info("所选范围内的专家不足两位，无法计算相似度。")
+    st.stop()
+
+st.caption(
+    f"共 {len(vectors)} 位专家，{len(window_issues)} 期 × {len(selected_playtypes)} 个玩法，"
+    f"{len(vectors.slots)} 个推荐槽位。"
+)
+
+st.subheader("🔗 疑似跟单专家对")
+threshold = st.slider("相似度阈值", min_value=0.5, max_value=1.0, value=0.9, step=0.01)
+similarity, shared = pairwise_similarity(vectors, metric=metric, min_overlap=int(min_overlap))
+pairs_df = top_pairs(similarity, shared, vectors.user_ids, threshold=threshold)
+if pairs_df.empty:
+    st.info("没有达到阈值的专家对。")
+else:
+    density = pd.Series(mask_density(vectors), index=vectors.user_ids).round(2)
+    pairs_df["avg_digits_a"] = pairs_df["user_a"].map(density)
+    pairs_df["avg_digits_b"] = pairs_df["user_b"].map(density)
+    st.dataframe(
+        pairs_df.rename(
+            columns={
+                "user_a": "专家A",
+                "user_b": "专家B",
+                "similarity": "相似度",
+                "shared_slots": "共同槽位",
+                "avg_digits_a": "A平均号码数",
+                "avg_digits_b": "B平均号码数",
+            }
+        ),
+        hide_index=True,
+        use_container_width=True,
+    )
+    st.caption("平均号码数越接近 10，推荐越宽泛，相似度天然越高，需结合判断。")
+
+st.subheader("🔍 相似专家查询")
+user_input = st.text_input("👤 输入专家 user_id")
+if user_input.strip():
+    try:
+        query_user = int(user_input.strip())
+    except ValueError:
+        st.warning("user_id 必须为数字。")
+        st.stop()
+    top_k = st.slider("显示数量", min_value=5, max_value=100, value=20, step=5)
+    neighbors_df = nearest_neighbors(
+        vectors, query_user, k=top_k, metric=metric, min_overlap=int(min_overlap)
+    )
+    if neighbors_df.empty:
+        st.info("该专家在所选范围内没有推荐记录或没有相似专家。")
+    else:
+        st.dataframe(
+            neighbors_df.rename(
+                columns={"user_id": "专家", "similarity": "相似度", "shared_slots": "共同槽位"}
+            ),
+            hide_index=True,
+            use_container_width=True,
+        )
@@ -1,16 +1,24 @@
 from __future__ import annotations
 
-import collections
-
 import pandas as pd
 import streamlit as st
 
 from db.connection import query_db
+from filters import MISS_MODES, MissRule, miss_filter, token_frequencies
+from utils.cache_control import get_cache_token
 from utils.charts import render_digit_frequency_chart
 from utils.data_access import fetch_lottery_infos, fetch_playtypes_for_issue, fetch_predictions
-from utils.numbers import match_prediction_hit, normalize_code, parse_tokens
+from utils.jobs import ProgressFn, job_key
+from utils.numbers import normalize_code
 from utils.sql import make_in_clause
-from utils.ui import issue_picker, playtype_picker, render_open_info
+from utils.ui import (
+    current_job,
+    issue_picker,
+    playtype_picker,
+    render_job,
+    render_open_info,
+    submit_job,
+)
 
 st.set_page_config(page_title="Lotto AI", layout="wide")
 
@@ -132,19 +140,132 @@ with st.expander("🔎 筛除连续未命中AI智体设置", expanded=True):
     )
     ref_playtypes = [int(pid) for pid in raw_ref_playtypes]
 
+    miss_mode_labels = {
+        "max": f"保留未命中次数 ≤ {miss_threshold_high} 的专家（高命中）",
+        "range": f"保留 {miss_threshold_low} ≤ 未命中次数 ≤ {miss_threshold_high} 的专家（中命中）",
+        "all_hit": "保留连续必中专家（未命中=0）",
+        "all_miss": f"保留连续未命中专家（未命中={lookback_n}）",
+    }
     filter_mode = st.selectbox(
         "🎯 筛选模式",
-        options=[
-            f"保留未命中次数 ≤ {miss_threshold_high} 的专家（高命中）",
-            f"保留 {miss_threshold_low} ≤ 未命中次数 ≤ {miss_threshold_high} 的专家（中命中）",
-            "保留连续必中专家（未命中=0）",
-            f"保留连续未命中专家（未命中={lookback_n}）",
-        ],
+        options=list(MISS_MODES),
+        format_func=miss_mode_labels.__getitem__,
     )
 
     enable_filter = st.checkbox("🧊 启用筛选", value=True)
 
 
+def compute_frequency(report: ProgressFn, params: dict) -> dict[str, object]:
+    """后台任务：按回溯未命中规则筛专家并统计当前期推荐数字频次。"""
+    playtype_map = {int(pid): name for pid, name in params["playtype_map"].items()}
+    report(0.05, "加载当前期推荐")
+    current_clause, current_params = make_in_clause("playtype_id", params["playtypes"], "cur")
+    current_params.update({"issue": params["issue"]})
+    sql_current = f"""
+        SELECT user_id, playtype_id, numbers
+        FROM expert_predictions
+        WHERE issue_name = :issue
+          AND {current_clause}
+    """
+    current_df = pd.DataFrame(query_db(sql_current, current_params))
+    if current_df.empty:
+        return {"message": "当前期暂无符合条件的专家推荐。"}
+
+    current_df["playtype_id"] = current_df["playtype_id"].astype(int)
+    if params["remove_duplicates"]:
+        current_df.drop_duplicates(subset=["user_id", "playtype_id", "numbers"], inplace=True)
+
+    report(0.2, "加载回溯期号")
+    issue_rows = query_db(
+        """
+        SELECT DISTINCT issue_name
+        FROM expert_predictions
+        WHERE issue_name <= :ref_issue
+        ORDER BY issue_name DESC
+        LIMIT :limit
+        """,
+        {"ref_issue": params["ref_issue"], "limit": params["lookback_n"]},
+    )
+    issue_list = sorted({row["issue_name"] for row in issue_rows})
+    if not issue_list:
+        return {"message": "所选回溯范围内无专家推荐记录。"}
+
+    report(0.35, f"加载 {len(issue_list)} 期开奖与回溯推荐")
+    lottery_map = fetch_lottery_infos(issue_list, ttl=None)
+    result_map = {
+        issue: normalize_code((lottery_map.get(issue) or {}).get("open_code"))
+        for issue in issue_list
+    }
+
+    history_df = pd.DataFrame()
+    if params["ref_playtypes"]:
+        history_df = fetch_predictions(
+            issue_list,
+            playtype_ids=params["ref_playtypes"],
+            columns=["issue_name", "playtype_id", "user_id", "numbers"],
+            ttl=None,
+        )
+        if not history_df.empty:
+            history_df["playtype_id"] = history_df["playtype_id"].astype(int)
+
+    if params["enable_filter"]:
+        report(0.7, "按未命中次数筛选专家")
+        kept_users = miss_filter(
+            history_df,
+            result_map,
+            playtype_map,
+            MissRule(params["mode"], params["low"], params["high"]),
+            min_rows=params["lookback_n"],
+            issues=issue_list,
+        )
+        current_df = current_df[current_df["user_id"].isin(kept_users)]
+
+    if current_df.empty:
+        return {"message": "无符合筛选条件的专家推荐。"}
+
+    freq_df = token_frequencies(current_df["numbers"]).rename(
+        columns={"value": "数字", "count": "推荐次数"}
+    )
+    if freq_df.empty:
+        return {"message": "⚠️ 无推荐数据可用于统计。"}
+
+    report(0.85, "加载专家信息")
+    included_user_ids = current_df["user_id"].unique().tolist()
+    display_df = pd.DataFrame()
+    if included_user_ids:
+        user_clause, user_params = make_in_clause("user_id", included_user_ids, "user")
+        sql_users = f"""
+            SELECT user_id, nick_name
+            FROM expert_info
+            WHERE {user_clause}
+        """
+        user_info_df = pd.DataFrame(query_db(sql_users, user_params))
+
+        recommend_df = current_df.copy()
+        recommend_df["playtype_name"] = recommend_df["playtype_id"].apply(
+            lambda pid: playtype_map.get(pid, str(pid))
+        )
+        recommend_df["推荐项"] = recommend_df.apply(
+            lambda row: f"{row['playtype_name']}: {row['numbers']}", axis=1
+        )
+        recommend_summary = (
+            recommend_df.groupby("user_id")["推荐项"]
+            .apply(lambda values: " / ".join(sorted(set(values))))
+            .reset_index()
+        )
+
+        display_df = user_info_df.merge(recommend_summary, on="user_id", how="left").rename(
+            columns={
+                "user_id": "用户ID",
+                "nick_name": "专家昵称",
+                "推荐项": "推荐数字",
+            }
+        )
+        display_df.sort_values("用户ID", inplace=True)
+
+    return {"freq": freq_df, "experts": display_df, "user_count": len(included_user_ids)}
+
+
 if st.button("🚀 查询推荐数字频次"):
     if not selected_playtypes:
         st.warning("⚠️ 请选择至少一个玩法。")
@@ -154,195 +275,52 @@ if st.button("🚀 查询推荐数字频次"):
         st.warning("⚠️ 请选择至少一个回溯玩法用于筛选。")
         st.stop()
 
-    with st.spinner("查询中..."):
-        try:
-            current_clause, current_params = make_in_clause(
-                "playtype_id", [int(pid) for pid in selected_playtypes], "cur"
-            )
-            current_params.update({"issue": selected_issue})
-            sql_current = f"""
-                SELECT user_id, playtype_id, numbers
-                FROM expert_predictions
-                WHERE issue_name = :issue
-                  AND {current_clause}
-            """
-            current_rows = query_db(sql_current, current_params)
-        except Exception as exc:  # pragma: no cover - defensive UI guard
-            st.error(f"加载当前期推荐失败：{exc}")
-            st.stop()
-
-        current_df = pd.DataFrame(current_rows)
-        if current_df.empty:
-            st.info("当前期暂无符合条件的专家推荐。")
-            st.stop()
-
-        current_df["playtype_id"] = current_df["playtype_id"].astype(int)
-
-        if remove_duplicates:
-            current_df.drop_duplicates(subset=["user_id", "playtype_id", "numbers"], inplace=True)
-
-        try:
-            issue_rows = query_db(
-                """
-                SELECT DISTINCT issue_name
-                FROM expert_predictions
-                WHERE issue_name <= :ref_issue
-                ORDER BY issue_name DESC
-                LIMIT :limit
-                """,
-                {"ref_issue": ref_issue, "limit": lookback_n},
-            )
-        except Exception as exc:  # pragma: no cover - defensive UI guard
-            st.error(f"加载回溯期号失败：{exc}")
-            st.stop()
-
-        issue_list = sorted({row["issue_name"] for row in issue_rows})
-        if not issue_list:
-            st.info("所选回溯范围内无专家推荐记录。")
-            st.stop()
-
-        lottery_map = fetch_lottery_infos(issue_list, ttl=None)
-        result_map = {
-            issue: normalize_code((lottery_map.get(issue) or {}).get("open_code"))
-            for issue in issue_list
-        }
-
-        history_df = pd.DataFrame()
-        if ref_playtypes:
-            history_df = fetch_predictions(
-                issue_list,
-                playtype_ids=ref_playtypes,
-                columns=["issue_name", "playtype_id", "user_id", "numbers"],
-                ttl=None,
-            )
-            if not history_df.empty:
-                history_df["playtype_id"] = history_df["playtype_id"].astype(int)
-
-        kept_users: set[str]
-        if enable_filter and not history_df.empty:
-            kept: list[str] = []
-            issue_sequence = sorted(issue_list)
-            result_lookup = result_map
-
-            for user_id, group in history_df.groupby("user_id"):
-                group = group.drop_duplicates(subset=["issue_name", "playtype_id", "numbers"])
-                group = group[group["issue_name"].isin(issue_sequence)]
-                if len(group) < lookback_n:
-                    continue
-
-                group = group.sort_values("issue_name")
-                group_dict = group.set_index("issue_name")
-                hits: list[bool] = []
-
-                for issue in issue_sequence:
-                    if issue not in group_dict.index:
-                        continue
-                    row = group_dict.loc[[issue]].iloc[0]
-                    open_code = result_lookup.get(issue)
-                    if not open_code:
-                        continue
-                    playtype_name = playtype_map.get(
-                        int(row["playtype_id"]), str(row["playtype_id"])
-                    )
-                    hit = match_prediction_hit(playtype_name, row["numbers"], open_code)
-                    hits.append(hit)
-
-                miss_count = hits.count(False)
-                if f"未命中次数 ≤ {miss_threshold_high}" in filter_mode:
-                    if miss_count <= miss_threshold_high:
-                        kept.append(user_id)
-                elif f"{miss_threshold_low} ≤ 未命中次数 ≤ {miss_threshold_high}" in filter_mode:
-                    if miss_threshold_low <= miss_count <= miss_threshold_high:
-                        kept.append(user_id)
-                elif "连续必中" in filter_mode:
-                    if miss_count == 0:
-                        kept.append(user_id)
-                elif "连续未命中" in filter_mode:
-                    if hits.count(True) == 0:
-                        kept.append(user_id)
-
-            kept_users = set(kept)
-        elif enable_filter and history_df.empty:
-            kept_users = set()
-        else:
-            kept_users = set(current_df["user_id"].unique())
-
-        if enable_filter:
-            current_df = current_df[current_df["user_id"].isin(kept_users)]
-
-        if current_df.empty:
-            st.info("无符合筛选条件的专家推荐。")
-            st.stop()
-
-        if remove_duplicates and not current_df.empty:
-            current_df.drop_duplicates(subset=["user_id", "playtype_id", "numbers"], inplace=True)
-
-        freq_counter = collections.Counter()
-        for numbers in current_df["numbers"]:
-            for token in parse_tokens(numbers):
-                key = normalize_code(token) or token.strip()
-                if key:
-                    freq_counter[key] += 1
-
-        if not freq_counter:
-            st.warning("⚠️ 无推荐数据可用于统计。")
-            st.stop()
-
-        freq_df = (
-            pd.DataFrame(
-                {"数字": list(freq_counter.keys()), "推荐次数": list(freq_counter.values())}
-            )
-            .sort_values(by="推荐次数", ascending=False)
-            .reset_index(drop=True)
-        )
+    job_params = {
+        "issue": selected_issue,
+        "playtypes": selected_playtypes,
+        "playtype_map": playtype_map,
+        "remove_duplicates": remove_duplicates,
+        "ref_issue": ref_issue,
+        "lookback_n": lookback_n,
+        "ref_playtypes": ref_playtypes,
+        "enable_filter": enable_filter,
+        "mode": filter_mode,
+        "low": miss_threshold_low,
+        "high": miss_threshold_high,
+    }
+    submit_job(
+        "filter_miss_job",
+        job_key(
+            "filter_miss",
+            job_params,
+            get_cache_token(["expert_predictions", "lottery_results", "expert_info"]),
+        ),
+        compute_frequency,
+        job_params,
+        label="推荐数字频次",
+    )
+
+outcome = render_job(current_job("filter_miss_job"))
+if outcome is None:
+    st.stop()
+if "message" in outcome:
+    st.info(outcome["message"])
+    st.stop()
 
-        st.subheader("推荐数字频次")
-        st.dataframe(freq_df, use_container_width=True)
+st.subheader("推荐数字频次")
+st.dataframe(outcome["freq"], use_container_width=True)
 
-        chart = render_digit_frequency_chart(
-            freq_df,
-            digit_column="数字",
-            count_column="推荐次数",
-        )
-        if chart is not None:
-            st.altair_chart(chart, use_container_width=True)
-
-        included_user_ids = current_df["user_id"].unique().tolist()
-        st.markdown(f"### ✅ 当前期实际参与统计的AI智体（{len(included_user_ids)}个）")
-
-        if included_user_ids:
-            user_clause, user_params = make_in_clause("user_id", included_user_ids, "user")
-            sql_users = f"""
-                SELECT user_id, nick_name
-                FROM expert_info
-                WHERE {user_clause}
-            """
-            user_rows = query_db(sql_users, user_params)
-            user_info_df = pd.DataFrame(user_rows)
-
-            current_df["playtype_name"] = current_df["playtype_id"].apply(
-                lambda pid: playtype_map.get(pid, str(pid))
-            )
-            recommend_df = current_df.copy()
-            recommend_df["推荐项"] = recommend_df.apply(
-                lambda row: f"{row['playtype_name']}: {row['numbers']}", axis=1
-            )
-            recommend_summary = (
-                recommend_df.groupby("user_id")["推荐项"]
-                .apply(lambda values: " / ".join(sorted(set(values))))
-                .reset_index()
-            )
-
-            display_df = user_info_df.merge(recommend_summary, on="user_id", how="left").rename(
-                columns={
-                    "user_id": "用户ID",
-                    "nick_name": "专家昵称",
-                    "推荐项": "推荐数字",
-                }
-            )
-            display_df.sort_values("用户ID", inplace=True)
-
-            st.subheader("参与统计的专家")
-            st.dataframe(display_df, use_container_width=True)
-        else:
-            st.info("暂无AI智体参与当前统计。")
+chart = render_digit_frequency_chart(
+    outcome["freq"],
+    digit_column="数字",
+    count_column="推荐次数",
+)
+if chart is not None:
+    st.altair_chart(chart, use_container_width=True)
+
+st.markdown(f"### ✅ 当前期实际参与统计的AI智体（{outcome['user_count']}个）")
+if outcome["user_count"]:
+    st.subheader("参与统计的专家")
+    st.dataframe(outcome["experts"], use_container_width=True)
+else:
+    st.info("暂无AI智体参与当前统计。")
@@ -1,44 +1,24 @@
 from __future__ import annotations
 
-import altair as alt
 import pandas as pd
 import streamlit as st
 
 from db.connection import query_db
 from utils.cache import cached_query
 from utils.data_access import fetch_playtypes
+from utils.fusion import (
+    FUSION_PRESETS,
+    FusionConfig,
+    consensus_ranking,
+    fused_scores,
+    kill_playtype_mask,
+)
+from utils.lazy import lazy_import
 from utils.ui import issue_picker
 
-st.set_page_config(page_title="Lotto AI", layout="wide")
-
-
-def flatten_numbers(numbers: str) -> list[str]:
-    parts = []
-    for token in numbers.replace("|", ",").split(","):
-        token = token.strip()
-        if token:
-            parts.append(token)
-    return parts
-
-
-def aggregate_digits(df: pd.DataFrame) -> pd.DataFrame:
-    counter: dict[str, int] = {}
-    for value in df["numbers"]:
-        for token in flatten_numbers(value):
-            for digit in token:
-                if digit.isdigit():
-                    counter[digit] = counter.get(digit, 0) + 1
-    result = pd.DataFrame(
-        sorted(
-            ((digit, count) for digit, count in counter.items()),
-            key=lambda item: item[1],
-            reverse=True,
-        ),
-        columns=["digit", "count"],
-    )
-    result["rank"] = range(1, len(result) + 1)
-    return result
+alt = lazy_import("altair")
 
+st.set_page_config(page_title="Lotto AI", layout="wide")
 
 st.header("FusionRecommendation - 融合推荐")
 
@@ -52,24 +32,11 @@ if not selected_issue:
 
 playtypes = fetch_playtypes()
 playtype_map = (
-    {row.playtype_id: row.playtype_name for row in playtypes.itertuples()}
+    {int(row.playtype_id): row.playtype_name for row in playtypes.itertuples()}
     if not playtypes.empty
     else {}
 )
 
-sql_predictions = """
-    SELECT user_id, playtype_id, numbers
-    FROM expert_predictions
-    WHERE issue_name = :issue
-"""
-prediction_rows = cached_query(query_db, sql_predictions, params={"issue": selected_issue}, ttl=300)
-if not prediction_rows:
-    st.info("未查询到预测记录。")
-    st.stop()
-
-pred_df = pd.DataFrame(prediction_rows)
-pred_df["playtype_name"] = pred_df["playtype_id"].apply(lambda pid: playtype_map.get(pid, str(pid)))
-
 lottery_rows = cached_query(
     query_db,
     "SELECT open_code FROM lottery_results WHERE issue_name = :issue LIMIT 1",
@@ -79,48 +46,106 @@ lottery_rows = cached_query(
 open_code = lottery_rows[0]["open_code"] if lottery_rows else None
 st.info(f"开奖号码提示：{open_code or '未开奖'}")
 
-filtered_df = pred_df[~pred_df["playtype_name"].str.contains("杀", na=False)].copy()
-consensus_df = aggregate_digits(filtered_df)
-consensus_df.rename(columns={"digit": "数字", "count": "被推荐次数", "rank": "排名"}, inplace=True)
+scheme_labels = st.multiselect(
+    "加权方案（可多选对比）",
+    options=list(FUSION_PRESETS),
+    default=list(FUSION_PRESETS)[:3],
+    key="fusion_schemes",
+)
+schemes = [FUSION_PRESETS[label] for label in scheme_labels]
+with st.expander("自定义加权方案", expanded=False):
+    use_custom = st.checkbox("加入对比", value=False, key="fusion_custom_enabled")
+    col_weight, col_half, col_history = st.columns(3)
+    with col_weight:
+        custom_weight = st.slider("命中率权重指数", 0.0, 4.0, 1.0, 0.5, key="fusion_custom_weight")
+    with col_half:
+        custom_half_life = st.number_input(
+            "半衰期（期，0 表示不衰减）", min_value=0, value=5, step=1, key="fusion_custom_half"
+        )
+    with col_history:
+        custom_history = st.select_slider(
+            "历史期数", options=[10, 30, 50, 100], value=30, key="fusion_custom_history"
+        )
+    if use_custom:
+        schemes.append(
+            FusionConfig(
+                "自定义",
+                hit_weight=float(custom_weight),
+                half_life=float(custom_half_life) or None,
+                history=int(custom_history),
+            )
+        )
+if not schemes:
+    st.warning("请至少选择一个加权方案。")
+    st.stop()
+
+results: dict[str, tuple] = {}
+for config in schemes:
+    playtype_ids, scores = fused_scores(selected_issue, config)
+    results[config.label] = (playtype_ids, scores)
+
+base_ids, base_scores = results[schemes[0].label]
+if not len(base_ids):
+    st.info("未查询到预测记录。")
+    st.stop()
 
 st.subheader("共识推荐数字")
-st.dataframe(consensus_df, width="stretch")
+st.caption("按方案对非“杀”类玩法加权汇总；权重 = 专家近期命中率相对玩法平均命中率的倍数。")
+rankings: dict[str, pd.DataFrame] = {}
+for label, (playtype_ids, scores) in results.items():
+    rankings[label] = consensus_ranking(scores, ~kill_playtype_mask(playtype_ids, playtype_map))
+
+columns = st.columns(len(rankings))
+for column, (label, ranking) in zip(columns, rankings.items()):
+    with column:
+        st.markdown(f"**{label}**")
+        st.dataframe(
+            ranking.rename(
+                columns={"digit": "数字", "score": "得分", "share": "占比", "rank": "排名"}
+            ),
+            hide_index=True,
+            use_container_width=True,
+        )
+
+comparison_df = pd.concat(
+    [ranking.assign(scheme=label) for label, ranking in rankings.items()], ignore_index=True
+)
 st.altair_chart(
-    alt.Chart(consensus_df)
+    alt.Chart(comparison_df)
     .mark_bar()
     .encode(
-        x=alt.X("数字:N", title="数字"),
-        y=alt.Y("被推荐次数:Q", title="被推荐次数"),
-        tooltip=["数字", "被推荐次数", "排名"],
+        x=alt.X("digit:N", title="数字"),
+        xOffset=alt.XOffset("scheme:N"),
+        y=alt.Y("share:Q", title="得分占比"),
+        color=alt.Color("scheme:N", title="方案"),
+        tooltip=["scheme", "digit", "score", "share", "rank"],
     )
     .properties(width=600, height=320),
     use_container_width=True,
 )
 
-st.subheader("按玩法推荐热力图")
-heatmap_records = []
-for playtype_id, group in pred_df.groupby("playtype_id"):
-    playtype_name = playtype_map.get(playtype_id, str(playtype_id))
-    for numbers in group["numbers"]:
-        for token in flatten_numbers(numbers):
-            for digit in token:
-                if digit.isdigit():
-                    heatmap_records.append({"playtype_name": playtype_name, "digit": digit})
-
-heatmap_df = pd.DataFrame(heatmap_records)
+st.subheader(f"按玩法推荐热力图（{schemes[0].label}）")
+heatmap_df = pd.DataFrame(
+    {
+        "playtype_name": [
+            playtype_map.get(int(pid), str(pid)) for pid in base_ids for _ in range(10)
+        ],
+        "digit": [str(digit) for _ in base_ids for digit in range(10)],
+        "score": base_scores.ravel().round(3),
+    }
+)
+heatmap_df = heatmap_df[heatmap_df["score"] > 0]
 if heatmap_df.empty:
     st.info("无法生成热力图数据。")
 else:
-    heatmap_df["count"] = 1
-    heatmap_df = heatmap_df.groupby(["playtype_name", "digit"], as_index=False)["count"].sum()
     chart = (
         alt.Chart(heatmap_df)
         .mark_rect()
         .encode(
             x=alt.X("digit:N", title="数字"),
             y=alt.Y("playtype_name:N", title="玩法"),
-            color=alt.Color("count:Q", title="推荐次数", scale=alt.Scale(scheme="tealblues")),
-            tooltip=["playtype_name", "digit", "count"],
+            color=alt.Color("score:Q", title="得分", scale=alt.Scale(scheme="tealblues")),
+            tooltip=["playtype_name", "digit", "score"],
         )
         .properties(width="container", height=400)
     )
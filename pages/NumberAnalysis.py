@@ -5,27 +5,20 @@ from itertools import permutations
 import pandas as pd
 import streamlit as st
 
-from db.connection import query_db
-from utils.cache import cached_query
-from utils.data_access import fetch_playtypes
-from utils.numbers import parse_tokens
+from utils.combinatorics import digits_mask
+from utils.combo_cube import combo_features, combo_trend
+from utils.data_access import (
+    fetch_playtypes,
+    fetch_recent_issues,
+    issue_combo_counts,
+    load_combo_cube,
+)
+from utils.lazy import lazy_import
 from utils.ui import issue_picker, playtype_picker, render_open_info
 
-st.set_page_config(page_title="Lotto AI", layout="wide")
-
-
-def _normalize_combo(tokens: list[str]) -> str:
-    return "".join(sorted(tokens))
-
-
-def _digits_from_tokens(tokens: list[str]) -> list[int]:
-    digits: list[int] = []
-    for token in tokens:
-        for char in token:
-            if char.isdigit():
-                digits.append(int(char))
-    return digits
+alt = lazy_import("altair")
 
+st.set_page_config(page_title="Lotto AI", layout="wide")
 
 st.header("NumberAnalysis - 号码组合分析")
 
@@ -60,57 +53,15 @@ selected_playtype = playtype_picker(
 if not selected_playtype:
     st.stop()
 
-sql = """
-    SELECT user_id, numbers
-    FROM expert_predictions
-    WHERE issue_name = :issue_name
-      AND playtype_id = :playtype_id
-"""
-params = {"issue_name": selected_issue, "playtype_id": int(selected_playtype)}
-
-try:
-    rows = cached_query(query_db, sql, params=params, ttl=120)
-except Exception as exc:
-    st.warning(f"查询推荐数据失败：{exc}")
-    rows = []
-
-if not rows:
+counts = issue_combo_counts(selected_issue, int(selected_playtype))
+if counts.empty:
     st.info("当前条件下未获取到推荐数据。")
     st.stop()
 
-raw_df = pd.DataFrame(rows)
-raw_df["tokens"] = raw_df["numbers"].apply(parse_tokens)
-raw_df["combo_key"] = raw_df["tokens"].apply(_normalize_combo)
-
-combo_df = (
-    raw_df.groupby("combo_key")
-    .agg(
-        count=("user_id", "nunique"),
-        sample_numbers=("numbers", "first"),
-        tokens=("tokens", "first"),
-    )
-    .reset_index()
-)
-combo_df["digits"] = combo_df["tokens"].apply(_digits_from_tokens)
-combo_df["sum_digits"] = combo_df["digits"].apply(sum)
-combo_df["span"] = combo_df["digits"].apply(
-    lambda values: max(values) - min(values) if values else 0
-)
-combo_df["odd_count"] = combo_df["digits"].apply(
-    lambda values: sum(1 for v in values if v % 2 == 1)
-)
-combo_df["even_count"] = combo_df["digits"].apply(
-    lambda values: sum(1 for v in values if v % 2 == 0)
-)
-combo_df["odd_even_ratio"] = combo_df.apply(
-    lambda row: f"{row['odd_count']}:{row['even_count']}", axis=1
+combo_df = counts.rename(columns={"expert_count": "count"}).merge(
+    combo_features(counts["combo_key"]), on="combo_key", how="left"
 )
-combo_df["big_count"] = combo_df["digits"].apply(lambda values: sum(1 for v in values if v >= 5))
-combo_df["small_count"] = combo_df["digits"].apply(lambda values: sum(1 for v in values if v < 5))
-combo_df["big_small_ratio"] = combo_df.apply(
-    lambda row: f"{row['big_count']}:{row['small_count']}", axis=1
-)
-combo_df.sort_values(by="count", ascending=False, inplace=True)
+combo_df.sort_values(by="count", ascending=False, inplace=True, kind="stable")
 combo_df.reset_index(drop=True, inplace=True)
 
 count_min = int(combo_df["count"].min())
@@ -160,18 +111,12 @@ with st.expander("过滤器", expanded=False):
 filtered_df = combo_df[combo_df["count"].between(selected_count[0], selected_count[1])].copy()
 
 if excluded_digits:
-    excluded_set = set(excluded_digits)
-    filtered_df = filtered_df[
-        ~filtered_df["digits"].apply(
-            lambda digits: bool(excluded_set.intersection({str(d) for d in digits}))
-        )
-    ]
+    excluded_mask = digits_mask(excluded_digits)
+    filtered_df = filtered_df[(filtered_df["digit_mask"] & excluded_mask) == 0]
 
 if include_digits:
-    include_set = set(include_digits)
-    filtered_df = filtered_df[
-        filtered_df["digits"].apply(lambda digits: include_set.issubset({str(d) for d in digits}))
-    ]
+    include_mask = digits_mask(include_digits)
+    filtered_df = filtered_df[(filtered_df["digit_mask"] & include_mask) == include_mask]
 
 if excluded_sums:
     filtered_df = filtered_df[~filtered_df["sum_digits"].isin(excluded_sums)]
@@ -298,3 +243,59 @@ if not summary_table.empty:
             st.markdown(
                 f"**纯收益：{'盈利' if perm_profit >= 0 else '亏损'} {abs(perm_profit)} 元**"
             )
+
+st.subheader("📈 组合热度趋势")
+trend_columns = st.columns(3)
+with trend_columns[0]:
+    trend_window = st.select_slider(
+        "统计期数", options=[10, 30, 50, 100], value=30, key="number_analysis_trend_window"
+    )
+with trend_columns[1]:
+    trend_top_n = st.slider(
+        "显示组合数", min_value=5, max_value=50, value=10, step=5, key="number_analysis_trend_top"
+    )
+with trend_columns[2]:
+    trend_filtered_only = st.checkbox(
+        "仅统计当前筛选后的组合", value=False, key="number_analysis_trend_filtered"
+    )
+
+trend_issues = fetch_recent_issues(limit=trend_window, until=selected_issue)
+cube = load_combo_cube(trend_issues, int(selected_playtype))
+if cube is None:
+    st.info("组合热度立方体尚未建立，请先运行 `python -m collector.combo_cube --rebuild`。")
+else:
+    if trend_filtered_only:
+        cube = cube[cube["combo_key"].isin(filtered_df["combo_key"])]
+    trend = combo_trend(cube, trend_issues[::-1], top_n=trend_top_n)
+    if trend.columns.empty:
+        st.info("所选期数内没有组合热度数据。")
+    else:
+        current = (
+            trend.loc[selected_issue]
+            if selected_issue in trend.index
+            else pd.Series(0, index=trend.columns)
+        )
+        trend_summary = pd.DataFrame(
+            {
+                "号码组合": trend.columns,
+                "窗口内专家数": trend.sum(axis=0).to_numpy(),
+                "出现期数": (trend > 0).sum(axis=0).to_numpy(),
+                "本期专家数": current.to_numpy(),
+            }
+        )
+        st.dataframe(trend_summary, hide_index=True, width="stretch")
+        trend_long = trend.reset_index().melt(
+            id_vars="issue_name", var_name="combo_key", value_name="expert_count"
+        )
+        st.altair_chart(
+            alt.Chart(trend_long)
+            .mark_line(point=True)
+            .encode(
+                x=alt.X("issue_name:N", title="期号", sort=None),
+                y=alt.Y("expert_count:Q", title="推荐专家数"),
+                color=alt.Color("combo_key:N", title="号码组合"),
+                tooltip=["issue_name", "combo_key", "expert_count"],
+            )
+            .properties(height=360),
+            use_container_width=True,
+        )
@@ -2,17 +2,27 @@ from __future__ import annotations
 
 from collections import Counter
 
-import altair as alt
 import pandas as pd
 import streamlit as st
 
 from db.connection import query_db
 from utils.cache import cached_query
+from utils.cache_control import get_cache_token
 from utils.charts import render_digit_frequency_chart
-from utils.data_access import fetch_lottery_info, fetch_playtypes_for_issue
+from utils.data_access import fetch_lottery_info, fetch_playtypes_for_issue, load_issue_bundle
+from utils.jobs import ProgressFn, job_key
+from utils.lazy import lazy_import
 from utils.numbers import normalize_code, parse_tokens
-from utils.sql import make_in_clause
-from utils.ui import issue_picker, playtype_picker, render_rank_position_calculator
+from utils.ui import (
+    current_job,
+    issue_picker,
+    playtype_picker,
+    render_job,
+    render_rank_position_calculator,
+    submit_job,
+)
+
+alt = lazy_import("altair")
 
 st.set_page_config(page_title="推荐号码热力图（简版）", layout="wide")
 st.header("NumberHeatmap_Simplified - 推荐号码热力图（简版）")
@@ -28,6 +38,59 @@ def render_digit_chart(freq_df: pd.DataFrame, open_digits: list[str]) -> alt.Cha
     )
 
 
+def detect_rank_hits(
+    report: ProgressFn, current_issue: str, playtype_id: int, range_limit: int | None
+) -> pd.DataFrame:
+    """后台任务：历史各期推荐数字排行榜前 10 位的开奖命中次数；无历史期号时返回空表。"""
+    history_rows = cached_query(
+        query_db,
+        """
+            SELECT DISTINCT issue_name
+            FROM expert_predictions
+            WHERE playtype_id = :playtype_id AND issue_name < :current_issue
+            ORDER BY issue_name DESC
+        """,
+        params={"playtype_id": playtype_id, "current_issue": current_issue},
+        ttl=120,
+    )
+    history_issues = [row["issue_name"] for row in history_rows]
+    if range_limit:
+        history_issues = history_issues[:range_limit]
+    if not history_issues:
+        return pd.DataFrame(columns=["排行榜位置", "命中次数"])
+
+    pos_counter = {i: 0 for i in range(1, 11)}
+    for index, issue in enumerate(history_issues):
+        report(index / len(history_issues), f"{issue}（{index + 1}/{len(history_issues)}）")
+        history_numbers = load_issue_bundle(issue).for_playtype(playtype_id).numbers
+        if not len(history_numbers):
+            continue
+        digits: list[str] = []
+        for numbers in history_numbers:
+            for token in parse_tokens(numbers):
+                digits.extend(list(token))
+        if not digits:
+            continue
+
+        series = pd.Series(digits).value_counts().head(10)
+        info = fetch_lottery_info(issue)
+        drawn = []
+        if info:
+            drawn = list(normalize_code(info.get("open_code")))
+        for rank, digit in enumerate(series.index.tolist(), start=1):
+            if rank > 10:
+                break
+            if drawn and digit in drawn:
+                pos_counter[rank] += 1
+
+    return pd.DataFrame(
+        {
+            "排行榜位置": list(pos_counter.keys()),
+            "命中次数": list(pos_counter.values()),
+        }
+    )
+
+
 selected_issue = issue_picker(
     "heatmap_issue",
     mode="single",
@@ -65,20 +128,15 @@ if not selected_playtypes:
     st.warning("请至少选择一个玩法。")
     st.stop()
 
-clause, params = make_in_clause("playtype_id", selected_playtypes, "pt")
-params.update({"issue": selected_issue})
-sql_predictions = f"""
-    SELECT playtype_id, numbers
-    FROM expert_predictions
-    WHERE issue_name = :issue
-      AND {clause}
-"""
-
 try:
-    rows = cached_query(query_db, sql_predictions, params=params, ttl=120)
+    bundle = load_issue_bundle(selected_issue, strict=True)
 except Exception as exc:  # pragma: no cover - 外部资源
     st.warning(f"查询推荐数据失败：{exc}")
-    rows = []
+    st.stop()
+
+rows = (
+    bundle.for_playtypes(selected_playtypes).to_frame(["playtype_id", "numbers"]).to_dict("records")
+)
 
 if not rows:
     st.info("未找到符合条件的推荐记录。")
@@ -156,63 +214,28 @@ else:
         if selected_id is None:
             st.warning("无法确定所选玩法编号。")
         else:
-            history_rows = cached_query(
-                query_db,
-                """
-                    SELECT DISTINCT issue_name
-                    FROM expert_predictions
-                    WHERE playtype_id = :playtype_id AND issue_name < :current_issue
-                    ORDER BY issue_name DESC
-                """,
-                params={"playtype_id": selected_id, "current_issue": selected_issue},
-                ttl=120,
+            submit_job(
+                "heatmap_detect_job",
+                job_key(
+                    "heatmap_detect",
+                    selected_issue,
+                    selected_id,
+                    range_limit,
+                    get_cache_token(["expert_predictions", "lottery_results"]),
+                ),
+                detect_rank_hits,
+                selected_issue,
+                selected_id,
+                range_limit,
+                label=f"{selected_name} 排行榜命中检测",
             )
-            history_issues = [row["issue_name"] for row in history_rows]
-            if range_limit:
-                history_issues = history_issues[:range_limit]
 
-            if not history_issues:
-                st.warning("缺少历史期号用于检测。")
-            else:
-                pos_counter = {i: 0 for i in range(1, 11)}
-                for issue in history_issues:
-                    rows = cached_query(
-                        query_db,
-                        """
-                            SELECT numbers
-                            FROM expert_predictions
-                            WHERE issue_name = :issue AND playtype_id = :playtype_id
-                        """,
-                        params={"issue": issue, "playtype_id": selected_id},
-                        ttl=120,
-                    )
-                    if not rows:
-                        continue
-                    digits: list[str] = []
-                    for row in rows:
-                        for token in parse_tokens(row["numbers"]):
-                            digits.extend(list(token))
-                    if not digits:
-                        continue
-
-                    series = pd.Series(digits).value_counts().head(10)
-                    info = fetch_lottery_info(issue)
-                    drawn = []
-                    if info:
-                        drawn = list(normalize_code(info.get("open_code")))
-                    for rank, digit in enumerate(series.index.tolist(), start=1):
-                        if rank > 10:
-                            break
-                        if drawn and digit in drawn:
-                            pos_counter[rank] += 1
-
-                result_df = pd.DataFrame(
-                    {
-                        "排行榜位置": list(pos_counter.keys()),
-                        "命中次数": list(pos_counter.values()),
-                    }
-                )
-                st.bar_chart(result_df.set_index("排行榜位置"))
+    result_df = render_job(current_job("heatmap_detect_job"))
+    if result_df is not None:
+        if result_df.empty:
+            st.warning("缺少历史期号用于检测。")
+        else:
+            st.bar_chart(result_df.set_index("排行榜位置"))
 
 render_rank_position_calculator(
     [(playtype_map.get(pid, str(pid)), digits) for pid, digits in rank_pool.items()],
@@ -2,14 +2,16 @@ from __future__ import annotations
 
 from collections import Counter
 
-import altair as alt
 import pandas as pd
 import streamlit as st
 
 from utils.data_access import fetch_lottery_infos, fetch_playtypes, fetch_predictions
+from utils.lazy import lazy_import
 from utils.numbers import normalize_code, parse_tokens
 from utils.ui import issue_picker, playtype_picker
 
+alt = lazy_import("altair")
+
 st.set_page_config(page_title="多期推荐数字热力图", layout="wide")
 st.header("NumberHeatmap_Simplified_v2_all - 多期推荐数字热力图")
 
@@ -5,10 +5,16 @@ import streamlit as st
 
 from db.connection import query_db
 from utils.cache import cached_query
-from utils.data_access import fetch_playtypes_for_issue
+from utils.data_access import fetch_lottery_infos, fetch_playtypes_for_issue, fetch_recent_issues
 from utils.predictions import build_prediction_distribution
+from utils.rank_store import load_rank_matrix
 from utils.sql import make_in_clause
-from utils.ui import issue_picker, playtype_picker, render_rank_position_calculator
+from utils.ui import (
+    issue_picker,
+    playtype_picker,
+    render_rank_backtest,
+    render_rank_position_calculator,
+)
 
 st.set_page_config(page_title="Lotto AI", layout="wide")
 
@@ -80,10 +86,34 @@ else:
     display_df.sort_values(by=["玩法"], inplace=True)
     st.dataframe(display_df, use_container_width=True, hide_index=True)
 
-    rank_entries: list[tuple[str, list[str]]] = []
-    for _, row in display_df.iterrows():
-        digits = [n.strip() for n in str(row["号码集合"]).split(",") if n.strip()]
-        if digits:
-            rank_entries.append((row["玩法"], digits))
-
-    render_rank_position_calculator(rank_entries, key="red_val_rank")
+    rank_window = st.select_slider(
+        "位置计算器统计期数",
+        options=[1, 10, 30, 100, 300],
+        value=1,
+        key="red_val_rank_window",
+        help="大于 1 时统计截至当前期的最近多期选号分布。",
+    )
+    rank_source = None
+    if rank_window > 1:
+        window_issues = [
+            issue
+            for issue in fetch_recent_issues(limit=rank_window + 50)
+            if issue <= selected_issue
+        ][:rank_window]
+        rank_source = load_rank_matrix(window_issues, selected_playtypes, source="v1")
+        if len(rank_source) == 0:
+            st.caption("所选期数内没有选号分布数据，仅统计当前期。")
+            rank_source = None
+    if rank_source is None:
+        rank_source = [
+            (name, [n.strip() for n in num.split(",") if n.strip()])
+            for name, num in zip(display_df["玩法"], display_df["号码集合"])
+        ]
+
+    render_rank_position_calculator(rank_source, key="red_val_rank")
+    if rank_window > 1 and not isinstance(rank_source, list):
+        open_codes = {
+            issue: info.get("open_code")
+            for issue, info in fetch_lottery_infos(window_issues).items()
+        }
+        render_rank_backtest(rank_source, open_codes, key="red_val_backtest")
@@ -5,14 +5,24 @@ import streamlit as st
 
 from db.connection import query_db
 from utils.cache import cached_query
+from utils.data_access import (
+    aggregate_red_val_distribution,
+    fetch_lottery_infos,
+    fetch_red_val_distribution,
+)
+from utils.lazy import lazy_import
+from utils.rank_store import load_rank_matrix
 from utils.sql import make_in_clause
 from utils.ui import (
     issue_picker,
     playtype_picker,
     render_open_info,
+    render_rank_backtest,
     render_rank_position_calculator,
 )
 
+alt = lazy_import("altair")
+
 st.set_page_config(page_title="Lotto AI", layout="wide")
 
 st.header("RedValList_v2 - 选号分布 (V2)")
@@ -125,10 +135,91 @@ display_columns = [
 detail_view = result_df[display_columns]
 st.dataframe(detail_view, width="stretch")
 
-rank_entries: list[tuple[str, list[str]]] = []
-for _, row in result_df.iterrows():
-    digits = [n.strip() for n in str(row["num"]).split(",") if n.strip()]
-    if digits:
-        rank_entries.append((row["playtype_name"], digits))
+rank_window = st.select_slider(
+    "位置计算器统计期数",
+    options=[1, 10, 30, 100, 200],
+    value=1,
+    key="red_val_v2_rank_window",
+    help="大于 1 时统计截至当前期的最近多期 v2 排行。",
+)
+if rank_window > 1:
+    window_issues = [issue for issue in issues if issue <= selected_issue][:rank_window]
+    rank_source = load_rank_matrix(window_issues, selected_playtypes, source="v2")
+else:
+    rank_source = [
+        (name, [n.strip() for n in num.split(",") if n.strip()])
+        for name, num in zip(result_df["playtype_name"], result_df["num"].astype(str))
+    ]
+
+render_rank_position_calculator(rank_source, key="red_val_v2_rank")
+if rank_window > 1:
+    open_codes = {
+        issue: info.get("open_code") for issue, info in fetch_lottery_infos(window_issues).items()
+    }
+    render_rank_backtest(rank_source, open_codes, key="red_val_v2_backtest")
+
+st.subheader("分布走势（多期）")
+METRIC_LABELS = {
+    "hit_count": "命中次数",
+    "serial_hit_count": "当前连红",
+    "series_not_hit_count": "当前连黑",
+    "max_serial_hit_count": "最高连红",
+    "max_series_not_hit_count": "最高连黑",
+    "his_max_serial_hit_count": "历史最高连红",
+    "his_max_series_not_hit_count": "历史最高连黑",
+}
+trend_cols = st.columns(4)
+trend_playtype = trend_cols[0].selectbox(
+    "玩法",
+    selected_playtypes,
+    format_func=lambda pid: playtype_map.get(str(pid), str(pid)),
+    key="red_val_v2_trend_playtype",
+)
+trend_metric = trend_cols[1].selectbox(
+    "分布字段",
+    list(METRIC_LABELS),
+    format_func=lambda key: METRIC_LABELS[key],
+    key="red_val_v2_trend_metric",
+)
+type_options = sorted(int(value) for value in result_df["type"].dropna().unique())
+trend_type = trend_cols[2].selectbox("排序类型", type_options or [0], key="red_val_v2_trend_type")
+trend_window = trend_cols[3].select_slider(
+    "期数", options=[10, 30, 50, 100], value=30, key="red_val_v2_trend_window"
+)
 
-render_rank_position_calculator(rank_entries, key="red_val_v2_rank")
+trend_issues = [issue for issue in issues if issue <= selected_issue][:trend_window]
+dist_df = fetch_red_val_distribution(
+    trend_issues, [trend_playtype], types=[trend_type], metrics=[trend_metric]
+)
+if dist_df.empty:
+    st.info("暂无展开后的分布数据，可运行 `python -m collector.red_val_dist` 同步。")
+else:
+    issue_totals = dist_df.groupby("issue_name")["expert_count"].transform("sum")
+    dist_df["share"] = (dist_df["expert_count"] / issue_totals).fillna(0).round(4)
+    heatmap = (
+        alt.Chart(dist_df)
+        .mark_rect()
+        .encode(
+            x=alt.X("issue_name:O", title="期号"),
+            y=alt.Y("bucket:O", title=METRIC_LABELS[trend_metric], sort="descending"),
+            color=alt.Color("share:Q", title="占比", scale=alt.Scale(scheme="blues")),
+            tooltip=["issue_name", "bucket", "expert_count", "share"],
+        )
+        .properties(height=320)
+    )
+    st.altair_chart(heatmap, use_container_width=True)
+
+    summary_df = aggregate_red_val_distribution(dist_df)
+    st.caption(f"{summary_df['issue_count'].max()} 期合计分布")
+    st.dataframe(
+        summary_df.rename(
+            columns={
+                "bucket": METRIC_LABELS[trend_metric],
+                "expert_count": "专家人次",
+                "issue_count": "出现期数",
+                "share": "占比",
+            }
+        ).drop(columns=["metric"]),
+        width="stretch",
+        hide_index=True,
+    )
@@ -1,13 +1,14 @@
 from __future__ import annotations
 
-from collections import Counter
 from typing import Sequence
 
 import pandas as pd
 import streamlit as st
 
 from db.connection import query_db
+from filters import digit_frequencies
 from utils.cache import cached_query
+from utils.cache_control import get_cache_token
 from utils.charts import render_digit_frequency_chart
 from utils.data_access import (
     fetch_lottery_info,
@@ -15,7 +16,10 @@ from utils.data_access import (
     fetch_playtypes_for_issue,
     fetch_predicted_issues,
     fetch_predictions,
+    load_issue_bundle,
 )
+from utils.expert_filter import FilterOutcome, FilterSession, HitCondition, NumberCondition
+from utils.filter_pipeline import FilterPipeline, PipelineStore, StageCache, run_pipeline
 from utils.numbers import match_prediction_hit, normalize_code, parse_tokens
 from utils.sql import make_in_clause
 from utils.ui import issue_picker, playtype_picker, render_open_info
@@ -39,14 +43,6 @@ def fetch_expert_names(user_ids: Sequence[int]) -> dict[int, str]:
     return {int(row["user_id"]): row.get("nick_name") or "未知" for row in rows}
 
 
-def extract_digit_set(numbers: str) -> set[str]:
-    tokens = parse_tokens(numbers)
-    digits: list[str] = []
-    for token in tokens:
-        digits.extend(list(token))
-    return set(digits)
-
-
 def render_horizontal_chart(freq_df: pd.DataFrame, open_digits: Sequence[str]):
     return render_digit_frequency_chart(
         freq_df,
@@ -57,165 +53,84 @@ def render_horizontal_chart(freq_df: pd.DataFrame, open_digits: Sequence[str]):
     )
 
 
-def users_matching_number_conditions(
-    df: pd.DataFrame,
-    conditions: list[dict[str, object]],
-) -> set[int]:
-    all_users = set(df["user_id"].unique())
-    if not conditions:
-        return all_users
-
-    candidate = all_users.copy()
-    for cond in conditions:
-        digits: list[str] = cond.get("digits", [])  # type: ignore[assignment]
-        playtypes: list[int] = cond.get("playtypes", [])  # type: ignore[assignment]
-        mode: str = cond.get("mode", "包含")  # type: ignore[assignment]
-        match_mode: str = cond.get("match", "任意匹配")  # type: ignore[assignment]
-
-        if not digits or not playtypes:
-            continue
-
-        relevant = df[df["playtype_id"].isin(playtypes)]
-        if relevant.empty:
-            candidate.clear()
-            break
-
-        cond_users: set[int] = set()
-        for user_id, group in relevant.groupby("user_id"):
-            if mode == "包含":
-                for digit_set in group["digit_set"]:
-                    if match_mode == "任意匹配":
-                        if any(d in digit_set for d in digits):
-                            cond_users.add(user_id)
-                            break
-                    else:  # 全部匹配
-                        if all(d in digit_set for d in digits):
-                            cond_users.add(user_id)
-                            break
-            else:  # 不包含
-                for digit_set in group["digit_set"]:
-                    if not any(d in digit_set for d in digits):
-                        cond_users.add(user_id)
-                        break
-
-        candidate &= cond_users
-        if not candidate:
-            break
-
-    return candidate
-
-
-def gather_hit_records(
-    issue_sequence: Sequence[str], playtype_id: int, playtype_name: str
-) -> dict[int, dict[str, bool]]:
-    if not issue_sequence:
-        return {}
-
+def load_hit_history(
+    issue_sequence: list[str], playtype_ids: list[int]
+) -> tuple[pd.DataFrame, dict[str, str | None]]:
     predictions_df = fetch_predictions(
         issue_sequence,
-        playtype_ids=[playtype_id],
-        columns=["issue_name", "user_id", "numbers"],
-        ttl=None,
+        playtype_ids=playtype_ids,
+        columns=["issue_name", "user_id", "playtype_id", "numbers"],
     )
-    if predictions_df.empty:
-        return {}
-
-    info_map = fetch_lottery_infos(issue_sequence, ttl=None)
-    records: dict[int, dict[str, bool]] = {}
-
-    for (user_id, issue_name), group in predictions_df.groupby(["user_id", "issue_name"]):
-        open_info = info_map.get(issue_name)
-        open_code = open_info.get("open_code") if open_info else None
-        hit = False
-        if open_code:
-            for numbers in group["numbers"]:
-                if match_prediction_hit(playtype_name, numbers, open_code):
-                    hit = True
-                    break
-        records.setdefault(int(user_id), {})[issue_name] = hit
-
-    return records
-
-
-def users_matching_hit_conditions(
-    conditions: list[dict[str, object]],
-    issues: list[str],
-    selected_issue: str,
-    playtype_map: dict[int, str],
-) -> set[int]:
-    if not conditions:
-        return set()
-
-    try:
-        current_index = issues.index(selected_issue)
-    except ValueError:
-        return set()
-
-    available_history = issues[current_index + 1 :]
-    if not available_history:
-        return set()
-
-    candidate: set[int] | None = None
-
-    for cond in conditions:
-        playtype_id = int(cond.get("playtype", available_history and 0))
-        playtype_name = playtype_map.get(playtype_id, str(playtype_id))
-        mode: str = cond.get("mode", "上期命中")  # type: ignore[assignment]
-
-        if mode in {"上期命中", "上期未命中"}:
-            sequence = available_history[:1]
-        else:  # 近N期命中M次
-            recent_n = int(cond.get("recent_n", 5))
-            sequence = available_history[:recent_n]
-
-        if not sequence:
-            cond_users: set[int] = set()
-        else:
-            records = gather_hit_records(sequence, playtype_id, playtype_name)
-            if not records:
-                cond_users = set()
-            else:
-                if mode == "上期命中":
-                    issue = sequence[0]
-                    cond_users = {
-                        user_id
-                        for user_id, issues_hits in records.items()
-                        if issues_hits.get(issue, False)
-                    }
-                elif mode == "上期未命中":
-                    issue = sequence[0]
-                    cond_users = {
-                        user_id
-                        for user_id, issues_hits in records.items()
-                        if issue in issues_hits and not issues_hits.get(issue, False)
-                    }
-                else:  # 近N期命中M次
-                    issue_order = sequence
-                    operator = cond.get("operator", ">=")
-                    expected = int(cond.get("expected", 1))
-                    op_map = {
-                        ">": lambda a, b: a > b,
-                        ">=": lambda a, b: a >= b,
-                        "=": lambda a, b: a == b,
-                        "<": lambda a, b: a < b,
-                        "<=": lambda a, b: a <= b,
-                    }
-                    compare = op_map.get(operator, op_map[">="])
-                    cond_users = set()
-                    for user_id, issues_hits in records.items():
-                        hit_count = sum(1 for issue in issue_order if issues_hits.get(issue, False))
-                        if compare(hit_count, expected):
-                            cond_users.add(user_id)
-
-        if candidate is None:
-            candidate = cond_users
-        else:
-            candidate &= cond_users
+    info_map = fetch_lottery_infos(issue_sequence)
+    return predictions_df, {
+        issue: (info or {}).get("open_code") for issue, info in info_map.items()
+    }
+
+
+_OPERATORS = {"≥": ">=", "=": "=", ">": ">", "<": "<", "<=": "<="}
+_OPERATOR_LABELS = {value: label for label, value in _OPERATORS.items()}
+
+
+@st.cache_resource(show_spinner=False)
+def get_stage_cache() -> StageCache:
+    return StageCache()
+
+
+def build_pipeline(name: str = "") -> FilterPipeline:
+    number_conditions: list[NumberCondition] = []
+    for cond in st.session_state["filter_conditions"]:
+        digits = tuple(d for d in cond.get("numbers", []) if d)
+        playtypes = tuple(int(pid) for pid in cond.get("playtypes", []) if pid is not None)
+        mode = cond.get("mode", "包含") or "包含"
+        match_mode = cond.get("match_mode", "全部匹配") or "全部匹配"
+        if mode == "不包含":
+            match_mode = "全部匹配"
+        if match_mode == "任意包含":
+            match_mode = "任意匹配"
+        number_conditions.append(NumberCondition(playtypes, digits, mode, match_mode))
+
+    hit_conditions: list[HitCondition] = []
+    for cond in st.session_state["hit_conditions"]:
+        playtype_value = cond.get("playtype")
+        if playtype_value is None:
+            continue
+        hit_conditions.append(
+            HitCondition(
+                playtype=int(playtype_value),
+                mode=cond.get("mode", "上期命中") or "上期命中",
+                recent_n=int(cond.get("recent_n", 5) or 5),
+                operator=_OPERATORS.get(cond.get("op", "≥") or "≥", ">="),
+                expected=int(cond.get("hit_n", 3) or 3),
+            )
+        )
+    return FilterPipeline(name, tuple(number_conditions), tuple(hit_conditions))
 
-        if candidate is not None and not candidate:
-            break
 
-    return candidate or set()
+def apply_pipeline(pipeline: FilterPipeline, available: Sequence[int]) -> None:
+    """把方案写回条件列表；本期没有的玩法被丢弃，命中条件回退到第一个玩法。"""
+    for key in list(st.session_state.keys()):
+        if str(key).startswith(("uefp_filter_", "uefp_hit_")):
+            st.session_state.pop(key, None)
+    st.session_state["filter_conditions"] = [
+        {
+            "playtypes": [pid for pid in cond.playtypes if pid in available],
+            "mode": cond.mode,
+            "match_mode": cond.match,
+            "numbers": list(cond.digits),
+        }
+        for cond in pipeline.number_conditions
+    ]
+    st.session_state["hit_conditions"] = [
+        {
+            "playtype": cond.playtype if cond.playtype in available else available[0],
+            "mode": cond.mode,
+            "recent_n": int(cond.recent_n),
+            "hit_n": int(cond.expected),
+            "op": _OPERATOR_LABELS.get(cond.operator, "≥"),
+        }
+        for cond in pipeline.hit_conditions
+    ]
+    clear_cached_result()
 
 
 issues = fetch_predicted_issues(limit=200)
@@ -446,99 +361,72 @@ for idx, cond in enumerate(st.session_state["hit_conditions"]):
 if st.session_state["hit_conditions"]:
     st.success(f"✅ 当前共设置 {len(st.session_state['hit_conditions'])} 条命中特征筛选条件")
 
+st.markdown("## 💾 筛选方案")
+pipeline_store = PipelineStore()
+saved_names = pipeline_store.names()
+plan_cols = st.columns([3, 1, 1])
+selected_plan = plan_cols[0].selectbox(
+    "已保存的方案",
+    options=saved_names,
+    index=None,
+    placeholder="选择方案" if saved_names else "暂无已保存的方案",
+    key="uefp_plan_selected",
+)
+if plan_cols[1].button("📂 载入", disabled=not selected_plan):
+    loaded = pipeline_store.load(selected_plan)
+    if loaded is not None:
+        apply_pipeline(loaded, playtype_ids)
+        st.rerun()
+if plan_cols[2].button("🗑️ 删除方案", disabled=not selected_plan):
+    pipeline_store.delete(selected_plan)
+    st.session_state.pop("uefp_plan_selected", None)
+    st.rerun()
+
+save_cols = st.columns([3, 1])
+plan_name = save_cols[0].text_input("方案名称", key="uefp_plan_name", placeholder="输入名称后保存")
+if save_cols[1].button("💾 保存当前条件", disabled=not plan_name.strip()):
+    pipeline_store.save(build_pipeline(plan_name.strip()))
+    st.success(f"已保存筛选方案：{plan_name.strip()}")
+
 st.markdown("---")
 st.markdown("## 🧾 查询推荐记录")
 
 if st.button("📥 执行筛选并查询推荐"):
-    issue_predictions = fetch_predictions(
-        [issue_name],
-        playtype_ids=playtype_ids,
-        columns=["issue_name", "playtype_id", "user_id", "numbers"],
-        ttl=None,
-    )
-    if issue_predictions.empty:
+    bundle = load_issue_bundle(issue_name).for_playtypes(playtype_ids)
+    if not len(bundle):
         clear_cached_result()
         st.info("当前期暂无推荐记录。")
     else:
-        issue_predictions = issue_predictions.copy()
-        issue_predictions["playtype_id"] = issue_predictions["playtype_id"].astype(int)
-        issue_predictions["user_id"] = issue_predictions["user_id"].astype(int)
-        issue_predictions["digit_set"] = issue_predictions["numbers"].apply(extract_digit_set)
-
-        number_conditions_payload: list[dict[str, object]] = []
-        for cond in st.session_state["filter_conditions"]:
-            digits = [d for d in cond.get("numbers", []) if d]
-            playtypes = [int(pid) for pid in cond.get("playtypes", []) if pid is not None]
-            if not digits or not playtypes:
-                continue
-            mode = cond.get("mode", "包含") or "包含"
-            match_mode = cond.get("match_mode", "全部匹配") or "全部匹配"
-            if mode == "不包含":
-                match_mode = "全部匹配"
-            if match_mode == "任意包含":
-                match_mode = "任意匹配"
-            number_conditions_payload.append(
-                {
-                    "digits": digits,
-                    "playtypes": playtypes,
-                    "mode": mode,
-                    "match": match_mode,
-                }
-            )
-
-        number_users = users_matching_number_conditions(
-            issue_predictions, number_conditions_payload
+        pipeline = build_pipeline()
+        history_issues = issues[issues.index(issue_name) + 1 :] if issue_name in issues else []
+        session = FilterSession(
+            bundle.user_ids,
+            bundle.playtype_ids,
+            bundle.digit_masks,
+            history_issues=history_issues,
+            load_history=load_hit_history,
+            playtype_names=playtype_map,
         )
-
-        hit_conditions_payload: list[dict[str, object]] = []
-        for cond in st.session_state["hit_conditions"]:
-            playtype_value = cond.get("playtype")
-            if playtype_value is None:
-                continue
-            mode = cond.get("mode", "上期命中") or "上期命中"
-            payload: dict[str, object] = {
-                "playtype": int(playtype_value),
-                "mode": mode,
-            }
-            if mode == "近N期命中M次":
-                payload["recent_n"] = int(cond.get("recent_n", 5) or 5)
-                payload["expected"] = int(cond.get("hit_n", 3) or 3)
-                op_value = cond.get("op", "≥") or "≥"
-                op_map = {"≥": ">=", "=": "=", ">": ">", "<": "<", "<=": "<="}
-                payload["operator"] = op_map.get(op_value, ">=")
-            else:
-                payload["recent_n"] = int(cond.get("recent_n", 5) or 5)
-                payload["expected"] = int(cond.get("hit_n", 1) or 1)
-                payload["operator"] = cond.get("op", ">=") or ">="
-            hit_conditions_payload.append(payload)
-
-        hit_users = (
-            users_matching_hit_conditions(
-                hit_conditions_payload,
-                issues,
-                issue_name,
-                playtype_map,
-            )
-            if hit_conditions_payload
-            else None
+        outcome = run_pipeline(
+            pipeline,
+            session,
+            issue=issue_name,
+            version=get_cache_token(["expert_predictions", "lottery_results"]),
+            cache=get_stage_cache(),
         )
-
-        final_users = set(number_users)
-        if hit_conditions_payload:
-            if not hit_users:
-                st.info("命中特征条件无满足用户。")
-                final_users = set()
-            else:
-                final_users &= hit_users
+        final_users = {int(uid) for uid in outcome.user_ids}
+        if pipeline.hit_conditions and not final_users:
+            st.info("命中特征条件无满足用户。")
 
         if not final_users:
             clear_cached_result()
             st.warning("⚠️ 没有符合条件的推荐记录")
         else:
-            target_df = issue_predictions[
-                (issue_predictions["playtype_id"] == int(target_playtype_id))
-                & (issue_predictions["user_id"].isin(final_users))
-            ][["user_id", "numbers"]].copy()
+            target_df = (
+                bundle.for_playtype(int(target_playtype_id))
+                .for_users(final_users)
+                .to_frame(["user_id", "numbers"])
+            )
 
             if target_df.empty:
                 clear_cached_result()
@@ -553,6 +441,7 @@ if st.button("📥 执行筛选并查询推荐"):
                     "user_ids": sorted(final_users),
                     "open_info": open_info,
                     "nick_map": nick_map,
+                    "plan": outcome,
                 }
 
 if "uefp_result" in st.session_state:
@@ -569,6 +458,24 @@ if "uefp_result" in st.session_state:
 
         st.markdown(f"### 📋 本期推荐记录（{issue_name}期） - 共 {len(rec_df)} 条")
         st.info(f"共筛选出 {len(user_ids)} 位专家，生成推荐记录 {len(rec_df)} 条")
+        plan: FilterOutcome | None = cached.get("plan")
+        if plan is not None and plan.steps:
+            with st.expander("🧭 筛选执行计划", expanded=False):
+                st.dataframe(
+                    pd.DataFrame(
+                        [
+                            {
+                                "步骤": step.label,
+                                "涉及推荐行": step.rows,
+                                "剩余专家": step.candidates,
+                                "耗时(ms)": step.elapsed_ms,
+                            }
+                            for step in plan.steps
+                        ]
+                    ),
+                    hide_index=True,
+                    use_container_width=True,
+                )
 
         open_code = open_info.get("open_code") if open_info else None
         blue_code = open_info.get("blue_code") if open_info else None
@@ -594,22 +501,10 @@ if "uefp_result" in st.session_state:
         open_digits = list(normalized_open)
         open_digit_set = set(open_digits)
 
-        number_counter: Counter[str] = Counter()
-        for numbers in rec_df["numbers"]:
-            for token in parse_tokens(numbers):
-                number_counter.update(list(token))
-
-        if number_counter:
-            freq_df = (
-                pd.DataFrame(
-                    [
-                        {"数字": digit, "被推荐次数": count}
-                        for digit, count in number_counter.items()
-                    ]
-                )
-                .sort_values("被推荐次数", ascending=False)
-                .reset_index(drop=True)
-            )
+        freq_df = digit_frequencies(rec_df["numbers"]).rename(
+            columns={"value": "数字", "count": "被推荐次数"}
+        )
+        if not freq_df.empty:
             hit_digit_count = (
                 sum(1 for digit in freq_df["数字"] if digit in open_digit_set)
                 if has_open_code
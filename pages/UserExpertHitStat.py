@@ -4,17 +4,21 @@ import re
 from collections import Counter
 from typing import Iterable, Sequence
 
-import altair as alt
 import pandas as pd
 import streamlit as st
 
 from db.connection import query_db
+from filters import digit_frequencies, select_experts, split_last_hit, summarize_hit_stat
 from utils.cache import cached_query
+from utils.catalog import load_issue_catalog
 from utils.charts import render_digit_frequency_chart
-from utils.data_access import fetch_lottery_info, fetch_playtypes
+from utils.data_access import fetch_lottery_info, playtype_names_by_id
+from utils.lazy import lazy_import
 from utils.numbers import match_prediction_hit, normalize_code, parse_tokens
 from utils.sql import make_in_clause
 
+alt = lazy_import("altair")
+
 st.set_page_config(page_title="AI 命中统计分析", layout="wide")
 st.header("UserExpertHitStat - AI 命中表现分析")
 st.caption("固定彩种：福彩3D")
@@ -57,23 +61,17 @@ POSITIONAL_PLAYTYPES: dict[str, int] = {
     "千位定1": 1,
 }
 
-PLAYTYPE_DICT = fetch_playtypes()
-PLAYTYPE_NAME_TO_ID: dict[str, int] = (
-    {row.playtype_name: int(row.playtype_id) for row in PLAYTYPE_DICT.itertuples()}
-    if not PLAYTYPE_DICT.empty
-    else {}
-)
-PLAYTYPE_ID_TO_NAME: dict[int, str] = (
-    {int(row.playtype_id): row.playtype_name for row in PLAYTYPE_DICT.itertuples()}
-    if not PLAYTYPE_DICT.empty
-    else {}
-)
+# --------- 数据查询辅助函数 ---------
 
 
-# --------- 数据查询辅助函数 ---------
+def playtype_name(playtype_id: int) -> str:
+    return playtype_names_by_id().get(playtype_id, str(playtype_id))
 
 
 def fetch_stat_issues() -> list[str]:
+    catalog = load_issue_catalog()
+    if catalog is not None:
+        return catalog.issues("hit_stat")
     rows = cached_query(
         query_db,
         "SELECT DISTINCT issue_name FROM expert_hit_stat ORDER BY issue_name DESC",
@@ -84,6 +82,11 @@ def fetch_stat_issues() -> list[str]:
 
 
 def fetch_playtypes_for_issue(issue: str) -> list[tuple[int, str]]:
+    catalog = load_issue_catalog()
+    playtype_ids = catalog.playtypes(issue, source="hit_stat") if catalog is not None else None
+    if playtype_ids is not None:
+        names = playtype_names_by_id()
+        return [(pid, names[pid]) for pid in playtype_ids if pid in names]
     rows = cached_query(
         query_db,
         """
@@ -99,7 +102,7 @@ def fetch_playtypes_for_issue(issue: str) -> list[tuple[int, str]]:
     return [
         (
             int(row["pid"]),
-            row.get("pname") or PLAYTYPE_ID_TO_NAME.get(int(row["pid"]), str(row["pid"])),
+            row.get("pname") or playtype_name(int(row["pid"])),
         )
         for row in rows
     ]
@@ -107,7 +110,7 @@ def fetch_playtypes_for_issue(issue: str) -> list[tuple[int, str]]:
 
 def fetch_hit_summary(issues: Sequence[str], playtype_id: int) -> pd.DataFrame:
     if not issues:
-        return pd.DataFrame(columns=["user_id", "total_count", "hit_count", "hit_number_count"])
+        return summarize_hit_stat([])
     clause, params = make_in_clause("issue_name", issues, "issue")
     params["playtype"] = int(playtype_id)
     sql = f"""
@@ -120,7 +123,7 @@ def fetch_hit_summary(issues: Sequence[str], playtype_id: int) -> pd.DataFrame:
         GROUP BY user_id
     """
     rows = cached_query(query_db, sql, params=params, ttl=120)
-    return pd.DataFrame(rows)
+    return summarize_hit_stat(rows)
 
 
 def fetch_nick_map(user_ids: Iterable[int]) -> dict[int, str]:
@@ -134,6 +137,9 @@ def fetch_nick_map(user_ids: Iterable[int]) -> dict[int, str]:
 
 
 def fetch_query_issues() -> list[str]:
+    catalog = load_issue_catalog()
+    if catalog is not None:
+        return catalog.issues("expert")
     sql = """
         SELECT issue_name
         FROM (
@@ -158,9 +164,7 @@ def fetch_last_hit_status(issue: str, playtype_id: int) -> tuple[set[int], set[i
         params={"issue": issue, "playtype": int(playtype_id)},
         ttl=120,
     )
-    hit_users = {int(row["user_id"]) for row in rows if row.get("hit_count", 0)}
-    miss_users = {int(row["user_id"]) for row in rows if not row.get("hit_count", 0)}
-    return hit_users, miss_users
+    return split_last_hit(rows)
 
 
 def fetch_predictions_for_users(
@@ -208,10 +212,10 @@ playtype_name_map = {pid: name for pid, name in playtype_pairs}
 selected_playtype_id = st.selectbox(
     "🎮 选择玩法",
     options=playtype_ids,
-    format_func=lambda pid: playtype_name_map.get(pid, PLAYTYPE_ID_TO_NAME.get(pid, str(pid))),
+    format_func=lambda pid: playtype_name_map.get(pid) or playtype_name(pid),
 )
-selected_playtype_name = playtype_name_map.get(
-    selected_playtype_id, PLAYTYPE_ID_TO_NAME.get(selected_playtype_id, str(selected_playtype_id))
+selected_playtype_name = playtype_name_map.get(selected_playtype_id) or playtype_name(
+    selected_playtype_id
 )
 
 if st.button("📊 分析 AI 命中表现"):
@@ -219,19 +223,16 @@ if st.button("📊 分析 AI 命中表现"):
     if summary_df.empty:
         st.info("所选条件下无命中统计数据。")
     else:
-        summary_df["user_id"] = summary_df["user_id"].astype(int)
         nick_map = fetch_nick_map(summary_df["user_id"].tolist())
-        summary_df["预测期数"] = summary_df["total_count"].fillna(0).astype(int)
-        summary_df["命中期数"] = summary_df["hit_count"].fillna(0).astype(int)
-        summary_df["命中数字数量"] = summary_df["hit_number_count"].fillna(0).astype(int)
-        summary_df["命中率"] = summary_df.apply(
-            lambda row: round(row["命中数字数量"] / row["预测期数"], 4) if row["预测期数"] else 0,
-            axis=1,
-        )
         summary_df["AI昵称"] = summary_df["user_id"].map(nick_map).fillna("未知")
-        result_df = summary_df[
-            ["user_id", "AI昵称", "命中期数", "预测期数", "命中数字数量", "命中率"]
-        ].sort_values(by="命中率", ascending=False)
+        result_df = summary_df.rename(
+            columns={
+                "total_count": "预测期数",
+                "hit_count": "命中期数",
+                "hit_number_count": "命中数字数量",
+                "hit_rate": "命中率",
+            }
+        )[["user_id", "AI昵称", "命中期数", "预测期数", "命中数字数量", "命中率"]]
         st.session_state["uehs_summary"] = {
             "result": result_df.reset_index(drop=True),
             "issues": list(selected_issues),
@@ -247,9 +248,7 @@ state = st.session_state["uehs_summary"]
 result_df: pd.DataFrame = state["result"]
 history_issues: list[str] = state["issues"]
 selected_playtype_id: int = state["playtype_id"]
-selected_playtype_name: str = state.get(
-    "playtype_name", PLAYTYPE_ID_TO_NAME.get(selected_playtype_id, str(selected_playtype_id))
-)
+selected_playtype_name: str = state.get("playtype_name") or playtype_name(selected_playtype_id)
 playtype_pairs = state.get("playtype_options", [])
 if not playtype_pairs:
     playtype_pairs = fetch_playtypes_for_issue(history_issues[0])
@@ -330,21 +329,23 @@ query_playtype_id = st.selectbox(
     "🎮 查询玩法",
     options=query_playtype_ids,
     index=default_index,
-    format_func=lambda pid: query_playtype_name_map.get(
-        pid, PLAYTYPE_ID_TO_NAME.get(pid, str(pid))
-    ),
+    format_func=lambda pid: query_playtype_name_map.get(pid) or playtype_name(pid),
 )
-query_playtype_name = query_playtype_name_map.get(
-    query_playtype_id, PLAYTYPE_ID_TO_NAME.get(query_playtype_id, str(query_playtype_id))
+query_playtype_name = query_playtype_name_map.get(query_playtype_id) or playtype_name(
+    query_playtype_id
 )
 
 if st.button("📥 查询推荐记录"):
-    filtered = result_df[
-        result_df["命中期数"].isin(selected_hit_values)
-        & result_df["命中数字数量"].isin(selected_num_hit_values)
-    ]
+    summary_view = result_df.rename(
+        columns={"命中期数": "hit_count", "命中数字数量": "hit_number_count"}
+    )
+    selected_users = select_experts(
+        summary_view,
+        hit_counts=selected_hit_values,
+        hit_number_counts=selected_num_hit_values,
+    )
 
-    if filtered.empty:
+    if not len(selected_users):
         st.warning("当前筛选条件下没有专家。")
         st.session_state.pop("uehs_records", None)
     else:
@@ -365,16 +366,20 @@ if st.button("📥 查询推荐记录"):
                 hit_users_last, miss_users_last = fetch_last_hit_status(
                     last_issue, query_playtype_id
                 )
-            if hit_status_filter == "上期命中":
-                filtered = filtered[filtered["user_id"].isin(hit_users_last)]
-            else:
-                filtered = filtered[filtered["user_id"].isin(miss_users_last)]
-        if filtered.empty:
+            selected_users = select_experts(
+                summary_view,
+                hit_counts=selected_hit_values,
+                hit_number_counts=selected_num_hit_values,
+                allowed_users=(
+                    hit_users_last if hit_status_filter == "上期命中" else miss_users_last
+                ),
+            )
+        if not len(selected_users):
             st.warning("筛选条件下无专家符合。")
             st.session_state.pop("uehs_records", None)
         else:
             rec_df = fetch_predictions_for_users(
-                query_issue, query_playtype_id, filtered["user_id"].tolist()
+                query_issue, query_playtype_id, selected_users.tolist()
             )
             st.session_state["uehs_records"] = {
                 "records": rec_df,
@@ -389,9 +394,8 @@ if "uehs_records" in st.session_state:
     rec_df: pd.DataFrame = record_state.get("records", pd.DataFrame())
     issue_for_display: str = record_state.get("issue", "")
     playtype_id_for_display: int = record_state.get("playtype_id", selected_playtype_id)
-    playtype_name_for_display: str = record_state.get(
-        "playtype_name",
-        PLAYTYPE_ID_TO_NAME.get(playtype_id_for_display, str(playtype_id_for_display)),
+    playtype_name_for_display: str = record_state.get("playtype_name") or playtype_name(
+        playtype_id_for_display
     )
     nick_map: dict[int, str] = record_state.get("nick_map", {})
 
@@ -417,19 +421,10 @@ if "uehs_records" in st.session_state:
                 unsafe_allow_html=True,
             )
 
-        number_counter: Counter[str] = Counter()
-        for numbers in rec_df["numbers"]:
-            for token in parse_tokens(numbers):
-                number_counter.update(list(token))
-
-        if number_counter:
-            freq_df = (
-                pd.DataFrame(
-                    [{"数字": digit, "出现次数": count} for digit, count in number_counter.items()]
-                )
-                .sort_values("出现次数", ascending=False)
-                .reset_index(drop=True)
-            )
+        freq_df = digit_frequencies(rec_df["numbers"]).rename(
+            columns={"value": "数字", "count": "出现次数"}
+        )
+        if not freq_df.empty:
             normalized_open = normalize_code(open_code) if open_code else ""
             open_digits = list(normalized_open)
             positional_index = POSITIONAL_PLAYTYPES.get(playtype_name_for_display)
@@ -2,31 +2,34 @@ from __future__ import annotations
 
 from typing import Sequence
 
-import altair as alt
 import pandas as pd
 import streamlit as st
 
 from db.connection import query_db
+from utils.cache_control import get_cache_token
 from utils.data_access import (
     fetch_lottery_infos,
-    fetch_playtypes,
     fetch_playtypes_for_issue,
     fetch_predictions,
+    playtype_names_by_id,
 )
+from utils.jobs import ProgressFn, job_key
+from utils.lazy import lazy_import
 from utils.numbers import match_prediction_hit, normalize_code, parse_tokens
-from utils.ui import issue_picker, playtype_picker, render_open_info
+from utils.ui import (
+    current_job,
+    issue_picker,
+    playtype_picker,
+    render_job,
+    render_open_info,
+    submit_job,
+)
+
+alt = lazy_import("altair")
 
 st.set_page_config(page_title="专家多期命中分析", layout="wide")
 st.header("UserHitAnalysis - 专家多期命中分析")
 
-# 预加载玩法字典供跨期画像展示使用
-_all_playtypes_df = fetch_playtypes()
-PLAYTYPE_NAME_MAP: dict[int, str] = (
-    {int(row.playtype_id): row.playtype_name for row in _all_playtypes_df.itertuples()}
-    if not _all_playtypes_df.empty
-    else {}
-)
-
 selected_issues = issue_picker(
     "user_hit_analysis_issues",
     mode="multi",
@@ -93,6 +96,76 @@ def _fetch_expert_name(user_id: int) -> str:
     return "未知"
 
 
+def build_profile(
+    report: ProgressFn, user_id: int, nick_name: str, history_issues: Sequence[str]
+) -> dict[str, object]:
+    """后台任务：专家在所选期号内各玩法的推荐 / 命中汇总。"""
+    report(0.05, "加载历史推荐")
+    history_tuple = tuple(history_issues)
+    predictions_df = _fetch_predictions(history_tuple, user_ids=[user_id])
+    if predictions_df.empty:
+        return {"message": "无历史推荐数据用于画像分析。"}
+
+    predictions_df["issue_name"] = predictions_df["issue_name"].astype(str)
+    report(0.2, "加载开奖信息")
+    info_map = _fetch_open_infos(history_tuple)
+
+    playtype_names = playtype_names_by_id()
+    summary_records = []
+    groups = list(predictions_df.groupby("playtype_id"))
+    for index, (inner_playtype_id, sub_df) in enumerate(groups):
+        inner_playtype_id = int(inner_playtype_id)
+        inner_playtype_name = playtype_names.get(inner_playtype_id, str(inner_playtype_id))
+        report(0.3 + 0.7 * index / len(groups), f"统计玩法：{inner_playtype_name}")
+        total = len(sub_df)
+        hit_count = 0
+        hit_digits_sum = 0
+        hit_issue_indices: list[int] = []
+
+        for row in sub_df.itertuples():
+            issue_name = str(row.issue_name)
+            numbers = row.numbers
+            open_info = info_map.get(issue_name)
+            open_code = open_info.get("open_code") if open_info else None
+            open_digits = set(normalize_code(open_code)) if open_code else set()
+            digits = set("".join(parse_tokens(numbers)))
+
+            if open_code and match_prediction_hit(inner_playtype_name, numbers, open_code):
+                hit_count += 1
+                hit_issue_indices.append(int(issue_name))
+            hit_digits_sum += len(open_digits & digits)
+
+        if hit_count > 1 and hit_issue_indices:
+            hit_issue_indices.sort()
+            computed_gaps = [j - i for i, j in zip(hit_issue_indices[:-1], hit_issue_indices[1:])]
+            if computed_gaps:
+                avg_gap = round(sum(computed_gaps) / len(computed_gaps), 1)
+            else:
+                avg_gap = "-"
+        elif hit_count == 1:
+            avg_gap = "1命中"
+        else:
+            avg_gap = "∞"
+
+        summary_records.append(
+            {
+                "玩法": inner_playtype_name,
+                "推荐期数": total,
+                "命中期数": hit_count,
+                "命中数字数量": hit_digits_sum,
+                "平均命中间隔": avg_gap,
+            }
+        )
+
+    if not summary_records:
+        return {"message": "未能生成专家画像。"}
+    return {
+        "user_id": user_id,
+        "nick_name": nick_name,
+        "stats": pd.DataFrame(summary_records).sort_values("命中期数", ascending=False),
+    }
+
+
 if st.button("🔍 批量查询专家多期命中"):
     raw_user = user_input.strip()
     if not raw_user:
@@ -231,68 +304,27 @@ if st.button("📌 查询专家综合画像"):
         st.warning("缺少可用于画像的期号。")
         st.stop()
 
-    history_tuple = tuple(history_issues)
-    predictions_df = _fetch_predictions(history_tuple, user_ids=[user_id])
-    if predictions_df.empty:
-        st.info("无历史推荐数据用于画像分析。")
-        st.stop()
-
-    predictions_df["issue_name"] = predictions_df["issue_name"].astype(str)
-    user_df = predictions_df
-    if user_df.empty:
-        st.info("该专家没有符合条件的历史推荐。")
-        st.stop()
-
-    info_map = _fetch_open_infos(history_tuple)
-
-    summary_records = []
-    for inner_playtype_id, sub_df in user_df.groupby("playtype_id"):
-        inner_playtype_id = int(inner_playtype_id)
-        inner_playtype_name = PLAYTYPE_NAME_MAP.get(inner_playtype_id, str(inner_playtype_id))
-        total = len(sub_df)
-        hit_count = 0
-        hit_digits_sum = 0
-        hit_issue_indices: list[int] = []
-
-        for row in sub_df.itertuples():
-            issue_name = str(row.issue_name)
-            numbers = row.numbers
-            open_info = info_map.get(issue_name)
-            open_code = open_info.get("open_code") if open_info else None
-            open_digits = set(normalize_code(open_code)) if open_code else set()
-            digits = set("".join(parse_tokens(numbers)))
-
-            if open_code and match_prediction_hit(inner_playtype_name, numbers, open_code):
-                hit_count += 1
-                hit_issue_indices.append(int(issue_name))
-            hit_digits_sum += len(open_digits & digits)
-
-        if hit_count > 1 and hit_issue_indices:
-            hit_issue_indices.sort()
-            computed_gaps = [j - i for i, j in zip(hit_issue_indices[:-1], hit_issue_indices[1:])]
-            if computed_gaps:
-                avg_gap = round(sum(computed_gaps) / len(computed_gaps), 1)
-            else:
-                avg_gap = "-"
-        elif hit_count == 1:
-            avg_gap = "1命中"
-        else:
-            avg_gap = "∞"
-
-        summary_records.append(
-            {
-                "玩法": inner_playtype_name,
-                "推荐期数": total,
-                "命中期数": hit_count,
-                "命中数字数量": hit_digits_sum,
-                "平均命中间隔": avg_gap,
-            }
-        )
+    submit_job(
+        "user_hit_profile_job",
+        job_key(
+            "user_hit_profile",
+            user_id,
+            history_issues,
+            get_cache_token(["expert_predictions", "lottery_results"]),
+        ),
+        build_profile,
+        user_id,
+        nick_name,
+        history_issues,
+        label=f"专家 {user_id} 综合画像",
+    )
 
-    if not summary_records:
-        st.info("未能生成专家画像。")
+profile = render_job(current_job("user_hit_profile_job"))
+if profile is not None:
+    if "message" in profile:
+        st.info(profile["message"])
     else:
-        stats_df = pd.DataFrame(summary_records).sort_values("命中期数", ascending=False)
+        user_id, nick_name, stats_df = profile["user_id"], profile["nick_name"], profile["stats"]
         st.markdown(f"### 🎯 专家综合画像（user_id: {user_id}，昵称：{nick_name}）")
         st.dataframe(stats_df, hide_index=True, use_container_width=True)
 
@@ -1,9 +1,18 @@
 # pages/Xuanhao_3D_P3.py
 # 组选/直选号码生成器 + 盈利模拟
-from itertools import combinations, permutations, product
-
+import numpy as np
 import streamlit as st
 
+from utils.combinatorics import (
+    CODE_LABELS,
+    CODE_MASK,
+    N_CODES,
+    best_permutation,
+    digits_mask,
+    filter_codes,
+    position_filter,
+)
+
 st.set_page_config("🎰 老苏组选/直选号码生成器", layout="wide")
 st.title("🎰 老苏组选/直选号码生成器 + 盈利模拟")
 
@@ -63,117 +72,52 @@ if mode == "直选":
         exclude_digits = st.multiselect("排除数字", list(range(10)), default=[])
 
 
-# ===== 生成函数 =====
-def generate_group6(include_digits, exclude):
-    result = []
+# ===== 生成号码（查 utils.combinatorics 特征表）=====
+def anchored_codes(candidates, include_digits, exclude):
+    # 含某个包含数字 d，且 d 以外的数字都不在排除列表中（与原逐个生成的规则一致）
+    exclude_mask = digits_mask(exclude)
+    keep = np.zeros(N_CODES, dtype=bool)
     for d in include_digits:
-        pool = [x for x in range(10) if x != d and x not in exclude]
-        result += [tuple(sorted((a, b, d))) for a, b in combinations(pool, 2)]
-    return sorted(set(result))
-
-
-def get_odd_even_ratio(digits):
-    odd = sum(1 for d in digits if d % 2 == 1)
-    even = 3 - odd
-    return f"{odd}:{even}"
-
-
-def get_big_small_ratio(digits):
-    big = sum(1 for d in digits if d >= 5)
-    small = 3 - big
-    return f"{big}:{small}"
-
-
-def has_consecutive(digits):
-    digits = sorted(digits)
-    return any(digits[i + 1] - digits[i] == 1 for i in range(2))
-
-
-def filter_advanced(numbers):
-    result = []
-    for code in numbers:
-        digits = list(code)
-        s = sum(digits)
-        sp = max(digits) - min(digits)
-        if s in sum_filters or sp in span_filters:
-            continue
-        if not (sum_range[0] <= s <= sum_range[1]):
-            continue
-        if not (span_range[0] <= sp <= span_range[1]):
-            continue
-        if allowed_odd_even and get_odd_even_ratio(digits) not in allowed_odd_even:
-            continue
-        if allowed_big_small and get_big_small_ratio(digits) not in allowed_big_small:
-            continue
-        if exclude_lianhao and has_consecutive(digits):
-            continue
-        result.append(code)
-    return result
-
-
-def generate_group3(include_digits, exclude):
-    result = []
-    for d in include_digits:
-        pool = [x for x in range(10) if x != d and x not in exclude]
-        for x in pool:
-            result.append(tuple(sorted([d, d, x])))
-            result.append(tuple(sorted([x, x, d])))
-    return sorted(set(result))
-
-
-def generate_zhixuan(
-    bai,
-    shi,
-    ge,
-    include_digits=None,
-    exclude_digits=None,
-    filter_group3=False,
-    filter_baozi=False,
-    filter_group6=False,
-):
-    include_digits = include_digits or []
-    exclude_digits = exclude_digits or []
-    result = []
-    for b, s, g in product(bai, shi, ge):
-        digits = [b, s, g]
-        if include_digits and not any(d in digits for d in include_digits):
-            continue
-        if any(d in digits for d in exclude_digits):
-            continue
-        if filter_group3 and (b == s or s == g or b == g) and not (b == s == g):
-            continue
-        if filter_baozi and b == s == g:
-            continue
-        if filter_group6 and len(set(digits)) == 3:
-            continue
-        result.append((b, s, g))
-    return result
-
-
-# ===== 生成号码 =====
-numbers = []
+        bit = 1 << int(d)
+        keep |= ((CODE_MASK & bit) != 0) & ((CODE_MASK & ~bit & exclude_mask) == 0)
+    return candidates & keep
+
+
+advanced = filter_codes(
+    sum_range=sum_range,
+    span_range=span_range,
+    exclude_sums=sum_filters,
+    exclude_spans=span_filters,
+    odd_even=allowed_odd_even,
+    big_small=allowed_big_small,
+    exclude_consecutive=exclude_lianhao,
+)
 if mode == "组选":
     if group_type == "组六":
-        numbers = generate_group6(include_digits, exclude_digits)
-        numbers = filter_advanced(numbers)
+        candidates = filter_codes(unordered=True, exclude_classes=["组三", "豹子"])
         prize_per_win = 280
     else:
-        numbers = generate_group3(include_digits, exclude_digits)
-        numbers = filter_advanced(numbers)
+        candidates = filter_codes(unordered=True, exclude_classes=["组六", "豹子", "顺子"])
         prize_per_win = 550
+    keep = anchored_codes(candidates, include_digits, exclude_digits)
 else:
-    numbers = generate_zhixuan(
-        bai_list,
-        shi_list,
-        ge_list,
-        include_digits,
-        exclude_digits,
-        filter_group3=filter_group3,
-        filter_baozi=filter_baozi,
-        filter_group6=filter_group6,
+    excluded_classes = [
+        name
+        for name, enabled in (
+            ("组三", filter_group3),
+            ("豹子", filter_baozi),
+            ("组六", filter_group6),
+            ("顺子", filter_group6),
+        )
+        if enabled
+    ]
+    keep = position_filter([bai_list, shi_list, ge_list]) & filter_codes(
+        exclude_classes=excluded_classes, exclude_digits=exclude_digits
     )
-    numbers = filter_advanced(numbers)
+    if include_digits:
+        keep &= (CODE_MASK & digits_mask(include_digits)) != 0
     prize_per_win = 1700
+numbers = np.flatnonzero(keep & advanced)
 
 # ===== 倍数与成本 =====
 col1, col2 = st.columns(2)
@@ -222,8 +166,7 @@ bonus_total = group_bonus + zhixuan_bonus
 profit = bonus_total - bet_cost
 
 # ===== 文本输出 =====
-number_str_list = ["".join(map(str, row)) for row in numbers]
-number_text = ",".join(number_str_list)
+number_text = ",".join(CODE_LABELS[numbers])
 st.text_area(
     "生成号码（可复制）",
     f"{number_text} 共{len(numbers)}注，组选{group_multiplier}倍，直选{zhixuan_multiplier}倍，{bet_cost}元",
@@ -246,20 +189,11 @@ if mode == "组选":
         with col_ge:
             ge_digits = st.multiselect("个位应包含", list(range(10)), default=[], key="pos_ge")
 
-        index_map = {0: bai_digits, 1: shi_digits, 2: ge_digits}
-        use_position_filter = any(index_map.values())
-
-        if use_position_filter:
-            adjusted = []
-            for code in numbers:
-                digits = list(code)
-                for perm in set(permutations(digits)):
-                    if all(not index_map[i] or perm[i] in index_map[i] for i in range(3)):
-                        adjusted.append("".join(map(str, perm)))
-                        break
-                else:
-                    adjusted.append("".join(map(str, code)))
-            result_text = ",".join(adjusted)
+        if bai_digits or shi_digits or ge_digits:
+            allowed = position_filter(
+                [digits or range(10) for digits in (bai_digits, shi_digits, ge_digits)]
+            )
+            result_text = ",".join(CODE_LABELS[best_permutation(numbers, allowed)])
         else:
             result_text = number_text
 
@@ -0,0 +1,12 @@
+from __future__ import annotations
+
+import pytest
+
+from utils import change_feed
+
+
+@pytest.fixture(autouse=True)
+def isolated_change_feed(tmp_path, monkeypatch):
+    """Keep every test's change feed out of the checked-out ``logs/`` directory."""
+    monkeypatch.setenv(change_feed.FEED_PATH_ENV, str(tmp_path / "change_feed.sqlite3"))
+    monkeypatch.setattr(change_feed, "_FEED", None)
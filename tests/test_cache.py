@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+import threading
+import time
 from types import SimpleNamespace
 
 import pytest
@@ -7,6 +9,13 @@ import pytest
 from utils import cache
 
 
+def _wait_until(predicate, timeout: float = 5.0) -> None:
+    deadline = time.time() + timeout
+    while not predicate() and time.time() < deadline:
+        time.sleep(0.001)
+    assert predicate()
+
+
 @pytest.fixture(autouse=True)
 def patch_cache(monkeypatch):
     store = {}
@@ -52,3 +61,76 @@ def test_cached_query_cache_miss_on_params_change():
     assert first == 1
     assert second == 2
     assert calls["count"] == 2
+
+
+def test_tables_in_sql_extracts_from_and_join():
+    sql = """
+        SELECT p.user_id FROM expert_predictions p
+        LEFT JOIN `expert_info` i ON i.user_id = p.user_id
+        WHERE p.issue_name IN (SELECT issue_name FROM lottery_results)
+    """
+
+    assert cache.tables_in_sql(sql) == ("expert_info", "expert_predictions", "lottery_results")
+
+
+def test_concurrent_identical_queries_share_one_execution():
+    started = threading.Event()
+    release = threading.Event()
+    calls = {"count": 0}
+
+    def runner(sql: str, params: dict | None):
+        calls["count"] += 1
+        started.set()
+        release.wait(5)
+        return [{"value": params["value"]}]
+
+    before = cache.cache_metrics()
+    results = []
+
+    def worker():
+        results.append(cache.cached_query(runner, "SELECT :value", {"value": 7}))
+
+    leader = threading.Thread(target=worker)
+    leader.start()
+    assert started.wait(5)
+    followers = [threading.Thread(target=worker) for _ in range(5)]
+    for thread in followers:
+        thread.start()
+    _wait_until(lambda: cache.cache_metrics()["coalesced"] - before["coalesced"] >= 5)
+    release.set()
+    for thread in [leader, *followers]:
+        thread.join(5)
+
+    after = cache.cache_metrics()
+    assert calls["count"] == 1
+    assert results == [[{"value": 7}]] * 6
+    assert after["executed"] - before["executed"] == 1
+    assert after["coalesced"] - before["coalesced"] == 5
+    assert after["in_flight"] == 0
+
+
+def test_single_flight_propagates_leader_error():
+    flight = cache.SingleFlight()
+    release = threading.Event()
+    errors = []
+
+    def failing():
+        release.wait(5)
+        raise RuntimeError("db down")
+
+    def worker():
+        try:
+            flight.run("k", failing)
+        except RuntimeError as exc:
+            errors.append(str(exc))
+
+    threads = [threading.Thread(target=worker) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    _wait_until(lambda: flight.coalesced >= 2)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert errors == ["db down"] * 3
+    assert flight.errors == 1 and flight.in_flight() == 0
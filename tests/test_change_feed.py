@@ -0,0 +1,58 @@
+from __future__ import annotations
+
+from utils.change_feed import (
+    ALL_TABLES,
+    DEFAULT_FEED_PATH,
+    FEED_PATH_ENV,
+    ChangeFeed,
+    feed_path,
+    publish_change,
+)
+
+
+def test_version_only_follows_requested_tables(tmp_path):
+    path = tmp_path / "feed.sqlite3"
+    feed = ChangeFeed(path, poll_interval=0)
+
+    before = feed.version(["lottery_results"])
+    publish_change("expert_predictions", issue_name="2025101", row_count=10, path=path)
+    assert feed.version(["lottery_results"]) == before
+
+    publish_change("lottery_results", row_count=1, max_issue="2025101", path=path)
+    assert feed.version(["lottery_results"]) != before
+
+    wildcard_before = feed.version(["lottery_results"])
+    publish_change(ALL_TABLES, path=path)
+    assert feed.version(["lottery_results"]) != wildcard_before
+
+
+def test_refresh_is_throttled(tmp_path):
+    path = tmp_path / "feed.sqlite3"
+    feed = ChangeFeed(path, poll_interval=3600)
+
+    assert feed.latest_seq() == 0
+    publish_change("lottery_results", row_count=1, path=path)
+    assert feed.latest_seq() == 0
+    assert max(feed.refresh(force=True).values()) == 1
+
+
+def test_changes_since_returns_events(tmp_path):
+    path = tmp_path / "feed.sqlite3"
+    first = publish_change("lottery_results", row_count=1, max_issue="2025100", path=path)
+    publish_change("expert_predictions", issue_name="2025101", row_count=42, path=path)
+
+    events = ChangeFeed(path).changes_since(first)
+
+    assert [(e.table_name, e.issue_name, e.row_count) for e in events] == [
+        ("expert_predictions", "2025101", 42)
+    ]
+
+
+def test_feed_path_prefers_argument_then_environment(tmp_path, monkeypatch):
+    monkeypatch.setenv(FEED_PATH_ENV, str(tmp_path / "env.sqlite3"))
+    assert feed_path() == tmp_path / "env.sqlite3"
+    assert feed_path(tmp_path / "arg.sqlite3") == tmp_path / "arg.sqlite3"
+    assert ChangeFeed().path == tmp_path / "env.sqlite3"
+
+    monkeypatch.delenv(FEED_PATH_ENV)
+    assert feed_path() == DEFAULT_FEED_PATH
@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import asyncio
+import base64
+import json
+
+from Crypto.Cipher import AES
+from Crypto.Util.Padding import unpad
+
+from collector import api, async_api
+
+
+def _decrypt(payload: str) -> str:
+    cipher = AES.new(api._AES_KEY, AES.MODE_CBC, api.AES_IV)
+    return unpad(cipher.decrypt(base64.b64decode(payload)), AES.block_size).decode("utf-8")
+
+
+def test_build_payload_matches_full_serialization():
+    body = {"issueName": "2025101", "lotteryId": "6", "recomUserId": "123", "note": '福彩"3D"'}
+    expected = json.dumps(
+        {
+            "body": json.dumps(body, separators=(",", ":"), ensure_ascii=False),
+            "header": api._request_header("40016"),
+        },
+        separators=(",", ":"),
+        ensure_ascii=False,
+    )
+
+    assert _decrypt(api._build_payload("40016", body)) == expected
+
+
+def test_build_payload_is_deterministic_per_action():
+    body = {"limit": 10}
+    first = api._build_payload("40030", body)
+    second = api._build_payload("40030", body)
+
+    assert first == second
+    assert json.loads(_decrypt(first))["header"]["action"] == "40030"
+    assert json.loads(_decrypt(api._build_payload("40016", body)))["header"]["action"] == "40016"
+
+
+class _FakeResponse:
+    def __init__(self, status_code: int, payload: dict | None = None) -> None:
+        self.status_code = status_code
+        self._payload = payload or {}
+
+    def json(self) -> dict:
+        return self._payload
+
+
+class _FakeSession:
+    def __init__(self, responses: list[_FakeResponse]) -> None:
+        self.responses = list(responses)
+        self.urls: list[str] = []
+
+    def post(self, url, **kwargs):
+        self.urls.append(url)
+        return self.responses.pop(0)
+
+
+def test_async_detail_client_fails_over_to_secondary_domain(monkeypatch):
+    monkeypatch.setattr(async_api, "_jittered_delay", lambda delay: 0)
+    detail = {
+        "code": 0,
+        "data": {
+            "issueName": "2025101",
+            "lotteryId": 6,
+            "schemeContentModelList": [
+                {"playtypeId": 1003, "playtypeName": "三胆", "numberList": ["1", "2", "3"]}
+            ],
+        },
+    }
+    session = _FakeSession([_FakeResponse(500)] * 3 + [_FakeResponse(200, detail)])
+    client = async_api.AsyncDetailClient(session)
+
+    result = asyncio.run(client.fetch(lottery_id=6, user_id=1, issue_name=None))
+
+    assert result.issue_name == "2025101"
+    assert result.schemes[0].numbers == [1, 2, 3]
+    assert async_api.SECONDARY_DOMAIN in session.urls[-1]
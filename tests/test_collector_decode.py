@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+from collector.api import _parse_detail, _parse_detail_expanded
+from collector.decode import decode_schemes, expand_scheme
+from utils.numbers import digit_mask
+
+RAW_LIST = [
+    {"playtypeId": 3003, "playtypeName": "定位3*3*3", "dwNumberList": [[1, 2, 3], [4, 5], [6]]},
+    {"playtypeId": 3008, "playtypeName": "跨度", "dwNumberList": [[1, 2], [3]]},
+    {"playtypeId": 1001, "playtypeName": "独胆", "numberList": [7]},
+    {"playtypeId": 1003, "playtypeName": "三胆", "numberList": ["0", "5", "9"]},
+    {"playtypeId": 2001, "playtypeName": "杀一", "numbers": "8"},
+    {"playtypeId": 3004, "playtypeName": "定位4*4*4", "numbers": "1,2|3,4|5,6"},
+    {"playtypeId": 1100, "playtypeName": "和值", "numberList": [12, 15]},
+    {"playtypeId": 9999, "playtypeName": "空", "numbers": None},
+]
+
+
+def _legacy_rows(raw_list):
+    detail = _parse_detail(
+        {"code": 0, "data": {"issueName": "2025101", "schemeContentModelList": raw_list}},
+        6,
+        None,
+    )
+    rows = []
+    for scheme in detail.schemes:
+        rows.extend(expand_scheme(scheme.playtype_id, scheme.playtype_name, scheme.numbers))
+    return rows
+
+
+def test_decode_schemes_matches_legacy_expansion():
+    legacy = _legacy_rows(RAW_LIST)
+    decoded = decode_schemes(RAW_LIST)
+
+    assert [(r.playtype_id, r.playtype_name, r.numbers) for r in decoded] == [
+        (r.playtype_id, r.playtype_name, r.numbers) for r in legacy
+    ]
+    assert [r.digit_mask for r in decoded] == [r.digit_mask for r in legacy]
+
+
+def test_decode_schemes_splits_positional_playtypes():
+    rows = decode_schemes(RAW_LIST[:1])
+
+    assert [r.playtype_id for r in rows] == [30031, 30032, 30033]
+    assert [r.playtype_name for r in rows] == [
+        "定位3*3*3-百位",
+        "定位3*3*3-十位",
+        "定位3*3*3-个位",
+    ]
+    assert [r.numbers for r in rows] == ["1,2,3", "4,5", "6"]
+    assert rows[0].digit_mask == digit_mask("123")
+
+
+def test_parse_detail_expanded_keeps_issue_metadata():
+    result = _parse_detail_expanded(
+        {"code": 0, "data": {"lotteryId": 6, "schemeContentModelList": RAW_LIST[2:3]}},
+        6,
+        "2025102",
+    )
+
+    assert result.issue_name == "2025102"
+    assert result.lottery_id == 6
+    assert result.schemes[0].numbers == "7"
+    assert result.schemes[0].digit_mask == 1 << 7
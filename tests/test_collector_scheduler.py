@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+from datetime import date, datetime, timedelta
+from itertools import islice
+
+from collector.config import DRAW_TZ
+from collector.scheduler import DrawScheduler, SchedulerConfig, backoff_delays, draw_window
+
+
+def _at(hour: int, minute: int, day: int = 1) -> datetime:
+    return datetime(2025, 10, day, hour, minute, tzinfo=DRAW_TZ)
+
+
+def test_draw_window_and_backoff():
+    start, end = draw_window(date(2025, 10, 1), SchedulerConfig())
+
+    assert start == _at(21, 10)
+    assert end == _at(22, 45)
+    assert list(islice(backoff_delays(10, 60, 2), 5)) == [10, 20, 40, 60, 60]
+
+
+def test_scheduler_polls_in_window_and_fires_hooks_once():
+    issues = iter(["2025260", "2025260", "2025261"])
+    polls: list[datetime] = []
+    fired: list[str] = []
+    scheduler = DrawScheduler(
+        SchedulerConfig(prediction_interval=None),
+        poll_results=lambda: polls.append(datetime.now()),
+        latest_issue=lambda: next(issues),
+    )
+    scheduler.on_new_issue(fired.append)
+
+    # 窗口外只休眠，不轮询
+    idle = scheduler.tick(_at(20, 0))
+    assert polls == []
+    assert idle == 600.0
+
+    assert scheduler.tick(_at(21, 16)) == 10.0
+    scheduler.tick(_at(21, 20))
+    assert fired == ["2025261"]
+    assert scheduler.last_issue == "2025261"
+
+    # 当天已拿到结果，休眠到次日窗口（受单次休眠上限约束）
+    assert scheduler.tick(_at(21, 21)) == 600.0
+    assert len(polls) == 2
+
+
+def test_scheduler_runs_predictions_on_interval():
+    runs: list[int] = []
+    scheduler = DrawScheduler(
+        SchedulerConfig(prediction_interval=timedelta(hours=3)),
+        poll_results=lambda: None,
+        latest_issue=lambda: "2025260",
+        collect_predictions=lambda: runs.append(1),
+    )
+
+    scheduler.tick(_at(9, 0))
+    scheduler.tick(_at(10, 0))
+    scheduler.tick(_at(12, 0))
+
+    assert len(runs) == 2
+
+
+def test_restart_after_todays_draw_does_not_poll(caplog):
+    polls: list[int] = []
+    scheduler = DrawScheduler(
+        SchedulerConfig(prediction_interval=None),
+        poll_results=lambda: polls.append(1),
+        latest_issue=lambda: "2025260",
+        latest_draw_time=lambda: datetime(2025, 10, 1, 21, 15),
+    )
+
+    assert scheduler.tick(_at(21, 40)) == 600.0
+    scheduler.tick(_at(22, 50))
+    assert polls == []
+    assert "开奖窗口已结束" not in caplog.text
+
+    # 次日照常轮询
+    assert scheduler.tick(_at(21, 20, day=2)) == 10.0
+    assert polls == [1]
+
+
+def test_predictions_wait_until_the_draw_is_settled():
+    issues = iter(["2025260", "2025260", "2025261"])
+    events: list[str] = []
+    scheduler = DrawScheduler(
+        SchedulerConfig(prediction_interval=timedelta(hours=3)),
+        poll_results=lambda: events.append("poll"),
+        latest_issue=lambda: next(issues),
+        collect_predictions=lambda: events.append("predict"),
+    )
+
+    scheduler.tick(_at(21, 15))
+    assert events == ["poll"]
+    # 拿到开奖结果后，推迟的预测采集在下一次唤醒时执行
+    assert scheduler.tick(_at(21, 20)) == 1.0
+    scheduler.tick(_at(21, 21))
+    assert events == ["poll", "poll", "predict"]
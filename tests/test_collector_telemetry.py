@@ -0,0 +1,41 @@
+from __future__ import annotations
+
+import json
+
+from collector.telemetry import RunMetrics, percentile
+
+
+def test_percentile_nearest_rank():
+    values = [float(v) for v in range(1, 101)]
+    assert percentile(values, 50) == 50.0
+    assert percentile(values, 99) == 99.0
+    assert percentile([], 50) is None
+
+
+def test_run_report_and_prometheus(tmp_path):
+    metrics = RunMetrics("unit")
+    with metrics.phase("storage"):
+        pass
+    metrics.phases["storage"] = 2.0
+    metrics.record_request("a.example", 0.2, size=100)
+    metrics.record_request("a.example", 0.4, size=50)
+    metrics.record_error("a.example", RuntimeError("HTTP 502 from a.example"))
+    metrics.record_error("a.example", TimeoutError())
+    metrics.record_retry("a.example")
+    metrics.record_rows("expert_predictions", 10)
+    metrics.finish()
+
+    report = metrics.to_report()
+    domain = report["requests"]["a.example"]
+    assert domain["count"] == 2
+    assert domain["p50"] == 0.2
+    assert domain["errors"] == {"HTTP 502 from a.example": 1, "TimeoutError": 1}
+    assert report["bytes_received"] == 150
+    assert report["rows_per_second"] == 5.0
+
+    path = metrics.write_json(tmp_path)
+    assert json.loads(path.read_text(encoding="utf-8"))["retries_total"] == 1
+
+    text = metrics.to_prometheus()
+    assert 'lotto_collector_unit_request_seconds_bucket{domain="a.example",le="0.25"} 1' in text
+    assert 'lotto_collector_unit_rows_written_total{table="expert_predictions"} 10' in text
@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+from utils.data_access import IssueBundle
+
+AppTest = pytest.importorskip("streamlit.testing.v1").AppTest
+
+PAGE = Path(__file__).resolve().parents[1] / "pages" / "Playtype_CombinationView.py"
+PLAYTYPES = {"百位定1": 1, "十位定1": 2, "个位定1": 3}
+ROWS = [
+    {"playtype_id": 1, "user_id": 7, "numbers": "1"},
+    {"playtype_id": 2, "user_id": 7, "numbers": "2"},
+    {"playtype_id": 3, "user_id": 7, "numbers": "3"},
+]
+
+
+@pytest.fixture
+def page(monkeypatch):
+    import utils.data_access as data_access
+    import utils.ui as ui
+
+    monkeypatch.setattr(ui, "issue_picker", lambda *args, **kwargs: "2025100")
+    monkeypatch.setattr(data_access, "fetch_lottery_info", lambda issue: None)
+    monkeypatch.setattr(data_access, "playtype_name_to_id_map", lambda: PLAYTYPES)
+    monkeypatch.setattr(
+        data_access, "load_issue_bundle", lambda issue: IssueBundle.from_rows(issue, ROWS)
+    )
+    return AppTest.from_file(str(PAGE), default_timeout=30).run()
+
+
+def test_keyword_search_lists_matching_combination(page):
+    page.text_input[0].input("321").run()
+    assert not page.exception
+    assert "### 号码组合统计（共 1 个）" in [item.value for item in page.markdown]
+
+
+def test_keyword_without_matches_stops_with_notice(page):
+    page.text_input[0].input("999").run()
+    assert not page.exception
+    assert "没有与“999”匹配" in page.info[0].value
+    assert not page.slider
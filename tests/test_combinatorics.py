@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+from collections import Counter
+
+import numpy as np
+
+from utils import numbers
+from utils.combinatorics import (
+    CODE_BIG_SMALL,
+    CODE_CANONICAL,
+    CODE_CLASS,
+    CODE_CONSECUTIVE,
+    CODE_MASK,
+    CODE_ODD_EVEN,
+    CODE_SPAN,
+    CODE_SUM,
+    COMBO_CODES,
+    GROUP_CLASSES,
+    best_permutation,
+    canonical_code,
+    code_frequencies,
+    encode_code,
+    filter_codes,
+    position_filter,
+    positional_codes,
+)
+from utils.data_access import IssueBundle
+
+
+def _legacy_classify(combo: str) -> str:
+    counts = Counter(combo)
+    if len(counts) == 1:
+        return "豹子"
+    if len(counts) == 2:
+        return "组三"
+    ordered = sorted(map(int, combo))
+    if ordered[1] == ordered[0] + 1 and ordered[2] == ordered[1] + 1:
+        return "顺子"
+    return "组六"
+
+
+def test_class_table_matches_legacy_classify():
+    for code in range(1000):
+        assert GROUP_CLASSES[CODE_CLASS[code]] == _legacy_classify(f"{code:03d}")
+
+
+def test_encode_and_canonical():
+    assert encode_code("012") == 12
+    assert encode_code("12") == -1
+    assert encode_code("a12") == -1
+    assert canonical_code("310") == canonical_code("013") == 13
+    assert CODE_CANONICAL[987] == 789
+
+
+def test_positional_codes_expands_every_combination():
+    masks = np.array([[0b1000, 0b100, 0b10], [0b111, 0b111000, 0b111000000], [0b1, 0, 0b1]])
+    rows, codes = positional_codes(masks)
+
+    assert codes[rows == 0].tolist() == [321]
+    assert len(codes[rows == 1]) == 27
+    assert codes[rows == 1].min() == 36 and codes[rows == 1].max() == 258
+    assert not (rows == 2).any()
+    assert code_frequencies(codes)[321] == 1
+
+
+def test_filter_codes():
+    keep = filter_codes(exclude_classes=["豹子", "组三"], exclude_digits=["9"], include_digits="12")
+    selected = np.flatnonzero(keep)
+
+    assert 120 in selected and 213 in selected
+    assert 112 not in selected and 129 not in selected and 345 not in selected
+    assert np.flatnonzero(filter_codes(canonical=canonical_code("211"))).tolist() == [112, 121, 211]
+
+
+def test_positional_masks_merges_per_user():
+    bundle = IssueBundle.from_rows(
+        "2025100",
+        [
+            {"playtype_id": 1, "user_id": 5, "numbers": "3"},
+            {"playtype_id": 1, "user_id": 5, "numbers": "4"},
+            {"playtype_id": 2, "user_id": 5, "numbers": "1"},
+            {"playtype_id": 3, "user_id": 8, "numbers": "2,7"},
+            {"playtype_id": 9, "user_id": 9, "numbers": "0"},
+        ],
+    )
+    user_ids, masks = bundle.positional_masks([1, 2, None, 3])
+
+    assert user_ids.tolist() == [5, 8]
+    assert masks.tolist() == [[0b11000, 0b10, 0, 0], [0, 0, 0, 0b10000100]]
+
+
+def test_feature_tables_match_scalar_helpers():
+    for code in range(1000):
+        digits = [int(ch) for ch in f"{code:03d}"]
+        assert CODE_SUM[code] == numbers.digit_sum(digits)
+        assert CODE_SPAN[code] == numbers.digit_span(digits)
+        assert CODE_ODD_EVEN[code] == numbers.ratio(digits, lambda d: d % 2 == 1)
+        assert CODE_BIG_SMALL[code] == numbers.ratio(digits, lambda d: d >= 5)
+        assert CODE_CONSECUTIVE[code] == numbers.has_consecutive_digits(digits)
+        assert CODE_MASK[code] == numbers.digit_mask(f"{code:03d}")
+
+
+def test_combo_codes_are_the_220_unordered_combinations():
+    assert len(COMBO_CODES) == 220
+    assert set(COMBO_CODES.tolist()) == set(CODE_CANONICAL.tolist())
+    assert np.flatnonzero(filter_codes(unordered=True)).tolist() == COMBO_CODES.tolist()
+
+
+def test_filter_codes_feature_conditions():
+    keep = filter_codes(
+        sum_range=(6, 6), odd_even=["2:1"], exclude_consecutive=True, unordered=True
+    )
+    assert np.flatnonzero(keep).tolist() == [33, 114]
+    assert not filter_codes(exclude_sums=[27], exclude_spans=[0])[999]
+
+
+def test_position_filter_and_best_permutation():
+    keep = position_filter([[1, 2], [3], range(10)])
+    assert np.flatnonzero(keep).tolist() == [130 + d for d in range(10)] + [
+        230 + d for d in range(10)
+    ]
+    assert not position_filter([[], range(10), range(10)]).any()
+
+    allowed = position_filter([[3], range(10), range(10)])
+    assert best_permutation(np.array([123, 459]), allowed).tolist() == [312, 459]
@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+import pandas as pd
+
+from utils.combo_cube import (
+    aggregate_combos,
+    combo_features,
+    combo_key,
+    combo_trend,
+    split_overflow,
+)
+
+
+def test_combo_key_ignores_order_and_separators():
+    assert combo_key("3,1 2") == "123"
+    assert combo_key("12|03") == "0312"
+    assert combo_key(None) == ""
+
+
+def test_aggregate_combos_counts_distinct_experts():
+    predictions = pd.DataFrame(
+        [
+            ("2025100", 1, 7, "1,2,3"),
+            ("2025100", 1, 7, "3,2,1"),
+            ("2025100", 1, 8, "2,1,3"),
+            ("2025100", 1, 9, "4,5,6"),
+            ("2025100", 2, 9, "4,5,6"),
+            ("2025101", 1, 7, ""),
+            ("2025101", 1, 8, "9,0,1"),
+        ],
+        columns=["issue_name", "playtype_id", "user_id", "numbers"],
+    )
+    cube = aggregate_combos(predictions)
+
+    assert cube.values.tolist() == [
+        ["2025100", 1, "123", 2],
+        ["2025100", 1, "456", 1],
+        ["2025100", 2, "456", 1],
+        ["2025101", 1, "019", 1],
+    ]
+
+
+def test_combo_features_match_row_wise_definitions():
+    features = combo_features(["123", "579", "0", "123", "59"]).set_index("combo_key")
+
+    assert list(features.index) == ["123", "579", "0", "59"]
+    assert features.loc["123", "sum_digits"] == 6
+    assert features.loc["579", "span"] == 4
+    assert features.loc["579", "odd_even_ratio"] == "3:0"
+    assert features.loc["123", "big_small_ratio"] == "0:3"
+    assert features.loc["0", "span"] == 0
+    assert features.loc["59", "digit_mask"] == (1 << 5) | (1 << 9)
+
+
+def test_combo_trend_ranks_by_window_total_and_fills_missing_issues():
+    cube = pd.DataFrame(
+        [
+            ("2025100", 1, "123", 2),
+            ("2025101", 1, "123", 1),
+            ("2025101", 1, "456", 5),
+            ("2025101", 1, "789", 1),
+        ],
+        columns=["issue_name", "playtype_id", "combo_key", "expert_count"],
+    )
+    trend = combo_trend(cube, ["2025099", "2025100", "2025101"], top_n=2)
+
+    assert list(trend.columns) == ["456", "123"]
+    assert trend.loc["2025099"].tolist() == [0, 0]
+    assert trend.loc["2025101"].tolist() == [5, 1]
+
+
+def test_split_overflow_records_truncated_issue_playtypes():
+    long_key = "0123456789" * 7
+    cube = pd.DataFrame(
+        [
+            ("2025100", 1, "123", 2),
+            ("2025100", 1, long_key, 1),
+            ("2025100", 1, long_key + "9", 1),
+            ("2025100", 2, "456", 1),
+            ("2025101", 1, long_key, 3),
+        ],
+        columns=["issue_name", "playtype_id", "combo_key", "expert_count"],
+    )
+    kept, overflow = split_overflow(cube)
+
+    assert kept["combo_key"].tolist() == ["123", "456"]
+    assert overflow.values.tolist() == [["2025100", 1, 2], ["2025101", 1, 1]]
@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+import threading
+import time
+
+from app_sections.dashboard import load_server_info, run_homepage_loaders
+from db.instrumentation import current_source
+
+
+def test_homepage_loaders_run_concurrently_and_are_timed():
+    barrier = threading.Barrier(3, timeout=5)
+
+    def slow(name):
+        def loader(safe_query):
+            barrier.wait()
+            time.sleep(0.05)
+            return safe_query(name)
+
+        return loader
+
+    calls: list[str] = []
+
+    def fake_query(sql, params=None):
+        calls.append(sql)
+        return [{"sql": sql}]
+
+    data = run_homepage_loaders(fake_query, {name: slow(name) for name in ("a", "b", "c")})
+
+    assert sorted(calls) == ["a", "b", "c"]
+    assert data["b"] == [{"sql": "b"}]
+    assert [timing.name for timing in data.timings] == ["a", "b", "c"]
+    assert all(timing.elapsed_ms >= 50 for timing in data.timings)
+    assert data.wall_ms < sum(timing.elapsed_ms for timing in data.timings)
+
+
+def test_server_info_tolerates_failed_queries():
+    assert load_server_info(lambda sql, params=None: []) == {"version": None, "db_name": None}
+
+
+def test_pool_threads_aggregate_under_pool_name():
+    data = run_homepage_loaders(
+        lambda sql, params=None: [], {"source": lambda safe_query: current_source()}
+    )
+    assert data["source"] == "homepage-loader"
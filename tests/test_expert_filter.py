@@ -0,0 +1,167 @@
+from __future__ import annotations
+
+import random
+
+import numpy as np
+import pandas as pd
+
+from utils.expert_filter import HitCondition, NumberCondition, run_filter
+from utils.numbers import digit_mask, match_prediction_hit
+
+PLAYTYPE_NAMES = {1: "独胆", 2: "双胆", 3: "三胆", 4: "杀一", 5: "百位定3"}
+HISTORY = ["2025099", "2025098", "2025097", "2025096"]
+OPEN_CODES = {"2025099": "123", "2025098": "455", "2025097": None, "2025096": "908"}
+
+
+def _random_numbers(rng: random.Random) -> str:
+    return ",".join(str(d) for d in rng.sample(range(10), rng.randint(1, 4)))
+
+
+def _current(rng: random.Random, size: int = 120):
+    rows = [
+        (rng.randint(1, 25), rng.choice(list(PLAYTYPE_NAMES)), _random_numbers(rng))
+        for _ in range(size)
+    ]
+    users = np.array([row[0] for row in rows])
+    playtypes = np.array([row[1] for row in rows])
+    numbers = [row[2] for row in rows]
+    masks = np.array([digit_mask(value) for value in numbers], dtype=np.int16)
+    return rows, users, playtypes, masks
+
+
+def _history(rng: random.Random, size: int = 300) -> pd.DataFrame:
+    return pd.DataFrame(
+        [
+            (
+                rng.choice(HISTORY),
+                rng.randint(1, 30),
+                rng.choice(list(PLAYTYPE_NAMES)),
+                _random_numbers(rng),
+            )
+            for _ in range(size)
+        ],
+        columns=["issue_name", "user_id", "playtype_id", "numbers"],
+    )
+
+
+def _reference(rows, history, number_conditions, hit_conditions) -> set[int]:
+    """Row-by-row semantics of the original UserExpertFilterPlus helpers."""
+    candidate = {row[0] for row in rows}
+    for cond in number_conditions:
+        passed = set()
+        for user, playtype, numbers in rows:
+            if playtype not in cond.playtypes:
+                continue
+            digit_set = set(numbers.replace(",", ""))
+            if cond.mode == "不包含":
+                ok = not any(d in digit_set for d in cond.digits)
+            elif cond.match == "任意匹配":
+                ok = any(d in digit_set for d in cond.digits)
+            else:
+                ok = all(d in digit_set for d in cond.digits)
+            if ok:
+                passed.add(user)
+        candidate &= passed
+    for cond in hit_conditions:
+        sequence = HISTORY[: cond.window]
+        records: dict[int, dict[str, bool]] = {}
+        subset = history[
+            (history["playtype_id"] == cond.playtype) & history["issue_name"].isin(sequence)
+        ]
+        for row in subset.itertuples():
+            code = OPEN_CODES[row.issue_name]
+            hit = bool(code) and match_prediction_hit(
+                PLAYTYPE_NAMES[cond.playtype], row.numbers, code
+            )
+            previous = records.setdefault(row.user_id, {}).get(row.issue_name, False)
+            records[row.user_id][row.issue_name] = previous or hit
+        if cond.mode == "上期命中":
+            passed = {user for user, hits in records.items() if hits.get(sequence[0], False)}
+        elif cond.mode == "上期未命中":
+            passed = {
+                user
+                for user, hits in records.items()
+                if sequence[0] in hits and not hits[sequence[0]]
+            }
+        else:
+            compare = {">=": int.__ge__, "<": int.__lt__, "=": int.__eq__}[cond.operator]
+            passed = {
+                user
+                for user, hits in records.items()
+                if compare(sum(hits.get(i, False) for i in sequence), cond.expected)
+            }
+        candidate &= passed
+    return candidate
+
+
+def test_run_filter_matches_row_wise_reference():
+    rng = random.Random(7)
+    for _ in range(150):
+        rows, users, playtypes, masks = _current(rng)
+        history = _history(rng)
+        number_conditions = [
+            NumberCondition(
+                tuple(rng.sample(list(PLAYTYPE_NAMES), rng.randint(1, 3))),
+                tuple(str(d) for d in rng.sample(range(10), rng.randint(1, 3))),
+                rng.choice(["包含", "不包含"]),
+                rng.choice(["全部匹配", "任意匹配"]),
+            )
+            for _ in range(rng.randint(0, 3))
+        ]
+        hit_conditions = [
+            HitCondition(
+                rng.choice(list(PLAYTYPE_NAMES)),
+                rng.choice(["上期命中", "上期未命中", "近N期命中M次"]),
+                recent_n=rng.randint(1, 4),
+                operator=rng.choice([">=", "<", "="]),
+                expected=rng.randint(0, 2),
+            )
+            for _ in range(rng.randint(0, 3))
+        ]
+        calls = []
+
+        def load(issues, playtype_ids, history=history, calls=calls):
+            calls.append((issues, playtype_ids))
+            subset = history[
+                history["issue_name"].isin(issues) & history["playtype_id"].isin(playtype_ids)
+            ]
+            return subset, OPEN_CODES
+
+        outcome = run_filter(
+            users,
+            playtypes,
+            masks,
+            number_conditions,
+            hit_conditions,
+            history_issues=HISTORY,
+            load_history=load,
+            playtype_names=PLAYTYPE_NAMES,
+        )
+        assert set(outcome.user_ids.tolist()) == _reference(
+            rows, history, number_conditions, hit_conditions
+        )
+        assert len(calls) <= 1
+
+
+def test_run_filter_short_circuits_before_loading_history():
+    users = np.array([1, 2])
+    playtypes = np.array([1, 1])
+    masks = np.array([digit_mask("1"), digit_mask("2")], dtype=np.int16)
+
+    def load(issues, playtype_ids):  # pragma: no cover - must not be called
+        raise AssertionError("history should not be loaded")
+
+    outcome = run_filter(
+        users,
+        playtypes,
+        masks,
+        [NumberCondition((1,), ("9",))],
+        [HitCondition(1)],
+        history_issues=HISTORY,
+        load_history=load,
+    )
+    assert outcome.user_ids.size == 0
+    assert outcome.skipped == 1
+
+    no_history = run_filter(users, playtypes, masks, [], [HitCondition(1)], history_issues=[])
+    assert no_history.user_ids.size == 0
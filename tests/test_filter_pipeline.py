@@ -0,0 +1,186 @@
+from __future__ import annotations
+
+import random
+
+import numpy as np
+import pandas as pd
+
+from utils.expert_filter import FilterSession, HitCondition, NumberCondition, run_filter
+from utils.filter_pipeline import FilterPipeline, PipelineStore, StageCache, run_pipeline
+from utils.numbers import digit_mask
+
+NAMES = {1: "独胆", 2: "双胆", 3: "杀一"}
+HISTORY = ["2025099", "2025098", "2025097"]
+OPEN_CODES = {"2025099": "123", "2025098": "455", "2025097": "908"}
+
+
+def _numbers(rng: random.Random) -> str:
+    return ",".join(str(d) for d in rng.sample(range(10), rng.randint(1, 4)))
+
+
+def _fixture(seed: int = 7):
+    rng = random.Random(seed)
+    rows = [(rng.randint(1, 30), rng.choice(list(NAMES)), _numbers(rng)) for _ in range(200)]
+    history = pd.DataFrame(
+        [
+            (rng.choice(HISTORY), rng.randint(1, 30), rng.choice(list(NAMES)), _numbers(rng))
+            for _ in range(400)
+        ],
+        columns=["issue_name", "user_id", "playtype_id", "numbers"],
+    )
+    arrays = (
+        np.array([row[0] for row in rows]),
+        np.array([row[1] for row in rows]),
+        np.array([digit_mask(row[2]) for row in rows], dtype=np.int16),
+    )
+    return arrays, history
+
+
+class _Loader:
+    def __init__(self, history: pd.DataFrame) -> None:
+        self.history = history
+        self.calls = 0
+
+    def __call__(self, issues, playtypes):
+        self.calls += 1
+        frame = self.history[self.history["issue_name"].isin(issues)]
+        return frame[frame["playtype_id"].isin(playtypes)], OPEN_CODES
+
+
+PIPELINE = FilterPipeline(
+    "测试方案",
+    (
+        NumberCondition((1, 2), ("3",), "包含"),
+        NumberCondition((1,), (), "包含"),  # 无数字：不参与执行
+        NumberCondition((3,), ("0", "9"), "不包含"),
+    ),
+    (HitCondition(1, "近N期命中M次", 3, ">=", 1),),
+)
+
+
+def _session(arrays, loader) -> FilterSession:
+    return FilterSession(*arrays, history_issues=HISTORY, load_history=loader, playtype_names=NAMES)
+
+
+def test_pipeline_json_round_trip_and_fingerprints():
+    restored = FilterPipeline.from_json(PIPELINE.to_json())
+    assert restored == PIPELINE
+    assert len(PIPELINE.stages()) == 3
+    prints = PIPELINE.fingerprints()
+    assert len(set(prints)) == 3
+    edited = FilterPipeline(
+        PIPELINE.name,
+        PIPELINE.number_conditions,
+        (HitCondition(1, "近N期命中M次", 3, ">=", 2),),
+    )
+    # 只改最后一个条件：前缀指纹不变
+    assert edited.fingerprints()[:2] == prints[:2]
+    assert edited.fingerprints()[2] != prints[2]
+
+
+def test_run_pipeline_matches_run_filter_and_reuses_prefix():
+    arrays, history = _fixture()
+    cache = StageCache()
+    first = run_pipeline(
+        PIPELINE, _session(arrays, _Loader(history)), issue="2025100", version="v1", cache=cache
+    )
+    expected = run_filter(
+        *arrays,
+        PIPELINE.number_conditions,
+        PIPELINE.hit_conditions,
+        history_issues=HISTORY,
+        load_history=_Loader(history),
+        playtype_names=NAMES,
+    )
+    assert first.user_ids.tolist() == expected.user_ids.tolist()
+    assert len(cache) == 3
+
+    edited = FilterPipeline(
+        PIPELINE.name,
+        PIPELINE.number_conditions,
+        (HitCondition(1, "上期未命中"),),
+    )
+    loader = _Loader(history)
+    second = run_pipeline(
+        edited, _session(arrays, loader), issue="2025100", version="v1", cache=cache
+    )
+    assert [step.kind for step in second.steps] == ["cached", "load", "hit"]
+    assert second.steps[0].candidates == first.steps[1].candidates
+    assert loader.calls == 1
+
+    # 完全命中缓存：不再加载历史
+    loader = _Loader(history)
+    again = run_pipeline(
+        edited, _session(arrays, loader), issue="2025100", version="v1", cache=cache
+    )
+    assert [step.kind for step in again.steps] == ["cached"]
+    assert again.user_ids.tolist() == second.user_ids.tolist()
+    assert loader.calls == 0
+
+    # 数据版本变化后重新计算
+    fresh = run_pipeline(
+        edited, _session(arrays, _Loader(history)), issue="2025100", version="v2", cache=cache
+    )
+    assert "cached" not in [step.kind for step in fresh.steps]
+
+
+def test_stage_cache_evicts_oldest():
+    cache = StageCache(max_entries=2)
+    for index in range(3):
+        cache.put(("i", "v", str(index)), np.array([index]))
+    assert cache.get(("i", "v", "0")) is None
+    assert cache.get(("i", "v", "2")).tolist() == [2]
+
+
+def test_pipeline_store_save_load_delete(tmp_path):
+    store = PipelineStore(tmp_path / "pipelines.json")
+    assert store.names() == []
+    store.save(PIPELINE)
+    assert store.names() == ["测试方案"]
+    assert store.load("测试方案") == PIPELINE
+    assert store.delete("测试方案") is True
+    assert store.delete("测试方案") is False
+    assert store.load("测试方案") is None
+
+
+def test_run_pipeline_orders_stages_by_cost_and_caches_by_condition_set():
+    arrays, history = _fixture()
+    wide = NumberCondition((1, 2, 3), ("5",), "不包含")
+    narrow = NumberCondition((3,), ("0", "9"), "不包含")
+    hit = HitCondition(1, "近N期命中M次", 3, ">=", 1)
+    cache = StageCache()
+
+    outcome = run_pipeline(
+        FilterPipeline("宽条件在前", (wide, narrow), (hit,)),
+        _session(arrays, _Loader(history)),
+        issue="2025100",
+        version="v1",
+        cache=cache,
+    )
+    number_steps = [step for step in outcome.steps if step.kind == "number"]
+    assert [step.label for step in number_steps] == [
+        narrow.label(NAMES),
+        wide.label(NAMES),
+    ]
+    expected = run_filter(
+        *arrays,
+        (wide, narrow),
+        (hit,),
+        history_issues=HISTORY,
+        load_history=_Loader(history),
+        playtype_names=NAMES,
+    )
+    assert outcome.user_ids.tolist() == expected.user_ids.tolist()
+
+    # 条件顺序不同但集合相同：整体命中缓存，不加载往期数据
+    loader = _Loader(history)
+    reordered = run_pipeline(
+        FilterPipeline("窄条件在前", (narrow, wide), (hit,)),
+        _session(arrays, loader),
+        issue="2025100",
+        version="v1",
+        cache=cache,
+    )
+    assert [step.kind for step in reordered.steps] == ["cached"]
+    assert reordered.user_ids.tolist() == outcome.user_ids.tolist()
+    assert loader.calls == 0
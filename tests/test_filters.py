@@ -0,0 +1,166 @@
+from __future__ import annotations
+
+import json
+import random
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from filters import (
+    MissRule,
+    digit_frequencies,
+    miss_filter,
+    miss_stats,
+    select_experts,
+    split_last_hit,
+    summarize_hit_stat,
+    token_frequencies,
+)
+from filters.cli import FilterReport, build_parser, write_report
+from utils.numbers import match_prediction_hit, normalize_code
+
+NAMES = {1: "独胆", 2: "双胆", 3: "杀一", 4: "百位定3", 5: "三胆"}
+ISSUES = ["2025095", "2025096", "2025097", "2025098", "2025099"]
+OPEN_CODES = {
+    "2025095": "123",
+    "2025096": "455",
+    "2025097": None,
+    "2025098": "908",
+    "2025099": "777",
+}
+
+
+def _history(seed: int) -> pd.DataFrame:
+    rng = random.Random(seed)
+    rows = []
+    for _ in range(400):
+        digits = rng.sample(range(10), rng.randint(1, 4))
+        rows.append(
+            (
+                rng.choice(ISSUES),
+                rng.choice(list(NAMES)),
+                rng.randint(1, 40),
+                ",".join(str(d) for d in digits),
+            )
+        )
+    return pd.DataFrame(rows, columns=["issue_name", "playtype_id", "user_id", "numbers"])
+
+
+def _reference(history: pd.DataFrame, rule: MissRule, min_rows: int) -> list[int]:
+    """Row-by-row loop of the original FilterTool_MissV2 page."""
+    kept = []
+    for user_id, group in history.groupby("user_id"):
+        group = group.drop_duplicates(subset=["issue_name", "playtype_id", "numbers"])
+        if len(group) < min_rows:
+            continue
+        hits = []
+        for issue in sorted(ISSUES):
+            rows = group[group["issue_name"] == issue]
+            open_code = normalize_code(OPEN_CODES.get(issue))
+            if rows.empty or not open_code:
+                continue
+            row = rows.iloc[0]
+            hits.append(match_prediction_hit(NAMES[row["playtype_id"]], row["numbers"], open_code))
+        misses = hits.count(False)
+        if rule.mode == "max":
+            ok = misses <= rule.high
+        elif rule.mode == "range":
+            ok = rule.low <= misses <= rule.high
+        elif rule.mode == "all_hit":
+            ok = misses == 0
+        else:
+            ok = hits.count(True) == 0
+        if ok:
+            kept.append(int(user_id))
+    return sorted(kept)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_miss_filter_matches_row_loop(seed):
+    history = _history(seed)
+    for rule in (
+        MissRule("max", high=1),
+        MissRule("range", low=1, high=2),
+        MissRule("all_hit"),
+        MissRule("all_miss"),
+    ):
+        for min_rows in (1, 3):
+            result = miss_filter(history, OPEN_CODES, NAMES, rule, min_rows=min_rows, issues=ISSUES)
+            assert result.tolist() == _reference(history, rule, min_rows)
+
+
+def test_miss_stats_empty_and_invalid_mode():
+    assert miss_stats(pd.DataFrame(), OPEN_CODES, NAMES).empty
+    with pytest.raises(ValueError):
+        MissRule("unknown")
+
+
+def test_frequencies_count_weighted_tokens():
+    numbers = ["1,2,3", "1,2,3", "12 45", None, "3"]
+    expected = Counter()
+    for value in numbers:
+        for char in (value or "").replace(",", "").replace(" ", ""):
+            expected[char] += 1
+    digits = digit_frequencies(numbers)
+    assert dict(zip(digits["value"], digits["count"])) == dict(expected)
+    assert digits["count"].is_monotonic_decreasing
+
+    tokens = token_frequencies(numbers)
+    assert dict(zip(tokens["value"], tokens["count"])) == {"1": 2, "2": 2, "3": 3, "12": 1, "45": 1}
+    assert digit_frequencies([]).empty
+
+
+def test_hit_stat_summary_and_selection():
+    summary = summarize_hit_stat(
+        [
+            {"user_id": 1, "total_count": 4, "hit_count": 2, "hit_number_count": 3},
+            {"user_id": 2, "total_count": 0, "hit_count": 0, "hit_number_count": 0},
+            {"user_id": 3, "total_count": 2, "hit_count": 1, "hit_number_count": None},
+            {"user_id": 4, "total_count": 5, "hit_count": 2, "hit_number_count": 5},
+        ]
+    )
+    assert summary["user_id"].tolist() == [4, 1, 2, 3]
+    assert summary["hit_rate"].tolist() == [1.0, 0.75, 0.0, 0.0]
+
+    assert select_experts(summary, hit_counts=[2]).tolist() == [4, 1]
+    assert select_experts(summary, hit_counts=[2], allowed_users={1}).tolist() == [1]
+    assert select_experts(summary, hit_number_counts=[0]).tolist() == [2, 3]
+
+    hit, miss = split_last_hit([{"user_id": 1, "hit_count": 1}, {"user_id": "2", "hit_count": 0}])
+    assert hit == {1} and miss == {2}
+
+
+def test_cli_parser_and_report_output(tmp_path):
+    args = build_parser().parse_args(
+        [
+            "--format",
+            "csv",
+            "--table",
+            "frequencies",
+            "miss",
+            "--issue",
+            "2025100",
+            "--playtype",
+            "1",
+        ]
+    )
+    assert args.command == "miss" and args.playtype == [1] and args.mode == "max"
+
+    report = FilterReport(
+        command="miss",
+        params={"issue": "2025100"},
+        experts=pd.DataFrame({"user_id": [1, 2], "nick_name": ["甲", "乙"]}),
+        frequencies=digit_frequencies(["1,2", "2"]),
+    )
+    csv_path = tmp_path / "freq.csv"
+    write_report(report, fmt="csv", table="frequencies", output=str(csv_path))
+    assert csv_path.read_text(encoding="utf-8").splitlines() == ["value,count", "2,2", "1,1"]
+
+    json_path = tmp_path / "report.json"
+    write_report(report, fmt="json", table="experts", output=str(json_path))
+    payload = json.loads(json_path.read_text(encoding="utf-8"))
+    assert payload["expert_count"] == 2
+    assert payload["experts"][0] == {"user_id": 1, "nick_name": "甲"}
+    assert np.isclose(payload["elapsed_ms"], 0.0)
@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.fusion import (
+    FusionConfig,
+    FusionInputs,
+    consensus_ranking,
+    expert_weights,
+    fuse,
+    kill_playtype_mask,
+)
+
+PREDICTIONS = pd.DataFrame(
+    [
+        (1, 1001, "12,21"),
+        (2, 1001, "23"),
+        (3, 1001, "9"),
+        (1, 2001, "5"),
+    ],
+    columns=["user_id", "playtype_id", "numbers"],
+)
+HISTORY_ISSUES = ["2025102", "2025101"]
+HISTORY = pd.DataFrame(
+    [
+        ("2025102", 1, 1001, 1, 1),
+        ("2025101", 1, 1001, 1, 1),
+        ("2025102", 2, 1001, 1, 0),
+        ("2025101", 2, 1001, 1, 1),
+        ("2025101", 4, 1001, 1, 0),
+        ("2025090", 2, 1001, 1, 1),
+    ],
+    columns=["issue_name", "user_id", "playtype_id", "total_count", "hit_count"],
+)
+
+
+def test_equal_weight_counts_distinct_digits_per_prediction():
+    inputs = FusionInputs.from_frames(PREDICTIONS, HISTORY, HISTORY_ISSUES)
+
+    scores = fuse(inputs, FusionConfig())
+
+    assert inputs.playtype_ids.tolist() == [1001, 2001]
+    assert scores[0].tolist() == [0, 1, 2, 1, 0, 0, 0, 0, 0, 1]
+    assert scores[1].tolist() == [0, 0, 0, 0, 0, 1, 0, 0, 0, 0]
+
+
+def test_hit_rate_weights_shrink_towards_playtype_mean():
+    inputs = FusionInputs.from_frames(PREDICTIONS, HISTORY, HISTORY_ISSUES)
+    # 玩法 1001 历史 5 条命中 3 条（2025090 不在窗口内）
+    mean = 3 / 5
+
+    weights = expert_weights(inputs, FusionConfig(hit_weight=1.0, prior_strength=2.0))
+
+    assert weights[0] == pytest.approx((2 + 2 * mean) / (2 + 2) / mean)
+    assert weights[1] == pytest.approx((1 + 2 * mean) / (2 + 2) / mean)
+    assert weights[2] == pytest.approx(1.0)
+    assert weights[3] == pytest.approx(1.0)  # 玩法 2001 无历史，退化为均值
+
+    decayed = expert_weights(
+        inputs, FusionConfig(hit_weight=1.0, half_life=1.0, prior_strength=2.0)
+    )
+    # 专家 2 最近一期未中，衰减后权重进一步下降
+    assert decayed[1] < weights[1]
+
+
+def test_consensus_excludes_kill_playtypes_and_ranks_by_score():
+    scores = np.zeros((2, 10))
+    scores[0, [3, 7]] = [2.0, 5.0]
+    scores[1, 3] = 10.0
+    mask = kill_playtype_mask(np.array([1001, 2001]), {1001: "独胆", 2001: "杀一"})
+
+    ranking = consensus_ranking(scores, ~mask)
+
+    assert mask.tolist() == [False, True]
+    assert ranking["digit"].tolist()[:3] == ["7", "3", "0"]
+    assert ranking["share"].tolist()[:2] == pytest.approx([5 / 7, 2 / 7], abs=1e-4)
+    assert ranking["rank"].tolist() == list(range(1, 11))
+
+
+def test_empty_inputs_fuse_to_empty_scores():
+    inputs = FusionInputs.from_frames(PREDICTIONS.iloc[:0], None, [])
+
+    assert fuse(inputs, FusionConfig(hit_weight=1.0)).shape == (0, 10)
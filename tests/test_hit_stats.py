@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+import math
+import random
+
+import numpy as np
+import pandas as pd
+
+from collector.hit_stats import attach_hit_gaps, compute_issue_stats, resolve_playtype_name
+from utils import numbers
+
+PLAYTYPE_NAMES = {
+    1001: "独胆",
+    1002: "双胆",
+    1003: "三胆",
+    1005: "五码组选",
+    2001: "杀一",
+    2002: "杀二",
+    3003: "定位3*3*3",
+    3013: "百位定3",
+    3017: "十位定1",
+}
+
+
+def test_vectorised_rules_match_scalar_hit_check():
+    rng = random.Random(3)
+    names = list(PLAYTYPE_NAMES.values()) + ["定位3*3*3-个位", "十位杀1", "和值"]
+    for name in names:
+        rule = numbers.classify_hit_rule(name)
+        preds = [",".join(map(str, rng.sample(range(10), rng.randint(0, 7)))) for _ in range(500)]
+        codes = [",".join(str(rng.randrange(10)) for _ in range(3)) for _ in range(500)]
+        codes[0] = ""
+        open_masks, open_positions = numbers.open_code_arrays(codes)
+        masks = np.array([numbers.digit_mask(value) for value in preds])
+
+        vectorised = numbers.evaluate_hit_rule(rule, masks, open_masks, open_positions)
+        expected = [numbers.match_prediction_hit(name, p, c) for p, c in zip(preds, codes)]
+
+        assert vectorised.tolist() == expected, name
+
+
+def test_compute_issue_stats_counts_hits_and_numbers():
+    predictions = pd.DataFrame(
+        [
+            ("2025101", 1, 1001, "3"),
+            ("2025101", 1, 2001, "3"),
+            ("2025101", 2, 30031, "1,2"),
+            ("2025101", 2, 1003, "1,2,3"),
+            ("2025102", 1, 1001, "9"),
+        ],
+        columns=["issue_name", "user_id", "playtype_id", "numbers"],
+    )
+    stats = compute_issue_stats(predictions, {"2025101": "1,2,3"}, PLAYTYPE_NAMES)
+    indexed = stats.set_index(["user_id", "playtype_id"])
+
+    assert set(stats["issue_name"]) == {"2025101"}
+    assert indexed.loc[(1, 1001), ["hit_count", "hit_number_count"]].tolist() == [1, 1]
+    assert indexed.loc[(1, 2001), "hit_count"] == 0
+    assert indexed.loc[(2, 30031), "hit_count"] == 1
+    assert indexed.loc[(2, 1003), ["hit_count", "hit_number_count"]].tolist() == [1, 3]
+    assert resolve_playtype_name(30031, PLAYTYPE_NAMES) == "定位3*3*3-百位"
+
+
+def test_attach_hit_gaps_uses_window_and_history():
+    order = [f"20251{idx:02d}" for idx in range(10)]
+    history = pd.DataFrame(
+        {
+            "issue_name": [order[1], order[4], order[0]],
+            "user_id": [7, 7, 8],
+            "playtype_id": [1001, 1001, 1001],
+            "hit_count": [1, 1, 1],
+        }
+    )
+    stats = pd.DataFrame(
+        {
+            "issue_name": [order[7], order[7]],
+            "user_id": [7, 8],
+            "playtype_id": [1001, 1001],
+            "total_count": [1, 1],
+            "hit_count": [1, 1],
+            "hit_number_count": [1, 1],
+        }
+    )
+
+    result = attach_hit_gaps(stats, history, order, window=30)
+    assert result["avg_hit_gap"].tolist() == [3.0, 7.0]
+
+    narrow = attach_hit_gaps(stats, history, order, window=4)
+    assert narrow["avg_hit_gap"].iloc[0] == 3.0
+    assert math.isnan(narrow["avg_hit_gap"].iloc[1])
@@ -0,0 +1,60 @@
+from __future__ import annotations
+
+import pytest
+
+from utils.data_access import IssueBundle
+
+ROWS = [
+    {"playtype_id": 1002, "user_id": 7, "numbers": "3,5"},
+    {"playtype_id": 1001, "user_id": 9, "numbers": "12"},
+    {"playtype_id": 1001, "user_id": 7, "numbers": None},
+    {"playtype_id": None, "user_id": 1, "numbers": "9"},
+    {"playtype_id": 1003, "user_id": 9, "numbers": "0|9"},
+]
+
+
+def test_from_rows_sorts_and_encodes_digits():
+    bundle = IssueBundle.from_rows("2025100", ROWS)
+
+    assert len(bundle) == 4
+    assert bundle.playtype_ids.tolist() == [1001, 1001, 1002, 1003]
+    assert bundle.user_ids.tolist() == [7, 9, 7, 9]
+    assert bundle.numbers.tolist() == ["", "12", "3,5", "0|9"]
+    assert bundle.digit_masks.tolist() == [0, 0b110, 0b101000, 0b1000000001]
+    assert bundle.playtypes() == [1001, 1002, 1003]
+    with pytest.raises(ValueError):
+        bundle.digit_masks[0] = 1
+
+
+def test_slicing_by_playtype_and_user():
+    bundle = IssueBundle.from_rows("2025100", ROWS)
+
+    assert bundle.for_playtype(1001).user_ids.tolist() == [7, 9]
+    assert len(bundle.for_playtype(1999)) == 0
+    assert bundle.for_playtypes([1002, 1003]).numbers.tolist() == ["3,5", "0|9"]
+    assert bundle.for_playtypes(None) is bundle
+    assert bundle.for_users([9]).playtype_ids.tolist() == [1001, 1003]
+
+
+def test_to_frame_columns():
+    bundle = IssueBundle.from_rows("2025100", ROWS).for_users([7])
+
+    frame = bundle.to_frame(["issue_name", "user_id", "digit_mask"])
+
+    assert frame.columns.tolist() == ["issue_name", "user_id", "digit_mask"]
+    assert frame["issue_name"].tolist() == ["2025100", "2025100"]
+    assert bundle.to_frame().columns.tolist() == ["playtype_id", "user_id", "numbers"]
+    with pytest.raises(ValueError):
+        bundle.to_frame(["open_code"])
+
+
+def test_load_issue_bundle_strict_reraises(monkeypatch):
+    import utils.data_access as data_access
+
+    def failing(issue, token):
+        raise RuntimeError("db down")
+
+    monkeypatch.setattr(data_access, "_load_issue_bundle", failing)
+    assert len(data_access.load_issue_bundle("2025100")) == 0
+    with pytest.raises(RuntimeError, match="db down"):
+        data_access.load_issue_bundle("2025100", strict=True)
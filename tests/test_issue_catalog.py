@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+import pytest
+
+from collector.issue_catalog import build_catalog_rows
+from utils.catalog import CatalogEntry, IssueCatalog
+
+
+def test_build_catalog_rows_merges_sources():
+    rows = build_catalog_rows(
+        ["2025100", "2025101", "2025102", "2025103"],
+        playtype_counts=[
+            {"issue_name": "2025101", "playtype_id": 1002, "row_count": 5},
+            {"issue_name": "2025101", "playtype_id": 1001, "row_count": 7},
+            {"issue_name": "2025102", "playtype_id": None, "row_count": 3},
+        ],
+        expert_counts=[{"issue_name": "2025101", "expert_count": 4}],
+        results=[{"issue_name": "2025100"}, {"issue_name": "2025101"}],
+        hit_stat_playtypes=[
+            {"issue_name": "2025100", "playtype_id": 1001},
+            {"issue_name": "2099999", "playtype_id": 1001},
+        ],
+    )
+
+    assert [row["issue_name"] for row in rows] == ["2025100", "2025101"]
+    first, second = rows
+    assert first == {
+        "issue_name": "2025100",
+        "playtype_ids": "",
+        "expert_count": 0,
+        "row_count": 0,
+        "has_result": 1,
+        "has_hit_stat": 1,
+        "hit_stat_playtype_ids": "1001",
+    }
+    assert second["playtype_ids"] == "1001,1002"
+    assert second["row_count"] == 12
+    assert second["expert_count"] == 4
+    assert second["has_result"] == 1 and second["has_hit_stat"] == 0
+
+
+def _catalog() -> IssueCatalog:
+    rows = [
+        {
+            "issue_name": "2025100",
+            "has_result": 1,
+            "has_hit_stat": 1,
+            "hit_stat_playtype_ids": "1001",
+        },
+        {"issue_name": "2025102", "playtype_ids": "1001,1002", "row_count": 12},
+        {"issue_name": "2025101", "playtype_ids": "1001", "row_count": 3, "has_result": 1},
+        {"issue_name": "2025099", "has_hit_stat": 1},
+    ]
+    return IssueCatalog(CatalogEntry.from_row(row) for row in rows)
+
+
+def test_catalog_issue_sources_and_order():
+    catalog = _catalog()
+
+    assert catalog.issues("lottery") == ["2025102", "2025101", "2025100"]
+    assert catalog.issues("lottery", limit=2) == ["2025102", "2025101"]
+    assert catalog.issues("predictions") == ["2025102", "2025101"]
+    assert catalog.issues("hit_stat") == ["2025100", "2025099"]
+    assert catalog.issues("expert") == ["2025102", "2025101", "2025100", "2025099"]
+    assert catalog.issues("expert", until="2025101") == ["2025101", "2025100", "2025099"]
+    assert catalog.issues("lottery", limit=2, until="2025101") == ["2025101", "2025100"]
+    with pytest.raises(ValueError):
+        catalog.issues("unknown")
+
+
+def test_catalog_playtypes():
+    catalog = _catalog()
+
+    assert catalog.playtypes("2025102") == (1001, 1002)
+    assert catalog.playtypes("2025100") == ()
+    assert catalog.playtypes("2025100", source="hit_stat") == (1001,)
+    assert catalog.playtypes("2030001") is None
+
+
+@pytest.fixture
+def catalog_engine(monkeypatch):
+    from sqlalchemy import create_engine, text
+    from sqlalchemy.pool import StaticPool
+
+    import collector.issue_catalog as issue_catalog
+
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+    with engine.begin() as conn:
+        for ddl in (
+            "CREATE TABLE expert_predictions (issue_name TEXT, playtype_id INT, user_id INT)",
+            "CREATE TABLE lottery_results (issue_name TEXT)",
+            "CREATE TABLE expert_hit_stat (issue_name TEXT, playtype_id INT)",
+            "CREATE TABLE issue_catalog (issue_name TEXT PRIMARY KEY, playtype_ids TEXT, "
+            "expert_count INT, row_count INT, has_result INT, has_hit_stat INT, "
+            "hit_stat_playtype_ids TEXT)",
+        ):
+            conn.execute(text(ddl))
+        conn.execute(
+            text("INSERT INTO expert_predictions VALUES (:issue, 1001, :user)"),
+            [{"issue": issue, "user": user} for issue in ("2025099", "2025100") for user in (1, 2)],
+        )
+        conn.execute(text("INSERT INTO lottery_results VALUES ('2025098'), ('2025099')"))
+    monkeypatch.setattr(issue_catalog, "get_engine", lambda: engine)
+    return engine
+
+
+def _catalogued(engine) -> list[str]:
+    from sqlalchemy import text
+
+    with engine.connect() as conn:
+        rows = conn.execute(text("SELECT issue_name FROM issue_catalog ORDER BY issue_name"))
+        return [row[0] for row in rows]
+
+
+def test_first_refresh_seeds_the_whole_catalog(catalog_engine):
+    from sqlalchemy import text
+
+    from collector.issue_catalog import refresh_catalog
+
+    assert refresh_catalog(["2025100"]) == 3
+    assert _catalogued(catalog_engine) == ["2025098", "2025099", "2025100"]
+
+    with catalog_engine.begin() as conn:
+        conn.execute(text("INSERT INTO lottery_results VALUES ('2025100'), ('2025101')"))
+    assert refresh_catalog(["2025101"]) == 1
+    assert _catalogued(catalog_engine) == ["2025098", "2025099", "2025100", "2025101"]
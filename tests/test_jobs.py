@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+import threading
+import time
+
+import pytest
+
+from utils.jobs import JobRunner, job_key
+
+
+def _wait(job, timeout: float = 5.0) -> None:
+    deadline = time.time() + timeout
+    while not job.done and time.time() < deadline:
+        time.sleep(0.01)
+    assert job.done
+
+
+@pytest.fixture
+def runner():
+    runner = JobRunner(max_workers=2)
+    yield runner
+    runner.shutdown()
+
+
+def test_job_key_is_order_insensitive_for_dicts():
+    assert job_key("miss", {"a": 1, "b": [1, 2]}) == job_key("miss", {"b": [1, 2], "a": 1})
+    assert job_key("miss", {"a": 1}) != job_key("miss", {"a": 2})
+
+
+def test_same_key_attaches_to_running_job(runner):
+    release = threading.Event()
+    calls = []
+
+    def work(report, value):
+        calls.append(value)
+        report(0.5, "半程")
+        release.wait(5)
+        return value * 2
+
+    first = runner.submit("k", work, 21, label="demo")
+    second = runner.submit("k", work, 21, label="demo")
+    assert second is first and first.attached == 1
+
+    deadline = time.time() + 5
+    while first.progress < 0.5 and time.time() < deadline:
+        time.sleep(0.01)
+    assert first.status == "running" and first.message == "半程"
+
+    release.set()
+    _wait(first)
+    assert first.status == "done" and first.result == 42 and first.progress == 1.0
+    assert runner.submit("k", work, 21) is first
+    assert calls == [21]
+
+
+def test_failed_job_is_retried_and_forget_recomputes(runner):
+    attempts = []
+
+    def flaky(report):
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise ValueError("boom")
+        return len(attempts)
+
+    job = runner.submit("flaky", flaky)
+    _wait(job)
+    assert job.status == "failed" and job.error == "boom"
+
+    retry = runner.submit("flaky", flaky)
+    assert retry is not job
+    _wait(retry)
+    assert retry.result == 2
+
+    runner.forget("flaky")
+    assert runner.get("flaky") is None
+    again = runner.submit("flaky", flaky)
+    _wait(again)
+    assert again.result == 3
+
+
+def test_finished_jobs_are_pruned(runner):
+    runner.keep_seconds = 0
+    runner.max_jobs = 2
+    job = runner.submit("old", lambda report: 1)
+    _wait(job)
+    job.finished_at -= 1
+    runner.submit("new", lambda report: 2)
+    assert runner.get("old") is None
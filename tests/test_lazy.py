@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+import builtins
+import sys
+import threading
+
+from utils.lazy import LazyModule, lazy_import
+
+
+def test_lazy_import_defers_until_attribute_access(tmp_path, monkeypatch):
+    (tmp_path / "lazy_probe_mod.py").write_text("VALUE = 42\n")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    monkeypatch.delitem(sys.modules, "lazy_probe_mod", raising=False)
+
+    module = lazy_import("lazy_probe_mod")
+    assert isinstance(module, LazyModule)
+    assert not module.loaded and "lazy_probe_mod" not in sys.modules
+
+    assert module.VALUE == 42
+    assert module.loaded and module.load() is sys.modules["lazy_probe_mod"]
+    assert lazy_import("lazy_probe_mod") is sys.modules["lazy_probe_mod"]
+
+
+def test_lazy_import_concurrent_first_access(tmp_path, monkeypatch):
+    (tmp_path / "lazy_probe_counter.py").write_text(
+        "import time\nimport builtins\n"
+        "builtins.lazy_probe_loads = getattr(builtins, 'lazy_probe_loads', 0) + 1\n"
+        "time.sleep(0.05)\nVALUE = 'ok'\n"
+    )
+    monkeypatch.syspath_prepend(str(tmp_path))
+    monkeypatch.delitem(sys.modules, "lazy_probe_counter", raising=False)
+
+    module = lazy_import("lazy_probe_counter")
+    results: list[str] = []
+    threads = [threading.Thread(target=lambda: results.append(module.VALUE)) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == ["ok"] * 8
+    assert builtins.lazy_probe_loads == 1
+    del builtins.lazy_probe_loads
@@ -0,0 +1,58 @@
+from __future__ import annotations
+
+import json
+
+from db.instrumentation import QueryMetrics, SlowQueryLog, estimate_bytes, fingerprint
+from utils.sql import make_in_clause
+
+
+def test_fingerprint_folds_in_lists_and_literals():
+    short, _ = make_in_clause("issue_name", ["2025001"], "issue")
+    long, _ = make_in_clause("issue_name", [f"2025{i:03d}" for i in range(30)], "issue")
+    sql = "SELECT user_id FROM expert_predictions WHERE {} AND playtype_id = 5 LIMIT 10"
+    first, normalised = fingerprint(sql.format(short))
+    second, _ = fingerprint("  " + sql.format(long).replace(" AND", "\n   AND"))
+    assert first == second
+    assert "issue_name IN (:issue_*)" in normalised and "playtype_id = ?" in normalised
+    assert (
+        fingerprint("SELECT 1 FROM t WHERE name = 'a'")[0]
+        == fingerprint("SELECT 2 FROM t WHERE name = 'bb'")[0]
+    )
+    assert fingerprint("SELECT :limit_1")[0] != fingerprint("SELECT :limit")[0]
+
+
+def test_estimate_bytes_extrapolates_from_sample():
+    rows = [{"user_id": 1, "numbers": "1,2,3", "note": None}] * 1000
+    assert estimate_bytes(rows) == 1000 * (8 + 5)
+    assert estimate_bytes([]) == 0
+
+
+def test_metrics_aggregate_by_statement_and_source(tmp_path):
+    log_path = tmp_path / "slow.jsonl"
+    metrics = QueryMetrics(slow_ms=100, slow_log=SlowQueryLog(log_path))
+    sql = "SELECT numbers FROM expert_predictions WHERE issue_name = :issue"
+    rows = [{"numbers": "123"}] * 4
+
+    metrics.record_query(sql, {"issue": "1"}, elapsed_ms=20, pool_wait_ms=2, rows=rows, source="A")
+    metrics.record_query(sql, {"issue": "2"}, elapsed_ms=150, rows=[], source="B")
+    metrics.record_query(sql, {"issue": "3"}, elapsed_ms=5, error=True, source="A")
+    metrics.record_cache_call(sql)
+    metrics.record_cache_call(sql)
+    metrics.record_cache_miss(sql)
+
+    (stats,) = metrics.statements()
+    assert stats["calls"] == 3 and stats["errors"] == 1
+    assert stats["total_ms"] == 175 and stats["max_ms"] == 150 and stats["pool_wait_ms"] == 2
+    assert stats["rows"] == 4 and stats["bytes"] == 12
+    assert stats["cache_calls"] == 2 and stats["cache_misses"] == 1
+    assert stats["sources"] == {"A": 2, "B": 1}
+    assert [item["source"] for item in metrics.sources()] == ["B", "A"]
+
+    lines = log_path.read_text(encoding="utf-8").splitlines()
+    assert len(lines) == 1
+    entry = json.loads(lines[0])
+    assert entry["elapsed_ms"] == 150 and entry["source"] == "B"
+    assert entry["params"] == {"issue": "2"}
+
+    metrics.reset()
+    assert metrics.statements() == [] and metrics.sources() == []
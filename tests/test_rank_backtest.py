@@ -0,0 +1,56 @@
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from utils.rank_backtest import backtest_rank_positions, wilson_interval
+from utils.rank_store import RankMatrix
+
+
+def _matrix() -> RankMatrix:
+    rows = [
+        {"issue_name": "2025100", "playtype_id": 1, "num": "1,2,3"},
+        {"issue_name": "2025100", "playtype_id": 2, "num": "4,5"},
+        {"issue_name": "2025101", "playtype_id": 1, "num": "7,8,9"},
+        {"issue_name": "2025101", "playtype_id": 2, "num": "8,0,1"},
+        {"issue_name": "2025102", "playtype_id": 1, "num": "1,2,3"},
+    ]
+    return RankMatrix.from_rows(rows, playtype_names={1: "独胆", 2: "双胆"})
+
+
+def test_wilson_interval_known_value_and_zero_trials():
+    low, high = wilson_interval(np.array([5, 0]), np.array([10, 0]))
+    assert low[0] == pytest.approx(0.2366, abs=1e-4)
+    assert high[0] == pytest.approx(0.7634, abs=1e-4)
+    assert np.isnan(low[1]) and np.isnan(high[1])
+
+
+def test_backtest_counts_hits_only_for_drawn_issues():
+    open_codes = {"2025100": "1,4,4", "2025101": "0,8,8", "2025102": None}
+
+    result = backtest_rank_positions(_matrix(), open_codes, [1, 2, 3, 11])
+
+    assert result["position"].tolist() == [1, 2, 3]
+    # 位置 1: 1✓ 4✓ 7✗ 8✓；位置 2: 2✗ 5✗ 8✓ 0✓；位置 3: 3✗ 9✗ 1✗（"4,5" 无第 3 位）
+    assert result["trials"].tolist() == [4, 4, 3]
+    assert result["hits"].tolist() == [3, 2, 0]
+    assert result["hit_rate"].tolist() == [0.75, 0.5, 0.0]
+    assert result["baseline"].iloc[0] == pytest.approx(0.2)
+    assert (result["ci_low"] <= result["hit_rate"]).all()
+    assert (result["ci_high"] >= result["hit_rate"]).all()
+
+
+def test_backtest_groups_by_playtype_and_respects_row_mask():
+    matrix = _matrix()
+    open_codes = {"2025100": "1,4,4", "2025101": "0,8,8"}
+
+    grouped = backtest_rank_positions(matrix, open_codes, [1], group_by_playtype=True)
+    assert grouped[["playtype_name", "trials", "hits"]].values.tolist() == [
+        ["双胆", 2, 2],
+        ["独胆", 2, 1],
+    ]
+
+    masked = backtest_rank_positions(matrix, open_codes, [1], row_mask=matrix.labels == "独胆")
+    assert masked[["trials", "hits"]].values.tolist() == [[2, 1]]
+
+    assert backtest_rank_positions(matrix, {}, [1]).empty
@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+from collections import Counter
+
+import numpy as np
+
+from utils.rank_store import RankMatrix, count_rank_digits
+
+
+def test_from_rows_parses_fixed_width_arrays_and_keeps_last_row():
+    rows = [
+        {"issue_name": "2025101", "playtype_id": 1001, "type": 4, "num": "9,9", "val": "1,1"},
+        {"issue_name": "2025101", "playtype_id": 1001, "type": 4, "num": "3, 7,1", "val": "0.5,x"},
+        {"issue_name": "2025100", "playtype_id": 1002, "num": "12,4", "val": None},
+    ]
+
+    matrix = RankMatrix.from_rows(rows, playtype_names={1001: "独胆"})
+
+    assert len(matrix) == 2
+    assert matrix.issues.tolist() == ["2025100", "2025101"]
+    assert matrix.labels.tolist() == ["1002", "独胆"]
+    assert matrix.digits.dtype == np.int8 and matrix.digits.shape == (2, 10)
+    assert matrix.digits[0, :3].tolist() == [-1, 4, -1]
+    assert matrix.digits[1, :4].tolist() == [3, 7, 1, -1]
+    assert matrix.values.dtype == np.float32
+    assert matrix.values[1, 0] == np.float32(0.5) and np.isnan(matrix.values[1, 1])
+
+
+def test_count_rank_digits_matches_counter_over_entries():
+    rng = np.random.default_rng(5)
+    entries = [
+        (name, [str(d) for d in rng.permutation(10)[: rng.integers(1, 11)]])
+        for name in ["独胆", "双胆", "杀一"] * 40
+    ]
+    positions = [1, 3, 10]
+    selected = {"独胆", "双胆"}
+
+    expected = Counter()
+    for name, digits in entries:
+        if name in selected:
+            for pos in positions:
+                if pos <= len(digits):
+                    expected[digits[pos - 1]] += 1
+
+    matrix = RankMatrix.from_entries(entries)
+    counts = count_rank_digits(matrix, positions, np.isin(matrix.labels, list(selected)))
+
+    assert {str(d): int(c) for d, c in enumerate(counts) if c} == dict(expected)
@@ -0,0 +1,60 @@
+from __future__ import annotations
+
+import pandas as pd
+
+from collector.red_val_dist import explode_distribution_rows, parse_count_map
+from utils.data_access import aggregate_red_val_distribution
+
+
+def test_parse_count_map_accepts_object_and_pair_list():
+    assert parse_count_map('{"0": 5, "2": "3", "x": 1}') == {0: 5, 2: 3}
+    assert parse_count_map([{"key": 1, "value": 4}, {"key": "1", "value": 1}]) == {1: 5}
+    assert parse_count_map("not json") == {}
+    assert parse_count_map(None) == {}
+
+
+def test_explode_keeps_latest_row_per_issue_playtype_type():
+    rows = [
+        {
+            "id": 1,
+            "issue_name": "2025101",
+            "playtype_id": 1001,
+            "type": 4,
+            "rank_count": 10,
+            "hit_count_map": '{"1": 99}',
+        },
+        {
+            "id": 2,
+            "issue_name": "2025101",
+            "playtype_id": 1001,
+            "type": 4,
+            "rank_count": 12,
+            "hit_count_map": '{"0": 4, "1": 8}',
+            "serial_hit_count_map": '{"3": 2}',
+        },
+    ]
+
+    frame = explode_distribution_rows(rows)
+
+    assert frame[["metric", "bucket", "expert_count", "rank_count"]].values.tolist() == [
+        ["hit_count", 0, 4, 12],
+        ["hit_count", 1, 8, 12],
+        ["serial_hit_count", 3, 2, 12],
+    ]
+
+
+def test_aggregate_across_issues_computes_share_per_metric():
+    frame = pd.DataFrame(
+        {
+            "issue_name": ["2025101", "2025101", "2025102", "2025102"],
+            "metric": ["hit_count"] * 4,
+            "bucket": [0, 1, 0, 1],
+            "expert_count": [4, 6, 2, 8],
+        }
+    )
+
+    summary = aggregate_red_val_distribution(frame)
+
+    assert summary["expert_count"].tolist() == [6, 14]
+    assert summary["issue_count"].tolist() == [2, 2]
+    assert summary["share"].tolist() == [0.3, 0.7]
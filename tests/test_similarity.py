@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.similarity import (
+    ExpertVectors,
+    nearest_neighbors,
+    pairwise_similarity,
+    top_pairs,
+)
+
+
+def _frame() -> pd.DataFrame:
+    return pd.DataFrame(
+        [
+            ("2025100", 1001, 1, "12"),
+            ("2025100", 1001, 1, "3"),
+            ("2025101", 1001, 1, "45"),
+            ("2025100", 1001, 2, "1,2,3"),
+            ("2025101", 1001, 2, "4 5"),
+            ("2025100", 1001, 3, "123"),
+            ("2025101", 1002, 3, "789"),
+            ("2025101", 1002, 4, None),
+        ],
+        columns=["issue_name", "playtype_id", "user_id", "numbers"],
+    )
+
+
+def _reference(vectors: ExpertVectors, metric: str) -> np.ndarray:
+    sets = [
+        {(slot, d) for slot, mask in enumerate(row) for d in range(10) if mask >> d & 1}
+        for row in vectors.masks.tolist()
+    ]
+    size = len(sets)
+    result = np.zeros((size, size))
+    for i in range(size):
+        for j in range(size):
+            if i == j or not sets[i] or not sets[j]:
+                continue
+            inter = len(sets[i] & sets[j])
+            if metric == "jaccard":
+                result[i, j] = inter / len(sets[i] | sets[j])
+            else:
+                result[i, j] = inter / np.sqrt(len(sets[i]) * len(sets[j]))
+    return result
+
+
+def test_from_frame_merges_rows_into_slot_masks():
+    vectors = ExpertVectors.from_frame(_frame())
+
+    assert vectors.user_ids.tolist() == [1, 2, 3, 4]
+    assert vectors.slots == [("2025100", 1001), ("2025101", 1001), ("2025101", 1002)]
+    assert vectors.masks[0].tolist() == [0b1110, 0b110000, 0]
+    assert vectors.masks[0].tolist() == vectors.masks[1].tolist()
+    assert vectors.masks[3].tolist() == [0, 0, 0]
+
+
+@pytest.mark.parametrize("metric", ["jaccard", "cosine"])
+def test_blocked_similarity_matches_set_reference(metric):
+    rng = np.random.default_rng(3)
+    rows = [
+        (f"20251{issue:02d}", 1001, user, "".join(map(str, rng.choice(10, 4, replace=False))))
+        for user in range(23)
+        for issue in range(12)
+        if rng.random() < 0.7
+    ]
+    frame = pd.DataFrame(rows, columns=["issue_name", "playtype_id", "user_id", "numbers"])
+    vectors = ExpertVectors.from_frame(frame)
+
+    similarity, shared = pairwise_similarity(vectors, metric=metric, block_size=5)
+
+    np.testing.assert_allclose(similarity, _reference(vectors, metric), atol=1e-6)
+    present = (vectors.masks != 0).astype(int)
+    expected_shared = present @ present.T
+    assert (shared == expected_shared).all()
+
+
+def test_nearest_neighbors_and_top_pairs():
+    vectors = ExpertVectors.from_frame(_frame())
+
+    neighbors = nearest_neighbors(vectors, 1, k=5)
+    assert neighbors["user_id"].tolist() == [2, 3]
+    assert neighbors["similarity"].tolist() == [1.0, 0.375]
+    assert neighbors["shared_slots"].tolist() == [2, 1]
+    assert nearest_neighbors(vectors, 1, min_overlap=2)["user_id"].tolist() == [2]
+    assert nearest_neighbors(vectors, 99).empty
+
+    similarity, shared = pairwise_similarity(vectors)
+    pairs = top_pairs(similarity, shared, vectors.user_ids, threshold=0.9)
+    assert pairs[["user_a", "user_b", "similarity", "shared_slots"]].values.tolist() == [
+        [1, 2, 1.0, 2]
+    ]
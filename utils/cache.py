@@ -1,10 +1,90 @@
 import hashlib
 import json
+import re
+import threading
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any, Callable, Sequence, TypeVar
 
 import streamlit as st
 
+from db.connection import query_metrics
 from utils.cache_control import get_cache_token
 
+_TABLE_PATTERN = re.compile(r"\b(?:FROM|JOIN)\s+`?([A-Za-z_][A-Za-z0-9_]*)`?", re.IGNORECASE)
+
+T = TypeVar("T")
+
+
+@dataclass
+class _Flight:
+    done: threading.Event = field(default_factory=threading.Event)
+    error: BaseException | None = None
+    waiters: int = 0
+
+
+class SingleFlight:
+    """Coalesce concurrent calls that share a key into one execution.
+
+    同一 key 已有调用在执行时，后来的调用只等待它结束，再各自调用一次 ``fn``——
+    对 :func:`cached_query` 而言第二次调用命中 ``st.cache_data``，拿到的仍是各自的副本。
+    领头调用失败时，等待者直接抛出同一异常，不再逐个重试。
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._flights: dict[str, _Flight] = {}
+        self.calls = 0
+        self.coalesced = 0
+        self.errors = 0
+        self.max_waiters = 0
+
+    def run(self, key: str, fn: Callable[[], T]) -> T:
+        with self._lock:
+            self.calls += 1
+            flight = self._flights.get(key)
+            if flight is None:
+                flight = self._flights[key] = _Flight()
+                leader = True
+            else:
+                flight.waiters += 1
+                self.coalesced += 1
+                self.max_waiters = max(self.max_waiters, flight.waiters)
+                leader = False
+
+        if leader:
+            try:
+                return fn()
+            except BaseException as exc:
+                flight.error = exc
+                with self._lock:
+                    self.errors += 1
+                raise
+            finally:
+                with self._lock:
+                    del self._flights[key]
+                flight.done.set()
+
+        flight.done.wait()
+        if flight.error is not None:
+            raise flight.error
+        return fn()
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._flights)
+
+
+_flights = SingleFlight()
+_executed = 0
+_executed_lock = threading.Lock()
+
+
+@lru_cache(maxsize=512)
+def tables_in_sql(sql: str) -> tuple[str, ...]:
+    """Best-effort list of tables referenced after FROM/JOIN."""
+    return tuple(sorted({match.lower() for match in _TABLE_PATTERN.findall(sql)}))
+
 
 def _make_key(
     sql: str,
@@ -33,12 +113,38 @@ def cached_query(
     *,
     extra_key: str | None = None,
     include_global_token: bool = True,
+    tables: Sequence[str] | None = None,
 ):
-    global_token = get_cache_token() if include_global_token else ""
+    global_token = ""
+    if include_global_token:
+        # 未显式指定时从 SQL 推断涉及的表，只随这些表的变更失效
+        global_token = get_cache_token(tables if tables is not None else tables_in_sql(sql) or None)
     key = _make_key(sql, params, extra_key, global_token)
+    query_metrics.record_cache_call(sql)
 
-    @st.cache_data(ttl=ttl, show_spinner=False)
     def _do(k: str):
+        global _executed
+        with _executed_lock:
+            _executed += 1
+        query_metrics.record_cache_miss(sql)
         return run_fn(sql, params)
 
-    return _do(key)
+    # st.cache_data 按函数限定名区分缓存；各 TTL 共用一个限定名时，换一个 TTL 调用就会
+    # 重建（清空）整个缓存，所以每个 TTL 使用独立的限定名。
+    _do.__qualname__ = f"cached_query.<ttl={ttl}>"
+    cached = st.cache_data(ttl=ttl, show_spinner=False)(_do)
+    return _flights.run(key, lambda: cached(key))
+
+
+def cache_metrics() -> dict[str, Any]:
+    """进程内 cached_query 计数：调用、被合并的并发调用、实际执行的查询（缓存未命中）。"""
+    with _executed_lock:
+        executed = _executed
+    return {
+        "calls": _flights.calls,
+        "coalesced": _flights.coalesced,
+        "executed": executed,
+        "errors": _flights.errors,
+        "max_waiters": _flights.max_waiters,
+        "in_flight": _flights.in_flight(),
+    }
@@ -1,40 +1,21 @@
 from __future__ import annotations
 
-import os
-import time
-from pathlib import Path
+from typing import Iterable
 
-_PROJECT_ROOT = Path(__file__).resolve().parents[1]
-_CACHE_TOKEN_FILE = _PROJECT_ROOT / "logs" / ".cache_token"
+from utils.change_feed import ALL_TABLES, get_change_feed, publish_change
 
 
-def _ensure_token_file() -> None:
-    try:
-        _CACHE_TOKEN_FILE.parent.mkdir(parents=True, exist_ok=True)
-    except OSError:
-        pass
+def get_cache_token(tables: Iterable[str] | None = None) -> str:
+    """Return the token used to bust cached DB queries.
 
+    传入 ``tables`` 时只跟随这些表（以及通配刷新）的变更；变更日志按固定间隔轮询，
+    不会在每次查询时访问文件系统。
+    """
+    return get_change_feed().version(tables)
 
-def get_cache_token() -> str:
-    """Return the monotonic token used to bust cached DB queries."""
-    try:
-        return str(int(_CACHE_TOKEN_FILE.stat().st_mtime))
-    except FileNotFoundError:
-        return bump_cache_token()
 
-
-def bump_cache_token() -> str:
-    """Update the token so cached queries are invalidated on next run."""
-    _ensure_token_file()
-    now = time.time()
-    try:
-        os.utime(_CACHE_TOKEN_FILE, (now, now))
-    except OSError:
-        try:
-            _CACHE_TOKEN_FILE.write_text(str(int(now)))
-        except OSError:
-            pass
-    try:
-        return str(int(_CACHE_TOKEN_FILE.stat().st_mtime))
-    except OSError:
-        return str(int(now))
+def bump_cache_token(source: str = "manual") -> str:
+    """Update the token so every cached query is invalidated on next run."""
+    seq = publish_change(ALL_TABLES, source=source)
+    get_change_feed().refresh(force=True)
+    return str(seq)
@@ -0,0 +1,133 @@
+"""期号目录（issue_catalog）的内存视图。
+
+整张目录表只有「每期一行」，一次查询读入后放在进程级缓存里，随 ``issue_catalog``
+变更失效；期号与玩法选择器都从这里取数，不再对大表做 DISTINCT 扫描。
+目录表不存在或为空时 :func:`load_issue_catalog` 返回 ``None``，调用方回退到原查询；
+目录一旦非空即视为完整（空表上的第一次刷新会扫描全部期号建目录，见
+``collector.issue_catalog.refresh_catalog``）。
+"""
+
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass
+from typing import Iterable, Mapping
+
+import streamlit as st
+
+from db.connection import query_db
+from utils.cache_control import get_cache_token
+
+logger = logging.getLogger(__name__)
+
+# lottery: 有开奖或推荐；predictions: 有推荐；hit_stat: 有命中统计；expert: 有推荐或命中统计
+ISSUE_SOURCES = ("lottery", "predictions", "hit_stat", "expert", "any")
+
+
+def _parse_ids(raw: object) -> tuple[int, ...]:
+    if not raw:
+        return ()
+    return tuple(int(token) for token in str(raw).split(",") if token.strip().isdigit())
+
+
+@dataclass(frozen=True, slots=True)
+class CatalogEntry:
+    issue_name: str
+    playtype_ids: tuple[int, ...]
+    expert_count: int
+    row_count: int
+    has_result: bool
+    has_hit_stat: bool
+    hit_stat_playtype_ids: tuple[int, ...]
+
+    @classmethod
+    def from_row(cls, row: Mapping[str, object]) -> CatalogEntry:
+        return cls(
+            issue_name=str(row["issue_name"]),
+            playtype_ids=_parse_ids(row.get("playtype_ids")),
+            expert_count=int(row.get("expert_count") or 0),
+            row_count=int(row.get("row_count") or 0),
+            has_result=bool(row.get("has_result")),
+            has_hit_stat=bool(row.get("has_hit_stat")),
+            hit_stat_playtype_ids=_parse_ids(row.get("hit_stat_playtype_ids")),
+        )
+
+    def matches(self, source: str) -> bool:
+        if source == "lottery":
+            # 与 fetch_recent_issues 一致：开奖记录或推荐记录任一存在
+            return self.has_result or self.row_count > 0
+        if source == "predictions":
+            return self.row_count > 0
+        if source == "hit_stat":
+            return self.has_hit_stat
+        if source == "expert":
+            return self.row_count > 0 or self.has_hit_stat
+        return self.has_result or self.row_count > 0 or self.has_hit_stat
+
+
+class IssueCatalog:
+    """Catalog entries ordered newest first."""
+
+    def __init__(self, entries: Iterable[CatalogEntry]) -> None:
+        self._entries = sorted(entries, key=lambda entry: entry.issue_name, reverse=True)
+        self._by_issue = {entry.issue_name: entry for entry in self._entries}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, issue: str) -> CatalogEntry | None:
+        return self._by_issue.get(str(issue))
+
+    def issues(
+        self, source: str = "lottery", *, limit: int | None = None, until: str | None = None
+    ) -> list[str]:
+        """Newest-first issues of ``source``; ``until`` keeps only issues at or before it."""
+        if source not in ISSUE_SOURCES:
+            raise ValueError(f"Unsupported issue source: {source}")
+        result: list[str] = []
+        for entry in self._entries:
+            if until is not None and entry.issue_name > until:
+                continue
+            if entry.matches(source):
+                result.append(entry.issue_name)
+                if limit is not None and len(result) >= limit:
+                    break
+        return result
+
+    def playtypes(self, issue: str, *, source: str = "predictions") -> tuple[int, ...] | None:
+        """Playtype ids of ``issue``; ``None`` when the issue is not catalogued."""
+        entry = self.get(issue)
+        if entry is None:
+            return None
+        return entry.hit_stat_playtype_ids if source == "hit_stat" else entry.playtype_ids
+
+
+@st.cache_resource(ttl=3600, show_spinner=False)
+def _load_catalog(token: str) -> IssueCatalog:
+    rows = query_db(
+        """
+        SELECT issue_name, playtype_ids, expert_count, row_count,
+               has_result, has_hit_stat, hit_stat_playtype_ids
+        FROM issue_catalog
+        """
+    )
+    return IssueCatalog(CatalogEntry.from_row(row) for row in rows)
+
+
+# 加载失败时记下当时的 token，目录表有变更之前不再重试
+_unavailable_token: str | None = None
+
+
+def load_issue_catalog() -> IssueCatalog | None:
+    """The in-memory catalog, or ``None`` when the table is missing or empty."""
+    global _unavailable_token
+    token = get_cache_token(["issue_catalog"])
+    if token == _unavailable_token:
+        return None
+    try:
+        catalog = _load_catalog(token)
+    except Exception:
+        logger.warning("issue_catalog 不可用，回退到直接查询", exc_info=True)
+        _unavailable_token = token
+        return None
+    return catalog if len(catalog) else None
@@ -0,0 +1,162 @@
+"""采集端到应用端的变更数据流（本地 SQLite 追加日志）。
+
+采集脚本写完数据后调用 :func:`publish_change` 记录「哪张表、哪一期、写入多少行、
+最新期号」；应用进程通过 :class:`ChangeFeed` 订阅，每隔 ``poll_interval`` 秒最多读取
+一次各表最新序号，``cached_query`` 只让涉及这些表的缓存失效，单次查询不再产生
+文件系统调用。
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import sqlite3
+import threading
+import time
+from contextlib import closing
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable
+
+logger = logging.getLogger(__name__)
+
+_PROJECT_ROOT = Path(__file__).resolve().parents[1]
+DEFAULT_FEED_PATH = _PROJECT_ROOT / "logs" / "change_feed.sqlite3"
+# 覆盖变更日志位置（测试或多实例部署时指向各自的文件）
+FEED_PATH_ENV = "LOTTO_CHANGE_FEED"
+
+# 通配表名：不针对具体表的变更（例如手动刷新），使所有缓存失效
+ALL_TABLES = "*"
+DEFAULT_POLL_INTERVAL = 2.0
+# 只保留最近若干条事件，避免日志无限增长
+MAX_EVENTS = 5000
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS changes (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    ts REAL NOT NULL,
+    source TEXT NOT NULL DEFAULT '',
+    table_name TEXT NOT NULL,
+    issue_name TEXT,
+    row_count INTEGER NOT NULL DEFAULT 0,
+    max_issue TEXT
+)
+"""
+
+
+@dataclass(frozen=True, slots=True)
+class ChangeEvent:
+    seq: int
+    ts: float
+    source: str
+    table_name: str
+    issue_name: str | None
+    row_count: int
+    max_issue: str | None
+
+
+def feed_path(path: Path | str | None = None) -> Path:
+    """Explicit ``path``, else ``$LOTTO_CHANGE_FEED``, else :data:`DEFAULT_FEED_PATH`."""
+    if path:
+        return Path(path)
+    return Path(os.environ.get(FEED_PATH_ENV) or DEFAULT_FEED_PATH)
+
+
+def _connect(path: Path) -> sqlite3.Connection:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(path, timeout=5)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute(_SCHEMA)
+    return conn
+
+
+def publish_change(
+    table_name: str,
+    *,
+    issue_name: str | None = None,
+    row_count: int = 0,
+    max_issue: str | None = None,
+    source: str = "",
+    path: Path | str | None = None,
+) -> int:
+    """Append one change event and return its sequence number."""
+    target = feed_path(path)
+    with closing(_connect(target)) as conn, conn:
+        cursor = conn.execute(
+            "INSERT INTO changes (ts, source, table_name, issue_name, row_count, max_issue) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (time.time(), source, table_name, issue_name, int(row_count), max_issue),
+        )
+        seq = int(cursor.lastrowid or 0)
+        if seq > MAX_EVENTS and seq % 100 == 0:
+            conn.execute("DELETE FROM changes WHERE seq <= ?", (seq - MAX_EVENTS,))
+    return seq
+
+
+class ChangeFeed:
+    """Process-local subscriber with throttled polling of the change log."""
+
+    def __init__(
+        self, path: Path | str | None = None, *, poll_interval: float = DEFAULT_POLL_INTERVAL
+    ) -> None:
+        self.path = feed_path(path)
+        self.poll_interval = poll_interval
+        self._lock = threading.Lock()
+        self._versions: dict[str, int] = {}
+        self._checked_at: float | None = None
+
+    def refresh(self, *, force: bool = False) -> dict[str, int]:
+        """Return ``{table: latest seq}``, re-reading the log at most once per interval."""
+        now = time.monotonic()
+        with self._lock:
+            fresh = self._checked_at is not None and now - self._checked_at < self.poll_interval
+            if fresh and not force:
+                return self._versions
+            self._checked_at = now
+            try:
+                with closing(_connect(self.path)) as conn:
+                    rows = conn.execute(
+                        "SELECT table_name, MAX(seq) FROM changes GROUP BY table_name"
+                    ).fetchall()
+            except sqlite3.Error:
+                logger.exception("读取变更日志失败: %s", self.path)
+                return self._versions
+            self._versions = {str(name): int(seq) for name, seq in rows}
+            return self._versions
+
+    def latest_seq(self) -> int:
+        return max(self.refresh().values(), default=0)
+
+    def version(self, tables: Iterable[str] | None = None) -> str:
+        """Token that changes only when one of ``tables`` (or the wildcard) changes."""
+        versions = self.refresh()
+        if tables is None:
+            return str(max(versions.values(), default=0))
+        wildcard = versions.get(ALL_TABLES, 0)
+        parts = [f"{ALL_TABLES}:{wildcard}"]
+        for table in sorted(set(tables)):
+            parts.append(f"{table}:{versions.get(table, 0)}")
+        return "|".join(parts)
+
+    def changes_since(self, seq: int, *, limit: int = 50) -> list[ChangeEvent]:
+        try:
+            with closing(_connect(self.path)) as conn:
+                rows = conn.execute(
+                    "SELECT seq, ts, source, table_name, issue_name, row_count, max_issue "
+                    "FROM changes WHERE seq > ? ORDER BY seq LIMIT ?",
+                    (int(seq), int(limit)),
+                ).fetchall()
+        except sqlite3.Error:
+            logger.exception("读取变更日志失败: %s", self.path)
+            return []
+        return [ChangeEvent(*row) for row in rows]
+
+
+_FEED: ChangeFeed | None = None
+
+
+def get_change_feed() -> ChangeFeed:
+    global _FEED
+    if _FEED is None:
+        _FEED = ChangeFeed()
+    return _FEED
@@ -2,9 +2,12 @@ from __future__ import annotations
 
 from collections.abc import Iterable, Sequence
 
-import altair as alt
 import pandas as pd
 
+from utils.lazy import lazy_import
+
+alt = lazy_import("altair")
+
 
 def render_digit_frequency_chart(
     freq_df: pd.DataFrame,
@@ -0,0 +1,215 @@
+"""福彩3D 号码组合的静态特征表与向量化查找。
+
+000–999 共 1000 个直选号码在导入时一次性算好特征，号码本身就是数组下标：
+
+- ``CODE_DIGITS[code]`` 百/十/个位数字，``CODE_MASK`` 数字掩码（同 :func:`utils.numbers.digit_mask`）；
+- ``CODE_SUM`` / ``CODE_SPAN`` 和值与跨度，``CODE_ODD`` / ``CODE_BIG`` 奇数与大数（≥5）个数，
+  ``CODE_ODD_EVEN`` / ``CODE_BIG_SMALL`` 为 ``"2:1"`` 形式的比值标签；
+- ``CODE_CONSECUTIVE`` 是否含连号，``CODE_CLASS`` 组选类型编号（见 ``GROUP_CLASSES``）；
+- ``CODE_CANONICAL`` 忽略顺序后的规范号码（数字升序），220 个组选号码即 ``COMBO_CODES``。
+
+页面筛选、频次统计都只是 ``np.bincount`` 与布尔下标运算，不再逐个号码重算特征。
+"""
+
+from __future__ import annotations
+
+from typing import Iterable, Sequence
+
+import numpy as np
+
+N_CODES = 1000
+GROUP_CLASSES = ("组六", "组三", "豹子", "顺子")
+_CLASS_INDEX = {name: idx for idx, name in enumerate(GROUP_CLASSES)}
+
+
+def digit_matrix(keys: Sequence[str]) -> np.ndarray:
+    """Digits of each string as an ``(n, 最长长度)`` int8 matrix; non-digits / padding are -1."""
+    if not len(keys):
+        return np.full((0, 1), -1, dtype=np.int8)
+    encoded = np.array([str(key).encode("ascii", "replace") for key in keys], dtype=np.bytes_)
+    width = max(encoded.dtype.itemsize, 1)
+    values = encoded.view(np.uint8).reshape(len(encoded), width).astype(np.int16) - ord("0")
+    return np.where((values >= 0) & (values <= 9), values, -1).astype(np.int8)
+
+
+def digit_features(digits: np.ndarray) -> dict[str, np.ndarray]:
+    """和值 / 跨度 / 奇偶 / 大小个数与数字掩码，按行统计 ``digit_matrix`` 中的有效数字。"""
+    matrix = np.asarray(digits, dtype=np.int16)
+    valid = matrix >= 0
+    values = np.where(valid, matrix, 0)
+    size = valid.sum(axis=1)
+    odd = (valid & (values % 2 == 1)).sum(axis=1)
+    big = (valid & (values >= 5)).sum(axis=1)
+    highest = np.where(valid, matrix, -1).max(axis=1, initial=-1)
+    lowest = np.where(valid, matrix, 10).min(axis=1, initial=10)
+    bits = np.where(valid, 1 << values, 0)
+    return {
+        "sum": values.sum(axis=1),
+        "span": np.where(size > 0, highest - lowest, 0),
+        "odd": odd,
+        "even": size - odd,
+        "big": big,
+        "small": size - big,
+        "mask": np.bitwise_or.reduce(bits, axis=1, initial=0),
+    }
+
+
+def _ratio_labels(counts: np.ndarray, size: int = 3) -> np.ndarray:
+    return np.array([f"{count}:{size - count}" for count in counts.tolist()], dtype=object)
+
+
+def _readonly(array: np.ndarray) -> np.ndarray:
+    array.flags.writeable = False
+    return array
+
+
+_codes = np.arange(N_CODES)
+CODE_DIGITS = _readonly(
+    np.stack([_codes // 100, _codes // 10 % 10, _codes % 10], axis=1).astype(np.int8)
+)
+CODE_LABELS = _readonly(np.array([f"{code:03d}" for code in _codes], dtype=object))
+_features = digit_features(CODE_DIGITS)
+CODE_MASK = _readonly(_features["mask"].astype(np.int16))
+CODE_SUM = _readonly(_features["sum"].astype(np.int8))
+CODE_SPAN = _readonly(_features["span"].astype(np.int8))
+CODE_ODD = _readonly(_features["odd"].astype(np.int8))
+CODE_BIG = _readonly(_features["big"].astype(np.int8))
+CODE_ODD_EVEN = _readonly(_ratio_labels(CODE_ODD))
+CODE_BIG_SMALL = _readonly(_ratio_labels(CODE_BIG))
+# 掩码中相邻两位同时为 1 即含连号（与 has_consecutive_digits 一致，重复数字不影响）
+CODE_CONSECUTIVE = _readonly((CODE_MASK & (CODE_MASK >> 1)) != 0)
+
+_ordered = np.sort(CODE_DIGITS, axis=1).astype(np.int16)
+CODE_CANONICAL = _readonly(
+    (_ordered[:, 0] * 100 + _ordered[:, 1] * 10 + _ordered[:, 2]).astype(np.int16)
+)
+_classes = np.full(N_CODES, _CLASS_INDEX["组六"], dtype=np.int8)
+_classes[(_ordered[:, 0] == _ordered[:, 1]) ^ (_ordered[:, 1] == _ordered[:, 2])] = _CLASS_INDEX[
+    "组三"
+]
+_classes[(_ordered[:, 0] == _ordered[:, 2])] = _CLASS_INDEX["豹子"]
+# 与原 Playtype_CombinationView.classify 一致：890 / 901 不算顺子
+_classes[(_ordered[:, 1] == _ordered[:, 0] + 1) & (_ordered[:, 2] == _ordered[:, 1] + 1)] = (
+    _CLASS_INDEX["顺子"]
+)
+CODE_CLASS = _readonly(_classes)
+# 组选号码（忽略顺序）：规范号码等于自身的 220 个
+COMBO_CODES = _readonly(np.flatnonzero(CODE_CANONICAL == _codes))
+del _codes, _features, _ordered, _classes
+
+
+def encode_code(text: str | None) -> int:
+    """``"012"`` -> ``12``; anything that is not exactly three digits -> ``-1``."""
+    value = (text or "").strip()
+    if len(value) != 3 or not value.isdigit():
+        return -1
+    return int(value)
+
+
+def canonical_code(text: str | None) -> int:
+    """Order-insensitive key of a three-digit string, ``-1`` when invalid."""
+    code = encode_code(text)
+    return int(CODE_CANONICAL[code]) if code >= 0 else -1
+
+
+def digits_mask(digits: Iterable[str | int]) -> int:
+    mask = 0
+    for digit in digits:
+        mask |= 1 << int(digit)
+    return mask
+
+
+def class_ids(names: Iterable[str]) -> list[int]:
+    return [_CLASS_INDEX[name] for name in names if name in _CLASS_INDEX]
+
+
+def positional_codes(position_masks: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Expand per-row ``(百, 十, 个)`` digit masks into every ordered code they cover.
+
+    ``position_masks`` 为 ``(n, 3)`` 整数数组；返回 ``(行下标, 号码)``。定1 每行至多
+    一个号码，定3 每行至多 27 个。
+    """
+    masks = np.asarray(position_masks, dtype=np.int16).reshape(-1, 3)
+    bits = ((masks[:, :, None] >> np.arange(10, dtype=np.int16)) & 1).astype(bool)
+    cube = bits[:, 0, :, None, None] & bits[:, 1, None, :, None] & bits[:, 2, None, None, :]
+    rows, codes = np.nonzero(cube.reshape(len(masks), N_CODES))
+    return rows, codes
+
+
+def code_frequencies(codes: np.ndarray) -> np.ndarray:
+    """Occurrences of each code 0–999."""
+    return np.bincount(np.asarray(codes, dtype=np.int64), minlength=N_CODES)
+
+
+def filter_codes(
+    *,
+    exclude_classes: Iterable[str] = (),
+    exclude_digits: Iterable[str | int] = (),
+    include_digits: Iterable[str | int] = (),
+    canonical: int | None = None,
+    sum_range: tuple[int, int] | None = None,
+    span_range: tuple[int, int] | None = None,
+    exclude_sums: Iterable[int] = (),
+    exclude_spans: Iterable[int] = (),
+    odd_even: Iterable[str] = (),
+    big_small: Iterable[str] = (),
+    exclude_consecutive: bool = False,
+    unordered: bool = False,
+) -> np.ndarray:
+    """Boolean mask over the 1000 codes; empty / ``None`` arguments do not filter.
+
+    ``odd_even`` / ``big_small`` 为保留的比值标签（如 ``"2:1"``），其余均为排除或区间条件；
+    ``unordered=True`` 只保留组选号码（``COMBO_CODES``）。
+    """
+    keep = np.ones(N_CODES, dtype=bool)
+    excluded = class_ids(exclude_classes)
+    if excluded:
+        keep &= ~np.isin(CODE_CLASS, excluded)
+    exclude_mask = digits_mask(exclude_digits)
+    if exclude_mask:
+        keep &= (CODE_MASK & exclude_mask) == 0
+    include_mask = digits_mask(include_digits)
+    if include_mask:
+        keep &= (CODE_MASK & include_mask) == include_mask
+    if canonical is not None:
+        keep &= CODE_CANONICAL == canonical
+    if sum_range is not None:
+        keep &= (CODE_SUM >= sum_range[0]) & (CODE_SUM <= sum_range[1])
+    if span_range is not None:
+        keep &= (CODE_SPAN >= span_range[0]) & (CODE_SPAN <= span_range[1])
+    sums = [int(value) for value in exclude_sums]
+    if sums:
+        keep &= ~np.isin(CODE_SUM, sums)
+    spans = [int(value) for value in exclude_spans]
+    if spans:
+        keep &= ~np.isin(CODE_SPAN, spans)
+    odd_even = list(odd_even)
+    if odd_even:
+        keep &= np.isin(CODE_ODD_EVEN, odd_even)
+    big_small = list(big_small)
+    if big_small:
+        keep &= np.isin(CODE_BIG_SMALL, big_small)
+    if exclude_consecutive:
+        keep &= ~CODE_CONSECUTIVE
+    if unordered:
+        keep &= CODE_CANONICAL == np.arange(N_CODES)
+    return keep
+
+
+def position_filter(position_digits: Sequence[Iterable[str | int]]) -> np.ndarray:
+    """Codes whose 百/十/个位 digits fall in the given per-position candidates."""
+    keep = np.ones(N_CODES, dtype=bool)
+    for column, digits in enumerate(position_digits):
+        keep &= (digits_mask(digits) >> CODE_DIGITS[:, column].astype(np.int16)) & 1 == 1
+    return keep
+
+
+def best_permutation(codes: np.ndarray, keep: np.ndarray) -> np.ndarray:
+    """For each code, the smallest permutation allowed by ``keep`` (itself when none is)."""
+    codes = np.asarray(codes, dtype=np.int64)
+    candidates = np.flatnonzero(keep)[::-1]
+    best = np.full(N_CODES, -1, dtype=np.int64)
+    # 倒序写入，同一规范号码最后留下的是最小的号码
+    best[CODE_CANONICAL[candidates]] = candidates
+    chosen = best[CODE_CANONICAL[codes]]
+    return np.where(chosen >= 0, chosen, codes)
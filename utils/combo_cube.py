@@ -0,0 +1,127 @@
+"""组合热度立方体：(期号, 玩法, 规范组合) → 推荐该组合的专家数。
+
+规范组合 ``combo_key`` 为推荐号码拆分后排序拼接（与 NumberAnalysis 原逻辑一致，忽略顺序）。
+立方体由 ``collector/combo_cube.py`` 按期写入 ``combo_frequency`` 表（建表语句见
+``newsql/combo_frequency.sql``），每期每玩法只存去重后的组合及计数；页面按期号区间读取，
+和值 / 跨度 / 奇偶 / 大小等特征按去重后的组合一次向量化算出再按 ``combo_key`` 关联。
+读取见 :func:`utils.data_access.load_combo_cube`，立方体缺某期时回退到单期推荐数据包现算。
+
+超过 :data:`COMBO_KEY_MAX_LENGTH` 的组合（如直选多注）不入立方体，被截掉组合的
+(期号, 玩法) 记入 ``combo_frequency_overflow``，单期统计对这些玩法回退到现算；
+跨期热度走势只统计立方体内的组合。
+"""
+
+from __future__ import annotations
+
+from typing import Iterable, Sequence
+
+import numpy as np
+import pandas as pd
+
+from utils.combinatorics import digit_features, digit_matrix
+from utils.numbers import parse_tokens
+
+CUBE_COLUMNS = ["issue_name", "playtype_id", "combo_key", "expert_count"]
+FEATURE_COLUMNS = [
+    "combo_key",
+    "digit_mask",
+    "sum_digits",
+    "span",
+    "odd_count",
+    "even_count",
+    "odd_even_ratio",
+    "big_count",
+    "small_count",
+    "big_small_ratio",
+]
+OVERFLOW_COLUMNS = ["issue_name", "playtype_id", "dropped_count"]
+# 超长组合（如直选多注）不入立方体，对应 (期号, 玩法) 记入溢出表并回退到现算
+COMBO_KEY_MAX_LENGTH = 64
+
+
+def combo_key(numbers: str | None) -> str:
+    return "".join(sorted(parse_tokens(numbers)))
+
+
+def aggregate_combos(predictions: pd.DataFrame) -> pd.DataFrame:
+    """Count distinct experts per ``(issue_name, playtype_id, combo_key)``.
+
+    ``predictions`` 需含 ``issue_name, playtype_id, user_id, numbers``；同一推荐串只解析一次。
+    """
+    if predictions.empty:
+        return pd.DataFrame(columns=CUBE_COLUMNS)
+    frame = predictions.dropna(subset=["playtype_id", "user_id"])
+    numbers = frame["numbers"].fillna("").astype(str)
+    uniques = pd.unique(numbers)
+    keys = pd.Series([combo_key(value) for value in uniques], index=uniques)
+    frame = frame.assign(combo_key=numbers.map(keys).to_numpy())
+    frame = frame[frame["combo_key"] != ""]
+    cube = (
+        frame.drop_duplicates(["issue_name", "playtype_id", "combo_key", "user_id"])
+        .groupby(["issue_name", "playtype_id", "combo_key"], sort=True)
+        .size()
+        .rename("expert_count")
+        .reset_index()
+    )
+    cube["issue_name"] = cube["issue_name"].astype(str)
+    cube["playtype_id"] = cube["playtype_id"].astype("int64")
+    return cube[CUBE_COLUMNS]
+
+
+def split_overflow(cube: pd.DataFrame) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """Split off combos longer than :data:`COMBO_KEY_MAX_LENGTH`.
+
+    返回 ``(可入库的立方体行, 溢出记录)``，溢出记录为每个 (期号, 玩法) 被截掉的组合数。
+    """
+    too_long = cube["combo_key"].str.len() > COMBO_KEY_MAX_LENGTH
+    overflow = (
+        cube[too_long]
+        .groupby(["issue_name", "playtype_id"], sort=True)
+        .size()
+        .rename("dropped_count")
+        .reset_index()
+    )
+    return cube[~too_long], overflow[OVERFLOW_COLUMNS]
+
+
+def combo_features(keys: Iterable[str]) -> pd.DataFrame:
+    """Feature columns (:data:`FEATURE_COLUMNS`) for each distinct ``combo_key``."""
+    unique_keys = list(dict.fromkeys(str(key) for key in keys))
+    features = digit_features(digit_matrix(unique_keys))
+    frame = pd.DataFrame(
+        {
+            "combo_key": unique_keys,
+            "digit_mask": features["mask"].astype(np.int64),
+            "sum_digits": features["sum"].astype(np.int64),
+            "span": features["span"].astype(np.int64),
+            "odd_count": features["odd"].astype(np.int64),
+            "even_count": features["even"].astype(np.int64),
+            "big_count": features["big"].astype(np.int64),
+            "small_count": features["small"].astype(np.int64),
+        }
+    )
+    frame["odd_even_ratio"] = frame["odd_count"].astype(str) + ":" + frame["even_count"].astype(str)
+    frame["big_small_ratio"] = (
+        frame["big_count"].astype(str) + ":" + frame["small_count"].astype(str)
+    )
+    return frame[FEATURE_COLUMNS]
+
+
+def combo_trend(cube: pd.DataFrame, issues: Sequence[str], top_n: int = 20) -> pd.DataFrame:
+    """Issue × combo expert-count matrix for the ``top_n`` combos by total count.
+
+    行为 ``issues``（缺失的期记 0），列按窗口内总专家数降序。
+    """
+    ordered = [str(issue) for issue in issues]
+    if cube.empty or not ordered:
+        return pd.DataFrame(index=pd.Index(ordered, name="issue_name"))
+    matrix = cube.pivot_table(
+        index="issue_name",
+        columns="combo_key",
+        values="expert_count",
+        aggfunc="sum",
+        fill_value=0,
+    ).reindex(ordered, fill_value=0)
+    totals = matrix.sum(axis=0)
+    top = totals.sort_values(ascending=False, kind="stable").index[: int(top_n)]
+    return matrix[top].astype("int64")
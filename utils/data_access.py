@@ -1,17 +1,30 @@
 from __future__ import annotations
 
 import logging
+from dataclasses import dataclass
 from typing import Iterable, Sequence
 
+import numpy as np
 import pandas as pd
+import streamlit as st
 
 from db.connection import query_db
 from utils.cache import cached_query
+from utils.cache_control import get_cache_token
+from utils.catalog import load_issue_catalog
+from utils.combo_cube import CUBE_COLUMNS, aggregate_combos
+from utils.numbers import digit_mask
+from utils.sql import make_in_clause
 
 logger = logging.getLogger(__name__)
 
 
-def fetch_recent_issues(limit: int = 200) -> list[str]:
+def fetch_recent_issues(limit: int = 200, *, until: str | None = None) -> list[str]:
+    """Latest ``limit`` issues, newest first; ``until`` counts back from that issue instead."""
+    catalog = load_issue_catalog()
+    if catalog is not None:
+        return catalog.issues("lottery", limit=int(limit), until=until)
+
     marker = ""
     try:
         latest = query_db("SELECT MAX(issue_name) AS max_issue FROM expert_predictions")
@@ -19,15 +32,22 @@ def fetch_recent_issues(limit: int = 200) -> list[str]:
     except Exception:
         marker = ""
 
+    params: dict[str, object] = {"limit": int(limit)}
+    until_clause = ""
+    if until is not None:
+        until_clause = "WHERE issue_name <= :until"
+        params["until"] = str(until)
     sql = f"""
     /* latest_prediction: {marker} */
     SELECT issue_name
     FROM (
         SELECT issue_name, open_time
         FROM lottery_results
+        {until_clause}
         UNION ALL
         SELECT issue_name, NULL AS open_time
         FROM expert_predictions
+        {until_clause}
     ) AS merged
     GROUP BY issue_name
     ORDER BY issue_name DESC, COALESCE(MAX(open_time), '1970-01-01') DESC
@@ -37,7 +57,7 @@ def fetch_recent_issues(limit: int = 200) -> list[str]:
         rows = cached_query(
             query_db,
             sql,
-            params={"limit": int(limit)},
+            params=params,
             ttl=300,
             extra_key=marker,
         )
@@ -105,6 +125,14 @@ def fetch_playtype_name_map() -> dict[str, str]:
     return {str(row.playtype_id): row.playtype_name for row in frame.itertuples()}
 
 
+def playtype_names_by_id() -> dict[int, str]:
+    """playtype_id -> 玩法名；页面在用到时再调用，不要在模块顶层预取。"""
+    frame = fetch_playtypes()
+    if frame.empty:
+        return {}
+    return {int(row.playtype_id): row.playtype_name for row in frame.itertuples()}
+
+
 def playtype_name_to_id_map() -> dict[str, str]:
     frame = fetch_playtypes()
     if frame.empty:
@@ -128,6 +156,15 @@ def fetch_experts(limit: int = 500) -> pd.DataFrame:
 
 
 def fetch_playtypes_for_issue(issue: str) -> pd.DataFrame:
+    catalog = load_issue_catalog()
+    playtype_ids = catalog.playtypes(issue) if catalog is not None else None
+    if playtype_ids is not None:
+        frame = fetch_playtypes()
+        if frame.empty:
+            return pd.DataFrame(columns=["playtype_id", "playtype_name"])
+        frame = frame[frame["playtype_id"].astype(int).isin(playtype_ids)]
+        return frame.sort_values("playtype_id").reset_index(drop=True)
+
     sql = """
     SELECT DISTINCT ep.playtype_id, pd.playtype_name
     FROM expert_predictions ep
@@ -144,6 +181,10 @@ def fetch_playtypes_for_issue(issue: str) -> pd.DataFrame:
 
 
 def fetch_predicted_issues(limit: int = 200) -> list[str]:
+    catalog = load_issue_catalog()
+    if catalog is not None:
+        return catalog.issues("predictions", limit=int(limit))
+
     sql = """
     SELECT DISTINCT issue_name
     FROM expert_predictions
@@ -277,3 +318,282 @@ def fetch_predictions(
     if frame.empty:
         return pd.DataFrame(columns=select_columns)
     return frame.reindex(columns=select_columns)
+
+
+BUNDLE_COLUMNS = ["issue_name", "playtype_id", "user_id", "numbers", "digit_mask"]
+
+
+@dataclass(frozen=True)
+class IssueBundle:
+    """All predictions of one issue in columnar form, sorted by (playtype_id, user_id).
+
+    ``digit_masks`` 为推荐号码的 10 位数字掩码（同 :func:`utils.numbers.digit_mask`）。
+    数组只读，同一进程内的所有页面与会话共享同一份对象。
+    """
+
+    issue: str
+    playtype_ids: np.ndarray  # int64
+    user_ids: np.ndarray  # int64
+    numbers: np.ndarray  # object
+    digit_masks: np.ndarray  # int16
+
+    def __len__(self) -> int:
+        return int(self.playtype_ids.shape[0])
+
+    @classmethod
+    def from_rows(cls, issue: str, rows: Iterable[dict]) -> IssueBundle:
+        records = [
+            (int(row["playtype_id"]), int(row["user_id"]), row.get("numbers") or "")
+            for row in rows
+            if row.get("playtype_id") is not None and row.get("user_id") is not None
+        ]
+        records.sort(key=lambda item: (item[0], item[1]))
+        numbers = np.array([item[2] for item in records], dtype=object)
+        arrays = (
+            np.array([item[0] for item in records], dtype=np.int64),
+            np.array([item[1] for item in records], dtype=np.int64),
+            numbers,
+            np.fromiter((digit_mask(v) for v in numbers), dtype=np.int16, count=len(numbers)),
+        )
+        for array in arrays:
+            array.flags.writeable = False
+        return cls(str(issue), *arrays)
+
+    def _take(self, selector: np.ndarray | slice) -> IssueBundle:
+        return IssueBundle(
+            self.issue,
+            self.playtype_ids[selector],
+            self.user_ids[selector],
+            self.numbers[selector],
+            self.digit_masks[selector],
+        )
+
+    def playtypes(self) -> list[int]:
+        return [int(pid) for pid in np.unique(self.playtype_ids)]
+
+    def users(self) -> list[int]:
+        return [int(uid) for uid in np.unique(self.user_ids)]
+
+    def for_playtype(self, playtype_id: int) -> IssueBundle:
+        """Rows of one playtype (contiguous slice found by binary search)."""
+        lo, hi = np.searchsorted(self.playtype_ids, [int(playtype_id), int(playtype_id) + 1])
+        return self._take(slice(int(lo), int(hi)))
+
+    def for_playtypes(self, playtype_ids: Iterable[int] | None) -> IssueBundle:
+        if playtype_ids is None:
+            return self
+        wanted = np.fromiter((int(pid) for pid in playtype_ids), dtype=np.int64)
+        return self._take(np.isin(self.playtype_ids, wanted))
+
+    def for_users(self, user_ids: Iterable[int] | None) -> IssueBundle:
+        if user_ids is None:
+            return self
+        wanted = np.fromiter((int(uid) for uid in user_ids), dtype=np.int64)
+        return self._take(np.isin(self.user_ids, wanted))
+
+    def positional_masks(self, playtype_ids: Sequence[int | None]) -> tuple[np.ndarray, np.ndarray]:
+        """Per-user digit masks for positional playtypes, e.g. ``(百位定1, 十位定1, 个位定1)``.
+
+        返回 ``(user_ids, masks)``，``masks`` 形状为 ``(用户数, len(playtype_ids))``，
+        同一用户同一玩法的多条推荐按位或合并，缺失的位置为 0。
+        """
+        wanted = [int(pid) for pid in playtype_ids if pid is not None]
+        subset = self.for_playtypes(wanted)
+        user_ids, user_codes = np.unique(subset.user_ids, return_inverse=True)
+        masks = np.zeros((len(user_ids), len(playtype_ids)), dtype=np.int16)
+        for column, playtype_id in enumerate(playtype_ids):
+            if playtype_id is None:
+                continue
+            selector = subset.playtype_ids == int(playtype_id)
+            np.bitwise_or.at(masks[:, column], user_codes[selector], subset.digit_masks[selector])
+        return user_ids, masks
+
+    def to_frame(self, columns: Sequence[str] | None = None) -> pd.DataFrame:
+        """Materialise as a DataFrame (``columns`` ⊆ :data:`BUNDLE_COLUMNS`)."""
+        selected = list(columns) if columns else BUNDLE_COLUMNS[1:4]
+        invalid = set(selected) - set(BUNDLE_COLUMNS)
+        if invalid:
+            raise ValueError(f"Unsupported columns requested: {sorted(invalid)}")
+        data = {
+            "issue_name": np.full(len(self), self.issue, dtype=object),
+            "playtype_id": self.playtype_ids,
+            "user_id": self.user_ids,
+            "numbers": self.numbers,
+            "digit_mask": self.digit_masks,
+        }
+        return pd.DataFrame({column: data[column] for column in selected})
+
+
+@st.cache_resource(ttl=900, max_entries=32, show_spinner=False)
+def _load_issue_bundle(issue: str, token: str) -> IssueBundle:
+    rows = query_db(
+        """
+        SELECT playtype_id, user_id, numbers
+        FROM expert_predictions
+        WHERE issue_name = :issue
+        """,
+        {"issue": issue},
+    )
+    return IssueBundle.from_rows(issue, rows)
+
+
+def load_issue_bundle(issue: str, *, strict: bool = False) -> IssueBundle:
+    """All predictions of ``issue``, loaded once per process and data version.
+
+    查询失败时默认记录日志并返回空数据包；``strict=True`` 时抛出异常，
+    供需要区分“查询失败”与“本期无数据”的页面使用。
+    """
+    if not issue:
+        return IssueBundle.from_rows("", [])
+    try:
+        return _load_issue_bundle(str(issue), get_cache_token(["expert_predictions"]))
+    except Exception:
+        logger.exception("load_issue_bundle failed (issue=%s)", issue)
+        if strict:
+            raise
+        return IssueBundle.from_rows(str(issue), [])
+
+
+def load_combo_cube(issues: Sequence[str], playtype_id: int) -> pd.DataFrame | None:
+    """Cube rows of ``playtype_id`` for ``issues``; ``None`` when the table is unavailable."""
+    if not issues:
+        return pd.DataFrame(columns=CUBE_COLUMNS)
+    clause, params = make_in_clause("issue_name", list(issues), "issue")
+    params["playtype_id"] = int(playtype_id)
+    try:
+        rows = cached_query(
+            query_db,
+            f"""
+            SELECT issue_name, playtype_id, combo_key, expert_count
+            FROM combo_frequency
+            WHERE playtype_id = :playtype_id AND {clause}
+            """,
+            params=params,
+            ttl=600,
+            tables=["combo_frequency"],
+        )
+    except Exception:
+        logger.warning("combo_frequency 不可用，回退到按期现算", exc_info=True)
+        return None
+    frame = pd.DataFrame(rows, columns=CUBE_COLUMNS)
+    frame["issue_name"] = frame["issue_name"].astype(str)
+    frame["expert_count"] = frame["expert_count"].astype("int64")
+    return frame
+
+
+def combo_cube_is_complete(issue: str, playtype_id: int) -> bool:
+    """Whether the cube holds every combo of ``(issue, playtype_id)``.
+
+    有超长组合被截掉（记录在 ``combo_frequency_overflow``）或溢出表不可用时返回 ``False``。
+    """
+    try:
+        rows = cached_query(
+            query_db,
+            """
+            SELECT dropped_count
+            FROM combo_frequency_overflow
+            WHERE issue_name = :issue AND playtype_id = :playtype_id
+            """,
+            params={"issue": str(issue), "playtype_id": int(playtype_id)},
+            ttl=600,
+            tables=["combo_frequency"],
+        )
+    except Exception:
+        logger.warning("combo_frequency_overflow 不可用，按期现算", exc_info=True)
+        return False
+    return not rows
+
+
+def issue_combo_counts(issue: str, playtype_id: int) -> pd.DataFrame:
+    """``combo_key / expert_count`` of one issue, computed from the bundle if not in the cube.
+
+    立方体缺这一期，或这一期该玩法有超长组合未入立方体时，都从推荐数据包现算。
+    """
+    cube = load_combo_cube([issue], playtype_id)
+    if cube is not None and not cube.empty and combo_cube_is_complete(issue, playtype_id):
+        return cube[["combo_key", "expert_count"]].reset_index(drop=True)
+    predictions = (
+        load_issue_bundle(issue)
+        .for_playtype(int(playtype_id))
+        .to_frame(["user_id", "playtype_id", "numbers"])
+        .assign(issue_name=str(issue))
+    )
+    counts = aggregate_combos(predictions)
+    return counts[["combo_key", "expert_count"]].reset_index(drop=True)
+
+
+RED_VAL_DIST_COLUMNS = [
+    "issue_name",
+    "playtype_id",
+    "type",
+    "metric",
+    "bucket",
+    "expert_count",
+    "rank_count",
+]
+
+
+def fetch_red_val_distribution(
+    issues: Sequence[str],
+    playtype_ids: Iterable[int] | None = None,
+    *,
+    types: Iterable[int] | None = None,
+    metrics: Iterable[str] | None = None,
+    ttl: int | None = 300,
+) -> pd.DataFrame:
+    """Read exploded red_val_list_v2 distributions (long format) from red_val_dist."""
+    if not issues:
+        return pd.DataFrame(columns=RED_VAL_DIST_COLUMNS)
+    clause, params = make_in_clause("issue_name", list(dict.fromkeys(issues)), "issue")
+    conditions = [clause]
+    for column, values, prefix in (
+        ("playtype_id", playtype_ids, "pt"),
+        ("type", types, "tp"),
+        ("metric", metrics, "mt"),
+    ):
+        if values is None:
+            continue
+        value_list = list(values)
+        if not value_list:
+            return pd.DataFrame(columns=RED_VAL_DIST_COLUMNS)
+        extra_clause, extra_params = make_in_clause(column, value_list, prefix)
+        conditions.append(extra_clause)
+        params.update(extra_params)
+
+    sql = f"""
+    SELECT {", ".join(RED_VAL_DIST_COLUMNS)}
+    FROM red_val_dist
+    WHERE {" AND ".join(conditions)}
+    ORDER BY issue_name, playtype_id, type, metric, bucket
+    """
+    try:
+        if ttl is None:
+            rows = query_db(sql, params)
+        else:
+            rows = cached_query(query_db, sql, params=params, ttl=ttl)
+    except Exception:
+        logger.exception("fetch_red_val_distribution failed (issues=%s)", list(issues)[:5])
+        return pd.DataFrame(columns=RED_VAL_DIST_COLUMNS)
+    frame = pd.DataFrame(rows)
+    if frame.empty:
+        return pd.DataFrame(columns=RED_VAL_DIST_COLUMNS)
+    return frame.reindex(columns=RED_VAL_DIST_COLUMNS)
+
+
+def aggregate_red_val_distribution(
+    frame: pd.DataFrame, by: Sequence[str] = ("metric", "bucket")
+) -> pd.DataFrame:
+    """Sum expert counts across issues; ``share`` is the bucket's share within its metric."""
+    keys = list(by)
+    if frame.empty:
+        return pd.DataFrame(columns=keys + ["expert_count", "issue_count", "share"])
+    summary = frame.groupby(keys, as_index=False).agg(
+        expert_count=("expert_count", "sum"), issue_count=("issue_name", "nunique")
+    )
+    share_keys = [key for key in keys if key != "bucket"]
+    if share_keys:
+        totals = summary.groupby(share_keys)["expert_count"].transform("sum")
+    else:
+        totals = summary["expert_count"].sum()
+    summary["share"] = (summary["expert_count"] / totals).where(totals > 0, 0.0).round(4)
+    return summary
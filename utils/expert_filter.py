@@ -0,0 +1,329 @@
+"""专家多条件筛选的执行计划（UserExpertFilterPlus）。
+
+所有条件一次性交给 :func:`run_filter`：
+
+- 本期推荐数字条件直接作用于单期数据包的数字掩码，每条条件是一次布尔掩码运算；
+- 往期命中条件所需的期号 / 玩法合并为一次批量查询（只有候选专家非空时才查询），
+  每行推荐的命中结果用 :func:`utils.numbers.evaluate_hit_rule` 向量化算出；
+- 条件按涉及的推荐行数从少到多执行（行越少通常越能收窄候选），候选为空立即停止，
+  后续条件只在剩余候选专家的推荐行上计算。
+
+本模块不依赖 Streamlit，历史数据通过 ``load_history`` 回调注入。
+"""
+
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass
+from typing import Callable, Iterable, Mapping, Sequence
+
+import numpy as np
+import pandas as pd
+
+from utils.numbers import classify_hit_rule, digit_mask, evaluate_hit_rule, open_code_arrays
+
+NUMBER_MODES = ("包含", "不包含")
+MATCH_MODES = ("全部匹配", "任意匹配")
+HIT_MODES = ("上期命中", "上期未命中", "近N期命中M次")
+_COMPARATORS = {
+    ">": np.greater,
+    ">=": np.greater_equal,
+    "=": np.equal,
+    "<": np.less,
+    "<=": np.less_equal,
+}
+
+# (期号列表, 玩法ID列表) -> (推荐记录 issue_name/user_id/playtype_id/numbers, {期号: 开奖号码})
+HistoryLoader = Callable[[list[str], list[int]], tuple[pd.DataFrame, Mapping[str, str | None]]]
+
+
+@dataclass(frozen=True)
+class NumberCondition:
+    """本期推荐数字条件：在 ``playtypes`` 中存在一条推荐满足包含 / 不包含 ``digits``。"""
+
+    playtypes: tuple[int, ...]
+    digits: tuple[str, ...]
+    mode: str = "包含"
+    match: str = "全部匹配"
+
+    @property
+    def mask(self) -> int:
+        return digit_mask("".join(self.digits))
+
+    @property
+    def active(self) -> bool:
+        return bool(self.playtypes) and self.mask != 0
+
+    def label(self, playtype_names: Mapping[int, str]) -> str:
+        names = "/".join(playtype_names.get(pid, str(pid)) for pid in self.playtypes[:3])
+        if len(self.playtypes) > 3:
+            names += f" 等 {len(self.playtypes)} 个玩法"
+        match = f"（{self.match}）" if self.mode == "包含" else ""
+        return f"{names} {self.mode}{match} {','.join(self.digits)}"
+
+
+@dataclass(frozen=True)
+class HitCondition:
+    """往期命中条件，统计选定期号之前 ``window`` 期该玩法的命中情况。"""
+
+    playtype: int
+    mode: str = "上期命中"
+    recent_n: int = 5
+    operator: str = ">="
+    expected: int = 1
+
+    @property
+    def window(self) -> int:
+        return int(self.recent_n) if self.mode == "近N期命中M次" else 1
+
+    def label(self, playtype_names: Mapping[int, str]) -> str:
+        name = playtype_names.get(self.playtype, str(self.playtype))
+        if self.mode == "近N期命中M次":
+            return f"{name} 近{self.recent_n}期命中 {self.operator} {self.expected} 次"
+        return f"{name} {self.mode}"
+
+
+@dataclass(frozen=True)
+class PlanStep:
+    kind: str  # number / load / hit / cached
+    label: str
+    rows: int  # 执行时涉及的推荐行数
+    candidates: int  # 执行后剩余候选专家数
+    elapsed_ms: float
+
+
+@dataclass(frozen=True)
+class FilterOutcome:
+    user_ids: np.ndarray  # int64，升序
+    steps: tuple[PlanStep, ...]
+    history_rows: int = 0
+    skipped: int = 0  # 因候选为空未执行的条件数
+
+
+def _number_pass(
+    cond: NumberCondition,
+    rows: np.ndarray,
+    user_codes: np.ndarray,
+    masks: np.ndarray,
+    n_users: int,
+) -> np.ndarray:
+    hits = masks[rows] & cond.mask
+    if cond.mode == "不包含":
+        ok = hits == 0
+    elif cond.match == "任意匹配":
+        ok = hits != 0
+    else:
+        ok = hits == cond.mask
+    passed = np.zeros(n_users, dtype=bool)
+    passed[user_codes[rows][ok]] = True
+    return passed
+
+
+@dataclass(frozen=True)
+class _History:
+    user_codes: np.ndarray
+    playtypes: np.ndarray
+    ages: np.ndarray  # 0 为上一期
+    hits: np.ndarray
+
+
+def _prepare_history(
+    frame: pd.DataFrame,
+    open_codes: Mapping[str, str | None],
+    history_issues: Sequence[str],
+    users: np.ndarray,
+    playtype_names: Mapping[int, str],
+) -> _History:
+    empty = np.array([], dtype=np.int64)
+    if frame.empty:
+        return _History(empty, empty, empty, np.array([], dtype=bool))
+    frame = frame.dropna(subset=["user_id", "playtype_id"])
+    user_ids = frame["user_id"].to_numpy(dtype=np.int64)
+    positions = np.clip(np.searchsorted(users, user_ids), 0, max(len(users) - 1, 0))
+    known = (users[positions] == user_ids) if len(users) else np.zeros(len(frame), dtype=bool)
+    age_of = {issue: age for age, issue in enumerate(history_issues)}
+    ages = frame["issue_name"].astype(str).map(age_of).fillna(-1).to_numpy(dtype=np.int64)
+    keep = known & (ages >= 0)
+
+    numbers = frame["numbers"].fillna("").astype(str).to_numpy()[keep]
+    uniques, inverse = np.unique(numbers, return_inverse=True)
+    masks = np.fromiter((digit_mask(value) for value in uniques), dtype=np.int16)[inverse]
+    ages = ages[keep]
+    playtypes = frame["playtype_id"].to_numpy(dtype=np.int64)[keep]
+
+    open_masks, open_positions = open_code_arrays([open_codes.get(i) for i in history_issues])
+    hits = np.zeros(len(ages), dtype=bool)
+    for playtype_id in np.unique(playtypes):
+        selector = playtypes == playtype_id
+        rule = classify_hit_rule(playtype_names.get(int(playtype_id), str(playtype_id)))
+        row_ages = ages[selector]
+        hits[selector] = evaluate_hit_rule(
+            rule, masks[selector], open_masks[row_ages], open_positions[row_ages]
+        )
+    return _History(positions[keep].astype(np.int64), playtypes, ages, hits)
+
+
+def _hit_pass(
+    cond: HitCondition, rows: np.ndarray, history: _History, window: int, n_users: int
+) -> np.ndarray:
+    present = np.zeros((n_users, window), dtype=bool)
+    hit = np.zeros((n_users, window), dtype=bool)
+    users, ages = history.user_codes[rows], history.ages[rows]
+    present[users, ages] = True
+    hit[users[history.hits[rows]], ages[history.hits[rows]]] = True
+    if cond.mode == "上期命中":
+        return present[:, 0] & hit[:, 0]
+    if cond.mode == "上期未命中":
+        return present[:, 0] & ~hit[:, 0]
+    compare = _COMPARATORS.get(cond.operator, np.greater_equal)
+    return present.any(axis=1) & compare(hit.sum(axis=1), int(cond.expected))
+
+
+class FilterSession:
+    """Current-issue rows plus hit history loaded at most once, shared by all conditions."""
+
+    def __init__(
+        self,
+        user_ids: np.ndarray,
+        playtype_ids: np.ndarray,
+        digit_masks: np.ndarray,
+        *,
+        history_issues: Sequence[str] = (),
+        load_history: HistoryLoader | None = None,
+        playtype_names: Mapping[int, str] | None = None,
+    ) -> None:
+        self.names = dict(playtype_names or {})
+        self.users, self.user_codes = np.unique(
+            np.asarray(user_ids, dtype=np.int64), return_inverse=True
+        )
+        self.playtype_ids = np.asarray(playtype_ids, dtype=np.int64)
+        self.digit_masks = np.asarray(digit_masks, dtype=np.int16)
+        self.history_issues = [str(issue) for issue in history_issues]
+        self._load_history = load_history
+        self._history: _History | None = None
+        self._depth = 0
+
+    def __len__(self) -> int:
+        return len(self.users)
+
+    def all_candidates(self) -> np.ndarray:
+        return np.ones(len(self.users), dtype=bool)
+
+    def candidates_of(self, user_ids: Iterable[int]) -> np.ndarray:
+        return np.isin(self.users, np.fromiter((int(uid) for uid in user_ids), dtype=np.int64))
+
+    def load_history(
+        self, hit_conditions: Sequence[HitCondition], candidates: np.ndarray
+    ) -> PlanStep | None:
+        """Fetch history for ``hit_conditions`` in one call; ``None`` when nothing was loaded."""
+        if self._history is not None or not hit_conditions:
+            return None
+        if not self.history_issues or self._load_history is None:
+            return None
+        started = time.perf_counter()
+        depth = min(max(cond.window for cond in hit_conditions), len(self.history_issues))
+        issues = self.history_issues[:depth]
+        wanted = sorted({int(cond.playtype) for cond in hit_conditions})
+        frame, open_codes = self._load_history(issues, wanted)
+        self._history = _prepare_history(frame, open_codes, issues, self.users, self.names)
+        self._depth = depth
+        elapsed = round((time.perf_counter() - started) * 1000, 3)
+        label = f"往期推荐 {len(issues)} 期 × {len(wanted)} 个玩法"
+        rows = len(self._history.ages)
+        return PlanStep("load", label, rows, int(candidates.sum()), elapsed)
+
+    def _selector(self, cond: NumberCondition | HitCondition) -> np.ndarray:
+        if isinstance(cond, NumberCondition):
+            return np.isin(self.playtype_ids, cond.playtypes)
+        history = self._history
+        if history is None:
+            return np.zeros(0, dtype=bool)
+        return (history.playtypes == cond.playtype) & (history.ages < self._window(cond))
+
+    def _window(self, cond: HitCondition) -> int:
+        return min(cond.window, self._depth)
+
+    def cost(self, cond: NumberCondition | HitCondition) -> int:
+        """Rows ``cond`` would touch; used to order conditions."""
+        return int(self._selector(cond).sum())
+
+    def apply(
+        self, cond: NumberCondition | HitCondition, candidates: np.ndarray
+    ) -> tuple[np.ndarray, PlanStep]:
+        """Narrow ``candidates`` by ``cond``; hit conditions need :meth:`load_history` first."""
+        started = time.perf_counter()
+        n_users = len(self.users)
+        if isinstance(cond, NumberCondition):
+            kind = "number"
+            rows = np.flatnonzero(self._selector(cond) & candidates[self.user_codes])
+            passed = _number_pass(cond, rows, self.user_codes, self.digit_masks, n_users)
+        elif self._history is None:
+            kind, rows = "hit", np.array([], dtype=np.int64)
+            passed = np.zeros(n_users, dtype=bool)
+        else:
+            kind = "hit"
+            history = self._history
+            rows = np.flatnonzero(self._selector(cond) & candidates[history.user_codes])
+            passed = _hit_pass(cond, rows, history, self._window(cond), n_users)
+        result = candidates & passed
+        elapsed = round((time.perf_counter() - started) * 1000, 3)
+        return result, PlanStep(kind, cond.label(self.names), len(rows), int(result.sum()), elapsed)
+
+
+def run_filter(
+    user_ids: np.ndarray,
+    playtype_ids: np.ndarray,
+    digit_masks: np.ndarray,
+    number_conditions: Sequence[NumberCondition] = (),
+    hit_conditions: Sequence[HitCondition] = (),
+    *,
+    history_issues: Sequence[str] = (),
+    load_history: HistoryLoader | None = None,
+    playtype_names: Mapping[int, str] | None = None,
+) -> FilterOutcome:
+    """Experts of the current issue satisfying every condition.
+
+    ``user_ids / playtype_ids / digit_masks`` 为本期推荐行（如 :class:`IssueBundle` 的数组），
+    ``history_issues`` 为选定期号之前的期号（由近及远）。有命中条件但没有往期期号时结果为空。
+    """
+    session = FilterSession(
+        user_ids,
+        playtype_ids,
+        digit_masks,
+        history_issues=history_issues,
+        load_history=load_history,
+        playtype_names=playtype_names,
+    )
+    candidates = session.all_candidates()
+    steps: list[PlanStep] = []
+    numbers_active = [cond for cond in number_conditions if cond.active]
+    pending = len(numbers_active) + len(hit_conditions)
+
+    for cond in sorted(numbers_active, key=session.cost):
+        if not candidates.any():
+            break
+        candidates, step = session.apply(cond, candidates)
+        steps.append(step)
+        pending -= 1
+
+    history_rows = 0
+    if hit_conditions and candidates.any():
+        load_step = session.load_history(hit_conditions, candidates)
+        if load_step is None:
+            candidates[:] = False
+        else:
+            steps.append(load_step)
+            history_rows = load_step.rows
+            for cond in sorted(hit_conditions, key=session.cost):
+                if not candidates.any():
+                    break
+                candidates, step = session.apply(cond, candidates)
+                steps.append(step)
+                pending -= 1
+
+    return FilterOutcome(
+        user_ids=session.users[candidates],
+        steps=tuple(steps),
+        history_rows=history_rows,
+        skipped=pending if not candidates.any() else 0,
+    )
@@ -0,0 +1,259 @@
+"""可保存的专家筛选方案（UserExpertFilterPlus）与逐阶段候选缓存。
+
+一个方案即一组条件（本期数字条件与往期命中条件），可序列化为 JSON 保存在本地
+（默认 ``logs/filter_pipelines.json``）。执行顺序与 :func:`utils.expert_filter.run_filter`
+一致：先数字条件、后命中条件，各自按涉及的推荐行数从少到多执行，候选为空即停止。
+每个阶段的候选专家集合按 ``(期号, 数据版本, 阶段指纹)`` 缓存；条件之间是“与”关系，
+候选集合与执行顺序无关，所以阶段指纹只取决于已执行的条件集合：修改某个条件时，
+排在它之前执行的阶段直接命中缓存。
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Mapping, Sequence
+
+import numpy as np
+
+from utils.expert_filter import (
+    FilterOutcome,
+    FilterSession,
+    HitCondition,
+    NumberCondition,
+    PlanStep,
+)
+
+logger = logging.getLogger(__name__)
+
+_PROJECT_ROOT = Path(__file__).resolve().parents[1]
+DEFAULT_PIPELINE_PATH = _PROJECT_ROOT / "logs" / "filter_pipelines.json"
+PIPELINE_VERSION = 1
+
+Stage = NumberCondition | HitCondition
+
+
+@dataclass(frozen=True)
+class FilterPipeline:
+    name: str
+    number_conditions: tuple[NumberCondition, ...] = ()
+    hit_conditions: tuple[HitCondition, ...] = ()
+
+    def stages(self) -> list[Stage]:
+        """Conditions as entered; number conditions without digits are skipped."""
+        return [cond for cond in self.number_conditions if cond.active] + list(self.hit_conditions)
+
+    def fingerprints(self) -> list[str]:
+        """Prefix fingerprints of :meth:`stages` (see :func:`prefix_fingerprints`)."""
+        return prefix_fingerprints(self.stages())
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "version": PIPELINE_VERSION,
+            "name": self.name,
+            "number_conditions": [asdict(cond) for cond in self.number_conditions],
+            "hit_conditions": [asdict(cond) for cond in self.hit_conditions],
+        }
+
+    @classmethod
+    def from_dict(cls, data: Mapping[str, Any]) -> FilterPipeline:
+        numbers = tuple(
+            NumberCondition(
+                playtypes=tuple(int(pid) for pid in item.get("playtypes", [])),
+                digits=tuple(str(digit) for digit in item.get("digits", [])),
+                mode=str(item.get("mode", "包含")),
+                match=str(item.get("match", "全部匹配")),
+            )
+            for item in data.get("number_conditions", [])
+        )
+        hits = tuple(
+            HitCondition(
+                playtype=int(item["playtype"]),
+                mode=str(item.get("mode", "上期命中")),
+                recent_n=int(item.get("recent_n", 5)),
+                operator=str(item.get("operator", ">=")),
+                expected=int(item.get("expected", 1)),
+            )
+            for item in data.get("hit_conditions", [])
+            if item.get("playtype") is not None
+        )
+        return cls(str(data.get("name", "")), numbers, hits)
+
+    def to_json(self) -> str:
+        return json.dumps(self.to_dict(), ensure_ascii=False)
+
+    @classmethod
+    def from_json(cls, text: str) -> FilterPipeline:
+        return cls.from_dict(json.loads(text))
+
+
+def prefix_fingerprints(stages: Sequence[Stage]) -> list[str]:
+    """Hash per prefix: entry ``k`` covers ``stages[0..k]`` regardless of their order."""
+    result: list[str] = []
+    payloads: list[str] = []
+    for stage in stages:
+        payloads.append(
+            json.dumps([type(stage).__name__, asdict(stage)], sort_keys=True, ensure_ascii=False)
+        )
+        result.append(hashlib.sha1("|".join(sorted(payloads)).encode()).hexdigest())
+    return result
+
+
+class StageCache:
+    """Bounded LRU of per-stage candidate user ids."""
+
+    def __init__(self, max_entries: int = 512) -> None:
+        self.max_entries = max_entries
+        self._entries: OrderedDict[tuple[str, str, str], np.ndarray] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: tuple[str, str, str]) -> np.ndarray | None:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+
+    def put(self, key: tuple[str, str, str], user_ids: np.ndarray) -> None:
+        value = np.array(user_ids, dtype=np.int64)
+        value.flags.writeable = False
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+def run_pipeline(
+    pipeline: FilterPipeline,
+    session: FilterSession,
+    *,
+    issue: str,
+    version: str,
+    cache: StageCache,
+) -> FilterOutcome:
+    """Evaluate ``pipeline`` on ``session``, resuming from the longest cached stage prefix.
+
+    数字条件按 ``session.cost`` 排序后执行；命中条件需要往期数据才能估算行数，
+    往期数据加载后再排序。``version`` 为数据版本（如推荐 / 开奖表的缓存 token），
+    数据变化后旧缓存自然失效。
+    """
+    stages = pipeline.stages()
+    numbers = sorted(
+        (stage for stage in stages if isinstance(stage, NumberCondition)), key=session.cost
+    )
+    hits = [stage for stage in stages if isinstance(stage, HitCondition)]
+    steps: list[PlanStep] = []
+    candidates = session.all_candidates()
+
+    def key(fingerprint: str) -> tuple[str, str, str]:
+        return (str(issue), str(version), fingerprint)
+
+    def resume(ordered: list[Stage], done: int) -> int:
+        """Jump to the longest cached prefix of ``ordered`` beyond ``done`` stages."""
+        nonlocal candidates
+        prints = prefix_fingerprints(ordered)
+        for index in range(len(ordered), done, -1):
+            cached = cache.get(key(prints[index - 1]))
+            if cached is not None:
+                candidates = session.candidates_of(cached)
+                label = f"复用缓存：{index} 个条件（至 {ordered[index - 1].label(session.names)}）"
+                steps.append(PlanStep("cached", label, 0, len(cached), 0.0))
+                return index
+        return done
+
+    def execute(ordered: list[Stage], start: int) -> int:
+        """Apply ``ordered[start:]``; returns how many were skipped on an empty candidate set."""
+        nonlocal candidates
+        prints = prefix_fingerprints(ordered)
+        skipped = 0
+        for offset in range(start, len(ordered)):
+            if not candidates.any():
+                # 候选已空：后续阶段不再计算，但仍记入缓存（结果必然为空）
+                skipped += 1
+            else:
+                candidates, step = session.apply(ordered[offset], candidates)
+                steps.append(step)
+            cache.put(key(prints[offset]), session.users[candidates])
+        return skipped
+
+    # 全部条件的指纹与顺序无关：整体命中缓存时连往期数据都不必加载
+    if hits and resume(numbers + hits, len(stages) - 1) == len(stages):
+        return FilterOutcome(user_ids=session.users[candidates], steps=tuple(steps))
+
+    skipped = execute(numbers, resume(numbers, 0))
+    history_rows = 0
+    if hits:
+        if candidates.any():
+            load_step = session.load_history(hits, candidates)
+            if load_step is not None:
+                steps.append(load_step)
+                history_rows = load_step.rows
+            ordered = numbers + sorted(hits, key=session.cost)
+        else:
+            ordered = numbers + hits
+        skipped += execute(ordered, resume(ordered, len(numbers)))
+
+    return FilterOutcome(
+        user_ids=session.users[candidates],
+        steps=tuple(steps),
+        history_rows=history_rows,
+        skipped=skipped,
+    )
+
+
+class PipelineStore:
+    """Named pipelines persisted in a single local JSON file."""
+
+    def __init__(self, path: Path | str | None = None) -> None:
+        self.path = Path(path) if path else DEFAULT_PIPELINE_PATH
+        self._lock = threading.Lock()
+
+    def _read(self) -> dict[str, dict[str, Any]]:
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError):
+            logger.warning("筛选方案文件无法读取：%s", self.path, exc_info=True)
+            return {}
+        return data.get("pipelines", {}) if isinstance(data, dict) else {}
+
+    def _write(self, pipelines: Mapping[str, dict[str, Any]]) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        payload = {"version": PIPELINE_VERSION, "pipelines": dict(sorted(pipelines.items()))}
+        tmp.write_text(json.dumps(payload, ensure_ascii=False, indent=2), encoding="utf-8")
+        os.replace(tmp, self.path)
+
+    def names(self) -> list[str]:
+        return sorted(self._read())
+
+    def load(self, name: str) -> FilterPipeline | None:
+        data = self._read().get(name)
+        return FilterPipeline.from_dict({**data, "name": name}) if data else None
+
+    def save(self, pipeline: FilterPipeline) -> None:
+        if not pipeline.name.strip():
+            raise ValueError("筛选方案名称不能为空")
+        with self._lock:
+            pipelines = self._read()
+            pipelines[pipeline.name] = pipeline.to_dict()
+            self._write(pipelines)
+
+    def delete(self, name: str) -> bool:
+        with self._lock:
+            pipelines = self._read()
+            if pipelines.pop(name, None) is None:
+                return False
+            self._write(pipelines)
+            return True
@@ -0,0 +1,250 @@
+"""融合推荐引擎：按专家历史命中率与近期衰减加权汇总本期推荐数字。
+
+本期每条推荐压缩为 10 位数字掩码，展开为 (推荐行, 数字) 稀疏坐标；权重确定后，
+``玩法 × 数字`` 得分就是一次带权 ``np.bincount``（等价于稀疏矩阵乘积）。
+专家权重来自 expert_hit_stat 最近 ``history`` 期：
+
+- 每期按 ``0.5 ** ((距今期数 - 1) / half_life)`` 衰减（历史先按 专家 × 距今期数 汇总成矩阵，
+  衰减即一次矩阵-向量乘积）；
+- 命中率向该玩法整体命中率收缩（``prior_strength`` 条虚拟样本），未见过的专家即为均值；
+- 权重 = (收缩后命中率 / 玩法均值) ** ``hit_weight``，``hit_weight=0`` 退化为等权计数。
+
+本期数据按 (期号, 历史期数) 缓存，权重方案只影响几次向量运算，单次融合为毫秒级。
+"""
+
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass
+from typing import Mapping
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from db.connection import query_db
+from utils.cache_control import get_cache_token
+from utils.data_access import load_issue_bundle
+from utils.numbers import digit_mask
+from utils.sql import make_in_clause
+
+logger = logging.getLogger(__name__)
+
+FUSION_TABLES = ["expert_predictions", "expert_hit_stat"]
+CONSENSUS_COLUMNS = ["digit", "score", "share", "rank"]
+
+
+@dataclass(frozen=True)
+class FusionConfig:
+    """One weighting scheme; instances are hashable and used as cache keys."""
+
+    label: str = "等权计数"
+    hit_weight: float = 0.0
+    half_life: float | None = None
+    history: int = 30
+    prior_strength: float = 5.0
+
+
+FUSION_PRESETS: dict[str, FusionConfig] = {
+    config.label: config
+    for config in (
+        FusionConfig(),
+        FusionConfig("命中率加权", hit_weight=1.0),
+        FusionConfig("近期命中加权", hit_weight=1.0, half_life=5.0),
+        FusionConfig("强命中率加权", hit_weight=2.0, half_life=10.0),
+    )
+}
+
+
+@dataclass(frozen=True)
+class FusionInputs:
+    """Current-issue predictions plus per-expert hit history, ready for weighting."""
+
+    playtype_ids: np.ndarray  # int64 (n_playtypes,)，得分矩阵的行
+    pred_groups: np.ndarray  # int64 (n_pred,)，(user, playtype) 分组编号
+    pred_playtypes: np.ndarray  # int64 (n_pred,)，playtype_ids 下标
+    bit_rows: np.ndarray  # int64 (n_bits,)，推荐行下标
+    bit_index: np.ndarray  # int64 (n_bits,)，playtype 下标 * 10 + 数字
+    group_playtypes: np.ndarray  # int64 (n_groups,)，playtype_ids 下标，-1 表示本期无此玩法
+    group_hits: np.ndarray  # float64 (n_groups, history)，第 j 列为距今 j+1 期
+    group_trials: np.ndarray  # float64 (n_groups, history)
+
+    @classmethod
+    def from_frames(
+        cls,
+        predictions: pd.DataFrame,
+        history: pd.DataFrame | None = None,
+        history_issues: list[str] | None = None,
+    ) -> FusionInputs:
+        """Build from ``user_id, playtype_id, numbers`` and expert_hit_stat rows.
+
+        ``history_issues`` 按由近及远排列，决定每条历史记录的距今期数。
+        """
+        predictions = predictions.dropna(subset=["user_id", "playtype_id"])
+        order = {issue: age for age, issue in enumerate(history_issues or [])}
+        if history is None or history.empty:
+            history = pd.DataFrame(columns=["issue_name", "user_id", "playtype_id"])
+        history = history[history["issue_name"].isin(order.keys())]
+
+        pred_playtypes, playtype_ids = pd.factorize(
+            predictions["playtype_id"].astype("int64"), sort=True
+        )
+        pairs = pd.concat(
+            [predictions[["user_id", "playtype_id"]], history[["user_id", "playtype_id"]]]
+        ).astype("int64")
+        if pairs.empty:
+            group_codes = np.array([], dtype=np.int64)
+            group_keys = np.array([], dtype=np.int64)
+        else:
+            group_codes, groups = pd.factorize(pd.MultiIndex.from_frame(pairs))
+            group_keys = groups.get_level_values(1).to_numpy(dtype=np.int64)
+        n_groups = len(group_keys)
+        hist_groups = group_codes[len(predictions) :]
+
+        masks = np.fromiter(
+            (
+                digit_mask(value) if isinstance(value, str) else 0
+                for value in predictions["numbers"]
+            ),
+            dtype=np.int16,
+            count=len(predictions),
+        )
+        bit_rows, digits = np.nonzero((masks[:, None] >> np.arange(10, dtype=np.int16)) & 1)
+
+        width = max(len(order), 1)
+        group_hits = np.zeros((n_groups, width), dtype=float)
+        group_trials = np.zeros((n_groups, width), dtype=float)
+        if len(hist_groups):
+            ages = history["issue_name"].map(order).to_numpy(dtype=np.int64)
+            np.add.at(group_hits, (hist_groups, ages), history["hit_count"].fillna(0))
+            np.add.at(group_trials, (hist_groups, ages), history["total_count"].fillna(0))
+
+        return cls(
+            playtype_ids=np.asarray(playtype_ids, dtype=np.int64),
+            pred_groups=group_codes[: len(predictions)].astype(np.int64),
+            pred_playtypes=pred_playtypes.astype(np.int64),
+            bit_rows=bit_rows.astype(np.int64),
+            bit_index=(pred_playtypes[bit_rows] * 10 + digits).astype(np.int64),
+            group_playtypes=pd.Index(playtype_ids).get_indexer(group_keys).astype(np.int64),
+            group_hits=group_hits,
+            group_trials=group_trials,
+        )
+
+
+def expert_weights(inputs: FusionInputs, config: FusionConfig) -> np.ndarray:
+    """Weight of every current prediction row under ``config``."""
+    size = len(inputs.pred_groups)
+    if config.hit_weight == 0 or not inputs.group_trials.any():
+        return np.ones(size, dtype=float)
+
+    ages = np.arange(inputs.group_trials.shape[1], dtype=float)
+    decay = 0.5 ** (ages / float(config.half_life)) if config.half_life else np.ones_like(ages)
+    hits = inputs.group_hits @ decay
+    trials = inputs.group_trials @ decay
+
+    n_playtypes = len(inputs.playtype_ids)
+    known = inputs.group_playtypes >= 0
+    pt_hits = np.bincount(inputs.group_playtypes[known], hits[known], minlength=n_playtypes)
+    pt_trials = np.bincount(inputs.group_playtypes[known], trials[known], minlength=n_playtypes)
+    overall = hits.sum() / trials.sum() if trials.sum() > 0 else 0.5
+    with np.errstate(divide="ignore", invalid="ignore"):
+        baseline = np.where(pt_trials > 0, pt_hits / pt_trials, overall)
+    baseline = np.clip(baseline, 1e-3, 1.0)
+
+    prior = baseline[inputs.pred_playtypes]
+    strength = max(float(config.prior_strength), 1e-6)
+    rate = (hits[inputs.pred_groups] + strength * prior) / (trials[inputs.pred_groups] + strength)
+    return (rate / prior) ** float(config.hit_weight)
+
+
+def fuse(inputs: FusionInputs, config: FusionConfig) -> np.ndarray:
+    """Weighted ``(n_playtypes, 10)`` digit scores."""
+    n_playtypes = len(inputs.playtype_ids)
+    if not len(inputs.bit_rows):
+        return np.zeros((n_playtypes, 10), dtype=float)
+    weights = expert_weights(inputs, config)
+    scores = np.bincount(inputs.bit_index, weights[inputs.bit_rows], minlength=n_playtypes * 10)
+    return scores.reshape(n_playtypes, 10)
+
+
+def consensus_ranking(scores: np.ndarray, row_mask: np.ndarray | None = None) -> pd.DataFrame:
+    """Sum the selected playtype rows into a ranked ``digit / score / share / rank`` table."""
+    selected = scores if row_mask is None else scores[row_mask]
+    totals = selected.sum(axis=0) if len(selected) else np.zeros(10)
+    grand = totals.sum()
+    frame = pd.DataFrame(
+        {
+            "digit": [str(d) for d in range(10)],
+            "score": totals.round(3),
+            "share": (totals / grand).round(4) if grand > 0 else 0.0,
+        }
+    )
+    frame = frame.sort_values(["score", "digit"], ascending=[False, True], kind="stable")
+    frame["rank"] = range(1, len(frame) + 1)
+    return frame[CONSENSUS_COLUMNS].reset_index(drop=True)
+
+
+def kill_playtype_mask(playtype_ids: np.ndarray, names: Mapping[int, str]) -> np.ndarray:
+    """True for playtypes whose name contains 杀 (excluded from consensus)."""
+    return np.array([("杀" in names.get(int(pid), "")) for pid in playtype_ids], dtype=bool)
+
+
+def _history_issues(issue: str, history: int) -> list[str]:
+    rows = query_db(
+        """
+        SELECT DISTINCT issue_name
+        FROM expert_hit_stat
+        WHERE issue_name < :issue
+        ORDER BY issue_name DESC
+        LIMIT :limit
+        """,
+        {"issue": issue, "limit": int(history)},
+    )
+    return [str(row["issue_name"]) for row in rows]
+
+
+@st.cache_data(ttl=600, show_spinner=False)
+def _load_inputs(issue: str, history: int, token: str) -> FusionInputs:
+    predictions = load_issue_bundle(issue).to_frame(["user_id", "playtype_id", "numbers"])
+    history_issues = _history_issues(issue, history) if history > 0 else []
+    history_frame = None
+    if history_issues and not predictions.empty:
+        issue_clause, params = make_in_clause("issue_name", history_issues, "issue")
+        pt_clause, pt_params = make_in_clause(
+            "playtype_id", sorted(predictions["playtype_id"].dropna().astype(int).unique()), "pt"
+        )
+        params.update(pt_params)
+        history_frame = pd.DataFrame(
+            query_db(
+                f"""
+                SELECT issue_name, user_id, playtype_id, total_count, hit_count
+                FROM expert_hit_stat
+                WHERE {issue_clause} AND {pt_clause}
+                """,
+                params,
+            ),
+            columns=["issue_name", "user_id", "playtype_id", "total_count", "hit_count"],
+        )
+    return FusionInputs.from_frames(predictions, history_frame, history_issues)
+
+
+def load_fusion_inputs(issue: str, history: int = 30) -> FusionInputs | None:
+    """Predictions and hit history for ``issue``, cached per data version."""
+    try:
+        return _load_inputs(str(issue), int(history), get_cache_token(FUSION_TABLES))
+    except Exception:
+        logger.exception("load_fusion_inputs failed (issue=%s)", issue)
+        return None
+
+
+@st.cache_data(ttl=600, show_spinner=False)
+def _fused_scores(issue: str, config: FusionConfig, token: str) -> tuple[np.ndarray, np.ndarray]:
+    inputs = load_fusion_inputs(issue, config.history)
+    if inputs is None:
+        return np.array([], dtype=np.int64), np.zeros((0, 10))
+    return inputs.playtype_ids, fuse(inputs, config)
+
+
+def fused_scores(issue: str, config: FusionConfig) -> tuple[np.ndarray, np.ndarray]:
+    """``(playtype_ids, scores)`` for ``issue`` under ``config``, cached per (issue, config)."""
+    return _fused_scores(str(issue), config, get_cache_token(FUSION_TABLES))
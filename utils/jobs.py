@@ -0,0 +1,149 @@
+"""后台计算任务：长耗时分析放到线程池里跑，页面只负责提交、轮询进度和读取结果。
+
+任务按指纹（:func:`job_key`，由页面参数与数据版本号算出）去重：同一指纹的任务在运行中或
+已完成时，再次提交会直接挂到已有任务上，所以控件触发的重跑不会中断计算，两位分析员同时
+跑同一分析也只算一次。失败的任务再次提交会重新执行；完成的任务保留 ``keep_seconds`` 秒。
+
+任务函数在工作线程里执行，不能调用 ``st.*`` 渲染元素（``st.cache_data`` 包装的查询可以用），
+第一个参数是 ``report(fraction, message)`` 进度回调。
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable
+
+logger = logging.getLogger(__name__)
+
+JOB_STATES = ("pending", "running", "done", "failed")
+
+ProgressFn = Callable[[float, str | None], None]
+
+
+def job_key(*parts: object) -> str:
+    """Stable fingerprint for a job from its (JSON-serialisable) parameters."""
+    blob = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(blob.encode("utf-8")).hexdigest()
+
+
+@dataclass(eq=False)
+class Job:
+    key: str
+    label: str = ""
+    status: str = "pending"
+    progress: float = 0.0
+    message: str = ""
+    result: Any = None
+    error: str | None = None
+    attached: int = 0
+    submitted_at: float = field(default_factory=time.time)
+    started_at: float | None = None
+    finished_at: float | None = None
+
+    @property
+    def done(self) -> bool:
+        return self.status in ("done", "failed")
+
+    @property
+    def elapsed(self) -> float:
+        if self.started_at is None:
+            return 0.0
+        return (self.finished_at or time.time()) - self.started_at
+
+    def report(self, fraction: float, message: str | None = None) -> None:
+        self.progress = min(max(float(fraction), 0.0), 1.0)
+        if message is not None:
+            self.message = message
+
+
+class JobRunner:
+    """Thread pool of keyed jobs shared by every session in the process."""
+
+    def __init__(self, max_workers: int = 2, *, keep_seconds: float = 900, max_jobs: int = 64):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="lotto-job")
+        self._jobs: dict[str, Job] = {}
+        self._lock = threading.Lock()
+        self.keep_seconds = keep_seconds
+        self.max_jobs = max_jobs
+
+    def submit(
+        self, key: str, fn: Callable[..., Any], *args: Any, label: str = "", **kwargs: Any
+    ) -> Job:
+        """Start ``fn(job.report, *args, **kwargs)`` unless job ``key`` is live or finished."""
+        with self._lock:
+            self._prune(time.time())
+            job = self._jobs.get(key)
+            if job is not None and job.status != "failed":
+                job.attached += 1
+                return job
+            job = Job(key=key, label=label)
+            self._jobs[key] = job
+        self._executor.submit(self._run, job, fn, args, kwargs)
+        return job
+
+    def get(self, key: str) -> Job | None:
+        with self._lock:
+            return self._jobs.get(key)
+
+    def jobs(self) -> list[Job]:
+        with self._lock:
+            return sorted(self._jobs.values(), key=lambda job: job.submitted_at, reverse=True)
+
+    def forget(self, key: str) -> None:
+        """Drop a finished job so the next submit recomputes it."""
+        with self._lock:
+            job = self._jobs.get(key)
+            if job is not None and job.done:
+                del self._jobs[key]
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._executor.shutdown(wait=wait)
+
+    def _run(self, job: Job, fn: Callable[..., Any], args: tuple, kwargs: dict) -> None:
+        job.started_at = time.time()
+        job.status = "running"
+        try:
+            job.result = fn(job.report, *args, **kwargs)
+        except Exception as exc:
+            logger.exception("后台任务失败：%s (%s)", job.label or fn.__name__, job.key[:12])
+            job.error = str(exc) or type(exc).__name__
+            job.status = "failed"
+        else:
+            job.progress = 1.0
+            job.status = "done"
+        finally:
+            job.finished_at = time.time()
+
+    def _prune(self, now: float) -> None:
+        finished = [job for job in self._jobs.values() if job.done]
+        for job in finished:
+            if now - (job.finished_at or now) > self.keep_seconds:
+                del self._jobs[job.key]
+        overflow = len(self._jobs) - self.max_jobs
+        if overflow > 0:
+            finished = sorted(
+                (job for job in self._jobs.values() if job.done),
+                key=lambda job: job.finished_at or 0.0,
+            )
+            for job in finished[:overflow]:
+                del self._jobs[job.key]
+
+
+_runner: JobRunner | None = None
+_runner_lock = threading.Lock()
+
+
+def get_job_runner() -> JobRunner:
+    """Process-wide runner, created on first use."""
+    global _runner
+    if _runner is None:
+        with _runner_lock:
+            if _runner is None:
+                _runner = JobRunner()
+    return _runner
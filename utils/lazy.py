@@ -0,0 +1,52 @@
+"""重量级依赖的延迟导入。
+
+页面脚本在每次首次访问时都要执行全部顶层 import，altair 这类只在出图时才用到的库
+会拖慢首屏。``alt = lazy_import("altair")`` 先返回一个占位对象，第一次访问属性时才真正
+导入模块；并发会话同时触发时由 :func:`importlib.import_module` 自身的模块锁保证只导入一次。
+"""
+
+from __future__ import annotations
+
+import importlib
+import sys
+from types import ModuleType
+from typing import Any
+
+
+class LazyModule:
+    """Module proxy that imports ``name`` on first attribute access."""
+
+    __slots__ = ("_name", "_module")
+
+    def __init__(self, name: str) -> None:
+        self._name = name
+        self._module: ModuleType | None = None
+
+    @property
+    def loaded(self) -> bool:
+        return self._module is not None
+
+    def load(self) -> ModuleType:
+        module = self._module
+        if module is None:
+            module = importlib.import_module(self._name)
+            self._module = module
+        return module
+
+    def __getattr__(self, attr: str) -> Any:
+        return getattr(self.load(), attr)
+
+    def __dir__(self) -> list[str]:
+        return dir(self.load())
+
+    def __repr__(self) -> str:
+        state = "loaded" if self._module is not None else "not loaded"
+        return f"<lazy module {self._name!r} ({state})>"
+
+
+def lazy_import(name: str) -> Any:
+    """Return the module if it is already imported, otherwise a :class:`LazyModule`."""
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    return LazyModule(name)
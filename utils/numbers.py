@@ -1,8 +1,11 @@
 from __future__ import annotations
 
 import re
+from dataclasses import dataclass
 from typing import Iterable, Sequence
 
+import numpy as np
+
 TOKEN_PATTERN = re.compile(r"[\s,|;]+")
 
 
@@ -102,6 +105,96 @@ def count_digit_hits(tokens: Iterable[str], open_code: str | None) -> int:
     return len(hit_digits)
 
 
+def digit_mask(numbers: str | None) -> int:
+    """Return a 10-bit mask with bit ``d`` set for every digit ``d`` in ``numbers``."""
+    if not numbers:
+        return 0
+    mask = 0
+    for char in numbers:
+        if "0" <= char <= "9":
+            mask |= 1 << (ord(char) - 48)
+    return mask
+
+
+# popcount lookup for 10-bit digit masks
+POPCOUNT_1024 = np.array([bin(value).count("1") for value in range(1024)], dtype=np.int8)
+
+_POSITION_INDEX = {"百位": 0, "十位": 1, "个位": 2}
+
+
+@dataclass(frozen=True, slots=True)
+class HitRule:
+    """Hit rule of one playtype, mirroring :func:`match_prediction_hit`.
+
+    kind: ``kill`` / ``pos_kill`` / ``pos_fix`` / ``min_hits`` / ``group`` / ``none``.
+    """
+
+    kind: str
+    position: int = -1
+    min_hits: int = 0
+
+
+def classify_hit_rule(playtype_name: str) -> HitRule:
+    name = playtype_name or ""
+    if name.startswith("杀"):
+        return HitRule("kill")
+    for position, idx in _POSITION_INDEX.items():
+        if position in name:
+            if "杀" in name:
+                return HitRule("pos_kill", position=idx)
+            if "定" in name:
+                return HitRule("pos_fix", position=idx)
+    if "独胆" in name:
+        return HitRule("min_hits", min_hits=1)
+    if "双胆" in name:
+        return HitRule("min_hits", min_hits=2)
+    if "三胆" in name or any(keyword in name for keyword in ["五码", "六码", "七码"]):
+        return HitRule("group")
+    return HitRule("none")
+
+
+def open_code_arrays(open_codes: Sequence[str | None]) -> tuple[np.ndarray, np.ndarray]:
+    """Return ``(masks, positions)``; positions is ``(n, 3)`` with ``-1`` for missing digits."""
+    masks = np.zeros(len(open_codes), dtype=np.int16)
+    positions = np.full((len(open_codes), 3), -1, dtype=np.int8)
+    for row, code in enumerate(open_codes):
+        digits = normalize_code(code)
+        masks[row] = digit_mask(digits)
+        for idx, char in enumerate(digits[:3]):
+            positions[row, idx] = ord(char) - 48
+    return masks, positions
+
+
+def evaluate_hit_rule(
+    rule: HitRule, masks: np.ndarray, open_masks: np.ndarray, open_positions: np.ndarray
+) -> np.ndarray:
+    """Vectorised :func:`match_prediction_hit` over aligned prediction/open-code arrays."""
+    masks = masks.astype(np.int16, copy=False)
+    open_masks = open_masks.astype(np.int16, copy=False)
+    valid = (masks != 0) & (open_masks != 0)
+    hits = POPCOUNT_1024[masks & open_masks]
+    if rule.kind == "kill":
+        result = hits == 0
+    elif rule.kind in ("pos_kill", "pos_fix"):
+        digit = open_positions[:, rule.position].astype(np.int16)
+        valid &= digit >= 0
+        contains = ((masks >> np.clip(digit, 0, 9)) & 1).astype(bool)
+        result = ~contains if rule.kind == "pos_kill" else contains
+    elif rule.kind == "min_hits":
+        result = hits >= rule.min_hits
+    elif rule.kind == "group":
+        unique = POPCOUNT_1024[open_masks]
+        first = np.clip(open_positions[:, 0].astype(np.int16), 0, 9)
+        result = np.where(
+            unique == 1,
+            ((masks >> first) & 1).astype(bool),
+            np.where(unique == 2, hits >= 2, hits == 3),
+        )
+    else:
+        result = np.zeros(len(masks), dtype=bool)
+    return result & valid
+
+
 def token_to_digits(token: str) -> list[int]:
     clean = normalize_code(token)
     return [int(ch) for ch in clean] if clean else []
@@ -128,10 +221,11 @@ def ratio(digits: Sequence[int], predicate) -> str:
 
 
 def has_consecutive_digits(digits: Sequence[int]) -> bool:
-    if not digits:
-        return False
-    ordered = sorted(set(digits))
-    return any(b - a == 1 for a, b in zip(ordered, ordered[1:]))
+    # 与 utils.combinatorics.CODE_CONSECUTIVE 同一判定：掩码相邻两位同时为 1
+    mask = 0
+    for digit in digits:
+        mask |= 1 << int(digit)
+    return bool(mask & (mask >> 1))
 
 
 def to_triplet(combo: Sequence[int]) -> tuple[int, int, int]:
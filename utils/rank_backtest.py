@@ -0,0 +1,108 @@
+"""排行榜位次回测：统计各排名位置上的数字在开奖号码中出现的频率。
+
+输入为 :class:`utils.rank_store.RankMatrix` 与期号→开奖号码映射，一次向量化计算
+得到每个位置的样本数、命中数、命中率与 Wilson 置信区间。命中定义为该位置的数字
+出现在开奖号码中（不区分位置）。
+"""
+
+from __future__ import annotations
+
+from typing import Mapping, Sequence
+
+import numpy as np
+import pandas as pd
+
+from utils.numbers import open_code_arrays
+from utils.rank_store import RankMatrix
+
+BACKTEST_COLUMNS = [
+    "position",
+    "trials",
+    "hits",
+    "hit_rate",
+    "ci_low",
+    "ci_high",
+    "baseline",
+]
+
+
+def wilson_interval(
+    hits: np.ndarray, trials: np.ndarray, z: float = 1.96
+) -> tuple[np.ndarray, np.ndarray]:
+    """Wilson score interval; rows with zero trials yield ``(nan, nan)``."""
+    hits = np.asarray(hits, dtype=float)
+    trials = np.asarray(trials, dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        p = hits / trials
+        denom = 1 + z**2 / trials
+        centre = (p + z**2 / (2 * trials)) / denom
+        margin = z * np.sqrt(p * (1 - p) / trials + z**2 / (4 * trials**2)) / denom
+    low = np.where(trials > 0, np.clip(centre - margin, 0, 1), np.nan)
+    high = np.where(trials > 0, np.clip(centre + margin, 0, 1), np.nan)
+    return low, high
+
+
+def random_digit_baseline(open_masks: np.ndarray) -> float:
+    """Chance that a uniformly random digit appears in the draws (mean of distinct/10)."""
+    if len(open_masks) == 0:
+        return float("nan")
+    distinct = np.array([bin(int(mask)).count("1") for mask in open_masks])
+    return float(distinct.mean() / 10)
+
+
+def backtest_rank_positions(
+    matrix: RankMatrix,
+    open_codes: Mapping[str, str | None],
+    positions: Sequence[int],
+    *,
+    row_mask: np.ndarray | None = None,
+    group_by_playtype: bool = False,
+    z: float = 1.96,
+) -> pd.DataFrame:
+    """Per-position hit rates across all issues in ``matrix`` that have a draw."""
+    columns = [pos for pos in dict.fromkeys(positions) if 1 <= pos <= matrix.width]
+    group_columns = ["playtype_name"] if group_by_playtype else []
+    if not columns or len(matrix) == 0:
+        return pd.DataFrame(columns=group_columns + BACKTEST_COLUMNS)
+
+    codes = [open_codes.get(issue) for issue in matrix.issues]
+    open_masks, _ = open_code_arrays(codes)
+    keep = open_masks != 0
+    if row_mask is not None:
+        keep &= row_mask
+    if not keep.any():
+        return pd.DataFrame(columns=group_columns + BACKTEST_COLUMNS)
+
+    digits = matrix.digits[keep][:, [pos - 1 for pos in columns]].astype(np.int16)
+    masks = open_masks[keep].astype(np.int16)[:, None]
+    valid = digits >= 0
+    hit = ((masks >> np.clip(digits, 0, 9)) & 1).astype(bool) & valid
+    baseline = random_digit_baseline(open_masks[keep])
+
+    if group_by_playtype:
+        labels, label_codes = np.unique(matrix.labels[keep], return_inverse=True)
+        trials = np.zeros((len(labels), len(columns)), dtype=np.int64)
+        hits = np.zeros_like(trials)
+        np.add.at(trials, label_codes, valid.astype(np.int64))
+        np.add.at(hits, label_codes, hit.astype(np.int64))
+        frame = pd.DataFrame(
+            {
+                "playtype_name": np.repeat(labels, len(columns)),
+                "position": np.tile(columns, len(labels)),
+                "trials": trials.ravel(),
+                "hits": hits.ravel(),
+            }
+        )
+    else:
+        frame = pd.DataFrame(
+            {"position": columns, "trials": valid.sum(axis=0), "hits": hit.sum(axis=0)}
+        )
+
+    trials_arr = frame["trials"].to_numpy()
+    with np.errstate(divide="ignore", invalid="ignore"):
+        frame["hit_rate"] = np.where(trials_arr > 0, frame["hits"] / trials_arr, np.nan)
+    frame["ci_low"], frame["ci_high"] = wilson_interval(frame["hits"], trials_arr, z)
+    frame["baseline"] = baseline
+    return frame[group_columns + BACKTEST_COLUMNS].round(
+        {"hit_rate": 4, "ci_low": 4, "ci_high": 4, "baseline": 4}
+    )
@@ -0,0 +1,205 @@
+"""排行榜数字位次的向量化存储。
+
+red_val_list / red_val_list_v2 的 ``num``（按排名排列的数字）与 ``val``（对应权重）
+在加载时一次性解析为定宽数组：``digits`` 为 int8 ``(行数, MAX_RANK)``，缺位填 ``-1``；
+``values`` 为 float32，缺位填 NaN。每行对应一个 (issue_name, playtype_id, type)，
+位次统计因此可以直接用 NumPy 在任意多期上归约。
+"""
+
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass
+from typing import Iterable, Sequence
+
+import numpy as np
+import streamlit as st
+
+from db.connection import query_db
+from utils.cache_control import get_cache_token
+from utils.sql import make_in_clause
+
+logger = logging.getLogger(__name__)
+
+MAX_RANK = 10
+RANK_SOURCES = {"v1": "red_val_list", "v2": "red_val_list_v2"}
+
+
+def _parse_digits(text: object, width: int) -> np.ndarray:
+    row = np.full(width, -1, dtype=np.int8)
+    if text is None:
+        return row
+    idx = 0
+    for token in str(text).split(","):
+        token = token.strip()
+        if not token:
+            continue
+        if idx >= width:
+            break
+        if len(token) == 1 and token.isdigit():
+            row[idx] = ord(token) - 48
+        idx += 1
+    return row
+
+
+def _parse_values(text: object, width: int) -> np.ndarray:
+    row = np.full(width, np.nan, dtype=np.float32)
+    if text is None:
+        return row
+    idx = 0
+    for token in str(text).split(","):
+        token = token.strip()
+        if not token:
+            continue
+        if idx >= width:
+            break
+        try:
+            row[idx] = float(token)
+        except ValueError:
+            pass
+        idx += 1
+    return row
+
+
+@dataclass(frozen=True)
+class RankMatrix:
+    """Rank-ordered digits per (issue, playtype, type) row."""
+
+    issues: np.ndarray  # object
+    playtype_ids: np.ndarray  # int64
+    types: np.ndarray  # int16
+    labels: np.ndarray  # object，玩法名称（供界面筛选）
+    digits: np.ndarray  # int8 (n, width)
+    values: np.ndarray  # float32 (n, width)
+
+    def __len__(self) -> int:
+        return int(self.digits.shape[0])
+
+    @property
+    def width(self) -> int:
+        return int(self.digits.shape[1])
+
+    @classmethod
+    def empty(cls, width: int = MAX_RANK) -> RankMatrix:
+        return cls(
+            issues=np.array([], dtype=object),
+            playtype_ids=np.array([], dtype=np.int64),
+            types=np.array([], dtype=np.int16),
+            labels=np.array([], dtype=object),
+            digits=np.full((0, width), -1, dtype=np.int8),
+            values=np.full((0, width), np.nan, dtype=np.float32),
+        )
+
+    @classmethod
+    def from_entries(
+        cls, entries: Sequence[tuple[str, Sequence[str]]], width: int = MAX_RANK
+    ) -> RankMatrix:
+        """Build from the legacy ``[(playtype_name, [digit, ...]), ...]`` form."""
+        if not entries:
+            return cls.empty(width)
+        digits = np.vstack([_parse_digits(",".join(map(str, d)), width) for _, d in entries])
+        size = len(entries)
+        return cls(
+            issues=np.full(size, "", dtype=object),
+            playtype_ids=np.zeros(size, dtype=np.int64),
+            types=np.zeros(size, dtype=np.int16),
+            labels=np.array([name for name, _ in entries], dtype=object),
+            digits=digits,
+            values=np.full((size, width), np.nan, dtype=np.float32),
+        )
+
+    @classmethod
+    def from_rows(
+        cls,
+        rows: Iterable[dict],
+        *,
+        playtype_names: dict[int, str] | None = None,
+        width: int = MAX_RANK,
+    ) -> RankMatrix:
+        """Parse DB rows; for duplicate (issue, playtype, type) keys the last row wins."""
+        latest: dict[tuple[str, int, int], dict] = {}
+        for row in rows:
+            if row.get("issue_name") is None or row.get("playtype_id") is None:
+                continue
+            key = (str(row["issue_name"]), int(row["playtype_id"]), int(row.get("type") or 0))
+            latest[key] = row
+        if not latest:
+            return cls.empty(width)
+        keys = sorted(latest)
+        names = playtype_names or {}
+        return cls(
+            issues=np.array([key[0] for key in keys], dtype=object),
+            playtype_ids=np.array([key[1] for key in keys], dtype=np.int64),
+            types=np.array([key[2] for key in keys], dtype=np.int16),
+            labels=np.array([names.get(key[1], str(key[1])) for key in keys], dtype=object),
+            digits=np.vstack([_parse_digits(latest[key].get("num"), width) for key in keys]),
+            values=np.vstack([_parse_values(latest[key].get("val"), width) for key in keys]),
+        )
+
+    def select(self, mask: np.ndarray) -> RankMatrix:
+        return RankMatrix(
+            issues=self.issues[mask],
+            playtype_ids=self.playtype_ids[mask],
+            types=self.types[mask],
+            labels=self.labels[mask],
+            digits=self.digits[mask],
+            values=self.values[mask],
+        )
+
+
+def count_rank_digits(
+    matrix: RankMatrix, positions: Sequence[int], row_mask: np.ndarray | None = None
+) -> np.ndarray:
+    """Occurrences of each digit 0-9 at the given 1-based rank ``positions``."""
+    columns = [pos - 1 for pos in positions if 1 <= pos <= matrix.width]
+    if not columns or len(matrix) == 0:
+        return np.zeros(10, dtype=np.int64)
+    digits = matrix.digits if row_mask is None else matrix.digits[row_mask]
+    picked = digits[:, columns].ravel()
+    return np.bincount(picked[picked >= 0], minlength=10)
+
+
+@st.cache_data(ttl=600, show_spinner=False)
+def _load_rank_rows(
+    table: str, issues: tuple[str, ...], playtype_ids: tuple[int, ...] | None, token: str
+) -> RankMatrix:
+    clause, params = make_in_clause("issue_name", issues, "issue")
+    conditions = [clause]
+    if playtype_ids is not None:
+        pt_clause, pt_params = make_in_clause("playtype_id", playtype_ids, "pt")
+        conditions.append(pt_clause)
+        params.update(pt_params)
+    type_column = "type" if table == "red_val_list_v2" else "0 AS type"
+    sql = f"""
+        SELECT issue_name, playtype_id, {type_column}, num, val
+        FROM {table}
+        WHERE {" AND ".join(conditions)}
+        ORDER BY id
+    """
+    names = {
+        int(row["playtype_id"]): row["playtype_name"]
+        for row in query_db("SELECT playtype_id, playtype_name FROM playtype_dict")
+    }
+    return RankMatrix.from_rows(query_db(sql, params), playtype_names=names)
+
+
+def load_rank_matrix(
+    issues: Sequence[str],
+    playtype_ids: Iterable[int] | None = None,
+    *,
+    source: str = "v1",
+) -> RankMatrix:
+    """Load and parse rankings for ``issues`` once per data version (process-level cache)."""
+    table = RANK_SOURCES[source]
+    issue_key = tuple(sorted({str(issue) for issue in issues if issue}))
+    if not issue_key:
+        return RankMatrix.empty()
+    playtype_key = None if playtype_ids is None else tuple(sorted({int(p) for p in playtype_ids}))
+    if playtype_key == ():
+        return RankMatrix.empty()
+    token = get_cache_token([table, "playtype_dict"])
+    try:
+        return _load_rank_rows(table, issue_key, playtype_key, token)
+    except Exception:
+        logger.exception("load_rank_matrix failed (source=%s, issues=%s)", source, len(issue_key))
+        return RankMatrix.empty()
@@ -0,0 +1,221 @@
+"""专家预测相似度索引，用于发现跟单 / 高度相关的专家。
+
+每位专家在每个 (期号, 玩法) 槽位上的推荐号码压缩为 10 位数字掩码，展开后得到
+``专家 × (槽位 × 10)`` 的 0/1 矩阵。交集大小由分块矩阵乘法一次算出，Jaccard 与余弦
+相似度都只需再做逐元素运算；只有一位专家选中的特征列对交集没有贡献，计算前即被剔除。
+"""
+
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass
+from typing import Sequence
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from utils.cache_control import get_cache_token
+from utils.data_access import fetch_predictions
+from utils.numbers import POPCOUNT_1024, digit_mask
+
+logger = logging.getLogger(__name__)
+
+METRICS = ("jaccard", "cosine")
+DEFAULT_BLOCK_SIZE = 256
+NEIGHBOR_COLUMNS = ["user_id", "similarity", "shared_slots"]
+PAIR_COLUMNS = ["user_a", "user_b", "similarity", "shared_slots"]
+
+
+@dataclass(frozen=True)
+class ExpertVectors:
+    """Digit masks of every expert on every (issue, playtype) slot."""
+
+    user_ids: np.ndarray  # int64 (n_users,)
+    slots: list[tuple[str, int]]
+    masks: np.ndarray  # int16 (n_users, n_slots)，0 表示该槽位未推荐
+
+    def __len__(self) -> int:
+        return int(self.masks.shape[0])
+
+    @classmethod
+    def empty(cls) -> ExpertVectors:
+        return cls(np.array([], dtype=np.int64), [], np.zeros((0, 0), dtype=np.int16))
+
+    @classmethod
+    def from_frame(cls, frame: pd.DataFrame) -> ExpertVectors:
+        """Build from ``issue_name, playtype_id, user_id, numbers`` rows."""
+        if frame.empty:
+            return cls.empty()
+        data = frame.dropna(subset=["issue_name", "playtype_id", "user_id"])
+        if data.empty:
+            return cls.empty()
+        user_codes, user_ids = pd.factorize(data["user_id"].astype("int64"), sort=True)
+        slot_keys = pd.MultiIndex.from_arrays(
+            [data["issue_name"].astype(str), data["playtype_id"].astype("int64")]
+        )
+        slot_codes, slot_index = pd.factorize(slot_keys, sort=True)
+        row_masks = np.fromiter(
+            (digit_mask(value) if isinstance(value, str) else 0 for value in data["numbers"]),
+            dtype=np.int16,
+            count=len(data),
+        )
+        masks = np.zeros((len(user_ids), len(slot_index)), dtype=np.int16)
+        np.bitwise_or.at(masks, (user_codes, slot_codes), row_masks)
+        return cls(
+            user_ids=np.asarray(user_ids, dtype=np.int64),
+            slots=[(str(issue), int(pid)) for issue, pid in slot_index],
+            masks=masks,
+        )
+
+    def bits(self) -> np.ndarray:
+        """Unpacked ``(n_users, n_slots * 10)`` float32 feature matrix."""
+        shifts = np.arange(10, dtype=np.int16)
+        unpacked = (self.masks[:, :, None] >> shifts) & 1
+        return unpacked.reshape(len(self), -1).astype(np.float32)
+
+
+def _prepare(vectors: ExpertVectors) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Return ``(features, sizes, participation)`` with single-owner columns dropped."""
+    features = vectors.bits()
+    sizes = features.sum(axis=1)
+    features = features[:, features.sum(axis=0) >= 2]
+    participation = (vectors.masks != 0).astype(np.float32)
+    participation = participation[:, participation.sum(axis=0) >= 2]
+    return features, sizes, participation
+
+
+def _similarity_block(
+    inter: np.ndarray, sizes_row: np.ndarray, sizes_all: np.ndarray, metric: str
+) -> np.ndarray:
+    with np.errstate(divide="ignore", invalid="ignore"):
+        if metric == "jaccard":
+            result = inter / (sizes_row[:, None] + sizes_all[None, :] - inter)
+        else:
+            result = inter / np.sqrt(sizes_row[:, None] * sizes_all[None, :])
+    return np.nan_to_num(result, nan=0.0, posinf=0.0).astype(np.float32)
+
+
+def pairwise_similarity(
+    vectors: ExpertVectors,
+    *,
+    metric: str = "jaccard",
+    min_overlap: int = 0,
+    block_size: int = DEFAULT_BLOCK_SIZE,
+) -> tuple[np.ndarray, np.ndarray]:
+    """Return ``(similarity, shared_slots)`` matrices, computed ``block_size`` rows at a time.
+
+    共同推荐槽位少于 ``min_overlap`` 的专家对相似度记为 0；对角线为 0。
+    """
+    if metric not in METRICS:
+        raise ValueError(f"Unsupported metric: {metric}")
+    size = len(vectors)
+    similarity = np.zeros((size, size), dtype=np.float32)
+    shared = np.zeros((size, size), dtype=np.int32)
+    if size == 0:
+        return similarity, shared
+    features, sizes, participation = _prepare(vectors)
+    step = max(int(block_size), 1)
+    for start in range(0, size, step):
+        stop = min(start + step, size)
+        inter = features[start:stop] @ features.T
+        similarity[start:stop] = _similarity_block(inter, sizes[start:stop], sizes, metric)
+        shared[start:stop] = np.rint(participation[start:stop] @ participation.T)
+    if min_overlap > 0:
+        similarity[shared < min_overlap] = 0.0
+    np.fill_diagonal(similarity, 0.0)
+    return similarity, shared
+
+
+def nearest_neighbors(
+    vectors: ExpertVectors,
+    user_id: int,
+    *,
+    k: int = 20,
+    metric: str = "jaccard",
+    min_overlap: int = 0,
+) -> pd.DataFrame:
+    """Top ``k`` experts most similar to ``user_id`` (one matrix-vector product)."""
+    if metric not in METRICS:
+        raise ValueError(f"Unsupported metric: {metric}")
+    matches = np.flatnonzero(vectors.user_ids == int(user_id))
+    if not len(matches):
+        return pd.DataFrame(columns=NEIGHBOR_COLUMNS)
+    row = int(matches[0])
+    features = vectors.bits()
+    sizes = features.sum(axis=1)
+    inter = features[row : row + 1] @ features.T
+    scores = _similarity_block(inter, sizes[row : row + 1], sizes, metric)[0]
+    present = vectors.masks != 0
+    shared_slots = (present & present[row]).sum(axis=1)
+    scores[shared_slots < min_overlap] = 0.0
+    scores[row] = 0.0
+    order = np.argsort(-scores, kind="stable")[: max(int(k), 0)]
+    order = order[scores[order] > 0]
+    return pd.DataFrame(
+        {
+            "user_id": vectors.user_ids[order],
+            "similarity": scores[order].round(4),
+            "shared_slots": shared_slots[order],
+        }
+    )
+
+
+def top_pairs(
+    similarity: np.ndarray,
+    shared: np.ndarray,
+    user_ids: np.ndarray,
+    *,
+    threshold: float = 0.8,
+    limit: int = 200,
+) -> pd.DataFrame:
+    """Expert pairs (upper triangle) whose similarity reaches ``threshold``, best first."""
+    rows, cols = np.nonzero(np.triu(similarity >= threshold, k=1))
+    if not len(rows):
+        return pd.DataFrame(columns=PAIR_COLUMNS)
+    scores = similarity[rows, cols]
+    order = np.argsort(-scores, kind="stable")[: max(int(limit), 0)]
+    rows, cols = rows[order], cols[order]
+    return pd.DataFrame(
+        {
+            "user_a": user_ids[rows],
+            "user_b": user_ids[cols],
+            "similarity": scores[order].round(4),
+            "shared_slots": shared[rows, cols],
+        }
+    )
+
+
+def mask_density(vectors: ExpertVectors) -> np.ndarray:
+    """Average number of digits per non-empty slot for each expert."""
+    counts = POPCOUNT_1024[vectors.masks].astype(np.float32)
+    present = (vectors.masks != 0).sum(axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(present > 0, counts.sum(axis=1) / present, 0.0)
+
+
+@st.cache_data(ttl=600, show_spinner=False)
+def _load_vectors(
+    issues: tuple[str, ...], playtype_ids: tuple[int, ...], token: str
+) -> ExpertVectors:
+    frame = fetch_predictions(
+        issues,
+        playtype_ids=playtype_ids,
+        columns=["issue_name", "playtype_id", "user_id", "numbers"],
+        ttl=None,
+    )
+    return ExpertVectors.from_frame(frame)
+
+
+def load_expert_vectors(issues: Sequence[str], playtype_ids: Sequence[int]) -> ExpertVectors:
+    """Load prediction vectors for ``issues`` × ``playtype_ids`` once per data version."""
+    issue_key = tuple(sorted({str(issue) for issue in issues if issue}))
+    playtype_key = tuple(sorted({int(pid) for pid in playtype_ids}))
+    if not issue_key or not playtype_key:
+        return ExpertVectors.empty()
+    token = get_cache_token(["expert_predictions"])
+    try:
+        return _load_vectors(issue_key, playtype_key, token)
+    except Exception:
+        logger.exception("load_expert_vectors failed (issues=%s)", len(issue_key))
+        return ExpertVectors.empty()
@@ -1,14 +1,13 @@
 from __future__ import annotations
 
 import logging
-from collections import Counter
-from typing import Iterable, Mapping, Sequence
+from typing import Any, Callable, Iterable, Mapping, Sequence
 
+import numpy as np
 import pandas as pd
 import streamlit as st
 
-from db.connection import query_db
-from utils.cache import cached_query
+from utils.change_feed import get_change_feed
 from utils.data_access import (
     default_issue_window,
     fetch_experts,
@@ -17,10 +16,45 @@ from utils.data_access import (
     fetch_playtypes,
     fetch_predicted_issues,
     fetch_recent_issues,
+    load_issue_bundle,
 )
+from utils.jobs import Job, get_job_runner
+from utils.rank_backtest import backtest_rank_positions
+from utils.rank_store import RankMatrix, count_rank_digits
 
 logger = logging.getLogger(__name__)
 
+_CHANGE_LABELS = {
+    "lottery_results": "开奖结果",
+    "expert_predictions": "专家预测",
+    "expert_info": "专家信息",
+    "expert_hit_stat": "命中统计",
+}
+
+
+def render_change_notice(session_key: str = "_change_feed_seen") -> None:
+    """Toast collector updates that arrived since this session last looked.
+
+    首次进入会话只记录当前序号；同一次运行内多次调用只提示一次。
+    """
+    feed = get_change_feed()
+    latest = feed.latest_seq()
+    seen = st.session_state.get(session_key)
+    st.session_state[session_key] = latest
+    if seen is None or latest <= seen:
+        return
+    messages: list[str] = []
+    for event in feed.changes_since(seen, limit=20):
+        label = _CHANGE_LABELS.get(event.table_name, event.table_name)
+        if event.table_name == "*":
+            messages.append("缓存已手动刷新")
+            continue
+        issue = event.max_issue or event.issue_name
+        suffix = f"（期号 {issue}）" if issue else ""
+        messages.append(f"{label} 更新 {event.row_count} 条{suffix}")
+    if messages:
+        st.toast("🆕 有新数据：" + "；".join(dict.fromkeys(messages)), icon="🔔")
+
 
 def issue_picker(
     key: str,
@@ -46,6 +80,7 @@ def issue_picker(
         Selected issue(s) according to the mode.
     """
 
+    render_change_notice()
     if mode == "range":
         start_issue, end_issue, _ = issue_range_selector(
             key_prefix=key,
@@ -320,24 +355,7 @@ def expert_picker(
 
     issue_user_ids: list[str] = []
     if issue:
-        try:
-            result = cached_query(
-                query_db,
-                """
-                SELECT DISTINCT user_id
-                FROM expert_predictions
-                WHERE issue_name = :issue
-                ORDER BY user_id
-                """,
-                params={"issue": issue},
-                ttl=120,
-            )
-        except Exception:
-            logger.exception("获取期号 %s 的专家列表失败", issue)
-            result = []
-        issue_user_ids = [
-            str(row.get("user_id")) for row in result if row.get("user_id") is not None
-        ]
+        issue_user_ids = [str(uid) for uid in load_issue_bundle(issue).users()]
 
     options = issue_user_ids or sorted(expert_map.keys())
     selection: str | None = None
@@ -366,18 +384,20 @@ def expert_picker(
 
 
 def render_rank_position_calculator(
-    entries: list[tuple[str, list[str]]],
+    entries: list[tuple[str, list[str]]] | RankMatrix,
     *,
     key: str,
     max_position: int = 10,
     title: str = "🧮 排行榜位置数字计算器",
     default_positions: Sequence[int] = (1, 2),
 ) -> None:
+    """Count digits at chosen rank positions; ``entries`` may span many issues."""
+    matrix = entries if isinstance(entries, RankMatrix) else RankMatrix.from_entries(entries)
     with st.expander(title, expanded=False):
-        if not entries:
+        if len(matrix) == 0:
             st.info("暂无数据可供计算。")
             return
-        available_playtypes = sorted({name for name, _ in entries})
+        available_playtypes = sorted(set(matrix.labels.tolist()))
         default_playtypes = [name for name in available_playtypes if not name.startswith("杀")]
         selected_playtypes = st.multiselect(
             "选择玩法",
@@ -392,18 +412,19 @@ def render_rank_position_calculator(
             format_func=lambda pos: f"第 {pos} 位",
             key=f"{key}_positions",
         )
+        issue_count = len(set(matrix.issues.tolist()) - {""})
+        if issue_count > 1:
+            st.caption(f"统计范围：{issue_count} 期，{len(matrix)} 条排行")
         if st.button("计算出现次数", key=f"{key}_calc"):
-            counter = Counter()
-            for playtype_name, digits in entries:
-                if selected_playtypes and playtype_name not in selected_playtypes:
-                    continue
-                for pos in selected_positions:
-                    if 1 <= pos <= len(digits):
-                        counter[digits[pos - 1]] += 1
-            if counter:
+            row_mask = np.isin(matrix.labels, selected_playtypes) if selected_playtypes else None
+            counts = count_rank_digits(matrix, selected_positions, row_mask)
+            if counts.any():
                 result_df = (
-                    pd.DataFrame(counter.items(), columns=["数字", "出现次数"])
-                    .sort_values("出现次数", ascending=False)
+                    pd.DataFrame(
+                        {"数字": [str(d) for d in range(10)], "出现次数": counts.astype(int)}
+                    )
+                    .query("出现次数 > 0")
+                    .sort_values("出现次数", ascending=False, kind="stable")
                     .reset_index(drop=True)
                 )
                 st.dataframe(result_df, hide_index=True, use_container_width=True)
@@ -411,6 +432,66 @@ def render_rank_position_calculator(
                 st.warning("未得到统计结果，请检查玩法或位置选择。")
 
 
+def render_rank_backtest(
+    matrix: RankMatrix,
+    open_codes: Mapping[str, str | None],
+    *,
+    key: str,
+    max_position: int = 10,
+    title: str = "📈 排行榜位次回测",
+) -> None:
+    """Hit rate (with 95% Wilson interval) of each rank position over the loaded issues."""
+    with st.expander(title, expanded=False):
+        if len(matrix) == 0:
+            st.info("暂无数据可供回测。")
+            return
+        available_playtypes = sorted(set(matrix.labels.tolist()))
+        selected_playtypes = st.multiselect(
+            "选择玩法",
+            options=available_playtypes,
+            default=available_playtypes,
+            key=f"{key}_playtypes",
+        )
+        selected_positions = st.multiselect(
+            "选择排行榜位置",
+            options=list(range(1, max_position + 1)),
+            default=list(range(1, max_position + 1)),
+            format_func=lambda pos: f"第 {pos} 位",
+            key=f"{key}_positions",
+        )
+        by_playtype = st.checkbox("按玩法拆分", value=False, key=f"{key}_by_playtype")
+        row_mask = np.isin(matrix.labels, selected_playtypes) if selected_playtypes else None
+        result = backtest_rank_positions(
+            matrix,
+            open_codes,
+            selected_positions,
+            row_mask=row_mask,
+            group_by_playtype=by_playtype,
+        )
+        if result.empty:
+            st.warning("所选范围内没有已开奖的期号。")
+            return
+        st.caption(
+            "命中：该位置数字出现在开奖号码中；随机基准为任意数字出现在开奖号码中的平均概率。"
+        )
+        st.dataframe(
+            result.rename(
+                columns={
+                    "playtype_name": "玩法",
+                    "position": "排行榜位置",
+                    "trials": "样本数",
+                    "hits": "命中数",
+                    "hit_rate": "命中率",
+                    "ci_low": "95%下限",
+                    "ci_high": "95%上限",
+                    "baseline": "随机基准",
+                }
+            ),
+            hide_index=True,
+            use_container_width=True,
+        )
+
+
 def dataframe_with_pagination(
     df: pd.DataFrame, page_size: int, key_prefix: str
 ) -> tuple[pd.DataFrame, int, int]:
@@ -490,3 +571,41 @@ def issue_multiselect(
         default=default_values,
         key=f"{key_prefix}_issues",
     )
+
+
+def submit_job(
+    state_key: str, key: str, fn: Callable[..., Any], *args: Any, label: str = "", **kwargs: Any
+) -> Job:
+    """提交（或挂到同指纹的已有）后台任务，并记到当前会话，之后的重跑用 :func:`current_job` 取回。"""
+    job = get_job_runner().submit(key, fn, *args, label=label, **kwargs)
+    st.session_state[state_key] = job.key
+    return job
+
+
+def current_job(state_key: str) -> Job | None:
+    key = st.session_state.get(state_key)
+    return get_job_runner().get(key) if key else None
+
+
+def render_job(job: Job | None, *, poll_interval: float = 1.0) -> Any | None:
+    """Show a job's progress; return its result once it has finished successfully.
+
+    运行中时用定时刷新的 fragment 轮询进度，完成后触发整页重跑以渲染结果；失败时提示错误。
+    """
+    if job is None:
+        return None
+    if job.status == "done":
+        return job.result
+    if job.status == "failed":
+        st.error(f"{job.label or '后台计算'}失败：{job.error}")
+        return None
+
+    @st.fragment(run_every=poll_interval)
+    def _poll() -> None:
+        if job.done:
+            st.rerun()
+        text = job.message or ("排队中…" if job.status == "pending" else "计算中…")
+        st.progress(job.progress, text=f"{job.label}：{text}（已用 {job.elapsed:.0f}s）")
+
+    _poll()
+    return None